@@ -0,0 +1,88 @@
+import tempfile
+from pathlib import Path
+import pytest
+from text_quality.classifier.pipeline import Pipeline
+from text_quality.feature.featurize import Featurizer
+from text_quality.feature.featurize import Scorers
+from text_quality.feature.scorer.dictionary import HunspellDictionary
+from text_quality.feature.scorer.dictionary import TokenDictionary
+from text_quality.feature.scorer.garbage import GarbageDetector
+from text_quality.feature.scorer.q_gram import QGram
+from text_quality.feature.tokenizer import NautilusOcrTokenizer
+from text_quality.settings import HUNSPELL_DIR
+from text_quality.settings import HUNSPELL_LANGUAGE
+from text_quality.settings import PIPELINE_FILE
+from text_quality.settings import QGRAMS_FILE
+from text_quality.settings import TOKEN_DICT_FILE
+from .corpus import NOISE_LEVELS
+from .corpus import PAGE_SIZES
+from .corpus import sample
+
+
+FASTTEXT_MODEL_FILE = Path(tempfile.gettempdir()) / "lid.176.ftz"
+
+
+@pytest.fixture(scope="session")
+def tokenizer():
+    return NautilusOcrTokenizer()
+
+
+@pytest.fixture(scope="session")
+def scorers():
+    return Scorers(
+        dict_score=HunspellDictionary.from_path(HUNSPELL_DIR, HUNSPELL_LANGUAGE),
+        dict_score_gt=TokenDictionary.from_file(TOKEN_DICT_FILE),
+        n_gram_score=QGram.from_file(QGRAMS_FILE),
+        garbage_score=GarbageDetector(),
+    )
+
+
+@pytest.fixture(scope="session")
+def featurizer(scorers, tokenizer):
+    return Featurizer(scorers, tokenizer)
+
+
+@pytest.fixture(scope="session")
+def language_model_file():
+    """The fastText model; benchmarks must not depend on network access."""
+    if not FASTTEXT_MODEL_FILE.is_file():
+        pytest.skip(f"FastText model not available at '{FASTTEXT_MODEL_FILE}'.")
+    return FASTTEXT_MODEL_FILE
+
+
+@pytest.fixture(scope="session")
+def pipeline(featurizer, language_model_file):
+    # pylint: disable=unused-argument
+    return Pipeline.from_file(PIPELINE_FILE, featurizer)
+
+
+@pytest.fixture(params=PAGE_SIZES.keys())
+def size(request):
+    return request.param
+
+
+@pytest.fixture(params=NOISE_LEVELS.keys())
+def noise_level(request):
+    return request.param
+
+
+@pytest.fixture
+def pages(size, noise_level):
+    return sample(size, noise_level)
+
+
+@pytest.fixture
+def report_throughput(benchmark):
+    """Add pages/s and tokens/s to the results of a benchmark that has been run."""
+
+    def _report(n_pages: int, n_tokens: int):
+        if benchmark.stats is None:
+            # benchmarks disabled, e.g. with --benchmark-disable
+            return
+        mean = benchmark.stats.stats.mean
+        benchmark.extra_info["pages"] = n_pages
+        benchmark.extra_info["tokens"] = n_tokens
+        benchmark.extra_info["pages_per_second"] = n_pages / mean
+        benchmark.extra_info["tokens_per_second"] = n_tokens / mean
+
+    return _report
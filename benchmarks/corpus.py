@@ -0,0 +1,77 @@
+"""A fixed, offline benchmark corpus.
+
+Pages are generated deterministically from the bundled token dictionary,
+so that benchmark results are comparable across commits and machines.
+"""
+
+import random
+import string
+from functools import lru_cache
+from typing import List
+from text_quality.settings import ENCODING
+from text_quality.settings import LINE_SEPARATOR
+from text_quality.settings import TOKEN_DICT_FILE
+
+
+SEED = 20230801
+"""Fixed seed for generating the benchmark corpus."""
+
+PAGE_SIZES = {"short": 5, "medium": 40, "long": 200}
+"""Number of lines per page for each page size."""
+
+NOISE_LEVELS = {"clean": 0.0, "noisy": 0.1, "garbage": 0.4}
+"""Probability of a character being corrupted for each noise level."""
+
+PAGES_PER_SAMPLE = 5
+"""Number of pages per corpus sample, i.e. per benchmark round."""
+
+_TOKENS_PER_LINE = (3, 9)
+_GARBAGE_CHARACTERS = string.ascii_letters + string.digits + string.punctuation + "„⸗"
+
+
+@lru_cache(maxsize=1)
+def vocabulary() -> List[str]:
+    """The alphabetic words from the bundled token dictionary, sorted."""
+    with open(TOKEN_DICT_FILE, "rt", encoding=ENCODING) as f:
+        return sorted({line.strip() for line in f if line.strip().isalpha()})
+
+
+def _noisy(token: str, noise: float, rnd: random.Random) -> str:
+    return "".join(
+        rnd.choice(_GARBAGE_CHARACTERS) if rnd.random() < noise else c for c in token
+    )
+
+
+def page(n_lines: int, noise: float, rnd: random.Random) -> str:
+    """Generate a single page.
+
+    Args:
+        n_lines: the number of lines in the page.
+        noise: probability for each character to be replaced by a random character.
+        rnd: the random generator to draw from.
+    Returns:
+        the page text, lines separated by LINE_SEPARATOR.
+    """
+    words = vocabulary()
+    lines = []
+    for _ in range(n_lines):
+        tokens = [
+            _noisy(rnd.choice(words), noise, rnd)
+            for _ in range(rnd.randint(*_TOKENS_PER_LINE))
+        ]
+        lines.append(" ".join(tokens))
+    return LINE_SEPARATOR.join(lines)
+
+
+def sample(size: str, noise_level: str, n_pages: int = PAGES_PER_SAMPLE) -> List[str]:
+    """Generate a reproducible sample of pages.
+
+    Args:
+        size: a key in PAGE_SIZES.
+        noise_level: a key in NOISE_LEVELS.
+        n_pages: the number of pages to generate.
+    Returns:
+        a list of page texts; identical for identical arguments.
+    """
+    rnd = random.Random(f"{SEED}-{size}-{noise_level}")
+    return [page(PAGE_SIZES[size], NOISE_LEVELS[noise_level], rnd) for _ in range(n_pages)]
@@ -0,0 +1,66 @@
+"""Benchmarks for the individual components of the pipeline."""
+
+import pytest
+from text_quality.classifier.duplicates import DuplicateIndex
+from text_quality.feature.featurize import Scorers
+from text_quality.language.fasttext import FastTextLanguageClassifier
+
+
+def test_tokenizer(benchmark, report_throughput, tokenizer, pages):
+    def tokenize():
+        return [tokenizer.tokenize(page) for page in pages]
+
+    tokens = benchmark(tokenize)
+
+    report_throughput(len(pages), sum(len(page_tokens) for page_tokens in tokens))
+
+
+@pytest.mark.parametrize("feature", Scorers.__annotations__.keys())
+# pylint: disable=too-many-arguments
+def test_scorer(benchmark, report_throughput, scorers, tokenizer, pages, feature):
+    scorer = scorers[feature]
+    tokens = [tokenizer.tokenize(page) for page in pages]
+
+    def score():
+        return [scorer.score(page_tokens) for page_tokens in tokens]
+
+    benchmark(score)
+
+    report_throughput(len(pages), sum(len(page_tokens) for page_tokens in tokens))
+
+
+def test_language_classifier(
+    benchmark, report_throughput, language_model_file, tokenizer, pages
+):
+    classifier = FastTextLanguageClassifier(model_file=language_model_file)
+
+    def classify():
+        return [classifier.classify(page) for page in pages]
+
+    benchmark(classify)
+
+    report_throughput(len(pages), sum(len(tokenizer.tokenize(page)) for page in pages))
+
+
+def test_featurizer(benchmark, report_throughput, featurizer, pages):
+    def featurize():
+        return [featurizer.featurize(page) for page in pages]
+
+    results = benchmark(featurize)
+
+    report_throughput(len(pages), sum(len(tokens) for _, tokens in results))
+
+
+def test_duplicate_index(benchmark, report_throughput, tokenizer, pages):
+    tokens = [tokenizer.tokenize(page) for page in pages]
+
+    def deduplicate():
+        index = DuplicateIndex()
+        for page_tokens in tokens:
+            signature = index.signature(page_tokens)
+            if index.query(signature) is None:
+                index.add(signature, None)
+
+    benchmark(deduplicate)
+
+    report_throughput(len(pages), sum(len(page_tokens) for page_tokens in tokens))
@@ -0,0 +1,46 @@
+"""End-to-end benchmarks for the classification pipeline."""
+
+from text_quality.classifier.cascade import SAMPLED_SUFFIX
+from text_quality.classifier.cascade import Cascade
+from text_quality.classifier.pipeline import Pipeline
+from text_quality.classifier.pipeline import Reason
+from text_quality.settings import PIPELINE_FILE
+
+
+def test_classify_with_scores(benchmark, report_throughput, pipeline, pages):
+    def classify():
+        return [pipeline.classify_with_scores(page) for page in pages]
+
+    results = benchmark(classify)
+
+    report_throughput(len(pages), sum(scores["n_tokens"] for _, scores, _ in results))
+
+
+def test_classify_cascade(benchmark, report_throughput, featurizer, pipeline, pages):
+    """Classify in cascade mode, and report how often it disagrees with the exact mode."""
+    cascade_pipeline = Pipeline.from_file(PIPELINE_FILE, featurizer, cascade=Cascade())
+    expensive = Cascade().expensive.name
+
+    def classify():
+        return cascade_pipeline.classify_batch_with_scores(pages)
+
+    results = benchmark(classify)
+
+    report_throughput(len(pages), sum(scores["n_tokens"] for _, scores, _ in results))
+    exact = pipeline.classify_batch_with_scores(pages)
+    scorers = [
+        scores["scorers"].split(",")
+        for _, scores, reason in results
+        if reason == Reason.CLASSIFIER
+    ]
+    benchmark.extra_info["disagreement_rate"] = sum(
+        quality != exact_quality
+        for (quality, _, _), (exact_quality, _, _) in zip(results, exact)
+    ) / len(pages)
+    benchmark.extra_info["skipped_rate"] = sum(
+        not any(scorer.startswith(expensive) for scorer in _scorers)
+        for _scorers in scorers
+    ) / len(pages)
+    benchmark.extra_info["sampled_rate"] = sum(
+        expensive + SAMPLED_SUFFIX in _scorers for _scorers in scorers
+    ) / len(pages)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+from text_quality.classifier.bundle import ModelBundle
+from text_quality.classifier.registry import LanguageResources
+from text_quality.language.fasttext import FastTextLanguageClassifier
+from text_quality.settings import DEFAULT_LANGUAGE
+from text_quality.settings import LOG_LEVEL
+
+
+logging.basicConfig(level=LOG_LEVEL)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Build a model bundle: a single file with all resources for classifying texts in one language."
+    )
+    parser.add_argument("output", type=Path, help="Output bundle file.")
+    parser.add_argument(
+        "--language",
+        default=DEFAULT_LANGUAGE,
+        metavar="LANG",
+        help="Language of the resources in the data directories (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--hunspell-dir",
+        type=Path,
+        metavar="DIR",
+        help="Directory with the Hunspell .aff and .dic files for the language.",
+    )
+    parser.add_argument(
+        "--token-dict", type=Path, metavar="FILE", help="Token dictionary file."
+    )
+    parser.add_argument("--qgrams", type=Path, metavar="FILE", help="Q-gram profile.")
+    parser.add_argument(
+        "--pipeline", type=Path, metavar="FILE", help="Classifier pipeline file."
+    )
+    parser.add_argument(
+        "--language-model",
+        type=Path,
+        default=Path(tempfile.gettempdir()) / "lid.176.ftz",
+        metavar="FILE",
+        help="FastText language identification model; downloaded if it does not exist (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--version",
+        help="Version of the bundle (default: the package version and the build date).",
+    )
+    parser.add_argument(
+        "--overwrite", action="store_true", help="Overwrite an existing output file."
+    )
+    args = parser.parse_args()
+
+    default_resources = LanguageResources.for_language(args.language)
+    resources = default_resources._replace(
+        hunspell_dir=args.hunspell_dir or default_resources.hunspell_dir,
+        token_dict_file=args.token_dict or default_resources.token_dict_file,
+        qgrams_file=args.qgrams or default_resources.qgrams_file,
+        pipeline_file=args.pipeline or default_resources.pipeline_file,
+    )
+    if not args.language_model.exists():
+        FastTextLanguageClassifier(model_file=args.language_model)
+
+    try:
+        manifest = ModelBundle.build(
+            args.output,
+            resources,
+            args.language_model,
+            version=args.version,
+            overwrite=args.overwrite,
+        )
+    except (FileExistsError, FileNotFoundError) as e:
+        parser.error(str(e))
+
+    json.dump(manifest, sys.stdout, indent=2)
+    sys.stdout.write("\n")
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import sys
+from itertools import chain
+from pathlib import Path
+from text_quality.corpus.discovery import read_file_list
+from text_quality.corpus.discovery import walk
+from text_quality.feature.scorer.q_gram_profile import MAX_QGRAMS
+from text_quality.feature.scorer.q_gram_profile import build_profile
+from text_quality.settings import LOG_LEVEL
+from text_quality.settings import Q_GRAMS_GAMMA
+
+
+logging.basicConfig(level=LOG_LEVEL)
+
+CORPUS_PATTERNS = ["*.xml", "*.txt", "*.jsonl", "*.dic"]
+
+
+def corpus_files(inputs, include):
+    for path in inputs:
+        if path.is_dir():
+            yield from walk(path, include)
+        else:
+            yield str(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Build a ranked character q-gram profile from a corpus, for use with QGram.from_file()."
+    )
+    parser.add_argument(
+        "inputs",
+        type=Path,
+        nargs="*",
+        metavar="PATH",
+        help="Corpus files (PageXML, plain text, JSON Lines, or Hunspell .dic) or directories to search recursively.",
+    )
+    parser.add_argument(
+        "--file-list",
+        type=argparse.FileType("rb"),
+        metavar="FILE",
+        help="A file listing corpus files, separated by newlines or NUL characters; '-' for stdin.",
+    )
+    parser.add_argument(
+        "--include",
+        nargs="+",
+        default=CORPUS_PATTERNS,
+        metavar="PATTERN",
+        help=f"File patterns to include when searching directories. Defaults to {' '.join(CORPUS_PATTERNS)}.",
+    )
+    parser.add_argument(
+        "--output", "-o", type=Path, required=True, help="The q-gram profile file."
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=Q_GRAMS_GAMMA,
+        help="The number of most frequent q-grams to write; 0 for all. Defaults to %(default)d.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="The number of worker processes; defaults to the number of CPUs.",
+    )
+    parser.add_argument(
+        "--max-qgrams",
+        type=int,
+        default=MAX_QGRAMS,
+        help="The maximum number of distinct q-grams to keep in memory per process. Defaults to %(default)d.",
+    )
+    parser.add_argument(
+        "--overwrite", action="store_true", help="Overwrite an existing output file."
+    )
+    args = parser.parse_args()
+
+    if not args.inputs and not args.file_list:
+        parser.error("No inputs given.")
+    if args.output.exists() and not args.overwrite:
+        parser.error(f"Output file '{args.output}' exists.")
+
+    paths = corpus_files(args.inputs, args.include)
+    if args.file_list:
+        paths = chain(paths, read_file_list(args.file_list))
+
+    counter = build_profile(paths, workers=args.workers, max_size=args.max_qgrams)
+    if not len(counter):
+        logging.error("No q-grams found.")
+        sys.exit(1)
+    counter.to_file(args.output, limit=args.limit or None, overwrite=args.overwrite)
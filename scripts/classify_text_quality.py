@@ -3,34 +3,98 @@
 import argparse
 import csv
 import glob
+import json
 import logging
 import os
+import signal
+import sqlite3
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from functools import partial
 from itertools import chain
 from pathlib import Path
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
 from typing import TypedDict
+from typing import Union
 from tqdm import tqdm
+from text_quality.classifier.aggregate import WindowAggregate
+from text_quality.classifier.budget import PageBudget
+from text_quality.classifier.bundle import BundleError
+from text_quality.classifier.bundle import ModelBundle
+from text_quality.classifier.cascade import Cascade
+from text_quality.classifier.duplicates import DuplicateIndex
+from text_quality.classifier.pipeline import Classification
 from text_quality.classifier.pipeline import ClassifierScores
 from text_quality.classifier.pipeline import Pipeline
+from text_quality.classifier.registry import LanguageRegistry
+from text_quality.corpus.discovery import PAGEXML_PATTERN
+from text_quality.corpus.discovery import read_file_list
+from text_quality.corpus.discovery import unique
+from text_quality.corpus.discovery import walk
+from text_quality.corpus.parallel import gil_enabled
+from text_quality.corpus.parallel import ordered_map
+from text_quality.corpus.prefetch import Prefetcher
+from text_quality.corpus.prefetch import file_size
+from text_quality.corpus.records import TextRecord
+from text_quality.corpus.records import batched
+from text_quality.corpus.records import read_jsonl
+from text_quality.corpus.records import read_nul_separated
+from text_quality.corpus.shard import Shard
+from text_quality.corpus.watch import FolderWatcher
+from text_quality.corpus.windows import WindowMode
+from text_quality.corpus.windows import read_windows
+from text_quality.corpus.work_queue import WorkQueue
 from text_quality.feature.featurize import Featurizer
 from text_quality.feature.featurize import Scorers
+from text_quality.feature.sampling import TokenSampler
 from text_quality.feature.scorer.dictionary import HunspellDictionary
 from text_quality.feature.scorer.dictionary import TokenDictionary
 from text_quality.feature.scorer.garbage import GarbageDetector
 from text_quality.feature.scorer.q_gram import QGram
 from text_quality.feature.tokenizer import NautilusOcrTokenizer
+from text_quality.language.classifier import LanguageStrategy
+from text_quality.language.prescreen import PrescreenLanguageClassifier
+from text_quality.monitoring.memory import MEMORY_ACCOUNTING
+from text_quality.monitoring.memory import add_memory_metrics
+from text_quality.monitoring.metrics import Counter
+from text_quality.monitoring.metrics import Metrics
+from text_quality.monitoring.metrics import MetricsExporter
+from text_quality.monitoring.metrics import MetricsSink
+from text_quality.monitoring.metrics import add_process_metrics
+from text_quality.monitoring.timing import NULL_TIMER
+from text_quality.monitoring.timing import AggregatingSink
+from text_quality.monitoring.timing import JsonLinesSink
+from text_quality.monitoring.timing import Timer
 from text_quality.page.page import Page
+from text_quality.settings import DEFAULT_LANGUAGE
+from text_quality.settings import DUPLICATE_MAX_ENTRIES
 from text_quality.settings import HUNSPELL_DIR
 from text_quality.settings import HUNSPELL_LANGUAGE
 from text_quality.settings import LOG_LEVEL
 from text_quality.settings import PIPELINE_FILE
+from text_quality.settings import PREFETCH_BYTES
+from text_quality.settings import PREFETCH_WORKERS
 from text_quality.settings import QGRAMS_FILE
+from text_quality.settings import QUEUE_LEASE
+from text_quality.settings import QUEUE_MAX_ATTEMPTS
+from text_quality.settings import SAMPLING_CONFIDENCE
 from text_quality.settings import TOKEN_DICT_FILE
+from text_quality.settings import WATCH_INTERVAL
+from text_quality.settings import WATCH_SETTLE
+from text_quality.settings import WINDOW_TOKENS
 
 
 logging.basicConfig(level=LOG_LEVEL)
 
 REASON_FIELDNAME = "Reason"
+LEVEL_FIELDNAMES = ["level", "id"]
 
 
 class OutputRow(TypedDict):
@@ -40,6 +104,120 @@ class OutputRow(TypedDict):
     quality_class: int
 
 
+def classify(
+    pipeline: Pipeline,
+    name: str,
+    page: Union[Page, str],
+    output_scores: bool,
+    output_levels: bool,
+) -> List[dict]:
+    """Classify a page, returning the output rows.
+
+    If output_levels is set, PageXML pages result in additional rows for each region and line.
+    """
+    if output_levels and isinstance(page, Page):
+        classifications = pipeline.classify_levels(page)
+        levels = [("page", classifications["page"])]
+        levels += [("region", region) for region in classifications["regions"]]
+        levels += [("line", line) for line in classifications["lines"]]
+    elif output_scores or output_levels:
+        levels = [("page", Classification(None, *pipeline.classify_with_scores(page)))]
+    else:
+        return [OutputRow(filename=name, quality_class=pipeline.classify(page))]
+
+    return output_rows(name, levels, output_scores, output_levels)
+
+
+def classify_records(
+    pipeline: Pipeline,
+    records: List[TextRecord],
+    output_scores: bool,
+    output_levels: bool,
+) -> List[dict]:
+    """Classify a batch of text records, returning the output rows."""
+    rows = []
+    for record, result in zip(
+        records, pipeline.classify_batch_with_scores([r.text for r in records])
+    ):
+        levels = [("page", Classification(None, *result))]
+        rows += output_rows(record.id, levels, output_scores, output_levels)
+    return rows
+
+
+def output_rows(
+    name: str,
+    levels: List[tuple[str, Classification]],
+    output_scores: bool,
+    output_levels: bool,
+) -> List[dict]:
+    rows = []
+    for level, classification in levels:
+        row = OutputRow(filename=name, quality_class=classification.quality)
+        if output_levels:
+            row |= {"level": level, "id": classification.id}
+        if output_scores:
+            row |= classification.scores | {
+                REASON_FIELDNAME: classification.reason.name
+            }
+        rows.append(row)
+    return rows
+
+
+def classify_windows(
+    pipeline: Pipeline,
+    name: str,
+    mode: WindowMode,
+    size: int,
+    batch_size: int,
+    output_scores: bool,
+) -> Iterator[List[dict]]:
+    """Classify the windows of a large text file in batches, yielding the output rows per batch.
+
+    The last rows are the aggregated result of all windows, on the 'file' level.
+    """
+    aggregate = WindowAggregate()
+    for batch in batched(read_windows(name, mode, size), batch_size):
+        levels = []
+        for record, result in zip(
+            batch, pipeline.classify_batch_with_scores([r.text for r in batch])
+        ):
+            aggregate.add(*result)
+            window = record.id.rsplit(":", 1)[1]
+            levels.append(("window", Classification(window, *result)))
+        yield output_rows(name, levels, output_scores, True)
+
+    if aggregate.windows:
+        levels = [("file", Classification(None, *aggregate.result()))]
+        yield output_rows(name, levels, output_scores, True)
+
+
+def read_pagexml(file: Path, timer: Timer, errors: Counter) -> Union[Page, str]:
+    """Parse a PageXML file; returns an empty string if the file cannot be parsed."""
+    try:
+        with timer.stage("parse"):
+            return Page.from_file(file)
+    except Exception as e:
+        logging.error("Error parsing file '%s': %s", file, str(e))
+        errors.inc()
+        return ""
+
+
+def read_input(
+    item: tuple[str, Optional[str]], errors: Counter
+) -> tuple[str, Union[Page, str], float]:
+    """Read an input ahead of its classification.
+
+    Returns:
+        the name, the parsed page or the text, and the duration of parsing in seconds.
+    """
+    name, text = item
+    if text is not None:
+        return name, text, 0.0
+    start = time.perf_counter()
+    page = read_pagexml(name, NULL_TIMER, errors)
+    return name, page, time.perf_counter() - start
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser("Classify the quality of a (digitized) text.")
 
@@ -67,74 +245,767 @@ if __name__ == "__main__":
         default="",
         type=str,
         metavar="PATTERN",
-        help="A pattern to find a set of PageXML files, e.g. 'pagexml/*.xml'.",
+        help="A pattern to find a set of PageXML files, e.g. 'pagexml/*.xml' or 'pagexml/**/*.xml'.",
+    )
+    input_args.add_argument(
+        "--pagexml-dir",
+        type=Path,
+        nargs="*",
+        default=[],
+        metavar="DIR",
+        help="Directories to search recursively for PageXML files; see --include and --exclude.",
+    )
+    input_args.add_argument(
+        "--include",
+        action="append",
+        metavar="PATTERN",
+        help=f"Pattern for files to include from --pagexml-dir (repeatable; default: '{PAGEXML_PATTERN}').",
+    )
+    input_args.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Pattern for files and directories to skip in --pagexml-dir (repeatable).",
+    )
+    input_args.add_argument(
+        "--pagexml-list",
+        type=argparse.FileType("rb"),
+        metavar="FILE",
+        help="A file listing PageXML files, separated by newlines or NUL characters (e.g. from 'find -print0'). "
+        "Use '-' for stdin.",
+    )
+    input_args.add_argument(
+        "--jsonl",
+        type=argparse.FileType("rt", encoding="utf-8"),
+        nargs="*",
+        default=[],
+        metavar="FILE",
+        help="JSON Lines file(s) with one page per line, with 'id' and 'text' fields. "
+        "The id is written to the 'filename' column. Use '-' for stdin.",
+    )
+    input_args.add_argument(
+        "--input-nul",
+        type=argparse.FileType("rb"),
+        metavar="FILE",
+        help="A file with plain texts separated by NUL characters, identified as FILE:N. Use '-' for stdin.",
+    )
+    input_args.add_argument(
+        "--batch-size",
+        type=int,
+        default=64,
+        metavar="N",
+        help="Number of records from --jsonl and --input-nul to classify at once (default: %(default)d).",
+    )
+    input_args.add_argument(
+        "--shard",
+        type=Shard.parse,
+        metavar="I/N",
+        help="Only process the I-th of N shards of the inputs (0 <= I < N), based on a hash of the input path. "
+        "Merge the outputs of all shards with merge_text_quality.py.",
+    )
+
+    window_args = parser.add_argument_group("Large texts")
+    window_args.add_argument(
+        "--windows",
+        type=WindowMode,
+        choices=list(WindowMode),
+        metavar="MODE",
+        help="Split the --input files into windows, memory-mapping them instead of reading them into memory: "
+        f"at form feeds ('{WindowMode.FORMFEED.value}'), blank lines ('{WindowMode.BLANK_LINE.value}'), "
+        f"or every --window-size tokens ('{WindowMode.TOKENS.value}'). "
+        "Outputs a row per window and an aggregated row per file, see the 'level' column.",
+    )
+    window_args.add_argument(
+        "--window-size",
+        type=int,
+        default=WINDOW_TOKENS,
+        metavar="N",
+        help=f"Number of tokens per window in '{WindowMode.TOKENS.value}' mode (default: %(default)d).",
     )
 
     parser.add_argument(
         "--output",
         "-o",
-        type=argparse.FileType("wt"),
-        default=sys.stdout,
+        type=Path,
         metavar="FILE",
         help="Output file; defaults to stdout.",
     )
+    parser.add_argument(
+        "--append",
+        action="store_true",
+        help="Append to the output file instead of overwriting it; the header is only written to an empty file.",
+    )
     parser.add_argument(
         "--output-scores",
         action="store_true",
         help="Output scores and text statistics, and reason for classification.",
     )
+    parser.add_argument(
+        "--output-levels",
+        action="store_true",
+        help="Output additional rows for each TextRegion and line in PageXML inputs.",
+    )
+    parser.add_argument(
+        "--cascade",
+        action="store_true",
+        help="Skip the Hunspell scorer for pages whose class it cannot change, "
+        "and run it on a sample of the tokens where that suffices. "
+        "Faster, but the class may differ from the exact classification in rare cases; "
+        "the 'scorers' output column lists the scorers that ran. Does not apply to --output-levels.",
+    )
+    parser.add_argument(
+        "--page-budget",
+        type=float,
+        metavar="MS",
+        help="Time budget per page in milliseconds: pages that would take longer, e.g. long runs of garbage, "
+        "are scored on a sample of their tokens and classified with reason 'BUDGET', "
+        "so that they can be reprocessed without a budget later. "
+        "The 'scorers' output column marks the sampled scorers. "
+        "Not a hard deadline; cannot be combined with --cascade and does not apply to --output-levels.",
+    )
+
+    parser.add_argument(
+        "--sampling-error",
+        type=float,
+        metavar="ERROR",
+        help="Score a stratified sample of the tokens of long pages, large enough for each score "
+        "to be within ERROR (e.g. 0.02) of its value on all tokens; see --sampling-confidence. "
+        "The 'n_sampled' and '*_error' output columns contain the sample sizes and the achieved error bounds.",
+    )
+    parser.add_argument(
+        "--sampling-confidence",
+        type=float,
+        default=SAMPLING_CONFIDENCE,
+        metavar="P",
+        help="Confidence level for --sampling-error (default: %(default)s).",
+    )
+
+    parser.add_argument(
+        "--bundle",
+        type=Path,
+        metavar="FILE",
+        help="Load the classifier and its resources from a model bundle built with build_model_bundle.py, "
+        "instead of the files in the data directories. The language of the bundle is the default language.",
+    )
+
+    language_args = parser.add_argument_group("Languages")
+    language_args.add_argument(
+        "--languages",
+        nargs="+",
+        default=[],
+        metavar="LANG",
+        help=f"Also classify pages in these languages, besides '{DEFAULT_LANGUAGE}'. "
+        "Requires a Hunspell dictionary, token dictionary, q-gram profile, and classifier for each language "
+        "in the data directories; they are loaded when a language is first encountered.",
+    )
+    language_args.add_argument(
+        "--language-memory",
+        type=int,
+        metavar="MB",
+        help="Memory budget for the resources of the languages given with --languages; "
+        "the least recently used ones are unloaded when it is exceeded.",
+    )
+    language_args.add_argument(
+        "--language-strategy",
+        type=LanguageStrategy,
+        choices=list(LanguageStrategy),
+        default=LanguageStrategy.FASTTEXT,
+        metavar="STRATEGY",
+        help=f"How the language of pages is identified: '{LanguageStrategy.ASSUME.value}' classifies all pages "
+        "in the default language without identifying it, e.g. for collections known to be monolingual; "
+        f"'{LanguageStrategy.FASTTEXT.value}' identifies every page with the fastText classifier (default); "
+        f"'{LanguageStrategy.PRESCREEN.value}' accepts pages whose tokens and q-grams evidently match "
+        "the default language, and identifies only the other pages with fastText, which is then loaded on first use. "
+        "With --profile, reports how many pages were passed on to fastText.",
+    )
+
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Classify N pages (or batches) in parallel threads, sharing the loaded resources. "
+        "Python code runs in parallel on free-threaded Python builds only; "
+        "otherwise, only stages that release the GIL do (default: %(default)d).",
+    )
+
+    prefetch_args = parser.add_argument_group("Prefetching")
+    prefetch_args.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Read and parse up to N input files ahead, in parallel with the classification, "
+        "e.g. on network file systems where reading small files one at a time leaves the CPU idle. "
+        "With --profile, reports whether the run was I/O-bound or CPU-bound (default: off).",
+    )
+    prefetch_args.add_argument(
+        "--prefetch-workers",
+        type=int,
+        default=PREFETCH_WORKERS,
+        metavar="N",
+        help="Number of threads reading files ahead (default: %(default)d).",
+    )
+    prefetch_args.add_argument(
+        "--prefetch-memory",
+        type=int,
+        default=PREFETCH_BYTES // 2**20,
+        metavar="MB",
+        help="Stop reading ahead while the files that have been read and not classified yet "
+        "amount to this size (default: %(default)d).",
+    )
+
+    duplicate_args = parser.add_argument_group("Near-duplicates")
+    duplicate_args.add_argument(
+        "--duplicate-threshold",
+        type=float,
+        metavar="SIMILARITY",
+        help="Reuse the result of an earlier page for pages whose sets of tokens are at least this similar "
+        "(estimated Jaccard similarity, e.g. 0.9), with reason 'DUPLICATE'. Does not apply to --output-levels.",
+    )
+    duplicate_args.add_argument(
+        "--duplicate-memory",
+        type=int,
+        default=DUPLICATE_MAX_ENTRIES,
+        metavar="N",
+        help="Number of pages the near-duplicate index keeps in memory; "
+        "older pages are moved to the --duplicate-index file (default: %(default)d).",
+    )
+    duplicate_args.add_argument(
+        "--duplicate-index",
+        type=Path,
+        metavar="FILE",
+        help="SQLite file for the near-duplicate index. If it exists, near-duplicates of the pages "
+        "from earlier runs are found as well. Defaults to a temporary file.",
+    )
+
+    watch_args = parser.add_argument_group("Watching")
+    watch_args.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep watching the --pagexml-dir directories, classifying new and modified files in batches of "
+        "--batch-size as they arrive, until interrupted. Results are written as soon as a batch is classified.",
+    )
+    watch_args.add_argument(
+        "--watch-interval",
+        type=float,
+        default=WATCH_INTERVAL,
+        metavar="SECONDS",
+        help="Seconds between scans of the watched directories (default: %(default)s).",
+    )
+    watch_args.add_argument(
+        "--watch-settle",
+        type=float,
+        default=WATCH_SETTLE,
+        metavar="SECONDS",
+        help="Seconds a file must remain unchanged before it is classified, "
+        "to skip files that are still being written (default: %(default)s).",
+    )
+    watch_args.add_argument(
+        "--watch-state",
+        type=Path,
+        metavar="FILE",
+        help="SQLite file recording the classified files. After a restart with the same file, "
+        "files that have been classified before are skipped; use with --append. "
+        "Without it, all files in the watched directories are classified at the start.",
+    )
+
+    queue_args = parser.add_argument_group("Work queue")
+    queue_args.add_argument(
+        "--queue",
+        type=Path,
+        metavar="FILE",
+        help="SQLite file on shared storage with a queue of PageXML files, for distributing them over "
+        "any number of workers on any number of nodes. The PageXML inputs, if any, are added to the queue; "
+        "then batches of --batch-size files are claimed and classified until the queue is drained. "
+        "The results are stored in the queue (and written to --output); export them with "
+        "merge_text_quality.py --queue FILE.",
+    )
+    queue_args.add_argument(
+        "--queue-lease",
+        type=float,
+        default=QUEUE_LEASE,
+        metavar="SECONDS",
+        help="Seconds after which the files claimed by a worker that has stopped are reclaimed by others "
+        "(default: %(default)s).",
+    )
+    queue_args.add_argument(
+        "--queue-max-attempts",
+        type=int,
+        default=QUEUE_MAX_ATTEMPTS,
+        metavar="N",
+        help="Number of times a file is claimed before it is given up as failed (default: %(default)d).",
+    )
+
+    profile_args = parser.add_argument_group("Profiling")
+    profile_args.add_argument(
+        "--profile",
+        action="store_true",
+        help="Measure the durations of all processing stages and print a summary to stderr.",
+    )
+    profile_args.add_argument(
+        "--profile-output",
+        type=argparse.FileType("wt"),
+        metavar="FILE",
+        help="Write the stage durations per page to a JSON Lines file; implies --profile.",
+    )
+    profile_args.add_argument(
+        "--memory-report",
+        action="store_true",
+        help="Measure the memory used by loading each component (resident memory and Python allocations), "
+        "and the peak Python allocations per page (or batch), and print a report to stderr. "
+        "Slows down processing considerably. With --threads, pages processed at once share their peak.",
+    )
+    profile_args.add_argument(
+        "--memory-report-output",
+        type=argparse.FileType("wt"),
+        metavar="FILE",
+        help="Write the memory report to a JSON file; implies --memory-report.",
+    )
+    metrics_args = parser.add_argument_group("Metrics")
+    metrics_args.add_argument(
+        "--metrics-file",
+        type=Path,
+        metavar="FILE",
+        help="Write operational metrics (pages, tokens, reasons, latencies, cache hits, memory) "
+        "to FILE in the Prometheus text format periodically, e.g. for the node_exporter textfile collector.",
+    )
+    metrics_args.add_argument(
+        "--metrics-port",
+        type=int,
+        metavar="PORT",
+        help="Serve the operational metrics in the Prometheus text format on PORT of localhost.",
+    )
+    metrics_args.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=15.0,
+        metavar="SECONDS",
+        help="Seconds between writes of --metrics-file (default: %(default)s).",
+    )
+    metrics_args.add_argument(
+        "--metrics-summary",
+        type=argparse.FileType("wt"),
+        metavar="FILE",
+        help="Write the final values of the operational metrics to a JSON file.",
+    )
+
     args = parser.parse_args()
+    if args.threads < 1:
+        parser.error(f"Invalid number of threads: {args.threads}")
+    if args.metrics_interval <= 0:
+        parser.error(f"Invalid metrics interval: {args.metrics_interval}")
+    if args.window_size < 1:
+        parser.error(f"Invalid window size: {args.window_size}")
+    if args.prefetch < 0:
+        parser.error(f"Invalid number of files to read ahead: {args.prefetch}")
+    if args.windows and any(f is sys.stdin for f in args.input):
+        parser.error("--windows cannot read from stdin.")
+    if args.watch and not args.pagexml_dir:
+        parser.error("--watch requires --pagexml-dir.")
+    if args.append and (not args.output or str(args.output) == "-"):
+        parser.error("--append requires --output.")
+    if args.queue and (
+        args.input or args.jsonl or args.input_nul or args.watch or args.shard
+    ):
+        parser.error(
+            "--queue only distributes PageXML files, and replaces --shard and --watch."
+        )
+
+    memory_report = args.memory_report or args.memory_report_output
+    if memory_report:
+        # before loading any resources
+        MEMORY_ACCOUNTING.start()
+
+    queue = None
+    if args.queue:
+        try:
+            queue = WorkQueue(
+                args.queue, lease=args.queue_lease, max_attempts=args.queue_max_attempts
+            )
+        except (ValueError, sqlite3.Error) as e:
+            parser.error(str(e))
+
+    watcher = None
+    if args.watch:
+        try:
+            watcher = FolderWatcher(
+                args.pagexml_dir,
+                args.include or [PAGEXML_PATTERN],
+                args.exclude,
+                interval=args.watch_interval,
+                settle=args.watch_settle,
+                state_file=args.watch_state,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+
+    metrics = Metrics()
+    parse_errors = metrics.counter(
+        "parse_errors_total", "Number of input files that could not be parsed."
+    )
+    export_metrics = bool(
+        args.metrics_file or args.metrics_port is not None or args.metrics_summary
+    )
+    if export_metrics:
+        add_process_metrics(metrics)
+        if memory_report:
+            add_memory_metrics(metrics, MEMORY_ACCOUNTING)
+
+    timer = NULL_TIMER
+    timing_summary = AggregatingSink()
+    if args.profile or args.profile_output or export_metrics:
+        timer = Timer(
+            ([timing_summary] if args.profile or args.profile_output else [])
+            + ([JsonLinesSink(args.profile_output)] if args.profile_output else [])
+            + ([MetricsSink(metrics)] if export_metrics else [])
+        )
+
+    if args.page_budget is not None and args.cascade:
+        parser.error("--page-budget cannot be combined with --cascade.")
+    try:
+        budget = (
+            PageBudget(args.page_budget / 1000)
+            if args.page_budget is not None
+            else None
+        )
+    except ValueError as e:
+        parser.error(str(e))
 
     tokenizer = NautilusOcrTokenizer()
+    try:
+        sampler = (
+            TokenSampler(args.sampling_error, args.sampling_confidence)
+            if args.sampling_error
+            else None
+        )
+    except ValueError as e:
+        parser.error(str(e))
 
-    featurizer = Featurizer(
-        Scorers(
-            dict_score=HunspellDictionary.from_path(HUNSPELL_DIR, HUNSPELL_LANGUAGE),
-            dict_score_gt=TokenDictionary.from_file(TOKEN_DICT_FILE),
-            n_gram_score=QGram.from_file(QGRAMS_FILE),
-            garbage_score=GarbageDetector(),
-        ),
-        tokenizer=tokenizer,
-    )
-    pipeline = Pipeline.from_file(PIPELINE_FILE, featurizer)
-    if pipeline.features != featurizer.features:
-        raise RuntimeError(
-            f"Pipline input features ({pipeline.features})"
-            f"do not match scorers ({featurizer.features})."
+    bundle = None
+    if args.bundle:
+        try:
+            bundle = ModelBundle(args.bundle)
+        except (OSError, BundleError) as e:
+            parser.error(str(e))
+    default_language = bundle.language if bundle else DEFAULT_LANGUAGE
+    if args.language_strategy is LanguageStrategy.ASSUME and any(
+        language != default_language for language in args.languages
+    ):
+        parser.error(
+            f"--languages requires identifying the language; "
+            f"not possible with --language-strategy {LanguageStrategy.ASSUME.value}."
         )
 
-    text_inputs = {f.name: os.linesep.join(f.readlines()) for f in args.input}
+    try:
+        registry = LanguageRegistry.from_resources(
+            [language for language in args.languages if language != default_language],
+            memory_budget=(
+                args.language_memory * 2**20 if args.language_memory else None
+            ),
+            timer=timer,
+            sampler=sampler,
+        )
+    except FileNotFoundError as e:
+        parser.error(str(e))
+
+    duplicates_dir = tempfile.TemporaryDirectory(prefix="text_quality_")
+    duplicates = None
+    if args.duplicate_threshold is not None:
+        try:
+            duplicates = DuplicateIndex(
+                args.duplicate_threshold,
+                max_entries=args.duplicate_memory,
+                spill_file=args.duplicate_index
+                or Path(duplicates_dir.name) / "duplicates.sqlite",
+            )
+        except ValueError as e:
+            parser.error(str(e))
 
-    pagexml_inputs = {}
-    for pagexml in chain(args.pagexml, glob.glob(args.pagexml_glob)):
-        if pagexml in pagexml_inputs:
-            logging.warning("Duplicate input file: '%s'", pagexml)
+    pipeline_args = {
+        "language_strategy": args.language_strategy,
+        "timer": timer,
+        "registry": registry,
+        "cascade": Cascade() if args.cascade else None,
+        "budget": budget,
+        "metrics": metrics if export_metrics else None,
+        "duplicates": duplicates,
+    }
+    if bundle is not None:
         try:
-            pagexml_inputs[pagexml] = Page.from_file(pagexml)
-        except Exception as e:
-            logging.error("Error parsing file '%s': %s", pagexml, str(e))
-            pagexml_inputs[pagexml] = ""
+            pipeline = Pipeline.from_bundle(bundle, sampler=sampler, **pipeline_args)
+        except BundleError as e:
+            parser.error(str(e))
+    else:
+        featurizer = Featurizer(
+            Scorers(
+                dict_score=HunspellDictionary.from_path(
+                    HUNSPELL_DIR, HUNSPELL_LANGUAGE
+                ),
+                dict_score_gt=TokenDictionary.from_file(TOKEN_DICT_FILE),
+                n_gram_score=QGram.from_file(QGRAMS_FILE),
+                garbage_score=GarbageDetector(),
+            ),
+            tokenizer=tokenizer,
+            timer=timer,
+            sampler=sampler,
+        )
+        pipeline = Pipeline.from_file(PIPELINE_FILE, featurizer, **pipeline_args)
+        if pipeline.features != featurizer.features:
+            raise RuntimeError(
+                f"Pipline input features ({pipeline.features})"
+                f"do not match scorers ({featurizer.features})."
+            )
+
+    window_inputs = [
+        f.name
+        for f in (args.input if args.windows else [])
+        if args.shard is None or f.name in args.shard
+    ]
+    text_inputs = {
+        f.name: os.linesep.join(f.readlines())
+        for f in (args.input if not args.windows else [])
+        if args.shard is None or f.name in args.shard
+    }
+
+    pagexml_inputs = unique(
+        pagexml
+        for pagexml in chain(
+            args.pagexml,
+            glob.iglob(args.pagexml_glob, recursive=True) if args.pagexml_glob else [],
+            # watched directories are scanned by the watcher
+            chain.from_iterable(
+                walk(directory, args.include or [PAGEXML_PATTERN], args.exclude)
+                for directory in (args.pagexml_dir if watcher is None else [])
+            ),
+            read_file_list(args.pagexml_list) if args.pagexml_list else [],
+        )
+        if args.shard is None or pagexml in args.shard
+    )
 
     fieldnames = list(OutputRow.__annotations__.keys())
+    if args.output_levels or args.windows:
+        fieldnames += LEVEL_FIELDNAMES
     if args.output_scores:
         fieldnames += list(ClassifierScores.__annotations__.keys()) + [REASON_FIELDNAME]
 
-    writer = csv.DictWriter(args.output, fieldnames=fieldnames)
-    writer.writeheader()
+    if queue is not None:
+        try:
+            queue.check_fieldnames(fieldnames)
+        except ValueError as e:
+            parser.error(str(e))
+        # the inputs are processed from the queue, by this and any other workers
+        added = queue.add(pagexml_inputs)
+        pagexml_inputs = []
+        logging.info(
+            "Added %d files to queue '%s': %s.", added, args.queue, queue.status()
+        )
 
-    for name, page in tqdm(
-        (text_inputs | pagexml_inputs).items(), desc="Processing", unit="file"
-    ):
-        if args.output_scores:
-            quality_class, classifier_scores, reason = pipeline.classify_with_scores(
-                page
+    # pylint: disable=consider-using-with
+    output = (
+        open(args.output, "at" if args.append else "wt")
+        if args.output and str(args.output) != "-"
+        else sys.stdout
+    )
+    writer = csv.DictWriter(output, fieldnames=fieldnames)
+    if output is sys.stdout or output.tell() == 0:
+        writer.writeheader()
+
+    try:
+        exporter = (
+            MetricsExporter(
+                metrics,
+                file=args.metrics_file,
+                port=args.metrics_port,
+                interval=args.metrics_interval,
+            )
+            if args.metrics_file or args.metrics_port is not None
+            else nullcontext()
+        )
+    except OSError as e:
+        parser.error(f"Cannot serve metrics on port {args.metrics_port}: {e}")
+
+    executor = ThreadPoolExecutor(args.threads) if args.threads > 1 else None
+    if executor is not None and gil_enabled():
+        logging.info(
+            "The GIL is enabled; only GIL-releasing stages run in parallel threads."
+        )
+
+    try:
+        prefetcher = (
+            Prefetcher(
+                partial(read_input, errors=parse_errors),
+                args.prefetch,
+                workers=args.prefetch_workers,
+                max_bytes=args.prefetch_memory * 2**20,
+                size=lambda item: file_size(item[0]) if item[1] is None else 0,
+            )
+            if args.prefetch
+            else None
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    with exporter:
+
+        def classify_file(item: tuple[str, Optional[str]]) -> List[dict]:
+            name, text = item
+            with timer.page(str(name)), MEMORY_ACCOUNTING.page():
+                page = (
+                    text
+                    if text is not None
+                    else read_pagexml(name, timer, parse_errors)
+                )
+                return classify(
+                    pipeline, name, page, args.output_scores, args.output_levels
+                )
+
+        def classify_read_file(item: tuple[str, Union[Page, str], float]) -> List[dict]:
+            name, page, parse_duration = item
+            with timer.page(str(name)), MEMORY_ACCOUNTING.page():
+                if parse_duration:
+                    timer.add("parse", parse_duration)
+                return classify(
+                    pipeline, name, page, args.output_scores, args.output_levels
+                )
+
+        def classify_files(
+            items: Iterable[tuple[str, Optional[str]]],
+        ) -> Iterator[List[dict]]:
+            """Classify files in order, reading them ahead if prefetching."""
+            if prefetcher is None:
+                return ordered_map(classify_file, items, executor)
+            return ordered_map(classify_read_file, prefetcher.map(items), executor)
+
+        # PageXML files are found and parsed lazily, while processing
+        for rows in tqdm(
+            classify_files(
+                chain(
+                    text_inputs.items(), ((pagexml, None) for pagexml in pagexml_inputs)
+                )
+            ),
+            desc="Processing",
+            unit="file",
+        ):
+            writer.writerows(rows)
+
+        # Large text files are split into windows, which are classified in batches
+        for name in window_inputs:
+            batches = classify_windows(
+                pipeline,
+                name,
+                args.windows,
+                args.window_size,
+                args.batch_size,
+                args.output_scores,
             )
-            row = (
-                OutputRow(filename=name, quality_class=quality_class)
-                | classifier_scores
-                | {REASON_FIELDNAME: reason.name}
+            with tqdm(desc=f"Processing {name}", unit="window") as progress:
+                while True:
+                    with timer.page(name), MEMORY_ACCOUNTING.page():
+                        rows = next(batches, None)
+                    if rows is None:
+                        break
+                    writer.writerows(rows)
+                    output.flush()
+                    progress.update(len(rows))
+
+        # Text records are streamed and classified in batches
+        records = chain(
+            chain.from_iterable(read_jsonl(f) for f in args.jsonl),
+            (
+                read_nul_separated(args.input_nul, args.input_nul.name)
+                if args.input_nul
+                else []
+            ),
+        )
+
+        def classify_batch(batch: List[TextRecord]) -> List[dict]:
+            with timer.page(batch[0].id), MEMORY_ACCOUNTING.page():
+                return classify_records(
+                    pipeline, batch, args.output_scores, args.output_levels
+                )
+
+        for rows in tqdm(
+            ordered_map(
+                classify_batch,
+                batched(
+                    (r for r in records if args.shard is None or r.id in args.shard),
+                    args.batch_size,
+                ),
+                executor,
+            ),
+            desc="Processing",
+            unit="batch",
+        ):
+            writer.writerows(rows)
+            output.flush()
+
+        # New files in watched directories are classified in batches as they arrive
+        if watcher is not None:
+            stop = threading.Event()
+            signal.signal(signal.SIGTERM, lambda *_: stop.set())
+            logging.info(
+                "Watching %s for new files.", ", ".join(map(str, args.pagexml_dir))
             )
-        else:
-            row = OutputRow(filename=name, quality_class=pipeline.classify(page))
+            with watcher, tqdm(desc="Watching", unit="file") as progress:
+                try:
+                    for batch in watcher.batches(args.batch_size, stop):
+                        for rows in classify_files(
+                            (pagexml, None)
+                            for pagexml in batch
+                            if args.shard is None or pagexml in args.shard
+                        ):
+                            writer.writerows(rows)
+                        output.flush()
+                        watcher.mark_processed(batch)
+                        progress.update(len(batch))
+                except KeyboardInterrupt:
+                    logging.info("Stopped watching.")
+
+        # Queued files are claimed and classified in batches until the queue is drained
+        if queue is not None:
+            stop = threading.Event()
+            signal.signal(signal.SIGTERM, lambda *_: stop.set())
+            with queue, tqdm(desc="Processing queue", unit="file") as progress:
+                try:
+                    for batch in queue.drain(args.batch_size, stop):
+                        results = dict(
+                            zip(
+                                batch,
+                                classify_files((pagexml, None) for pagexml in batch),
+                            )
+                        )
+                        queue.complete(results)
+                        for rows in results.values():
+                            writer.writerows(rows)
+                        output.flush()
+                        progress.update(len(batch))
+                except KeyboardInterrupt:
+                    logging.info("Stopped processing the queue.")
+                logging.info("Queue '%s': %s.", args.queue, queue.status())
+
+        if executor is not None:
+            executor.shutdown()
+        if prefetcher is not None:
+            prefetcher.close()
+
+    if output is not sys.stdout:
+        output.close()
+    if duplicates is not None:
+        duplicates.close()
+    duplicates_dir.cleanup()
 
-        writer.writerow(row)
+    if args.profile or args.profile_output:
+        print(timing_summary.report(), file=sys.stderr)
+        if prefetcher is not None:
+            print(prefetcher.report(), file=sys.stderr)
+        if isinstance(pipeline.language_classifier, PrescreenLanguageClassifier):
+            print(pipeline.language_classifier.report(), file=sys.stderr)
+    if args.metrics_summary:
+        json.dump(metrics.summary(), args.metrics_summary, indent=2)
+    if memory_report:
+        print(MEMORY_ACCOUNTING.report(), file=sys.stderr)
+        if args.memory_report_output:
+            json.dump(MEMORY_ACCOUNTING.summary(), args.memory_report_output, indent=2)
+        MEMORY_ACCOUNTING.stop()
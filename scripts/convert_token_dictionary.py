@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+from pathlib import Path
+from text_quality.feature.scorer.dictionary import TokenDictionary
+from text_quality.settings import LOG_LEVEL
+
+
+logging.basicConfig(level=LOG_LEVEL)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Convert a token dictionary between the text and the binary, memory-mappable format."
+    )
+    parser.add_argument(
+        "input", type=Path, help="Token dictionary file, in either format."
+    )
+    parser.add_argument("output", type=Path, help="Output file.")
+    parser.add_argument(
+        "--to-text",
+        action="store_true",
+        help="Write the text format (one token per line) instead of the binary format.",
+    )
+    parser.add_argument(
+        "--overwrite", action="store_true", help="Overwrite an existing output file."
+    )
+    args = parser.parse_args()
+
+    dictionary = TokenDictionary.from_file(args.input)
+    if args.to_text:
+        dictionary.to_file(args.output, overwrite=args.overwrite)
+    else:
+        dictionary.to_binary_file(args.output, overwrite=args.overwrite)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List
+from typing import Optional
+from tqdm import tqdm
+from text_quality.classifier.bundle import BundleError
+from text_quality.classifier.pipeline import Pipeline
+from text_quality.corpus.discovery import PAGEXML_PATTERN
+from text_quality.corpus.discovery import walk
+from text_quality.corpus.estimate import QualityEstimator
+from text_quality.corpus.estimate import stratum_of
+from text_quality.corpus.parallel import ordered_map
+from text_quality.feature.featurize import Featurizer
+from text_quality.feature.featurize import Scorers
+from text_quality.feature.scorer.dictionary import HunspellDictionary
+from text_quality.feature.scorer.dictionary import TokenDictionary
+from text_quality.feature.scorer.garbage import GarbageDetector
+from text_quality.feature.scorer.q_gram import QGram
+from text_quality.feature.tokenizer import NautilusOcrTokenizer
+from text_quality.language.classifier import LanguageStrategy
+from text_quality.page.page import Page
+from text_quality.settings import ENCODING
+from text_quality.settings import ESTIMATE_CONFIDENCE
+from text_quality.settings import ESTIMATE_INITIAL_SAMPLE
+from text_quality.settings import ESTIMATE_PRECISION
+from text_quality.settings import HUNSPELL_DIR
+from text_quality.settings import HUNSPELL_LANGUAGE
+from text_quality.settings import LOG_LEVEL
+from text_quality.settings import PIPELINE_FILE
+from text_quality.settings import QGRAMS_FILE
+from text_quality.settings import TOKEN_DICT_FILE
+
+
+logging.basicConfig(level=LOG_LEVEL)
+
+
+def classify_file(pipeline: Pipeline, path: str) -> Optional[int]:
+    try:
+        return int(pipeline.classify(Page.from_file(path)))
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        logging.error("Error processing file '%s': %s", path, str(e))
+        return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Estimate the proportions of the quality classes in a corpus of PageXML files, "
+        "by classifying a stratified random sample of the pages."
+    )
+    parser.add_argument(
+        "pagexml_dir",
+        type=Path,
+        nargs="+",
+        metavar="DIR",
+        help="Directories to search recursively for PageXML files; see --include and --exclude.",
+    )
+    parser.add_argument(
+        "--include",
+        action="append",
+        metavar="PATTERN",
+        help=f"Pattern for files to include (repeatable; default: '{PAGEXML_PATTERN}').",
+    )
+    parser.add_argument(
+        "--exclude",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="Pattern for files and directories to skip (repeatable).",
+    )
+    parser.add_argument(
+        "--stratum-depth",
+        type=int,
+        metavar="N",
+        help="Stratify by the first N directory levels below each DIR, e.g. 1 for the inventories "
+        "in an archive directory; by default, every directory is a stratum.",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=argparse.FileType("wt", encoding=ENCODING),
+        default=sys.stdout,
+        metavar="FILE",
+        help="CSV output file with the estimated proportion and confidence interval of each quality class "
+        "per stratum, and over all strata (stratum '*'); defaults to stdout.",
+    )
+
+    sampling_args = parser.add_argument_group("Sampling")
+    sampling_args.add_argument(
+        "--precision",
+        type=float,
+        default=ESTIMATE_PRECISION,
+        metavar="WIDTH",
+        help="Classify pages until the confidence intervals of the proportions over all strata "
+        "are at most this wide on either side (default: %(default)s).",
+    )
+    sampling_args.add_argument(
+        "--stratum-precision",
+        type=float,
+        metavar="WIDTH",
+        help="Also classify pages until the confidence intervals of each stratum are at most this wide on either side; "
+        "requires many more pages than the overall precision.",
+    )
+    sampling_args.add_argument(
+        "--confidence",
+        type=float,
+        default=ESTIMATE_CONFIDENCE,
+        metavar="P",
+        help="Confidence level of the intervals (default: %(default)s).",
+    )
+    sampling_args.add_argument(
+        "--initial",
+        type=int,
+        default=ESTIMATE_INITIAL_SAMPLE,
+        metavar="N",
+        help="Number of pages per stratum classified in the first round (default: %(default)d).",
+    )
+    sampling_args.add_argument(
+        "--max-samples",
+        type=int,
+        metavar="N",
+        help="Classify at most N pages in total, even if the target precision is not reached.",
+    )
+    sampling_args.add_argument("--seed", type=int, default=0, help="Random seed.")
+
+    classifier_args = parser.add_argument_group("Classifier")
+    classifier_args.add_argument(
+        "--bundle",
+        type=Path,
+        metavar="FILE",
+        help="Load the classifier and its resources from a model bundle built with build_model_bundle.py.",
+    )
+    classifier_args.add_argument(
+        "--language-strategy",
+        type=LanguageStrategy,
+        choices=list(LanguageStrategy),
+        default=LanguageStrategy.FASTTEXT,
+        metavar="STRATEGY",
+        help="How the language of pages is identified, see classify_text_quality.py (default: fasttext).",
+    )
+    classifier_args.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Classify N pages in parallel threads (default: %(default)d).",
+    )
+    args = parser.parse_args()
+
+    if args.threads < 1:
+        parser.error(f"Invalid number of threads: {args.threads}")
+    if args.stratum_depth is not None and args.stratum_depth < 0:
+        parser.error(f"Invalid stratum depth: {args.stratum_depth}")
+    try:
+        estimator = QualityEstimator(
+            precision=args.precision,
+            stratum_precision=args.stratum_precision,
+            confidence=args.confidence,
+            initial=args.initial,
+            max_samples=args.max_samples,
+            seed=args.seed,
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.bundle:
+        try:
+            pipeline = Pipeline.from_bundle(
+                args.bundle, language_strategy=args.language_strategy
+            )
+        except (OSError, BundleError) as e:
+            parser.error(str(e))
+    else:
+        featurizer = Featurizer(
+            Scorers(
+                dict_score=HunspellDictionary.from_path(
+                    HUNSPELL_DIR, HUNSPELL_LANGUAGE
+                ),
+                dict_score_gt=TokenDictionary.from_file(TOKEN_DICT_FILE),
+                n_gram_score=QGram.from_file(QGRAMS_FILE),
+                garbage_score=GarbageDetector(),
+            ),
+            tokenizer=NautilusOcrTokenizer(),
+        )
+        pipeline = Pipeline.from_file(
+            PIPELINE_FILE, featurizer, language_strategy=args.language_strategy
+        )
+
+    for directory in args.pagexml_dir:
+        for path in tqdm(
+            walk(directory, args.include or (PAGEXML_PATTERN,), args.exclude),
+            desc=f"Listing {directory}",
+            unit="file",
+        ):
+            estimator.add(path, stratum_of(path, directory, args.stratum_depth))
+
+    executor = ThreadPoolExecutor(args.threads) if args.threads > 1 else None
+
+    def classify(paths: List[str]) -> List[Optional[int]]:
+        return list(
+            tqdm(
+                ordered_map(
+                    lambda path: classify_file(pipeline, path), paths, executor
+                ),
+                total=len(paths),
+                desc="Classifying",
+                unit="file",
+            )
+        )
+
+    estimator.run(classify)
+    if executor is not None:
+        executor.shutdown()
+
+    estimator.to_csv(args.output)
+    print(estimator.report(), file=sys.stderr)
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+from pathlib import Path
+import pandas as pd
+from text_quality.feature.featurize import Featurizer
+from text_quality.feature.featurize import Scorers
+from text_quality.feature.scorer.dictionary import HunspellDictionary
+from text_quality.feature.scorer.dictionary import TokenDictionary
+from text_quality.feature.scorer.garbage import GarbageDetector
+from text_quality.feature.scorer.q_gram import QGram
+from text_quality.feature.tokenizer import NautilusOcrTokenizer
+from text_quality.settings import HUNSPELL_DIR
+from text_quality.settings import HUNSPELL_LANGUAGE
+from text_quality.settings import LOG_LEVEL
+from text_quality.settings import QGRAMS_FILE
+from text_quality.settings import TOKEN_DICT_FILE
+from text_quality.training.features import FeatureCache
+from text_quality.training.features import default_fingerprint
+from text_quality.training.features import extract_features
+
+
+logging.basicConfig(level=LOG_LEVEL)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Featurize a labelled PageXML corpus for training the classifier."
+    )
+    parser.add_argument(
+        "labels",
+        type=Path,
+        metavar="FILE",
+        help="A CSV file with a column for the PageXML file names and a column for the labels.",
+    )
+    parser.add_argument(
+        "--pagexml-dir",
+        type=Path,
+        default=Path("."),
+        metavar="DIR",
+        help="The directory the file names are relative to. Defaults to the current directory.",
+    )
+    parser.add_argument(
+        "--path-column",
+        default="Filename",
+        help="The column with the file names. Defaults to '%(default)s'.",
+    )
+    parser.add_argument(
+        "--suffix",
+        default=".xml",
+        help="A suffix to append to the file names. Defaults to '%(default)s'.",
+    )
+    parser.add_argument(
+        "--label-column",
+        default="quality",
+        help="The column with the labels. Defaults to '%(default)s'.",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=Path,
+        required=True,
+        metavar="FILE",
+        help="Output file for the features and labels; CSV, or Parquet if the file name ends with '.parquet'.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=Path,
+        metavar="DIR",
+        help="Cache the feature vectors in this directory, so that unchanged pages are not featurized again.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="The number of processes to featurize pages in. Defaults to %(default)d.",
+    )
+    args = parser.parse_args()
+
+    featurizer = Featurizer(
+        Scorers(
+            dict_score=HunspellDictionary.from_path(HUNSPELL_DIR, HUNSPELL_LANGUAGE),
+            dict_score_gt=TokenDictionary.from_file(TOKEN_DICT_FILE),
+            n_gram_score=QGram.from_file(QGRAMS_FILE),
+            garbage_score=GarbageDetector(),
+        ),
+        tokenizer=NautilusOcrTokenizer(),
+    )
+
+    cache = None
+    if args.cache_dir:
+        cache = FeatureCache(
+            args.cache_dir,
+            default_fingerprint(featurizer.features),
+            featurizer.features,
+        )
+
+    labels = pd.read_csv(args.labels)
+    paths = [
+        str(args.pagexml_dir / (str(filename) + args.suffix))
+        for filename in labels[args.path_column]
+    ]
+
+    features = extract_features(paths, featurizer, cache=cache, workers=args.workers)
+    features[args.label_column] = labels[args.label_column].to_numpy()
+
+    if args.output.suffix == ".parquet":
+        features.to_parquet(args.output)
+    else:
+        features.to_csv(args.output)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import json
+import logging
+import sys
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+from pathlib import Path
+from typing import Iterator
+from typing import Optional
+from tqdm import tqdm
+from text_quality.corpus.synthetic import NOISE_LEVELS
+from text_quality.corpus.synthetic import CorpusGenerator
+from text_quality.corpus.synthetic import Noise
+from text_quality.corpus.synthetic import SyntheticPage
+from text_quality.corpus.synthetic import to_pagexml
+from text_quality.settings import ENCODING
+from text_quality.settings import LOG_LEVEL
+
+
+logging.basicConfig(level=LOG_LEVEL)
+
+FORMATS = ("pagexml", "text", "jsonl", "book")
+
+FILES_PER_DIRECTORY = 1000
+"""Pages in the 'pagexml' and 'text' formats are written to subdirectories of this many files."""
+
+_CHUNK_SIZE = 100
+
+_generator: Optional[CorpusGenerator] = None
+
+
+def _init_worker(**kwargs) -> None:
+    global _generator  # pylint: disable=global-statement
+    _generator = CorpusGenerator(**kwargs)
+
+
+def _generate(start: int, n_pages: int) -> list[SyntheticPage]:
+    return list(_generator.pages(n_pages, start))
+
+
+def generate(
+    n_pages: int, start: int, workers: int, **kwargs
+) -> Iterator[SyntheticPage]:
+    """Generate pages in the order of their indices, in worker processes if workers > 1."""
+    chunks = (
+        (chunk_start, min(_CHUNK_SIZE, start + n_pages - chunk_start))
+        for chunk_start in range(start, start + n_pages, _CHUNK_SIZE)
+    )
+    if workers > 1:
+        with Pool(workers, initializer=partial(_init_worker, **kwargs)) as pool:
+            # a few chunks per worker at a time, so that memory usage is bounded
+            while group := list(islice(chunks, 4 * workers)):
+                for pages in pool.starmap(_generate, group, chunksize=1):
+                    yield from pages
+    else:
+        _init_worker(**kwargs)
+        for chunk in chunks:
+            yield from _generate(*chunk)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Generate a synthetic corpus with HTR-like noise, for load and scale testing."
+    )
+    parser.add_argument(
+        "output",
+        type=Path,
+        help="Output directory for the 'pagexml' and 'text' formats; output file otherwise ('-' for stdout).",
+    )
+    parser.add_argument(
+        "--pages",
+        type=int,
+        default=1000,
+        metavar="N",
+        help="Number of pages (default: %(default)d).",
+    )
+    parser.add_argument(
+        "--start",
+        type=int,
+        default=0,
+        metavar="INDEX",
+        help="Index of the first page, e.g. for generating a large corpus in parts (default: %(default)d).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="pagexml",
+        help="'pagexml' and 'text' write a file per page, 'jsonl' a JSON Lines file with 'id' and 'text' fields, "
+        "and 'book' a single text file with pages separated by form feeds (default: %(default)s).",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+    parser.add_argument(
+        "--lines",
+        type=int,
+        nargs=2,
+        default=(20, 40),
+        metavar=("MIN", "MAX"),
+        help="Minimum and maximum number of lines per page (default: 20 40).",
+    )
+    parser.add_argument(
+        "--line-tokens",
+        type=float,
+        nargs=2,
+        default=(7.0, 2.5),
+        metavar=("MEAN", "SD"),
+        help="Mean and standard deviation of the number of tokens per line (default: 7 2.5).",
+    )
+    parser.add_argument(
+        "--languages",
+        nargs="+",
+        default=["de", "fr"],
+        metavar="LANG",
+        help="Languages of foreign pages, with Hunspell dictionaries in the data directory (default: de fr).",
+    )
+
+    noise_args = parser.add_argument_group(
+        "Noise", "Probabilities of the kinds of noise; override those of --noise."
+    )
+    noise_args.add_argument(
+        "--noise",
+        choices=list(NOISE_LEVELS),
+        default="htr",
+        help="Noise level (default: %(default)s).",
+    )
+    for field in Noise._fields:
+        noise_args.add_argument(f"--{field.replace('_', '-')}", type=float, metavar="P")
+
+    parser.add_argument(
+        "--labels",
+        type=argparse.FileType("wt", encoding=ENCODING),
+        metavar="FILE",
+        help="Write the language and the short columns flag of each page to a CSV file.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of processes generating pages (default: %(default)d).",
+    )
+    args = parser.parse_args()
+
+    noise = NOISE_LEVELS[args.noise]._replace(
+        **{
+            field: getattr(args, field)
+            for field in Noise._fields
+            if getattr(args, field) is not None
+        }
+    )
+    generator_args = {
+        "seed": args.seed,
+        "noise": noise,
+        "lines": tuple(args.lines),
+        "line_tokens": tuple(args.line_tokens),
+        "languages": args.languages,
+    }
+    try:
+        # validate the arguments before starting workers
+        CorpusGenerator(**generator_args)
+    except (ValueError, FileNotFoundError) as e:
+        parser.error(str(e))
+
+    labels = csv.writer(args.labels) if args.labels else None
+    if labels:
+        labels.writerow(["id", "language", "short_columns"])
+
+    file_output = args.format in ("jsonl", "book")
+    if not file_output:
+        args.output.mkdir(parents=True, exist_ok=True)
+    # pylint: disable=consider-using-with
+    output = (
+        (
+            open(args.output, "wt", encoding=ENCODING)
+            if str(args.output) != "-"
+            else sys.stdout
+        )
+        if file_output
+        else None
+    )
+
+    for i, page in enumerate(
+        tqdm(
+            generate(args.pages, args.start, args.workers, **generator_args),
+            total=args.pages,
+            unit="page",
+        )
+    ):
+        if args.format == "jsonl":
+            output.write(
+                json.dumps({"id": page.id, "text": page.text}, ensure_ascii=False)
+                + "\n"
+            )
+        elif args.format == "book":
+            output.write(("\f" if i else "") + page.text + "\n")
+        else:
+            directory = args.output / f"{(args.start + i) // FILES_PER_DIRECTORY:05d}"
+            directory.mkdir(exist_ok=True)
+            if args.format == "pagexml":
+                (directory / f"{page.id}.xml").write_text(
+                    to_pagexml(page), encoding=ENCODING
+                )
+            else:
+                (directory / f"{page.id}.txt").write_text(page.text, encoding=ENCODING)
+
+        if labels:
+            labels.writerow([page.id, page.language, int(page.short_columns)])
+
+    if output is not None and output is not sys.stdout:
+        output.close()
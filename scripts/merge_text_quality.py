@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import argparse
+import logging
+import sqlite3
+import sys
+from pathlib import Path
+from text_quality.corpus.shard import MergeError
+from text_quality.corpus.shard import merge
+from text_quality.corpus.work_queue import TaskState
+from text_quality.corpus.work_queue import WorkQueue
+from text_quality.settings import LOG_LEVEL
+
+
+logging.basicConfig(level=LOG_LEVEL)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        "Merge the outputs of sharded classify_text_quality.py runs, or export the results of a work queue."
+    )
+    parser.add_argument(
+        "inputs",
+        type=argparse.FileType("rt"),
+        nargs="*",
+        metavar="FILE",
+        help="CSV output files of the shards.",
+    )
+    parser.add_argument(
+        "--queue",
+        type=Path,
+        metavar="FILE",
+        help="Export the results stored in the work queue of classify_text_quality.py --queue instead, "
+        "in the order the files were added; fails if any files have not been classified.",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        type=argparse.FileType("wt"),
+        default=sys.stdout,
+        metavar="FILE",
+        help="Output file; defaults to stdout.",
+    )
+    parser.add_argument(
+        "--expected",
+        type=argparse.FileType("rt"),
+        metavar="FILE",
+        help="A file listing all input paths, one per line, to check for missing inputs.",
+    )
+    parser.add_argument(
+        "--no-strict",
+        dest="strict",
+        action="store_false",
+        help="Exit successfully even if inputs are duplicated or missing.",
+    )
+    args = parser.parse_args()
+    if bool(args.inputs) == bool(args.queue):
+        parser.error("Give either CSV files or --queue.")
+
+    if args.queue:
+        if not args.queue.is_file():
+            parser.error(f"Queue file not found: '{args.queue}'")
+        try:
+            queue = WorkQueue(args.queue)
+            n_rows = queue.to_csv(args.output)
+            status = queue.status()
+            failed = queue.paths(TaskState.FAILED)
+            queue.close()
+        except sqlite3.Error as e:
+            parser.error(f"Cannot read queue '{args.queue}': {e}")
+
+        for path in failed:
+            logging.error("Failed input: '%s'", path)
+        logging.info("Exported %d rows from queue: %s.", n_rows, status)
+        if args.strict and (status.pending or status.claimed or status.failed):
+            logging.error("Not all inputs in the queue have been classified.")
+            sys.exit(1)
+    else:
+        expected = None
+        if args.expected:
+            expected = [line.strip() for line in args.expected if line.strip()]
+
+        try:
+            n_inputs = merge(args.inputs, args.output, expected, strict=args.strict)
+        except MergeError as e:
+            logging.error(str(e))
+            sys.exit(1)
+        logging.info("Merged outputs for %d inputs.", n_inputs)
@@ -0,0 +1,109 @@
+import math
+import joblib
+import pytest
+from text_quality.classifier.aggregate import WindowAggregate
+from text_quality.classifier.budget import PageBudget
+from text_quality.classifier.pipeline import Pipeline
+from text_quality.classifier.pipeline import Reason
+from text_quality.classifier.pipeline import default_scores_dict
+from text_quality.settings import PIPELINE_FILE
+
+
+def scores(n_tokens, language="nl", dict_score=0.5, **fields):
+    return default_scores_dict(
+        0.0,
+        n_characters=5 * n_tokens,
+        n_tokens=n_tokens,
+        n_sampled=n_tokens,
+        language=language,
+        language_confidence=0.9,
+        scorers="dict_score,dict_score_gt,n_gram_score,garbage_score",
+        dict_score=dict_score,
+        **fields,
+    )
+
+
+class TestWindowAggregate:
+    def test_result(self):
+        aggregate = WindowAggregate()
+        aggregate.add(1, scores(30, dict_score=0.9), Reason.CLASSIFIER)
+        aggregate.add(3, scores(10, dict_score=0.1), Reason.CLASSIFIER)
+        aggregate.add(1, scores(20, language="en"), Reason.LANGUAGE)
+
+        quality, result, reason = aggregate.result()
+
+        assert aggregate.windows == 3
+        assert quality == 1
+        assert result["confidence"] == pytest.approx(50 / 60)
+        assert result["language"] == "nl"
+        assert result["language_confidence"] == pytest.approx(40 / 60)
+        assert result["n_tokens"] == 60
+        assert result["n_characters"] == 300
+        assert result["dict_score"] == pytest.approx((30 * 0.9 + 10 * 0.1) / 40)
+        assert (
+            result["scorers"] == "dict_score,dict_score_gt,n_gram_score,garbage_score"
+        )
+        assert reason == Reason.CLASSIFIER
+
+    def test_budget(self):
+        aggregate = WindowAggregate()
+        aggregate.add(1, scores(30, dict_score=0.9), Reason.CLASSIFIER)
+        aggregate.add(3, scores(10, dict_score=0.1), Reason.BUDGET)
+        aggregate.add(1, scores(20, language="en"), Reason.LANGUAGE)
+
+        quality, result, reason = aggregate.result()
+
+        assert quality == 1
+        assert result["dict_score"] == pytest.approx((30 * 0.9 + 10 * 0.1) / 40)
+        assert reason == Reason.BUDGET
+
+    def test_budget_windows(self, featurizer):
+        # tokens longer than 10 characters degrade the windows
+        pipeline = Pipeline(
+            joblib.load(PIPELINE_FILE),
+            featurizer,
+            budget=PageBudget(10.0, max_token_length=10),
+        )
+        windows = [
+            "een Nederlandse tekst met woorden",
+            "een tekst met korte woorden",
+        ]
+
+        aggregate = WindowAggregate()
+        results = pipeline.classify_batch_with_scores(windows)
+        for result in results:
+            aggregate.add(*result)
+        _, window_scores, reason = aggregate.result()
+
+        assert [reason for _, _, reason in results] == [
+            Reason.BUDGET,
+            Reason.CLASSIFIER,
+        ]
+        assert reason == Reason.BUDGET
+        assert not math.isnan(window_scores["dict_score"])
+
+    def test_skipped_scorer(self):
+        aggregate = WindowAggregate()
+        aggregate.add(1, scores(10, dict_score=math.nan), Reason.CLASSIFIER)
+        aggregate.add(1, scores(10, dict_score=0.8), Reason.CLASSIFIER)
+
+        _, result, _ = aggregate.result()
+
+        assert result["dict_score"] == pytest.approx(0.8)
+
+    def test_no_tokens(self):
+        aggregate = WindowAggregate()
+        aggregate.add(0, scores(0, language=""), Reason.EMPTY)
+        aggregate.add(0, scores(0, language=""), Reason.EMPTY)
+        aggregate.add(2, scores(0, language=""), Reason.SHORT_COLUMNS)
+
+        quality, result, reason = aggregate.result()
+
+        assert quality == 0
+        assert result["confidence"] == pytest.approx(2 / 3)
+        assert result["language"] == ""
+        assert reason == Reason.EMPTY
+
+    def test_empty(self):
+        with pytest.raises(ValueError):
+            WindowAggregate().result()
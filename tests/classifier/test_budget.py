@@ -0,0 +1,96 @@
+import random
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.classifier.budget import PageBudget
+from text_quality.classifier.cascade import SAMPLED_SUFFIX
+
+
+class TestPageBudget:
+    @pytest.mark.parametrize(
+        "seconds, max_token_length, min_sample, expected_exception",
+        [
+            (0.1, 100, 50, does_not_raise()),
+            (0, 100, 50, pytest.raises(ValueError, match="Invalid budget: 0")),
+            (
+                0.1,
+                0,
+                50,
+                pytest.raises(ValueError, match="Invalid maximum token length: 0"),
+            ),
+            (
+                0.1,
+                100,
+                1,
+                pytest.raises(ValueError, match="Invalid minimum sample size: 1"),
+            ),
+        ],
+    )
+    def test_init(self, seconds, max_token_length, min_sample, expected_exception):
+        with expected_exception:
+            PageBudget(
+                seconds, max_token_length=max_token_length, min_sample=min_sample
+            )
+
+    def test_rate(self):
+        # pylint: disable=protected-access
+        budget = PageBudget(1.0)
+        assert budget.rate("dict_score") is None
+
+        budget._measure("dict_score", 1.0, 0)
+        assert budget.rate("dict_score") is None
+
+        budget._measure("dict_score", 1.0, 100)
+        assert budget.rate("dict_score") == pytest.approx(0.01)
+
+        budget._measure("dict_score", 2.0, 100)
+        assert budget.rate("dict_score") == pytest.approx(0.012)
+
+    def test_counts(self, featurizer):
+        budget = PageBudget(10.0)
+        tokens = featurizer.tokenize("een Nederlandse tekst met 3 woorden. " * 10)
+
+        budgeted = budget.counts(featurizer, tokens)
+
+        assert budgeted.counts == featurizer.count(tokens)
+        assert budgeted.errors == {feature: 0.0 for feature in featurizer.features}
+        assert budgeted.n_sampled == len(tokens)
+        assert budgeted.scorers == featurizer.features
+        assert not budgeted.degraded
+        for feature in featurizer.features:
+            assert budget.rate(feature) > 0
+
+    def test_counts_sampled(self, featurizer):
+        # pylint: disable=protected-access
+        budget = PageBudget(0.01, min_sample=20)
+        budget._measure("dict_score", 1.0, 1)
+        rnd = random.Random(0)
+        tokens = [rnd.choice(["een", "tekst", "xqzt", "wrbbl"]) for _ in range(500)]
+
+        budgeted = budget.counts(featurizer, tokens)
+
+        assert budgeted.scorers == [
+            "dict_score" + SAMPLED_SUFFIX,
+            "dict_score_gt",
+            "n_gram_score",
+            "garbage_score",
+        ]
+        assert budgeted.degraded
+        assert 20 <= budgeted.n_sampled < len(tokens)
+        assert budgeted.errors["dict_score"] > 0.0
+        assert (
+            budgeted.counts["dict_score_gt"]
+            == featurizer.count(tokens)["dict_score_gt"]
+        )
+
+    def test_counts_long_tokens(self, featurizer):
+        budget = PageBudget(10.0, max_token_length=10)
+        tokens = ["een", "", "Nederlandse", "x" * 25]
+
+        budgeted = budget.counts(featurizer, tokens)
+
+        assert budgeted.degraded
+        assert budgeted.scorers == featurizer.features
+        assert budgeted.n_sampled == 7
+        assert budgeted.counts == featurizer.count(
+            ["een", "", "Nederlands", "e", "x" * 10, "x" * 10, "x" * 5]
+        )
@@ -0,0 +1,223 @@
+import json
+import shutil
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.classifier import bundle as bundle_module
+from text_quality.classifier.bundle import BUNDLE_FORMAT_VERSION
+from text_quality.classifier.bundle import BundleError
+from text_quality.classifier.bundle import ModelBundle
+from text_quality.classifier.pipeline import Pipeline
+from text_quality.classifier.registry import LanguageResources
+from text_quality.language.classifier import LanguageClassifier
+from text_quality.settings import DEFAULT_LANGUAGE
+
+
+LANGUAGE_MODEL = b"language model"
+
+TEXTS = [
+    "Dit is een korte Nederlandse tekst over de kerk en het huis van de koopman.",
+    "asdf qwe zxcv bnm",
+    "In den jaere 1650 is het schip van Amsterdam naer Batavia vertrocken.",
+]
+
+
+class DutchClassifier(LanguageClassifier):
+    def __init__(self, model_file=None) -> None:
+        super().__init__()
+        self.model_file = model_file
+
+    def classify(self, text: str) -> tuple[str, float]:
+        return "nl", 1.0
+
+
+@pytest.fixture(scope="module")
+def bundle_file(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("bundle")
+    language_model = directory / "lid.ftz"
+    language_model.write_bytes(LANGUAGE_MODEL)
+
+    file = directory / "model.tqb"
+    ModelBundle.build(
+        file,
+        LanguageResources.for_language(DEFAULT_LANGUAGE),
+        language_model,
+        version="1.0",
+    )
+    return file
+
+
+@pytest.fixture
+def bundle_copy(bundle_file, tmp_path):
+    return shutil.copy(bundle_file, tmp_path / bundle_file.name)
+
+
+def rewrite_manifest(file, **changes):
+    with open(file, "r+b") as f:
+        f.seek(len(bundle_module._MAGIC))  # pylint: disable=protected-access
+        size = int.from_bytes(f.read(8), "little")
+        manifest = json.loads(f.read(size)) | changes
+        encoded = json.dumps(manifest).encode("utf-8")
+        assert len(encoded) <= size
+
+        f.seek(len(bundle_module._MAGIC))  # pylint: disable=protected-access
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+
+
+class TestModelBundle:
+    def test_manifest(self, bundle_file):
+        bundle = ModelBundle(bundle_file)
+
+        assert bundle.version == "1.0"
+        assert bundle.language == DEFAULT_LANGUAGE
+        assert bundle.features == [
+            "dict_score",
+            "dict_score_gt",
+            "n_gram_score",
+            "garbage_score",
+        ]
+        assert set(bundle.manifest["sections"]) == set(ModelBundle.SECTIONS)
+        assert all(
+            section["offset"] % 4096 == 0
+            for section in bundle.manifest["sections"].values()
+        )
+
+    def test_load(self, bundle_file):
+        featurizer, pipeline = ModelBundle(bundle_file).load()
+        expected_featurizer, expected_pipeline = LanguageResources.for_language(
+            DEFAULT_LANGUAGE
+        ).load()
+
+        features = [featurizer.featurize(text)[0] for text in TEXTS]
+        assert features == [expected_featurizer.featurize(text)[0] for text in TEXTS]
+        assert list(pipeline.feature_names_in_) == list(
+            expected_pipeline.feature_names_in_
+        )
+
+    def test_close(self, bundle_file):
+        with ModelBundle(bundle_file) as bundle:
+            featurizer, _ = bundle.load()
+
+        with pytest.raises(ValueError):
+            bundle.pipeline()
+        assert featurizer.featurize(TEXTS[0]) == ModelBundle(
+            bundle_file
+        ).featurizer().featurize(TEXTS[0])
+
+    def test_language_classifier(self, bundle_file, monkeypatch, tmp_path):
+        monkeypatch.setattr(bundle_module.tempfile, "tempdir", str(tmp_path))
+        monkeypatch.setattr(
+            bundle_module, "FastTextLanguageClassifier", lambda model_file: model_file
+        )
+
+        model_file = ModelBundle(bundle_file).language_classifier()
+
+        assert model_file.parent == tmp_path
+        assert model_file.read_bytes() == LANGUAGE_MODEL
+        assert ModelBundle(bundle_file).language_classifier() == model_file
+
+    def test_corrupt(self, bundle_copy):
+        section = ModelBundle(bundle_copy).manifest["sections"]["token_dict"]
+        with open(bundle_copy, "r+b") as f:
+            f.seek(section["offset"] + section["size"] // 2)
+            f.write(b"\xff\xff")
+
+        with pytest.raises(BundleError, match="Checksum mismatch.*'token_dict'"):
+            ModelBundle(bundle_copy)
+        ModelBundle(bundle_copy, verify=False)
+
+    def test_truncated(self, bundle_copy):
+        with open(bundle_copy, "r+b") as f:
+            f.truncate(8192)
+
+        with pytest.raises(BundleError, match="truncated"):
+            ModelBundle(bundle_copy)
+
+    def test_not_a_bundle(self, tmp_path):
+        file = tmp_path / "model.joblib"
+        file.write_bytes(b"not a bundle")
+
+        with pytest.raises(BundleError, match="Not a model bundle"):
+            ModelBundle(file)
+
+    @pytest.mark.parametrize(
+        "format_version,expectation",
+        [
+            (BUNDLE_FORMAT_VERSION, does_not_raise()),
+            (BUNDLE_FORMAT_VERSION + 1, pytest.raises(BundleError)),
+        ],
+    )
+    def test_format_version(self, bundle_copy, format_version, expectation):
+        rewrite_manifest(bundle_copy, format_version=format_version)
+
+        with expectation:
+            ModelBundle(bundle_copy)
+
+    def test_settings(self, bundle_file, monkeypatch):
+        monkeypatch.setattr(bundle_module, "Q_GRAM_LENGTH", 4)
+
+        with pytest.raises(BundleError, match="Q_GRAM_LENGTH=3"):
+            ModelBundle(bundle_file)
+
+    def test_features(self, bundle_copy):
+        rewrite_manifest(bundle_copy, features=["dict_score"])
+
+        with pytest.raises(BundleError, match="do not match"):
+            ModelBundle(bundle_copy).load()
+
+    @pytest.mark.parametrize(
+        "overwrite,expectation",
+        [(False, pytest.raises(FileExistsError)), (True, does_not_raise())],
+    )
+    def test_build_overwrite(self, tmp_path, overwrite, expectation):
+        file = tmp_path / "model.tqb"
+        file.write_bytes(b"")
+        language_model = tmp_path / "lid.ftz"
+        language_model.write_bytes(LANGUAGE_MODEL)
+
+        with expectation:
+            ModelBundle.build(
+                file,
+                LanguageResources.for_language(DEFAULT_LANGUAGE),
+                language_model,
+                overwrite=overwrite,
+            )
+
+    def test_build_missing(self, tmp_path):
+        with pytest.raises(FileNotFoundError, match="lid.ftz"):
+            ModelBundle.build(
+                tmp_path / "model.tqb",
+                LanguageResources.for_language(DEFAULT_LANGUAGE),
+                tmp_path / "lid.ftz",
+            )
+
+
+class TestPipelineFromBundle:
+    def test_classify(self, bundle_file, monkeypatch):
+        monkeypatch.setattr(
+            bundle_module, "FastTextLanguageClassifier", DutchClassifier
+        )
+        featurizer, pipeline = LanguageResources.for_language(DEFAULT_LANGUAGE).load()
+        expected = Pipeline(pipeline, featurizer, language_classifier=DutchClassifier())
+
+        assert [
+            Pipeline.from_bundle(bundle_file).classify_with_scores(text)
+            for text in TEXTS
+        ] == [expected.classify_with_scores(text) for text in TEXTS]
+
+    def test_language_classifier(self, bundle_file, monkeypatch):
+        monkeypatch.setattr(bundle_module, "FastTextLanguageClassifier", pytest.fail)
+        language_classifier = DutchClassifier()
+
+        pipeline = Pipeline.from_bundle(
+            bundle_file, language_classifier=language_classifier
+        )
+
+        assert pipeline.language_classifier is language_classifier
+
+    def test_invalid(self, tmp_path):
+        file = tmp_path / "model.tqb"
+        file.write_bytes(b"not a bundle")
+
+        with pytest.raises(BundleError):
+            Pipeline.from_bundle(file)
@@ -0,0 +1,144 @@
+from contextlib import nullcontext as does_not_raise
+import joblib
+import pandas as pd
+import pytest
+from text_quality.classifier.cascade import Cascade
+from text_quality.classifier.cascade import ExpensiveFeature
+from text_quality.settings import PIPELINE_FILE
+
+
+class TestExpensiveFeature:
+    @pytest.mark.parametrize(
+        "expensive, features, expected",
+        [
+            (ExpensiveFeature("dict_score"), {"dict_score_gt": 0.5}, (0.0, 1.0)),
+            (
+                ExpensiveFeature("dict_score", "dict_score_gt", -0.25, 0.25),
+                {"dict_score_gt": 0.5},
+                (0.25, 0.75),
+            ),
+            (
+                ExpensiveFeature("dict_score", "dict_score_gt", -0.25, 0.25),
+                {"dict_score_gt": 0.9},
+                (0.65, 1.0),
+            ),
+        ],
+    )
+    def test_bounds(self, expensive, features, expected):
+        assert expensive.bounds(features) == pytest.approx(expected)
+
+    def test_calibrate(self):
+        features = pd.DataFrame(
+            {"dict_score": [0.1 * i for i in range(11)], "dict_score_gt": [0.5] * 11}
+        )
+        expensive = ExpensiveFeature.calibrate(
+            features, "dict_score", "dict_score_gt", coverage=0.8
+        )
+
+        assert expensive.name == "dict_score"
+        assert expensive.proxy == "dict_score_gt"
+        assert expensive.lower == pytest.approx(-0.4)
+        assert expensive.upper == pytest.approx(0.4)
+
+
+class TestCascade:
+    @pytest.mark.parametrize(
+        "grid_size, expected_exception",
+        [
+            (2, does_not_raise()),
+            (1, pytest.raises(ValueError, match="Invalid grid size: 1")),
+        ],
+    )
+    def test_init(self, grid_size, expected_exception):
+        with expected_exception:
+            Cascade(grid_size=grid_size)
+
+    def test_init_groups(self):
+        with pytest.raises(ValueError, match="Invalid number of groups: 1"):
+            Cascade(groups=1)
+
+    def test_decide(self):
+        pipeline = joblib.load(PIPELINE_FILE)
+        cascade = Cascade()
+        features = [
+            {"dict_score_gt": 1.0, "n_gram_score": 0.0, "garbage_score": 0.0},
+            {"dict_score_gt": 1.0, "n_gram_score": 0.0, "garbage_score": 0.0},
+        ]
+        bounds = [(0.95, 0.95), (0.0, 1.0)]
+
+        decisions = cascade.decide(pipeline, features, bounds)
+
+        expected = pipeline.predict(
+            pd.DataFrame(
+                [features[0] | {"dict_score": 0.95}],
+                columns=pipeline.feature_names_in_,
+            )
+        )[0]
+        assert decisions[0].quality == expected
+        assert 0 < decisions[0].confidence <= 1
+        assert decisions[1] is None or decisions[1].quality == expected
+
+    def test_decide_empty(self):
+        assert Cascade().decide(joblib.load(PIPELINE_FILE), [], []) == []
+
+    @pytest.mark.parametrize(
+        "sample_size, n_tokens, expected",
+        [
+            (4, 2, ["t0", "t1"]),
+            (4, 4, ["t0", "t1", "t2", "t3"]),
+            (4, 8, ["t0", "t2", "t4", "t6"]),
+            (3, 10, ["t0", "t3", "t6"]),
+        ],
+    )
+    def test_sample(self, sample_size, n_tokens, expected):
+        tokens = [f"t{i}" for i in range(n_tokens)]
+        assert Cascade(sample_size=sample_size).sample(tokens) == expected
+
+    def test_sample_groups(self):
+        tokens = [f"t{i}" for i in range(8)]
+        groups = Cascade(sample_size=4, groups=2).sample_groups(tokens)
+
+        assert groups == [["t0", "t4"], ["t2", "t6"]]
+
+    @pytest.mark.parametrize(
+        "group_counts, n_sampled, expected",
+        [
+            ([(5, 10), (5, 10)], 20, 20),  # no variation between the groups
+            ([(0, 10), (0, 10)], 20, 20),
+            ([(10, 10), (0, 10)], 20, 1),  # fully correlated characters
+            ([(1, 2), (0, 2), (1, 2), (2, 2)], 8, 6),
+            (
+                [(5, 10), (4, 10), (5, 10), (6, 10)],
+                8,
+                8,
+            ),  # capped at the number of tokens
+        ],
+    )
+    def test_effective_size(self, group_counts, n_sampled, expected):
+        assert Cascade.effective_size(group_counts, n_sampled) == pytest.approx(
+            expected
+        )
+
+    @pytest.mark.parametrize(
+        "estimate, n_sampled, n_total",
+        [(0.5, 100, 1000), (0.0, 100, 1000), (1.0, 200, 10000), (0.9, 50, 60)],
+    )
+    def test_sample_bounds(self, estimate, n_sampled, n_total):
+        lower, upper = Cascade().sample_bounds(estimate, n_sampled, n_total)
+
+        assert 0.0 <= lower <= estimate <= upper <= 1.0
+        assert lower < upper
+
+    def test_sample_bounds_narrowing(self):
+        cascade = Cascade()
+
+        small_lower, small_upper = cascade.sample_bounds(0.5, 100, 10000)
+        large_lower, large_upper = cascade.sample_bounds(0.5, 1000, 10000)
+        finite_lower, finite_upper = cascade.sample_bounds(0.5, 100, 110)
+
+        assert large_upper - large_lower < small_upper - small_lower
+        assert finite_upper - finite_lower < small_upper - small_lower
+
+    @pytest.mark.parametrize("n_sampled, n_total", [(100, 100), (0, 100)])
+    def test_sample_bounds_exact(self, n_sampled, n_total):
+        assert Cascade().sample_bounds(0.3, n_sampled, n_total) == (0.3, 0.3)
@@ -0,0 +1,141 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.classifier.duplicates import DuplicateIndex
+from text_quality.classifier.duplicates import lsh_bands
+
+
+@pytest.fixture
+def tokens():
+    rnd = random.Random(0)
+    return [f"token{rnd.randrange(10000)}" for _ in range(300)]
+
+
+def changed(tokens, n):
+    """Replace the first n tokens."""
+    return [f"changed{i}" for i in range(n)] + tokens[n:]
+
+
+def renamed(tokens, page):
+    """The tokens of a different page."""
+    return [f"page{page}-{token}" for token in tokens]
+
+
+@pytest.mark.parametrize(
+    "num_perm, threshold, expected",
+    [(128, 0.9, (8, 16)), (128, 0.8, (16, 8)), (128, 0.5, (32, 4)), (1, 0.1, (1, 1))],
+)
+def test_lsh_bands(num_perm, threshold, expected):
+    assert lsh_bands(num_perm, threshold) == expected
+
+
+class TestDuplicateIndex:
+    @pytest.mark.parametrize(
+        "kwargs, expected_exception",
+        [
+            ({}, does_not_raise()),
+            ({"threshold": 0}, pytest.raises(ValueError, match="threshold")),
+            ({"num_perm": 0}, pytest.raises(ValueError, match="hash functions")),
+            ({"max_entries": 0}, pytest.raises(ValueError, match="entries")),
+        ],
+    )
+    def test_init(self, kwargs, expected_exception):
+        with expected_exception:
+            DuplicateIndex(**kwargs)
+
+    @pytest.mark.parametrize("n_changed", [0, 5, 30, 150])
+    def test_similarity(self, tokens, n_changed):
+        index = DuplicateIndex()
+        other = changed(tokens, n_changed)
+        jaccard = len(set(tokens) & set(other)) / len(set(tokens) | set(other))
+
+        similarity = index.similarity(index.signature(tokens), index.signature(other))
+
+        assert similarity == pytest.approx(jaccard, abs=0.1)
+
+    def test_signature(self, tokens):
+        index = DuplicateIndex()
+
+        assert (index.signature(tokens) == index.signature(tokens[::-1])).all()
+        assert (
+            index.signature(tokens) == DuplicateIndex(seed=0).signature(tokens)
+        ).all()
+        assert not (
+            index.signature(tokens) == DuplicateIndex(seed=1).signature(tokens)
+        ).all()
+
+    @pytest.mark.parametrize(
+        "n_changed, expected", [(0, "page1"), (5, "page1"), (150, None)]
+    )
+    def test_query(self, tokens, n_changed, expected):
+        index = DuplicateIndex()
+        index.add(index.signature(tokens), "page1")
+        index.add(index.signature(changed(tokens, 300)), "page2")
+
+        match = index.query(index.signature(changed(tokens, n_changed)))
+
+        if expected is None:
+            assert match is None
+        else:
+            assert match.result == expected
+            assert match.similarity >= index.threshold
+
+    def test_max_entries(self, tokens):
+        index = DuplicateIndex(max_entries=10)
+
+        for i in range(20):
+            index.add(index.signature(renamed(tokens, i)), i)
+
+        assert len(index) == index.in_memory <= 10
+        assert index.query(index.signature(renamed(tokens, 0))) is None
+        assert index.query(index.signature(renamed(tokens, 19))).result == 19
+
+    def test_spill(self, tokens, tmp_path):
+        spill_file = tmp_path / "index.sqlite"
+        index = DuplicateIndex(max_entries=10, spill_file=spill_file)
+
+        for i in range(20):
+            index.add(index.signature(renamed(tokens, i)), [i, {"score": 0.5}])
+
+        assert len(index) == 20
+        assert index.in_memory <= 10
+        assert index.query(index.signature(renamed(tokens, 0))).result == [
+            0,
+            {"score": 0.5},
+        ]
+        index.close()
+
+        reopened = DuplicateIndex(max_entries=10, spill_file=spill_file)
+        assert len(reopened) == 20
+        assert reopened.query(index.signature(renamed(tokens, 19))).result == [
+            19,
+            {"score": 0.5},
+        ]
+        reopened.add(reopened.signature(tokens), [20, {}])
+        reopened.close()
+        assert len(DuplicateIndex(spill_file=spill_file)) == 21
+
+    def test_spill_parameters(self, tmp_path):
+        spill_file = tmp_path / "index.sqlite"
+        DuplicateIndex(spill_file=spill_file).close()
+
+        with pytest.raises(ValueError, match="other parameters"):
+            DuplicateIndex(num_perm=64, spill_file=spill_file)
+
+    def test_threads(self, tokens, tmp_path):
+        index = DuplicateIndex(max_entries=10, spill_file=tmp_path / "index.sqlite")
+        barrier = threading.Barrier(8)
+
+        def add(i):
+            barrier.wait(timeout=10)
+            for j in range(10):
+                signature = index.signature(renamed(tokens, 10 * i + j))
+                index.add(signature, 10 * i + j)
+                index.query(signature)
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(add, range(8)))
+
+        assert len(index) == 80
@@ -1,13 +1,35 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import nullcontext as does_not_raise
 import joblib
 import pytest
 import sklearn
+from pagexml.model.physical_document_model import Coords
 from pagexml.model.physical_document_model import PageXMLScan
 from pagexml.model.physical_document_model import PageXMLTextLine
+from pagexml.model.physical_document_model import PageXMLTextRegion
+from text_quality.classifier.budget import PageBudget
+from text_quality.classifier.cascade import SAMPLED_SUFFIX
+from text_quality.classifier.cascade import Cascade
+from text_quality.classifier.cascade import ExpensiveFeature
+from text_quality.classifier.duplicates import DuplicateIndex
 from text_quality.classifier.pipeline import ClassifierScores, Reason
 from text_quality.classifier.pipeline import Pipeline
 from text_quality.classifier.pipeline import default_scores_dict
+from text_quality.classifier.registry import LanguageBundle
+from text_quality.classifier.registry import LanguageRegistry
+from text_quality.corpus.parallel import ordered_map
+from text_quality.feature.featurize import Featurizer
 from text_quality.feature.featurize import Scorers
+from text_quality.feature.sampling import TokenSampler
+from text_quality.feature.tokenizer import NautilusOcrTokenizer
+from text_quality.language.classifier import AssumedLanguageClassifier
+from text_quality.language.classifier import LanguageStrategy
+from text_quality.language.classifier import LazyLanguageClassifier
+from text_quality.language.prescreen import PrescreenLanguageClassifier
+from text_quality.monitoring.metrics import Metrics
+from text_quality.monitoring.timing import AggregatingSink
+from text_quality.monitoring.timing import Timer
 from text_quality.page.page import Page
 from text_quality.settings import PIPELINE_FILE
 
@@ -70,8 +92,14 @@ class TestPipeline:
                     garbage_score=0,
                     n_characters=0,
                     n_tokens=0,
+                    n_sampled=0,
                     language="0",
                     language_confidence=0.0,
+                    scorers="",
+                    dict_score_error=0.0,
+                    dict_score_gt_error=0.0,
+                    n_gram_score_error=0.0,
+                    garbage_score_error=0.0,
                 ),
                 Reason.EMPTY,
             ),
@@ -86,8 +114,14 @@ class TestPipeline:
                     garbage_score=0,
                     n_characters=21,
                     n_tokens=3,
+                    n_sampled=3,
                     language="nl",
                     language_confidence=1.0,
+                    scorers="dict_score,dict_score_gt,n_gram_score,garbage_score",
+                    dict_score_error=0.0,
+                    dict_score_gt_error=0.0,
+                    n_gram_score_error=0.0,
+                    garbage_score_error=0.0,
                 ),
                 Reason.CLASSIFIER,
             ),
@@ -102,8 +136,14 @@ class TestPipeline:
                     garbage_score=0,
                     n_characters=4,
                     n_tokens=0,
+                    n_sampled=0,
                     language="0",
                     language_confidence=0.0,
+                    scorers="",
+                    dict_score_error=0.0,
+                    dict_score_gt_error=0.0,
+                    n_gram_score_error=0.0,
+                    garbage_score_error=0.0,
                 ),
                 Reason.SHORT_COLUMNS,
             ),
@@ -120,8 +160,14 @@ class TestPipeline:
                     garbage_score=0,
                     n_characters=21,
                     n_tokens=3,
+                    n_sampled=3,
                     language="nl",
                     language_confidence=1.0,
+                    scorers="dict_score,dict_score_gt,n_gram_score,garbage_score",
+                    dict_score_error=0.0,
+                    dict_score_gt_error=0.0,
+                    n_gram_score_error=0.0,
+                    garbage_score_error=0.0,
                 ),
                 Reason.CLASSIFIER,
             ),
@@ -136,11 +182,39 @@ class TestPipeline:
                     garbage_score=0,
                     n_characters=49,
                     n_tokens=0,
+                    n_sampled=0,
                     language="0",
                     language_confidence=0.0,
+                    scorers="",
+                    dict_score_error=0.0,
+                    dict_score_gt_error=0.0,
+                    n_gram_score_error=0.0,
+                    garbage_score_error=0.0,
                 ),
                 Reason.SHORT_COLUMNS,
             ),
+            (
+                Page(PageXMLScan()),
+                0,
+                ClassifierScores(
+                    confidence=1,
+                    dict_score=0,
+                    dict_score_gt=0,
+                    n_gram_score=0,
+                    garbage_score=0,
+                    n_characters=0,
+                    n_tokens=0,
+                    n_sampled=0,
+                    language="0",
+                    language_confidence=0.0,
+                    scorers="",
+                    dict_score_error=0.0,
+                    dict_score_gt_error=0.0,
+                    n_gram_score_error=0.0,
+                    garbage_score_error=0.0,
+                ),
+                Reason.EMPTY,
+            ),
         ],
     )
     # pylint: disable=too-many-arguments
@@ -152,6 +226,445 @@ class TestPipeline:
         assert scores == pytest.approx(expected_scores)
         assert reason == expected_reason
 
+    def test_classify_batch_with_scores(self, pipeline):
+        pages = [
+            "",
+            "een Nederlandse tekst",
+            Page(PageXMLScan(lines=[PageXMLTextLine(text="test")])),
+            "nog een Nederlandse tekst",
+        ]
+
+        results = pipeline.classify_batch_with_scores(pages)
+
+        assert len(results) == len(pages)
+        for page, (quality, scores, reason) in zip(pages, results):
+            expected_quality, expected_scores, expected_reason = (
+                pipeline.classify_with_scores(page)
+            )
+            assert quality == expected_quality
+            assert scores == pytest.approx(expected_scores)
+            assert reason == expected_reason
+
+    def test_languages(self, sklearn_pipeline, featurizer):
+        loads = []
+        registry = LanguageRegistry()
+        registry.register(
+            "en",
+            lambda: loads.append("en") or LanguageBundle(featurizer, sklearn_pipeline),
+        )
+        pipeline = Pipeline(sklearn_pipeline, featurizer, registry=registry)
+        english = "This is an English text about the weather."
+
+        assert pipeline.languages == ["nl", "en"]
+        assert loads == []
+
+        quality, scores, reason = pipeline.classify_with_scores(english)
+        assert reason == Reason.CLASSIFIER
+        assert scores["language"] == "en"
+        assert quality in (1, 2, 3)
+
+        assert pipeline.classify(english) == quality
+        assert loads == ["en"]
+
+    def test_unsupported_language(self, pipeline):
+        quality, scores, reason = pipeline.classify_with_scores(
+            "This is an English text about the weather."
+        )
+
+        assert quality == 0
+        assert reason == Reason.LANGUAGE
+        assert scores["language"] == "en"
+
+    def test_language_strategy_assume(self, sklearn_pipeline, featurizer):
+        pipeline = Pipeline(
+            sklearn_pipeline,
+            featurizer,
+            language_classifier=LazyLanguageClassifier(pytest.fail),
+            language_strategy=LanguageStrategy.ASSUME,
+        )
+
+        _, scores, reason = pipeline.classify_with_scores(
+            "This is an English text about the weather."
+        )
+
+        assert reason == Reason.CLASSIFIER
+        assert (scores["language"], scores["language_confidence"]) == ("nl", 1.0)
+
+    def test_language_strategy_prescreen(self, sklearn_pipeline, featurizer):
+        fasttext = LazyLanguageClassifier(lambda: AssumedLanguageClassifier("en"))
+        pipeline = Pipeline(
+            sklearn_pipeline,
+            featurizer,
+            language_classifier=fasttext,
+            language_strategy=LanguageStrategy.PRESCREEN,
+        )
+        dutch = "op deeser den handen is onse op\nte onse waar gekomen zoo is\nt 1a per 't gh@ x1 ,, 19 zzkq"
+
+        _, scores, reason = pipeline.classify_with_scores(dutch)
+        assert reason == Reason.CLASSIFIER
+        assert scores["language"] == "nl"
+        assert not fasttext.loaded
+
+        _, scores, reason = pipeline.classify_with_scores(
+            "This is an English text about the weather."
+        )
+        assert reason == Reason.LANGUAGE
+        assert scores["language"] == "en"
+        assert fasttext.loaded
+
+        assert isinstance(pipeline.language_classifier, PrescreenLanguageClassifier)
+        assert pipeline.language_classifier.summary() == {"accepted": 1, "fallback": 1}
+
+    def test_language_strategy_prescreen_scorers(self, sklearn_pipeline, featurizer):
+        scorers = dict(featurizer.scorers)
+        del scorers["n_gram_score"]
+
+        with pytest.raises(ValueError):
+            Pipeline(
+                sklearn_pipeline,
+                Featurizer(scorers, NautilusOcrTokenizer()),
+                language_strategy=LanguageStrategy.PRESCREEN,
+            )
+
+    def test_classify_batch_by_language(
+        self, sklearn_pipeline, featurizer, monkeypatch
+    ):
+        registry = LanguageRegistry()
+        registry.register("en", lambda: LanguageBundle(featurizer, sklearn_pipeline))
+        pipeline = Pipeline(sklearn_pipeline, featurizer, registry=registry)
+
+        batch_sizes = []
+        predict = sklearn_pipeline.predict
+        monkeypatch.setattr(
+            sklearn_pipeline,
+            "predict",
+            lambda features: batch_sizes.append(len(features)) or predict(features),
+        )
+        pages = [
+            "een Nederlandse tekst",
+            "This is an English text about the weather.",
+            "nog een Nederlandse tekst",
+            "Another English text about the weather.",
+        ]
+
+        results = pipeline.classify_batch_with_scores(pages)
+
+        assert batch_sizes == [2, 2]
+        assert [scores["language"] for _, scores, _ in results] == [
+            "nl",
+            "en",
+            "nl",
+            "en",
+        ]
+        assert all(reason == Reason.CLASSIFIER for _, _, reason in results)
+
+    @pytest.mark.parametrize(
+        "cascade",
+        [
+            Cascade(),
+            Cascade(sample_size=0),
+            Cascade(ExpensiveFeature("dict_score", "dict_score_gt", -0.1, 0.1)),
+            Cascade(sample_size=2),
+        ],
+    )
+    def test_classify_cascade(self, sklearn_pipeline, featurizer, cascade):
+        exact = Pipeline(sklearn_pipeline, featurizer)
+        pipeline = Pipeline(sklearn_pipeline, featurizer, cascade=cascade)
+        pages = [
+            "",
+            "een Nederlandse tekst",
+            "nog een Nederlandse tekst " * 20,
+            "xqz vbnm qwrtz plkj " * 10,
+            Page(PageXMLScan(lines=[PageXMLTextLine(text="een Nederlandse tekst")])),
+        ]
+
+        results = pipeline.classify_batch_with_scores(pages)
+
+        for (
+            page,
+            (quality, scores, reason),
+            (
+                exact_quality,
+                exact_scores,
+                exact_reason,
+            ),
+        ) in zip(pages, results, exact.classify_batch_with_scores(pages)):
+            assert reason == exact_reason
+            assert pipeline.classify(page) == quality
+            if reason != Reason.CLASSIFIER:
+                assert scores == pytest.approx(exact_scores)
+                continue
+
+            for feature in ("dict_score_gt", "n_gram_score", "garbage_score"):
+                assert scores[feature] == pytest.approx(exact_scores[feature])
+            scorers = scores["scorers"].split(",")
+            assert scorers[:3] == ["dict_score_gt", "n_gram_score", "garbage_score"]
+            if "dict_score" in scorers:
+                assert quality == exact_quality
+                assert scores == pytest.approx(
+                    exact_scores | {"scorers": scores["scorers"]}
+                )
+            elif "dict_score" + SAMPLED_SUFFIX not in scorers:
+                assert scores["dict_score"] != scores["dict_score"]  # NaN
+
+    def test_classify_cascade_skips_scorer(
+        self, sklearn_pipeline, featurizer, monkeypatch
+    ):
+        """A cascade with a point interval never needs the expensive scorer."""
+        pipeline = Pipeline(
+            sklearn_pipeline,
+            featurizer,
+            cascade=Cascade(ExpensiveFeature("dict_score", "dict_score_gt", 0, 0)),
+        )
+        counted = []
+        count = featurizer.count
+        monkeypatch.setattr(
+            featurizer,
+            "count",
+            lambda tokens, features=None: counted.append(features)
+            or count(tokens, features),
+        )
+
+        quality, scores, reason = pipeline.classify_with_scores("een Nederlandse tekst")
+
+        assert reason == Reason.CLASSIFIER
+        assert quality in (1, 2, 3, 4)
+        assert scores["scorers"] == "dict_score_gt,n_gram_score,garbage_score"
+        assert counted == [["dict_score_gt", "n_gram_score", "garbage_score"]]
+
+    @pytest.mark.parametrize("cascade", [None, Cascade()])
+    def test_classify_sampled(self, sklearn_pipeline, featurizer, cascade):
+        # pylint: disable=protected-access
+        sampler = TokenSampler(0.05)
+        sampling_featurizer = Featurizer(
+            featurizer._scorers, featurizer._tokenizer, sampler=sampler
+        )
+        pipeline = Pipeline(sklearn_pipeline, sampling_featurizer, cascade=cascade)
+        short_text = "een Nederlandse tekst"
+        long_text = "een Nederlandse tekst met 3 woorden. " * 1000
+
+        (_, short_scores, _), (_, long_scores, reason) = (
+            pipeline.classify_batch_with_scores([short_text, long_text])
+        )
+
+        assert short_scores["n_sampled"] == short_scores["n_tokens"] == 3
+        assert reason == Reason.CLASSIFIER
+        assert long_scores["n_sampled"] < long_scores["n_tokens"]
+        _, exact_scores, _ = Pipeline(
+            sklearn_pipeline, featurizer
+        ).classify_with_scores(long_text)
+        for feature in long_scores["scorers"].split(","):
+            feature = feature.removesuffix(SAMPLED_SUFFIX)
+            assert 0 <= long_scores[f"{feature}_error"] <= 0.1
+            assert long_scores[feature] == pytest.approx(
+                exact_scores[feature], abs=long_scores[f"{feature}_error"] + 1e-9
+            )
+
+    def test_classify_budget(self, sklearn_pipeline, featurizer):
+        # pylint: disable=protected-access
+        budget = PageBudget(0.01, min_sample=20)
+        pipeline = Pipeline(sklearn_pipeline, featurizer, budget=budget)
+        short_text = "een Nederlandse tekst"
+        long_text = "een Nederlandse tekst met 3 woorden. " * 100
+
+        _, short_scores, short_reason = pipeline.classify_with_scores(short_text)
+        budget._measure("dict_score", 1.0, 1)
+        quality, long_scores, long_reason = pipeline.classify_with_scores(long_text)
+
+        assert short_reason == Reason.CLASSIFIER
+        assert short_scores["n_sampled"] == short_scores["n_tokens"] == 3
+        assert long_reason == Reason.BUDGET
+        assert quality in (1, 2, 3, 4)
+        assert long_scores["scorers"].split(",")[0] == "dict_score" + SAMPLED_SUFFIX
+        assert 20 <= long_scores["n_sampled"] < long_scores["n_tokens"]
+        assert pipeline.classify(long_text) == quality
+
+    def test_budget_cascade(self, sklearn_pipeline, featurizer):
+        with pytest.raises(ValueError):
+            Pipeline(
+                sklearn_pipeline,
+                featurizer,
+                cascade=Cascade(),
+                budget=PageBudget(0.01),
+            )
+
+    @pytest.mark.parametrize("cascade", [None, Cascade()])
+    def test_classify_threads(self, sklearn_pipeline, featurizer, cascade):
+        """Stress test: classifying in a thread pool gives the same results as serially."""
+        timer = Timer([AggregatingSink()])
+        pipeline = Pipeline(sklearn_pipeline, featurizer, timer=timer, cascade=cascade)
+        rnd = random.Random(0)
+        words = [
+            "een",
+            "Nederlandse",
+            "tekst",
+            "met",
+            "woorden",
+            "xqz",
+            "ſ",
+            "3",
+            "...",
+        ]
+        texts = [
+            " ".join(rnd.choice(words) for _ in range(rnd.randint(0, 60)))
+            for _ in range(200)
+        ]
+        pages = texts + [
+            Page(PageXMLScan(lines=[PageXMLTextLine(text=text)])) for text in texts[:50]
+        ]
+
+        def classify(page):
+            with timer.page("page"):
+                return pipeline.classify_with_scores(page)
+
+        expected = [pipeline.classify_with_scores(page) for page in pages]
+        with ThreadPoolExecutor(8) as executor:
+            results = list(ordered_map(classify, pages, executor, max_pending=32))
+
+        assert len(results) == len(expected)
+        for (quality, scores, reason), (
+            expected_quality,
+            expected_scores,
+            expected_reason,
+        ) in zip(results, expected):
+            assert quality == expected_quality
+            assert scores == pytest.approx(expected_scores, nan_ok=True)
+            assert reason == expected_reason
+
+    @pytest.mark.parametrize("cascade", [None, Cascade()])
+    def test_classify_metrics(self, sklearn_pipeline, featurizer, cascade):
+        metrics = Metrics()
+        pipeline = Pipeline(
+            sklearn_pipeline, featurizer, cascade=cascade, metrics=metrics
+        )
+
+        pipeline.classify("een Nederlandse tekst")
+        pipeline.classify_batch_with_scores(["", "een Nederlandse tekst met woorden"])
+
+        summary = metrics.summary()
+        assert summary["pages_total"] == {"reason=CLASSIFIER": 2, "reason=EMPTY": 1}
+        assert summary["tokens_total"] == 8
+        assert summary["language_cache_hits_total"] == 2
+        assert summary["language_cache_misses_total"] == 0
+        assert summary["language_cache_hit_ratio"] == 1.0
+
+    @pytest.mark.parametrize("cascade", [None, Cascade()])
+    def test_classify_duplicates(self, sklearn_pipeline, featurizer, cascade):
+        pipeline = Pipeline(
+            sklearn_pipeline, featurizer, cascade=cascade, duplicates=DuplicateIndex()
+        )
+        text = (
+            "Op heden compareerde voor mij, notaris, residerende binnen deze stad, "
+            "en de nagenoemde getuigen, de eerzame Jan Pieterszoon, koopman, wonende "
+            "alhier, dewelke verklaarde te verkopen aan Claes Jansen, schipper, "
+            "een huis en erf staande aan de oostzijde van de Nieuwe Gracht"
+        )
+        near_duplicate = text.replace("schipper", "schiper")
+        other = "een heel andere tekst, over iets anders"
+
+        results = pipeline.classify_batch_with_scores(
+            [text, near_duplicate, other, text + " ook"]
+        )
+        (quality, scores, reason), *_ = pipeline.classify_batch_with_scores(
+            [Page(PageXMLScan(lines=[PageXMLTextLine(text=near_duplicate)]))]
+        )
+
+        assert [reason for _, _, reason in results] == [
+            Reason.CLASSIFIER,
+            Reason.DUPLICATE,
+            Reason.CLASSIFIER,
+            Reason.DUPLICATE,
+        ]
+        assert results[1][0] == results[3][0] == results[0][0]
+        assert results[3][1]["n_tokens"] == results[0][1]["n_tokens"] + 1
+        assert results[3][1]["confidence"] == results[0][1]["confidence"]
+        assert reason == Reason.DUPLICATE
+        assert quality == results[0][0]
+        assert scores["n_characters"] == len(near_duplicate)
+
+    def test_classify_duplicates_budget(
+        self, sklearn_pipeline, featurizer, monkeypatch
+    ):
+        # tokens longer than 10 characters degrade the pages
+        budget = PageBudget(10.0, max_token_length=10)
+        elapsed = []
+        counts = budget.counts
+        monkeypatch.setattr(
+            budget,
+            "counts",
+            lambda *args: elapsed.append(args[2]) or counts(*args),
+        )
+        pipeline = Pipeline(
+            sklearn_pipeline, featurizer, duplicates=DuplicateIndex(), budget=budget
+        )
+        text = (
+            "Op heden compareerde voor mij, notaris, residerende binnen deze stad, "
+            "en de nagenoemde getuigen, de eerzame Jan Pieterszoon, koopman, wonende "
+            "alhier, dewelke verklaarde te verkopen aan Claes Jansen, schipper"
+        )
+
+        results = pipeline.classify_batch_with_scores([text, text + " ook"])
+        (_, _, reason), *_ = pipeline.classify_batch_with_scores([text + " nog"])
+
+        assert [reason for _, _, reason in results] == [Reason.BUDGET, Reason.BUDGET]
+        assert reason == Reason.BUDGET  # classified again, not reused
+        assert len(elapsed) == 2
+        assert all(seconds > 0 for seconds in elapsed)
+
+    @pytest.mark.parametrize(
+        "page, expected_regions, expected_lines",
+        [
+            (Page(PageXMLScan()), [], []),
+            (
+                Page(
+                    PageXMLScan(
+                        text_regions=[
+                            PageXMLTextRegion(
+                                doc_id="r1",
+                                coords=Coords([(0, 0), (10, 0), (10, 10), (0, 10)]),
+                                lines=[
+                                    PageXMLTextLine(
+                                        doc_id="l1", text="een Nederlandse tekst"
+                                    ),
+                                    PageXMLTextLine(doc_id="l2", text="test"),
+                                ],
+                            ),
+                            PageXMLTextRegion(
+                                doc_id="r2",
+                                coords=Coords([(0, 20), (10, 20), (10, 30), (0, 30)]),
+                                lines=[PageXMLTextLine(doc_id="l3", text="ab")],
+                            ),
+                        ]
+                    )
+                ),
+                [("r1", Reason.CLASSIFIER), ("r2", Reason.SHORT_COLUMNS)],
+                [
+                    ("l1", Reason.CLASSIFIER),
+                    ("l2", Reason.SHORT_COLUMNS),
+                    ("l3", Reason.SHORT_COLUMNS),
+                ],
+            ),
+        ],
+    )
+    def test_classify_levels(self, pipeline, page, expected_regions, expected_lines):
+        classifications = pipeline.classify_levels(page)
+
+        quality, scores, reason = pipeline.classify_with_scores(page)
+        assert classifications["page"].quality == quality
+        assert classifications["page"].scores == pytest.approx(scores)
+        assert classifications["page"].reason == reason
+
+        assert [
+            (region.id, region.reason) for region in classifications["regions"]
+        ] == expected_regions
+        assert [
+            (line.id, line.reason) for line in classifications["lines"]
+        ] == expected_lines
+
+        for line in classifications["lines"]:
+            if line.reason == Reason.CLASSIFIER:
+                assert line.scores["language"] == scores["language"]
+
 
 @pytest.mark.parametrize(
     "default_value, fields, expected, expected_exception",
@@ -163,12 +676,18 @@ class TestPipeline:
                 confidence=0.0,
                 n_characters=0,
                 n_tokens=0,
+                n_sampled=0,
                 dict_score=0.0,
                 dict_score_gt=0.0,
                 n_gram_score=0.0,
                 garbage_score=0.0,
                 language="0",
                 language_confidence=0.0,
+                scorers="",
+                dict_score_error=0.0,
+                dict_score_gt_error=0.0,
+                n_gram_score_error=0.0,
+                garbage_score_error=0.0,
             ),
             does_not_raise(),
         ),
@@ -179,12 +698,18 @@ class TestPipeline:
                 confidence=1.0,
                 n_characters=1,
                 n_tokens=1,
+                n_sampled=1,
                 dict_score=1.0,
                 dict_score_gt=1.0,
                 n_gram_score=1.0,
                 garbage_score=1.0,
                 language="1",
                 language_confidence=1.0,
+                scorers="",
+                dict_score_error=1.0,
+                dict_score_gt_error=1.0,
+                n_gram_score_error=1.0,
+                garbage_score_error=1.0,
             ),
             does_not_raise(),
         ),
@@ -195,12 +720,18 @@ class TestPipeline:
                 confidence=1.0,
                 n_characters=1,
                 n_tokens=0,
+                n_sampled=0,
                 dict_score=0.0,
                 dict_score_gt=0.0,
                 n_gram_score=0.0,
                 garbage_score=0.0,
                 language="0",
                 language_confidence=0.0,
+                scorers="",
+                dict_score_error=0.0,
+                dict_score_gt_error=0.0,
+                n_gram_score_error=0.0,
+                garbage_score_error=0.0,
             ),
             does_not_raise(),
         ),
@@ -0,0 +1,195 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.classifier import registry as registry_module
+from text_quality.classifier.registry import LanguageBundle
+from text_quality.classifier.registry import LanguageRegistry
+from text_quality.classifier.registry import LanguageResources
+from text_quality.settings import DEFAULT_LANGUAGE
+
+
+class CountingLoader:
+    """A loader that returns a dummy bundle and counts its calls."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.calls = 0
+
+    def __call__(self) -> LanguageBundle:
+        self.calls += 1
+        return LanguageBundle(featurizer=self.name, pipeline=self.name)
+
+
+@pytest.fixture
+def loaders():
+    return {language: CountingLoader(language) for language in ("de", "fr", "en")}
+
+
+class TestLanguageRegistry:
+    def test_lazy_loading(self, loaders):
+        registry = LanguageRegistry()
+        for language, loader in loaders.items():
+            registry.register(language, loader)
+
+        assert registry.loaded == []
+        assert registry.get("de").featurizer == "de"
+        assert registry.get("de").featurizer == "de"
+        assert loaders["de"].calls == 1
+        assert loaders["fr"].calls == 0
+        assert registry.loaded == ["de"]
+
+    def test_threads(self):
+        barrier = threading.Barrier(8)
+        loader = CountingLoader("de")
+        registry = LanguageRegistry()
+        registry.register("de", loader)
+
+        def get(_):
+            barrier.wait(timeout=10)
+            return registry.get("de")
+
+        with ThreadPoolExecutor(8) as executor:
+            bundles = list(executor.map(get, range(8)))
+
+        assert loader.calls == 1
+        assert all(bundle is bundles[0] for bundle in bundles)
+
+    def test_threads_other_languages(self, loaders):
+        """Loading a bundle does not block getting or loading bundles for other languages."""
+        loading = threading.Event()
+        release = threading.Event()
+
+        def slow_loader():
+            loading.set()
+            release.wait(timeout=10)
+            return LanguageBundle("de", "de")
+
+        registry = LanguageRegistry()
+        registry.pin("nl", LanguageBundle("nl", "nl"))
+        registry.register("de", slow_loader)
+        registry.register("fr", loaders["fr"])
+        registry.get("fr")
+
+        with ThreadPoolExecutor(1) as executor:
+            future = executor.submit(registry.get, "de")
+            assert loading.wait(timeout=10)
+
+            assert registry.get("nl").featurizer == "nl"
+            assert registry.get("fr").featurizer == "fr"
+            assert registry.get("en") is None
+            registry.register("en", loaders["en"])
+            assert registry.get("en").featurizer == "en"
+            assert not future.done()
+
+            release.set()
+            assert future.result(timeout=10).featurizer == "de"
+
+    def test_unknown_language(self):
+        registry = LanguageRegistry()
+
+        assert "de" not in registry
+        assert registry.get("de") is None
+
+    def test_pin(self, loaders):
+        registry = LanguageRegistry()
+        registry.pin("nl", LanguageBundle("nl", "nl"))
+        registry.register("de", loaders["de"])
+
+        assert "nl" in registry
+        assert registry.languages == ["nl", "de"]
+        assert registry.get("nl").featurizer == "nl"
+
+    @pytest.mark.parametrize(
+        "budget,expected_loaded,expected_calls",
+        [
+            (None, ["nl", "fr", "en", "de"], {"de": 1, "fr": 1, "en": 1}),
+            (250, ["nl", "en", "de"], {"de": 1, "fr": 1, "en": 1}),
+            (150, ["nl", "de"], {"de": 3, "fr": 1, "en": 1}),
+            (0, ["nl", "de"], {"de": 3, "fr": 1, "en": 1}),
+        ],
+    )
+    def test_memory_budget(self, loaders, budget, expected_loaded, expected_calls):
+        registry = LanguageRegistry(budget)
+        registry.pin("nl", LanguageBundle("nl", "nl"))
+        for language, loader in loaders.items():
+            registry.register(language, loader, 100)
+
+        for language in ("de", "fr", "de", "en", "de"):
+            assert registry.get(language).featurizer == language
+
+        assert registry.loaded == expected_loaded
+        assert {
+            language: loader.calls for language, loader in loaders.items()
+        } == expected_calls
+
+    def test_memory_reload(self, loaders):
+        """Evicted bundles count with their estimated size when they are loaded again."""
+        registry = LanguageRegistry(250)
+        for language, loader in loaders.items():
+            registry.register(language, loader, 100)
+
+        for _ in range(3):
+            for language in loaders:
+                registry.get(language)
+                assert registry.memory <= 250
+
+        assert registry.memory == 200
+        assert registry.loaded == ["fr", "en"]
+        assert loaders["de"].calls == 3
+
+    @pytest.mark.parametrize(
+        "budget,expected_hits,expected_misses,expected_evictions",
+        [(None, 3, 3, 0), (150, 1, 5, 4)],
+    )
+    def test_counts(
+        self, loaders, budget, expected_hits, expected_misses, expected_evictions
+    ):
+        registry = LanguageRegistry(budget)
+        registry.pin("nl", LanguageBundle("nl", "nl"))
+        for language, loader in loaders.items():
+            registry.register(language, loader, 100)
+
+        for language in ("de", "fr", "de", "en", "de", "nl", "xx"):
+            registry.get(language)
+
+        assert registry.hits == expected_hits
+        assert registry.misses == expected_misses
+        assert registry.evictions == expected_evictions
+
+    @pytest.mark.parametrize(
+        "languages,expectation",
+        [
+            ([], does_not_raise()),
+            ([DEFAULT_LANGUAGE], does_not_raise()),
+            (["xx"], pytest.raises(FileNotFoundError)),
+        ],
+    )
+    def test_from_resources(self, languages, expectation):
+        with expectation:
+            assert LanguageRegistry.from_resources(languages).languages == languages
+
+
+class TestLanguageResources:
+    def test_for_default_language(self):
+        resources = LanguageResources.for_language(DEFAULT_LANGUAGE)
+
+        assert resources.missing() == []
+        assert resources.memory_estimate() > sum(
+            file.stat().st_size for file in resources.files()
+        )
+
+    def test_memory_estimate_gamma(self, monkeypatch):
+        resources = LanguageResources.for_language(DEFAULT_LANGUAGE)
+        estimate = resources.memory_estimate()
+
+        monkeypatch.setattr(registry_module, "Q_GRAMS_GAMMA", 10)
+
+        assert resources.memory_estimate() < estimate
+
+    def test_for_language(self):
+        resources = LanguageResources.for_language("de")
+
+        assert resources.token_dict_file.name == "de_voc.txt"
+        assert resources.pipeline_file.name == "pipeline_nn_de.joblib"
+        assert not any(file.name.startswith("de.") for file in resources.missing())
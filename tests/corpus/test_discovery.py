@@ -0,0 +1,73 @@
+import io
+from pathlib import Path
+import pytest
+from text_quality.corpus.discovery import read_file_list
+from text_quality.corpus.discovery import unique
+from text_quality.corpus.discovery import walk
+
+
+@pytest.fixture
+def directory(tmp_path) -> Path:
+    for file in ("1.xml", "2.txt", "a/3.xml", "a/b/4.xml", "c/5.xml", "c/6.XML"):
+        (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / file).touch()
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    "include, exclude, expected",
+    [
+        (["*.xml"], [], ["1.xml", "a/3.xml", "a/b/4.xml", "c/5.xml"]),
+        (["*.xml", "*.XML"], [], ["1.xml", "a/3.xml", "a/b/4.xml", "c/5.xml", "c/6.XML"]),
+        (["*.xml"], ["c"], ["1.xml", "a/3.xml", "a/b/4.xml"]),
+        (["*.xml"], ["a/b"], ["1.xml", "a/3.xml", "c/5.xml"]),
+        (["*.xml"], ["3.xml"], ["1.xml", "a/b/4.xml", "c/5.xml"]),
+        (["a/*.xml"], [], ["a/3.xml", "a/b/4.xml"]),
+        (["*.txt"], [], ["2.txt"]),
+        ([], [], []),
+    ],
+)
+def test_walk(directory, include, exclude, expected):
+    paths = walk(directory, include, exclude)
+
+    assert [Path(path).relative_to(directory).as_posix() for path in paths] == expected
+
+
+def test_walk_lazy(directory):
+    paths = walk(directory)
+
+    assert next(paths) == str(directory / "1.xml")
+
+
+def test_walk_missing_directory(tmp_path):
+    assert list(walk(tmp_path / "missing")) == []
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (b"", []),
+        (b"a.xml\nb.xml\n", ["a.xml", "b.xml"]),
+        (b"a.xml\r\nb.xml", ["a.xml", "b.xml"]),
+        (b"a.xml\n\nb.xml\n", ["a.xml", "b.xml"]),
+        (b"a.xml\0b c.xml\0", ["a.xml", "b c.xml"]),
+        (b"a\nb.xml\0c.xml", ["a\nb.xml", "c.xml"]),
+        ("é.xml\n".encode("utf-8"), ["é.xml"]),
+    ],
+)
+def test_read_file_list(content, expected):
+    assert list(read_file_list(io.BytesIO(content))) == expected
+
+
+def test_read_file_list_chunks():
+    paths = [f"directory/{i}.xml" for i in range(20000)]
+    content = "\n".join(paths).encode("utf-8")
+
+    assert list(read_file_list(io.BytesIO(content))) == paths
+
+
+def test_unique():
+    assert list(unique(["a.xml", Path("a.xml"), "b.xml", "./a.xml"])) == [
+        "a.xml",
+        "b.xml",
+    ]
@@ -0,0 +1,172 @@
+import csv
+import io
+import random
+from contextlib import nullcontext as does_not_raise
+from pathlib import Path
+import pytest
+from text_quality.corpus.estimate import FIELDNAMES
+from text_quality.corpus.estimate import OVERALL
+from text_quality.corpus.estimate import QualityEstimator
+from text_quality.corpus.estimate import stratum_of
+
+
+def corpus(estimator, strata):
+    """Add pages to the estimator; the quality class of a page is the last part of its path."""
+    for name, (population, proportions) in strata.items():
+        rnd = random.Random(name)
+        for i in range(population):
+            quality = rnd.choices(range(1, len(proportions) + 1), proportions)[0]
+            estimator.add(f"{name}/{i}/{quality}", name)
+
+
+def classify(paths):
+    return [int(path.rsplit("/", 1)[1]) for path in paths]
+
+
+class TestQualityEstimator:
+    def test_run(self):
+        estimator = QualityEstimator(precision=0.03)
+        strata = {
+            "a": (20000, [0.8, 0.15, 0.05]),
+            "b": (5000, [0.1, 0.2, 0.7]),
+            "c": (500, [0.3, 0.4, 0.3]),
+        }
+        corpus(estimator, strata)
+
+        overall = estimator.run(classify)
+
+        assert overall.population == 25500
+        assert overall.sampled < 2000
+        assert estimator.half_width(overall) <= 0.03
+        for quality in (1, 2, 3):
+            expected = (
+                sum(
+                    population * proportions[quality - 1]
+                    for population, proportions in strata.values()
+                )
+                / overall.population
+            )
+            proportion = overall.proportions[quality]
+            assert proportion.lower - 0.01 <= expected <= proportion.upper + 0.01
+
+    def test_stratum_precision(self):
+        estimator = QualityEstimator(precision=0.1, stratum_precision=0.05)
+        corpus(estimator, {"a": (10000, [0.5, 0.5]), "b": (10000, [0.9, 0.1])})
+
+        estimator.run(classify)
+
+        for estimate in estimator.estimates():
+            assert estimator.half_width(estimate) <= 0.06
+
+    def test_small_strata(self):
+        estimator = QualityEstimator()
+        corpus(estimator, {"a": (5, [0.5, 0.5]), "b": (40, [1.0])})
+
+        overall = estimator.run(classify)
+        small, large = estimator.estimates()
+
+        assert small.sampled == 5
+        assert estimator.half_width(small) == 0.0
+        assert 30 <= large.sampled <= 40
+        assert large.proportions[1].estimate == 1.0
+        assert estimator.half_width(overall) <= 0.02
+
+    def test_max_samples(self):
+        estimator = QualityEstimator(precision=0.01, max_samples=100)
+        corpus(estimator, {"a": (10000, [0.5, 0.5]), "b": (10000, [0.5, 0.5])})
+
+        overall = estimator.run(classify)
+
+        assert overall.sampled <= 100
+        assert estimator.half_width(overall) > 0.01
+
+    def test_failed(self):
+        estimator = QualityEstimator(initial=10)
+        corpus(estimator, {"a": (1000, [1.0])})
+        failures = iter([None] * 5)
+
+        def failing(paths):
+            return [next(failures, quality) for quality in classify(paths)]
+
+        overall = estimator.run(failing)
+
+        assert overall.failed == 5
+        assert overall.sampled >= 10
+
+    def test_draw(self):
+        estimator = QualityEstimator(initial=3)
+        corpus(estimator, {"a": (100, [1.0]), "b": (2, [1.0])})
+
+        batch = estimator.draw()
+
+        assert [stratum for stratum, _ in batch] == ["a"] * 3 + ["b"] * 2
+        assert len(set(batch)) == 5
+        assert QualityEstimator().draw() == []
+
+    def test_reservoir(self):
+        estimator = QualityEstimator(initial=10, precision=0.5, seed=1)
+        for i in range(1000):
+            estimator.add(str(i), "a")
+
+        paths = [int(path) for _, path in estimator.draw()]
+
+        assert estimator.capacity == 10
+        assert len(paths) == 10
+        assert max(paths) > 100
+
+    def test_to_csv(self):
+        estimator = QualityEstimator()
+        corpus(estimator, {"a": (10, [0.5, 0.5]), "b": (10, [1.0])})
+        estimator.run(classify)
+
+        output = io.StringIO()
+        assert estimator.to_csv(output) == 6
+
+        output.seek(0)
+        rows = list(csv.DictReader(output))
+        assert list(rows[0]) == FIELDNAMES
+        assert [(row["stratum"], row["quality_class"]) for row in rows] == [
+            ("a", "1"),
+            ("a", "2"),
+            ("b", "1"),
+            ("b", "2"),
+            (OVERALL, "1"),
+            (OVERALL, "2"),
+        ]
+        assert rows[2]["proportion"] == "1.0"
+        assert sum(int(row["pages"]) for row in rows[-2:]) == 20
+
+    def test_report(self):
+        estimator = QualityEstimator()
+        corpus(estimator, {"a": (10, [1.0])})
+        estimator.run(classify)
+
+        assert estimator.report().startswith("10 of 10 pages in 1 strata classified")
+
+    @pytest.mark.parametrize(
+        "kwargs,expectation",
+        [
+            ({}, does_not_raise()),
+            ({"precision": 0}, pytest.raises(ValueError)),
+            ({"stratum_precision": 1.5}, pytest.raises(ValueError)),
+            ({"confidence": 1}, pytest.raises(ValueError)),
+            ({"initial": 1}, pytest.raises(ValueError)),
+            ({"max_samples": 0}, pytest.raises(ValueError)),
+        ],
+    )
+    def test_invalid(self, kwargs, expectation):
+        with expectation:
+            QualityEstimator(**kwargs)
+
+
+@pytest.mark.parametrize(
+    "path,depth,expected",
+    [
+        ("root/a/b/page.xml", None, "root/a/b"),
+        ("root/a/b/page.xml", 1, "root/a"),
+        ("root/a/b/page.xml", 0, "root"),
+        ("root/page.xml", 1, "root"),
+    ],
+)
+def test_stratum_of(path, depth, expected):
+    assert stratum_of(path, "root", depth) == str(Path(expected))
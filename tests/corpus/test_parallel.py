@@ -0,0 +1,51 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import pytest
+from text_quality.corpus.parallel import gil_enabled
+from text_quality.corpus.parallel import ordered_map
+
+
+def test_gil_enabled():
+    assert isinstance(gil_enabled(), bool)
+
+
+@pytest.mark.parametrize("threads", [0, 1, 4])
+@pytest.mark.parametrize("max_pending", [None, 1, 3])
+def test_ordered_map(threads, max_pending):
+    items = list(range(50))
+
+    with ThreadPoolExecutor(threads) if threads else nullcontext() as executor:
+        results = list(ordered_map(lambda x: x * x, items, executor, max_pending))
+
+    assert results == [x * x for x in items]
+
+
+def test_ordered_map_lazy():
+    consumed = []
+    started = threading.Event()
+
+    def items():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    with ThreadPoolExecutor(2) as executor:
+        results = ordered_map(lambda x: started.set() or x, items(), executor, 5)
+        assert next(results) == 0
+        assert started.is_set()
+        assert len(consumed) <= 6
+        assert list(results) == list(range(1, 100))
+
+
+def test_ordered_map_exception():
+    def fail(x):
+        if x == 3:
+            raise ValueError(x)
+        return x
+
+    with ThreadPoolExecutor(2) as executor:
+        results = ordered_map(fail, range(10), executor, 2)
+        assert [next(results) for _ in range(3)] == [0, 1, 2]
+        with pytest.raises(ValueError):
+            next(results)
@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.corpus.prefetch import Prefetcher
+from text_quality.corpus.prefetch import file_size
+
+
+@pytest.mark.parametrize("max_items", [1, 3, 100])
+@pytest.mark.parametrize("workers", [1, 4])
+def test_map(max_items, workers):
+    with Prefetcher(
+        lambda x: x * x, max_items, workers=workers, size=lambda _: 1
+    ) as prefetcher:
+        results = list(prefetcher.map(range(50)))
+
+    assert results == [x * x for x in range(50)]
+    summary = prefetcher.summary()
+    assert summary["items"] == 50
+    assert summary["elapsed"] > 0
+
+
+def test_read_ahead():
+    read = []
+    lock = threading.Lock()
+
+    def record(x):
+        with lock:
+            read.append(x)
+        return x
+
+    with Prefetcher(record, 5, workers=2, size=lambda _: 0) as prefetcher:
+        results = prefetcher.map(range(100))
+        assert next(results) == 0
+        time.sleep(0.05)
+
+        # the items submitted before the first one was consumed, and the one after
+        assert 1 < len(read) <= 6
+        assert list(results) == list(range(1, 100))
+
+
+def test_max_bytes():
+    read = []
+
+    def record(x):
+        read.append(x)
+        return x
+
+    with Prefetcher(
+        record, 100, workers=1, max_bytes=25, size=lambda _: 10
+    ) as prefetcher:
+        results = prefetcher.map(range(100))
+        next(results)
+        time.sleep(0.05)
+
+        # reading stops once 30 bytes are held
+        assert len(read) <= 4
+        assert list(results) == list(range(1, 100))
+
+
+def test_max_bytes_exceeded_by_single_items():
+    def read(x):
+        time.sleep(random.random() / 1000)
+        return x
+
+    with Prefetcher(read, 10, workers=4, max_bytes=1, size=lambda _: 10) as prefetcher:
+        assert list(prefetcher.map(range(200))) == list(range(200))
+
+
+def test_exception():
+    def fail(x):
+        if x == 3:
+            raise ValueError(x)
+        return x
+
+    with Prefetcher(fail, 2, workers=2, size=lambda _: 1) as prefetcher:
+        results = prefetcher.map(range(10))
+        assert [next(results) for _ in range(3)] == [0, 1, 2]
+        with pytest.raises(ValueError):
+            next(results)
+
+
+@pytest.mark.parametrize("read_delay,bound", [(0.02, "I/O-bound"), (0.0, "CPU-bound")])
+def test_report(read_delay, bound):
+    def read(x):
+        time.sleep(read_delay)
+        return x
+
+    with Prefetcher(read, 2, workers=1, size=lambda _: 2**20) as prefetcher:
+        for _ in prefetcher.map(range(10)):
+            time.sleep(0.002 if read_delay else 0.02)
+
+    summary = prefetcher.summary()
+    assert summary["bytes"] == 10 * 2**20
+    assert 0 < summary["reader_utilization"] <= 1
+    assert bound in prefetcher.report()
+
+
+def test_file_size(tmp_path):
+    file = tmp_path / "page.xml"
+    file.write_text("<xml/>")
+
+    assert file_size(file) == 6
+    assert file_size(tmp_path / "missing.xml") == 0
+
+
+@pytest.mark.parametrize(
+    "args,kwargs,expectation",
+    [
+        ((1,), {}, does_not_raise()),
+        ((0,), {}, pytest.raises(ValueError)),
+        ((1,), {"workers": 0}, pytest.raises(ValueError)),
+        ((1,), {"max_bytes": 0}, pytest.raises(ValueError)),
+    ],
+)
+def test_invalid(args, kwargs, expectation):
+    with expectation:
+        Prefetcher(lambda x: x, *args, **kwargs).close()
@@ -0,0 +1,64 @@
+import io
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.corpus import records
+from text_quality.corpus.records import TextRecord
+from text_quality.corpus.records import batched
+from text_quality.corpus.records import read_jsonl
+from text_quality.corpus.records import read_nul_separated
+
+
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        ("", []),
+        ('{"id": "a", "text": "text a"}\n', [TextRecord("a", "text a")]),
+        (
+            '{"id": 1, "text": "text 1"}\n\n{"id": "2", "text": ""}',
+            [TextRecord("1", "text 1"), TextRecord("2", "")],
+        ),
+        ('{"text": "text"}\n', [TextRecord("input.jsonl:1", "text")]),
+        ('invalid\n{"id": "a"}\n{"id": "b", "text": null}\n[]\n', []),
+    ],
+)
+def test_read_jsonl(content, expected):
+    file = io.StringIO(content)
+    file.name = "input.jsonl"
+
+    assert list(read_jsonl(file)) == expected
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1 << 16])
+@pytest.mark.parametrize(
+    "content, expected",
+    [
+        (b"", []),
+        (b"text", [TextRecord("input:1", "text")]),
+        (
+            "text 1\0\0tëxt 3\0".encode("utf-8"),
+            [
+                TextRecord("input:1", "text 1"),
+                TextRecord("input:2", ""),
+                TextRecord("input:3", "tëxt 3"),
+            ],
+        ),
+    ],
+)
+def test_read_nul_separated(monkeypatch, chunk_size, content, expected):
+    monkeypatch.setattr(records, "_CHUNK_SIZE", chunk_size)
+
+    assert list(read_nul_separated(io.BytesIO(content), "input")) == expected
+
+
+@pytest.mark.parametrize(
+    "items, size, expected, expected_exception",
+    [
+        ([], 2, [], does_not_raise()),
+        ([1, 2, 3], 2, [[1, 2], [3]], does_not_raise()),
+        ([1, 2], 2, [[1, 2]], does_not_raise()),
+        ([1], 0, None, pytest.raises(ValueError)),
+    ],
+)
+def test_batched(items, size, expected, expected_exception):
+    with expected_exception:
+        assert list(batched(iter(items), size)) == expected
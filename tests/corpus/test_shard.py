@@ -0,0 +1,119 @@
+import io
+from collections import Counter
+from contextlib import nullcontext as does_not_raise
+from pathlib import Path
+import pytest
+from text_quality.corpus.shard import MergeError
+from text_quality.corpus.shard import Shard
+from text_quality.corpus.shard import merge
+from text_quality.corpus.shard import shard_of
+
+
+class TestShard:
+    @pytest.mark.parametrize(
+        "value, expected, expected_exception",
+        [
+            ("0/1", Shard(0, 1), does_not_raise()),
+            ("2/4", Shard(2, 4), does_not_raise()),
+            ("4/4", None, pytest.raises(ValueError)),
+            ("-1/4", None, pytest.raises(ValueError)),
+            ("1", None, pytest.raises(ValueError)),
+            ("a/b", None, pytest.raises(ValueError)),
+        ],
+    )
+    def test_parse(self, value, expected, expected_exception):
+        with expected_exception:
+            assert Shard.parse(value) == expected
+
+    def test_contains(self):
+        paths = [f"pages/{i}.xml" for i in range(100)]
+        shards = [Shard(i, 3) for i in range(3)]
+
+        for path in paths:
+            assert sum(path in shard for shard in shards) == 1
+
+
+@pytest.mark.parametrize(
+    "path, equivalent",
+    [
+        ("pages/1.xml", Path("pages/1.xml")),
+        ("pages/1.xml", "pages/./1.xml"),
+        ("pages/1.xml", "pages//1.xml"),
+    ],
+)
+def test_shard_of_stable(path, equivalent):
+    assert shard_of(path, 7) == shard_of(equivalent, 7)
+
+
+def test_shard_of_balanced():
+    counts = Counter(shard_of(f"pages/{i}.xml", 4) for i in range(4000))
+
+    assert sorted(counts.keys()) == [0, 1, 2, 3]
+    assert all(900 < count < 1100 for count in counts.values())
+
+
+def test_shard_of_known_value():
+    """The assignment must not change between versions."""
+    assert [shard_of(f"{i}.xml", 4) for i in range(8)] == [2, 2, 2, 0, 2, 1, 1, 1]
+
+
+class TestMerge:
+    @pytest.mark.parametrize(
+        "inputs, expected_output, expected, expected_exception",
+        [
+            (
+                ["filename,quality_class\nb,2\n", "filename,quality_class\na,1\n"],
+                "filename,quality_class\na,1\nb,2\n",
+                ["a", "b"],
+                does_not_raise(),
+            ),
+            (
+                [
+                    "filename,quality_class,level,id\nb,2,page,\nb,1,line,l1\n",
+                    "filename,quality_class,level,id\na,1,page,\n",
+                ],
+                "filename,quality_class,level,id\na,1,page,\nb,2,page,\nb,1,line,l1\n",
+                None,
+                does_not_raise(),
+            ),
+            (
+                ["filename\npages//b.xml\n", "filename\npages/a.xml\n"],
+                "filename\npages/a.xml\npages//b.xml\n",
+                ["pages/a.xml", "pages/b.xml"],
+                does_not_raise(),
+            ),
+            (
+                ["filename,quality_class\nb,2\n", "filename,quality_class\nb,2\n"],
+                "filename,quality_class\nb,2\nb,2\n",
+                None,
+                pytest.raises(MergeError, match="1 duplicate input"),
+            ),
+            (
+                ["filename,quality_class\nb,2\n"],
+                "filename,quality_class\nb,2\n",
+                ["a", "b"],
+                pytest.raises(MergeError, match="1 missing input"),
+            ),
+            (
+                ["filename,quality_class\nb,2\n", "filename,quality\na,1\n"],
+                None,
+                None,
+                pytest.raises(ValueError, match="Header"),
+            ),
+        ],
+    )
+    def test_merge(self, inputs, expected_output, expected, expected_exception):
+        output = io.StringIO()
+        with expected_exception:
+            merge([io.StringIO(_input) for _input in inputs], output, expected)
+
+        if expected_output is not None:
+            assert output.getvalue().replace("\r\n", "\n") == expected_output
+
+    def test_merge_not_strict(self):
+        output = io.StringIO()
+        inputs = ["filename,quality_class\nb,2\n", "filename,quality_class\nb,2\n"]
+
+        assert (
+            merge([io.StringIO(_input) for _input in inputs], output, strict=False) == 1
+        )
@@ -0,0 +1,112 @@
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.corpus.synthetic import HYPHENS
+from text_quality.corpus.synthetic import NOISE_LEVELS
+from text_quality.corpus.synthetic import CorpusGenerator
+from text_quality.corpus.synthetic import Noise
+from text_quality.corpus.synthetic import hunspell_words
+from text_quality.corpus.synthetic import to_pagexml
+from text_quality.page.page import Page
+from text_quality.settings import DEFAULT_LANGUAGE
+from text_quality.settings import SHORT_COLUMN_WIDTH
+
+
+@pytest.fixture(scope="module")
+def clean_generator():
+    return CorpusGenerator(1, noise=NOISE_LEVELS["clean"])
+
+
+@pytest.fixture(scope="module")
+def dutch_words():
+    return set(hunspell_words(DEFAULT_LANGUAGE))
+
+
+class TestCorpusGenerator:
+    def test_deterministic(self):
+        pages = list(CorpusGenerator(1).pages(20))
+
+        assert list(CorpusGenerator(1).pages(10, start=10)) == pages[10:]
+        assert CorpusGenerator(1).page(5) == pages[5]
+        assert CorpusGenerator(2).page(5) != pages[5]
+
+    @pytest.mark.parametrize("lines", [(1, 1), (5, 10)])
+    def test_lines(self, lines):
+        generator = CorpusGenerator(noise=NOISE_LEVELS["clean"], lines=lines)
+
+        for page in generator.pages(20):
+            assert lines[0] <= len(page.lines) <= lines[1]
+            assert page.id.startswith("page_")
+            assert all(page.lines)
+
+    def test_line_tokens(self):
+        generator = CorpusGenerator(
+            noise=NOISE_LEVELS["clean"], lines=(100, 100), line_tokens=(3.0, 0.0)
+        )
+
+        assert all(len(line.split()) == 3 for line in generator.page(0).lines)
+
+    def test_clean(self, clean_generator):
+        page = clean_generator.page(0)
+
+        assert page.language == DEFAULT_LANGUAGE
+        assert not page.short_columns
+        assert all(token.isalpha() for token in page.text.split())
+
+    def test_substitution(self, dutch_words):
+        generator = CorpusGenerator(noise=Noise(substitution=0.5), lines=(50, 50))
+        tokens = generator.page(0).text.split()
+
+        assert sum(token in dutch_words for token in tokens) < len(tokens) / 2
+
+    def test_hyphenation(self):
+        generator = CorpusGenerator(noise=Noise(hyphenation=1.0), lines=(50, 50))
+        lines = generator.page(0).lines
+
+        assert sum(line[-1] in HYPHENS for line in lines) > len(lines) / 2
+
+    def test_garbage(self, dutch_words):
+        generator = CorpusGenerator(noise=Noise(garbage=1.0), lines=(50, 50))
+        tokens = generator.page(0).text.split()
+
+        assert sum(token in dutch_words for token in tokens) < len(tokens) / 10
+
+    def test_short_columns(self):
+        page = CorpusGenerator(noise=Noise(short_columns=1.0)).page(0)
+
+        assert page.short_columns
+        assert all(0 < len(line) < SHORT_COLUMN_WIDTH for line in page.lines)
+
+    def test_foreign(self):
+        generator = CorpusGenerator(noise=Noise(foreign=1.0), languages=["de"])
+
+        assert {page.language for page in generator.pages(5)} == {"de"}
+
+    @pytest.mark.parametrize(
+        "kwargs,expectation",
+        [
+            ({}, does_not_raise()),
+            ({"lines": (0, 5)}, pytest.raises(ValueError)),
+            ({"lines": (5, 4)}, pytest.raises(ValueError)),
+            ({"line_tokens": (0.5, 1.0)}, pytest.raises(ValueError)),
+            ({"noise": Noise(garbage=1.5)}, pytest.raises(ValueError)),
+            (
+                {"noise": Noise(foreign=0.1), "languages": []},
+                pytest.raises(ValueError),
+            ),
+            ({"languages": ["xx"]}, pytest.raises(FileNotFoundError)),
+        ],
+    )
+    def test_invalid(self, kwargs, expectation):
+        with expectation:
+            CorpusGenerator(**kwargs)
+
+
+def test_to_pagexml(tmp_path, clean_generator):
+    page = clean_generator.page(0)._replace(lines=["a < b & c", "d"] * 6)
+    file = tmp_path / "page.xml"
+    file.write_text(to_pagexml(page, lines_per_region=5), encoding="utf-8")
+
+    parsed = Page.from_file(file)
+
+    assert parsed.lines() == page.lines
+    assert {line.region_id for line in parsed.text_lines()} == {"r1", "r2", "r3"}
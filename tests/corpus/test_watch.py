@@ -0,0 +1,118 @@
+import os
+import threading
+import time
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.corpus.watch import FolderWatcher
+
+
+def write(file, content="<PcGts/>", age=None):
+    file.parent.mkdir(parents=True, exist_ok=True)
+    file.write_text(content)
+    if age is not None:
+        mtime = time.time() - age
+        os.utime(file, (mtime, mtime))
+    return str(file)
+
+
+@pytest.fixture
+def watcher(tmp_path):
+    with FolderWatcher([tmp_path], interval=0, settle=0) as watcher:
+        yield watcher
+
+
+class TestFolderWatcher:
+    def test_scan(self, tmp_path, watcher):
+        files = [write(tmp_path / "1.xml"), write(tmp_path / "a" / "2.xml")]
+        write(tmp_path / "3.txt")
+
+        assert watcher.scan() == []
+        assert watcher.scan() == files
+        assert watcher.scan() == []
+
+    def test_growing_file(self, tmp_path, watcher):
+        file = write(tmp_path / "1.xml", "<PcGts>")
+
+        assert watcher.scan() == []
+        write(tmp_path / "1.xml", "<PcGts></PcGts>")
+        assert watcher.scan() == []
+        assert watcher.scan() == [file]
+
+    @pytest.mark.parametrize("age,expected", [(None, []), (120, ["1.xml"])])
+    def test_settle(self, tmp_path, age, expected):
+        write(tmp_path / "1.xml", age=age)
+
+        with FolderWatcher([tmp_path], settle=60) as watcher:
+            assert watcher.scan() == []
+            assert watcher.scan() == [str(tmp_path / name) for name in expected]
+
+    def test_modified(self, tmp_path, watcher):
+        file = write(tmp_path / "1.xml", age=120)
+        watcher.scan()
+        watcher.scan()
+        watcher.mark_processed([file])
+
+        write(tmp_path / "1.xml", "<PcGts></PcGts>")
+
+        assert watcher.scan() == []
+        assert watcher.scan() == [file]
+
+    def test_deleted(self, tmp_path, watcher):
+        file = tmp_path / "1.xml"
+        write(file)
+        watcher.scan()
+
+        file.unlink()
+
+        assert watcher.scan() == []
+        write(file)
+        assert watcher.scan() == []
+
+    def test_mark_processed(self, tmp_path, watcher):
+        files = [write(tmp_path / "1.xml"), write(tmp_path / "2.xml")]
+        watcher.scan()
+        watcher.scan()
+
+        watcher.mark_processed(files[:1] + [str(tmp_path / "unknown.xml")])
+
+        assert watcher.processed == 1
+        assert watcher.scan() == []
+
+    def test_state_file(self, tmp_path):
+        directory = tmp_path / "pages"
+        files = [write(directory / "1.xml"), write(directory / "2.xml")]
+        state_file = tmp_path / "state.sqlite"
+
+        with FolderWatcher([directory], settle=0, state_file=state_file) as watcher:
+            watcher.scan()
+            assert watcher.scan() == files
+            watcher.mark_processed(files[:1])
+
+        with FolderWatcher([directory], settle=0, state_file=state_file) as watcher:
+            assert watcher.processed == 1
+            watcher.scan()
+            assert watcher.scan() == files[1:]
+
+    def test_batches(self, tmp_path, watcher):
+        files = [write(tmp_path / f"{i}.xml") for i in range(5)]
+        stop = threading.Event()
+
+        batches = []
+        for batch in watcher.batches(2, stop):
+            batches.append(batch)
+            if sum(map(len, batches)) == len(files):
+                stop.set()
+
+        assert batches == [files[:2], files[2:4], files[4:]]
+
+    @pytest.mark.parametrize(
+        "interval,settle,expectation",
+        [
+            (0, 0, does_not_raise()),
+            (-1, 0, pytest.raises(ValueError)),
+            (0, -1, pytest.raises(ValueError)),
+        ],
+    )
+    def test_invalid(self, tmp_path, interval, settle, expectation):
+        with expectation:
+            FolderWatcher([tmp_path], interval=interval, settle=settle)
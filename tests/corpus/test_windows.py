@@ -0,0 +1,75 @@
+import pytest
+from text_quality.corpus.windows import WindowMode
+from text_quality.corpus.windows import read_windows
+
+
+TEXT = "page one\fpage two\n\nparagraph two\n \t\n\nparagraph three\f \f\nlast page ö\n"
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    file = tmp_path / "book.txt"
+    file.write_text(TEXT, encoding="utf-8")
+    return file
+
+
+@pytest.mark.parametrize(
+    "mode,size,expected",
+    [
+        (
+            WindowMode.FORMFEED,
+            1,
+            [
+                "page one",
+                "page two\n\nparagraph two\n \t\n\nparagraph three",
+                "\nlast page ö\n",
+            ],
+        ),
+        (
+            WindowMode.BLANK_LINE,
+            1,
+            [
+                "page one\fpage two",
+                "paragraph two",
+                "paragraph three\f \f\nlast page ö\n",
+            ],
+        ),
+        (
+            WindowMode.TOKENS,
+            4,
+            [
+                "page one\fpage two",
+                "\n\nparagraph two\n \t\n\nparagraph three",
+                "\f \f\nlast page ö",
+            ],
+        ),
+        (WindowMode.TOKENS, 100, [TEXT.rstrip()]),
+    ],
+)
+def test_read_windows(text_file, mode, size, expected):
+    windows = list(read_windows(text_file, mode, size))
+
+    assert [window.text for window in windows] == expected
+    assert [window.id for window in windows] == [
+        f"{text_file}:{i}" for i in range(1, len(expected) + 1)
+    ]
+
+
+@pytest.mark.parametrize("mode", list(WindowMode))
+def test_read_windows_empty(tmp_path, mode):
+    file = tmp_path / "empty.txt"
+    file.touch()
+
+    assert list(read_windows(file, mode)) == []
+
+
+def test_read_windows_lazy(text_file):
+    windows = read_windows(text_file, WindowMode.TOKENS, 1)
+
+    assert next(windows).text == "page"
+    windows.close()
+
+
+def test_read_windows_invalid_size(text_file):
+    with pytest.raises(ValueError):
+        list(read_windows(text_file, WindowMode.TOKENS, 0))
@@ -0,0 +1,197 @@
+import csv
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext as does_not_raise
+import numpy as np
+import pytest
+from text_quality.corpus.work_queue import QueueStatus
+from text_quality.corpus.work_queue import TaskState
+from text_quality.corpus.work_queue import WorkQueue
+
+
+@pytest.fixture
+def queue_file(tmp_path):
+    return tmp_path / "queue.sqlite"
+
+
+@pytest.fixture
+def queue(queue_file):
+    queue = WorkQueue(queue_file, worker="w1")
+    yield queue
+    queue.close()
+
+
+class TestWorkQueue:
+    def test_add(self, queue):
+        assert queue.add(f"file{i}.xml" for i in range(5)) == 5
+        assert queue.add(["file0.xml", "file5.xml"], chunk_size=1) == 1
+
+        assert queue.status() == QueueStatus(pending=6, claimed=0, done=0, failed=0)
+
+    def test_claim(self, queue):
+        queue.add(f"file{i}.xml" for i in range(5))
+
+        assert queue.claim(2) == ["file0.xml", "file1.xml"]
+        assert queue.claim(10) == ["file2.xml", "file3.xml", "file4.xml"]
+        assert queue.claim(10) == []
+        assert queue.status().claimed == 5
+
+    def test_complete(self, queue):
+        queue.add(["a.xml", "b.xml"])
+        queue.claim(2)
+
+        rows = {"b.xml": [{"filename": "b.xml", "quality_class": np.int64(1)}] * 2}
+        assert queue.complete(rows) == 1
+        assert queue.complete(rows) == 0
+
+        assert queue.paths(TaskState.DONE) == ["b.xml"]
+        assert queue.paths(TaskState.CLAIMED) == ["a.xml"]
+        assert list(queue.results()) == rows["b.xml"]
+
+    def test_results_order(self, queue):
+        queue.add(["a.xml", "b.xml"])
+        queue.claim(2)
+        queue.complete({"b.xml": [{"filename": "b.xml"}]})
+        queue.complete({"a.xml": [{"filename": "a.xml", "id": 1}, {"id": 2}]})
+
+        assert list(queue.results()) == [
+            {"filename": "a.xml", "id": 1},
+            {"id": 2},
+            {"filename": "b.xml"},
+        ]
+
+    def test_expired_lease(self, queue_file):
+        with WorkQueue(queue_file, worker="w1", lease=0.1) as first:
+            first.add(["a.xml", "b.xml"])
+            assert first.claim(1) == ["a.xml"]
+
+            # stopped worker: no renewal
+            first.close()
+            time.sleep(0.2)
+
+            with WorkQueue(queue_file, worker="w2", lease=0.1) as second:
+                assert second.claim(10) == ["a.xml", "b.xml"]
+
+    def test_renew(self, queue_file):
+        with WorkQueue(queue_file, worker="w1", lease=0.3) as first:
+            first.add(["a.xml"])
+            first.claim(1)
+            time.sleep(0.5)
+
+            with WorkQueue(queue_file, worker="w2", lease=0.3) as second:
+                assert second.claim(1) == []
+
+    def test_failed(self, queue_file):
+        queue = WorkQueue(queue_file, lease=0.01, max_attempts=2)
+        queue.add(["a.xml"])
+
+        for _ in range(2):
+            assert queue.claim(1) == ["a.xml"]
+            time.sleep(0.02)
+
+        assert queue.claim(1) == []
+        assert queue.paths(TaskState.FAILED) == ["a.xml"]
+        queue.close()
+
+    def test_failed_release(self, queue_file):
+        for attempt in range(5):
+            with WorkQueue(queue_file, max_attempts=2) as queue:
+                if attempt == 0:
+                    queue.add(["a.xml"])
+                claimed = queue.claim(1)
+            assert claimed == (["a.xml"] if attempt < 2 else [])
+
+        with WorkQueue(queue_file) as queue:
+            assert queue.status() == QueueStatus(pending=0, claimed=0, done=0, failed=1)
+
+    def test_close_releases(self, queue_file, queue):
+        queue.add(["a.xml", "b.xml"])
+        queue.claim(2)
+        queue.complete({"a.xml": []})
+        queue.close()
+
+        with WorkQueue(queue_file, worker="w2") as other:
+            assert other.status() == QueueStatus(pending=1, claimed=0, done=1, failed=0)
+            assert other.claim(10) == ["b.xml"]
+
+    def test_drain(self, queue):
+        queue.add(f"file{i}.xml" for i in range(5))
+
+        batches = []
+        for batch in queue.drain(2):
+            batches.append(batch)
+            queue.complete({path: [] for path in batch})
+
+        assert batches == [
+            ["file0.xml", "file1.xml"],
+            ["file2.xml", "file3.xml"],
+            ["file4.xml"],
+        ]
+        assert queue.status().done == 5
+
+    def test_drain_wait(self, queue_file, queue):
+        queue.add(["a.xml"])
+        with WorkQueue(queue_file, worker="w2") as other:
+            other.claim(1)
+
+            assert not list(queue.drain(10, wait=False))
+
+            stop = threading.Event()
+            threading.Timer(0.1, stop.set).start()
+            assert not list(queue.drain(10, stop, poll=0.01))
+
+    def test_workers(self, queue_file):
+        paths = [f"file{i}.xml" for i in range(100)]
+        with WorkQueue(queue_file) as queue:
+            queue.add(paths)
+
+        def work(worker):
+            processed = []
+            with WorkQueue(queue_file, worker=worker) as queue:
+                for batch in queue.drain(3):
+                    queue.complete({path: [{"filename": path}] for path in batch})
+                    processed += batch
+            return processed
+
+        with ThreadPoolExecutor(4) as executor:
+            processed = list(executor.map(work, ["w1", "w2", "w3", "w4"]))
+
+        assert sorted(sum(processed, [])) == sorted(paths)
+        with WorkQueue(queue_file) as queue:
+            assert [row["filename"] for row in queue.results()] == paths
+
+    def test_fieldnames(self, queue_file, queue):
+        queue.check_fieldnames(["filename", "quality_class"])
+
+        with WorkQueue(queue_file) as other:
+            other.check_fieldnames(["filename", "quality_class"])
+            with pytest.raises(ValueError):
+                other.check_fieldnames(["filename"])
+
+    def test_to_csv(self, queue):
+        queue.check_fieldnames(["filename", "quality_class", "level"])
+        queue.add(["a.xml"])
+        queue.claim(1)
+        queue.complete({"a.xml": [{"filename": "a.xml", "quality_class": 1}]})
+
+        output = io.StringIO()
+        assert queue.to_csv(output) == 1
+
+        output.seek(0)
+        assert list(csv.DictReader(output)) == [
+            {"filename": "a.xml", "quality_class": "1", "level": ""}
+        ]
+
+    @pytest.mark.parametrize(
+        "kwargs,expectation",
+        [
+            ({}, does_not_raise()),
+            ({"lease": 0}, pytest.raises(ValueError)),
+            ({"max_attempts": 0}, pytest.raises(ValueError)),
+        ],
+    )
+    def test_invalid(self, queue_file, kwargs, expectation):
+        with expectation:
+            WorkQueue(queue_file, **kwargs).close()
@@ -3,6 +3,7 @@ from pathlib import Path
 import pytest
 from text_quality.feature.scorer.dictionary import HunspellDictionary
 from text_quality.feature.scorer.dictionary import TokenDictionary
+from text_quality.feature.scorer.token_set import MappedTokenSet
 from text_quality.settings import ENCODING
 from text_quality.settings import HUNSPELL_DIR
 from text_quality.settings import HUNSPELL_LANGUAGE
@@ -13,6 +14,13 @@ def token_dictionary():
     return TokenDictionary(["token"])
 
 
+@pytest.fixture
+def mapped_token_dictionary(tmp_path):
+    file = tmp_path / "dictionary.bin"
+    TokenDictionary(["token"]).to_binary_file(file)
+    return TokenDictionary.from_file(file)
+
+
 @pytest.fixture
 def hunspell_dictionary():
     return HunspellDictionary.from_path(HUNSPELL_DIR, HUNSPELL_LANGUAGE)
@@ -49,6 +57,41 @@ class TestTokenDictionary:
             == token_dictionary._dictionary
         )
 
+    def test_from_file_comments(self, tmp_path):
+        dict_file = tmp_path / "dictionary"
+        dict_file.write_text("# comment\n token \n  # indented comment\n")
+
+        assert TokenDictionary.from_file(dict_file)._dictionary == {"token"}
+
+    def test_from_binary_file(self, mapped_token_dictionary):
+        assert isinstance(mapped_token_dictionary._dictionary, MappedTokenSet)
+        assert mapped_token_dictionary._lookup("token")
+        assert not mapped_token_dictionary._lookup("test")
+
+    def test_binary_to_text_file(self, mapped_token_dictionary, tmp_path):
+        dict_file = tmp_path / "dictionary.txt"
+
+        mapped_token_dictionary.to_file(dict_file)
+
+        assert TokenDictionary.from_file(dict_file)._dictionary == {"token"}
+
+    def test_convert(self, token_file, tmp_path):
+        binary_file = tmp_path / "dictionary.bin"
+
+        TokenDictionary.convert(token_file, binary_file)
+
+        assert set(TokenDictionary.from_file(binary_file)._dictionary) == {
+            "token1",
+            "token2",
+        }
+
+    @pytest.mark.parametrize(
+        "tokens, expected",
+        [([], (0, 0)), ([""], (0, 0)), (["token", "token2"], (5, 11))],
+    )
+    def test_counts_mapped(self, mapped_token_dictionary, tokens, expected):
+        assert mapped_token_dictionary.counts(tokens) == expected
+
     @pytest.mark.parametrize(
         "tokens, expected",
         [([], 0), (["token"], 1), (["token", "token2"], 0.4545), (["Token"], 0)],
@@ -56,6 +99,13 @@ class TestTokenDictionary:
     def test_score(self, token_dictionary, tokens, expected):
         assert token_dictionary.score(tokens) == pytest.approx(expected, 0.001)
 
+    @pytest.mark.parametrize(
+        "tokens, expected",
+        [([], (0, 0)), ([""], (0, 0)), (["token", "token2"], (5, 11))],
+    )
+    def test_counts(self, token_dictionary, tokens, expected):
+        assert token_dictionary.counts(tokens) == expected
+
 
 class TestHunspellDictionary:
     # pylint: disable=protected-access
@@ -22,3 +22,10 @@ class TestGarbageDetector:
     )
     def test_score(self, garbage_detector, tokens, expected):
         assert garbage_detector.score(tokens) == pytest.approx(expected)
+
+    @pytest.mark.parametrize(
+        "tokens, expected",
+        [([], (0, 0)), (["token1", "token2"], (0, 2)), (["a" * 22, "token"], (1, 2))],
+    )
+    def test_counts(self, garbage_detector, tokens, expected):
+        assert garbage_detector.counts(tokens) == expected
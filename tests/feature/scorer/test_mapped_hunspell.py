@@ -0,0 +1,136 @@
+import pickle
+import pytest
+from spylls import hunspell
+from text_quality.feature.scorer import mapped_hunspell
+from text_quality.feature.scorer.mapped_hunspell import MappedDic
+from text_quality.feature.scorer.mapped_hunspell import MappedHunspell
+
+
+AFF = """SET UTF-8
+TRY esianrtolcdugmphbyfvkwz
+KEEPCASE K
+
+SFX S Y 2
+SFX S 0 s [^s]
+SFX S 0 es s
+
+PFX O Y 1
+PFX O 0 over .
+"""
+
+DIC = """6
+huis/S
+kerk/SO
+Amsterdam
+schip/S
+SCHIP
+koopman/K
+"""
+
+WORDS = [
+    "huis",
+    "huizen",
+    "kerks",
+    "overkerk",
+    "overkerks",
+    "Amsterdam",
+    "amsterdam",
+    "AMSTERDAM",
+    "schip",
+    "Schip",
+    "SCHIP",
+    "koopman",
+    "Koopman",
+    "xyz",
+    "",
+]
+
+
+@pytest.fixture
+def dictionary(tmp_path):
+    (tmp_path / "test.aff").write_text(AFF, encoding="utf-8")
+    (tmp_path / "test.dic").write_text(DIC, encoding="utf-8")
+    return hunspell.Dictionary.from_files(str(tmp_path / "test"))
+
+
+@pytest.fixture
+def dic_file(tmp_path, dictionary):
+    file = tmp_path / "test.mapped"
+    with open(file, "wb") as f:
+        MappedHunspell.write_dic(dictionary, f)
+    return file
+
+
+class TestMappedDic:
+    def test_len(self, dictionary, dic_file):
+        assert len(MappedDic(dic_file)) == len(dictionary.dic.words)
+
+    def test_words(self, dictionary, dic_file):
+        assert [word.stem for word in MappedDic(dic_file).words] == [
+            word.stem for word in dictionary.dic.words
+        ]
+
+    @pytest.mark.parametrize("stem", ["huis", "kerk", "schip", "SCHIP", "xyz"])
+    @pytest.mark.parametrize("ignorecase", [False, True])
+    def test_homonyms(self, dictionary, dic_file, stem, ignorecase):
+        expected = dictionary.dic.homonyms(stem, ignorecase=ignorecase)
+        actual = MappedDic(dic_file).homonyms(stem, ignorecase=ignorecase)
+
+        assert [(word.stem, word.flags, word.captype) for word in actual] == [
+            (word.stem, word.flags, word.captype) for word in expected
+        ]
+
+    def test_cache_size(self, dic_file, monkeypatch):
+        # pylint: disable=protected-access
+        monkeypatch.setattr(mapped_hunspell, "_CACHE_SIZE", 2)
+        dic = MappedDic(dic_file)
+
+        for stem in ["huis", "kerk", "schip", "xyz"]:
+            dic.homonyms(stem)
+
+        assert len(dic._homonyms) <= 2
+        assert [word.stem for word in dic.homonyms("huis")] == ["huis"]
+
+    def test_hash_collisions(self, dictionary, tmp_path, monkeypatch):
+        monkeypatch.setattr(mapped_hunspell, "_hash", lambda key: len(key))
+        file = tmp_path / "test.mapped"
+        with open(file, "wb") as f:
+            MappedDic.write(dictionary.dic, f)
+
+        dic = MappedDic(file)
+
+        assert [word.stem for word in dic.homonyms("huis")] == ["huis"]
+        assert [word.stem for word in dic.homonyms("kerk")] == ["kerk"]
+        assert dic.homonyms("xyzw") == []
+
+    def test_offset(self, dictionary, tmp_path):
+        file = tmp_path / "test.mapped"
+        with open(file, "wb") as f:
+            f.write(b"header")
+            MappedDic.write(dictionary.dic, f)
+
+        dic = MappedDic(file, offset=len(b"header"))
+
+        assert [word.stem for word in dic.homonyms("huis")] == ["huis"]
+        assert [
+            word.stem for word in pickle.loads(pickle.dumps(dic)).homonyms("huis")
+        ] == ["huis"]
+
+    def test_read_only(self, dictionary, dic_file):
+        with pytest.raises(TypeError):
+            MappedDic(dic_file).append(dictionary.dic.words[0], lower=["huis"])
+
+    def test_invalid_file(self, tmp_path):
+        file = tmp_path / "test.dic"
+        file.write_text(DIC)
+
+        with pytest.raises(ValueError):
+            MappedDic(file)
+
+
+class TestMappedHunspell:
+    @pytest.mark.parametrize("word", WORDS)
+    def test_lookup(self, dictionary, dic_file, word):
+        mapped = MappedHunspell(dictionary.aff, MappedDic(dic_file))
+
+        assert mapped.lookup(word) == dictionary.lookup(word)
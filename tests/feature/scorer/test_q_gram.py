@@ -24,6 +24,13 @@ class TestQGram:
     def test_score(self, q_gram, tokens, expected):
         assert q_gram.score(tokens) == pytest.approx(expected)
 
+    @pytest.mark.parametrize(
+        "tokens, expected",
+        [([], (0, 0)), (["token"], (0, 3)), (["abcdef"], (1.5, 4))],
+    )
+    def test_counts(self, q_gram, tokens, expected):
+        assert q_gram.counts(tokens) == pytest.approx(expected)
+
     def test_to_from_file(self, tmp_path, q_gram):
         # pylint: disable=protected-access
 
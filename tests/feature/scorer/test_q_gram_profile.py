@@ -0,0 +1,120 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.feature.scorer.q_gram import QGram
+from text_quality.feature.scorer.q_gram_profile import QGramCounter
+from text_quality.feature.scorer.q_gram_profile import build_profile
+from text_quality.feature.scorer.q_gram_profile import read_texts
+from text_quality.feature.tokenizer import NautilusOcrTokenizer
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    (tmp_path / "a.txt").write_text("abcd abc\nabce-\nde\n")
+    (tmp_path / "b.jsonl").write_text(
+        json.dumps({"id": "1", "text": "xyz abc"}) + "\n" + "invalid\n"
+    )
+    (tmp_path / "c.dic").write_text("2\nabcd/XY\n\tcomment\nxyzw/Z\n")
+    return sorted(tmp_path.iterdir())
+
+
+class TestQGramCounter:
+    # pylint: disable=protected-access
+
+    def test_update(self):
+        counter = QGramCounter()
+        counter.update(["abc", "bcd", "abc"])
+
+        assert counter["abc"] == 2
+        assert counter["xyz"] == 0
+        assert counter.ranked() == ["abc", "bcd"]
+
+    def test_merge(self):
+        counter1 = QGramCounter()
+        counter1.update(["abc", "bcd"])
+        counter2 = QGramCounter()
+        counter2.update(["bcd", "cde"])
+
+        counter1.merge(counter2)
+
+        assert counter1.ranked() == ["bcd", "abc", "cde"]
+        assert counter1.error == 0
+
+    @pytest.mark.parametrize(
+        "limit,expected", [(None, ["a", "b", "c", "d"]), (2, ["a", "b"]), (0, [])]
+    )
+    def test_ranked(self, limit, expected):
+        counter = QGramCounter()
+        counter.update(["d", "c", "b", "a", "a", "b"])
+
+        assert counter.ranked(limit) == expected
+
+    def test_prune(self):
+        counter = QGramCounter(max_size=4)
+        counter.update(["a"] * 5 + ["b"] * 4 + ["c"] * 3 + ["d", "e"])
+
+        assert counter.ranked() == ["a", "b"]
+        assert counter.error == 3
+
+        counter.update(["c"])
+        assert counter["c"] + counter.error >= 4
+
+    def test_prune_ties(self):
+        counter = QGramCounter(max_size=4)
+        counter.update(["a", "b", "c", "d", "e"])
+
+        assert len(counter) == 2
+        assert counter.error == 1
+
+        counter.update(["f", "g", "h"] * 2)
+        assert counter.ranked()[:2] == ["f", "g"]
+        assert len(counter) == 2
+
+    @pytest.mark.parametrize(
+        "max_size,expectation",
+        [
+            (None, does_not_raise()),
+            (1, does_not_raise()),
+            (0, pytest.raises(ValueError)),
+        ],
+    )
+    def test_max_size(self, max_size, expectation):
+        with expectation:
+            QGramCounter(max_size)
+
+    def test_to_file(self, tmp_path):
+        counter = QGramCounter()
+        counter.update(["abc", "def", "def", "ghi"])
+        qgram_file = tmp_path / "qgrams.txt"
+
+        assert counter.to_file(qgram_file, limit=2) == 2
+        assert QGram.from_file(qgram_file)._lang_qgrams == ["def", "abc"]
+
+        with pytest.raises(FileExistsError):
+            counter.to_file(qgram_file)
+
+
+def test_read_texts(corpus, tmp_path):
+    texts = [text for path in corpus for text in read_texts(path)]
+
+    assert texts == ["abcd abc\nabce-\nde", "xyz abc", "abcd\n\nxyzw"]
+    assert not list(read_texts(tmp_path / "missing.txt"))
+
+
+@pytest.mark.parametrize(
+    "workers,executor",
+    [(1, None), (2, ThreadPoolExecutor(2)), (2, None)],
+)
+def test_build_profile(corpus, workers, executor):
+    counter = build_profile(
+        corpus, workers=workers, files_per_task=1, executor=executor
+    )
+
+    expected = QGramCounter()
+    for text in ["abcd abc\nabce-\nde", "xyz abc", "abcd\n\nxyzw"]:
+        expected.update(QGram._get_qgrams(NautilusOcrTokenizer().tokenize(text)))
+
+    assert counter.ranked() == expected.ranked()
+    assert counter.ranked(3) == ["abc", "bcd", "xyz"]
+    assert counter["bce"] == 1  # from the hyphenated 'abcede'
@@ -0,0 +1,112 @@
+import pickle
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.feature.scorer import token_set
+from text_quality.feature.scorer.token_set import MappedTokenSet
+
+
+TOKENS = ["token", "Token", "tökën", "", "another token", "b"]
+
+
+@pytest.fixture
+def token_set_file(tmp_path):
+    file = tmp_path / "tokens.bin"
+    MappedTokenSet.write(TOKENS, file)
+    return file
+
+
+class TestMappedTokenSet:
+    def test_len(self, token_set_file):
+        assert len(MappedTokenSet(token_set_file)) == len(TOKENS)
+
+    def test_iter(self, token_set_file):
+        assert sorted(MappedTokenSet(token_set_file)) == sorted(TOKENS)
+
+    @pytest.mark.parametrize(
+        "token,expected",
+        [("token", True), ("tökën", True), ("", True), ("toke", False), ("c", False)],
+    )
+    def test_contains(self, token_set_file, token, expected):
+        assert (token in MappedTokenSet(token_set_file)) == expected
+
+    @pytest.mark.parametrize(
+        "tokens,expected",
+        [
+            ([], []),
+            (["token", "test", "b", "token"], [True, False, True, True]),
+            (TOKENS, [True] * len(TOKENS)),
+        ],
+    )
+    def test_contains_batch(self, token_set_file, tokens, expected):
+        assert MappedTokenSet(token_set_file).contains(tokens).tolist() == expected
+
+    def test_hash_collisions(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(token_set, "_hash", lambda token: len(token))
+        file = tmp_path / "tokens.bin"
+        MappedTokenSet.write(["ab", "cd", "x", "ef"], file)
+
+        tokens = MappedTokenSet(file)
+
+        assert tokens.contains(["ab", "cd", "ef", "gh", "x", "y"]).tolist() == [
+            True,
+            True,
+            True,
+            False,
+            True,
+            False,
+        ]
+        assert "ef" in tokens
+        assert "gh" not in tokens
+
+    def test_empty(self, tmp_path):
+        file = tmp_path / "tokens.bin"
+        assert MappedTokenSet.write([], file) == 0
+
+        tokens = MappedTokenSet(file)
+        assert len(tokens) == 0
+        assert "token" not in tokens
+        assert tokens.contains(["token"]).tolist() == [False]
+
+    def test_write_duplicates(self, tmp_path):
+        assert MappedTokenSet.write(["a", "a", "b"], tmp_path / "tokens.bin") == 2
+
+    @pytest.mark.parametrize(
+        "overwrite,expectation",
+        [(False, pytest.raises(FileExistsError)), (True, does_not_raise())],
+    )
+    def test_write_overwrite(self, token_set_file, overwrite, expectation):
+        with expectation:
+            MappedTokenSet.write(["a"], token_set_file, overwrite=overwrite)
+
+    def test_pickle(self, token_set_file):
+        tokens = MappedTokenSet(token_set_file)
+        pickled = pickle.dumps(tokens)
+
+        assert len(pickled) < 1024
+        assert sorted(pickle.loads(pickled)) == sorted(TOKENS)
+
+    def test_is_token_set_file(self, token_set_file, tmp_path):
+        text_file = tmp_path / "tokens.txt"
+        text_file.write_text("token\n")
+
+        assert MappedTokenSet.is_token_set_file(token_set_file)
+        assert not MappedTokenSet.is_token_set_file(text_file)
+
+    def test_invalid_file(self, tmp_path):
+        text_file = tmp_path / "tokens.txt"
+        text_file.write_text("not a token set file\n")
+
+        with pytest.raises(ValueError):
+            MappedTokenSet(text_file)
+
+    def test_offset(self, tmp_path):
+        file = tmp_path / "tokens.bin"
+        with open(file, "wb") as f:
+            f.write(b"header")
+            MappedTokenSet.write_to(TOKENS, f)
+
+        tokens = MappedTokenSet(file, offset=len(b"header"))
+
+        assert sorted(tokens) == sorted(TOKENS)
+        assert "token" in tokens
+        assert sorted(pickle.loads(pickle.dumps(tokens))) == sorted(TOKENS)
@@ -1,7 +1,11 @@
 import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal
+from text_quality.feature.featurize import Featurizer
 from text_quality.feature.featurize import Scorers
+from text_quality.feature.sampling import TokenSampler
+from text_quality.monitoring.timing import AggregatingSink
+from text_quality.monitoring.timing import Timer
 
 
 class TestFeaturizer:
@@ -56,3 +60,62 @@ class TestFeaturizer:
         features_df, tokens = featurizer.featurize_as_dataframe(text)
         assert_frame_equal(features_df, expected_df, check_dtype=False)
         assert tokens == expected_tokens
+
+    @pytest.mark.parametrize(
+        "lines",
+        [[], ["test token"], ["test", "token"], ["een Nederland-", "se tekst", ""]],
+    )
+    def test_featurize_lines(self, featurizer, lines):
+        line_counts, line_tokens = featurizer.featurize_lines(lines)
+
+        assert len(line_counts) == len(line_tokens) == len(lines)
+
+        features, tokens = featurizer.featurize("\n".join(lines))
+        assert Featurizer.ratios(featurizer.sum_counts(line_counts)) == pytest.approx(
+            features
+        )
+        assert [token for _tokens in line_tokens for token in _tokens] == tokens
+
+    def test_featurize_timer(self, featurizer):
+        # pylint: disable=protected-access
+        sink = AggregatingSink()
+        timed_featurizer = Featurizer(
+            featurizer._scorers, featurizer._tokenizer, timer=Timer([sink])
+        )
+
+        timed_featurizer.featurize("test token")
+
+        assert list(sink.summary().keys()) == ["tokenize"] + [
+            f"score:{feature}" for feature in Scorers.__annotations__.keys()
+        ]
+
+    @pytest.mark.parametrize(
+        "features", [None, ["dict_score_gt"], ["n_gram_score", "garbage_score"]]
+    )
+    def test_sample_counts(self, featurizer, features):
+        # pylint: disable=protected-access
+        sampler = TokenSampler(0.05)
+        sampling_featurizer = Featurizer(
+            featurizer._scorers, featurizer._tokenizer, sampler=sampler
+        )
+        tokens = featurizer.tokenize("een Nederlandse tekst met 3 woorden. " * 1000)
+
+        sampled = sampling_featurizer.sample_counts(tokens, features)
+
+        expected = featurizer.count(tokens, features)
+        assert list(sampled.counts) == list(expected)
+        assert sampled.n_sampled < len(tokens)
+        for feature, ratio in Featurizer.ratios(sampled.counts).items():
+            assert 0 <= sampled.errors[feature] <= sampler.error_bound
+            assert ratio == pytest.approx(
+                Featurizer.ratios(expected)[feature], abs=sampler.error_bound
+            )
+
+    def test_sample_counts_without_sampler(self, featurizer):
+        tokens = featurizer.tokenize("een Nederlandse tekst " * 100)
+
+        sampled = featurizer.sample_counts(tokens)
+
+        assert sampled.counts == featurizer.count(tokens)
+        assert sampled.errors == {feature: 0.0 for feature in featurizer.features}
+        assert sampled.n_sampled == len(tokens)
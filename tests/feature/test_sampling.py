@@ -0,0 +1,110 @@
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.feature.sampling import TokenSampler
+
+
+def count_long(tokens):
+    """Counts the fraction of long tokens, and of characters in long tokens."""
+    return {
+        "long": (sum(len(token) > 3 for token in tokens), len(tokens)),
+        "long_characters": (
+            sum(len(token) for token in tokens if len(token) > 3),
+            sum(len(token) for token in tokens),
+        ),
+    }
+
+
+class TestTokenSampler:
+    @pytest.mark.parametrize(
+        "kwargs, expected_exception",
+        [
+            ({}, does_not_raise()),
+            ({"error_bound": 0.1, "confidence": 0.99}, does_not_raise()),
+            ({"error_bound": 0}, pytest.raises(ValueError, match="error bound")),
+            ({"error_bound": 1.5}, pytest.raises(ValueError, match="error bound")),
+            ({"confidence": 1}, pytest.raises(ValueError, match="confidence")),
+            ({"groups": 1}, pytest.raises(ValueError, match="number of groups")),
+            ({"max_rounds": 0}, pytest.raises(ValueError, match="rounds")),
+        ],
+    )
+    def test_init(self, kwargs, expected_exception):
+        with expected_exception:
+            TokenSampler(**kwargs)
+
+    @pytest.mark.parametrize(
+        "error_bound, n_tokens, expected",
+        [
+            (0.02, 0, 0),
+            (0.02, 5, 5),
+            (0.02, 100, 97),
+            (0.02, 10**6, 2396),
+            (0.05, 10**6, 384),
+            (0.5, 10**6, 10),
+        ],
+    )
+    def test_sample_size(self, error_bound, n_tokens, expected):
+        assert TokenSampler(error_bound).sample_size(n_tokens) == expected
+
+    @pytest.mark.parametrize("size", [1, 10, 25, 99])
+    def test_sample(self, size):
+        tokens = [str(i) for i in range(100)]
+        sampler = TokenSampler(groups=10)
+
+        groups = sampler.sample(tokens, size)
+
+        assert len(groups) == min(10, size)
+        sample = [int(token) for group in groups for token in group]
+        assert len(sample) == size
+        assert len(set(sample)) == size
+        # one token per stratum
+        bounds = [int(i * (100 / size)) for i in range(size)] + [100]
+        for i, token in enumerate(sorted(sample)):
+            assert bounds[i] <= token < max(bounds[i] + 1, bounds[i + 1])
+
+        assert sampler.sample(tokens, size) == groups
+
+    @pytest.mark.parametrize(
+        "group_counts, n_sampled, n_tokens, expected",
+        [
+            ([(5, 10), (5, 10)], 20, 20, 0.0),
+            ([(0, 0), (0, 0)], 20, 100, 0.0),
+            ([(5, 10), (5, 10)], 20, 100, 0.0),
+            ([(0, 10), (10, 10)], 20, 10**9, 1.96 * 0.5),
+        ],
+    )
+    def test_error(self, group_counts, n_sampled, n_tokens, expected):
+        assert TokenSampler().error(group_counts, n_sampled, n_tokens) == pytest.approx(
+            expected, rel=1e-3
+        )
+
+    def test_counts(self):
+        tokens = ["a", "bcde", "fg", "hijklm"] * 10000
+        sampler = TokenSampler(0.02)
+
+        sampled = sampler.counts(tokens, count_long)
+
+        assert sampled.n_sampled < len(tokens)
+        exact = count_long(tokens)
+        for feature, (numerator, denominator) in sampled.counts.items():
+            assert 0 <= sampled.errors[feature] <= sampler.error_bound
+            assert numerator / denominator == pytest.approx(
+                exact[feature][0] / exact[feature][1], abs=sampled.errors[feature]
+            )
+
+    def test_counts_short(self):
+        tokens = ["a", "bcde", "fg"]
+
+        sampled = TokenSampler().counts(tokens, count_long)
+
+        assert sampled.counts == count_long(tokens)
+        assert sampled.errors == {"long": 0.0, "long_characters": 0.0}
+        assert sampled.n_sampled == 3
+
+    def test_counts_enlarges_sample(self):
+        # a few very long tokens dominate the character-weighted ratio
+        tokens = (["a"] * 99 + ["b" * 500]) * 1000
+        sampler = TokenSampler(0.05, groups=10)
+
+        sampled = sampler.counts(tokens, count_long)
+
+        assert sampled.n_sampled > sampler.sample_size(len(tokens))
@@ -18,3 +18,19 @@ class TestNautilusOcrTokenizer:
     )
     def test_tokenize(self, text, expected):
         assert self.tokenizer.tokenize(text) == expected
+
+    @pytest.mark.parametrize(
+        "lines,expected",
+        [
+            ([], []),
+            ([""], [[]]),
+            (["test token", "second line"], [["test", "token"], ["second", "line"]]),
+            (["hyphen-", "ated token"], [["hyphenated"], ["token"]]),
+            (["a", "", "b"], [["a"], [], ["b"]]),
+        ],
+    )
+    def test_tokenize_lines(self, lines, expected):
+        assert self.tokenizer.tokenize_lines(lines) == expected
+        assert [token for line in expected for token in line] == self.tokenizer.tokenize(
+            "\n".join(lines)
+        )
@@ -1,8 +1,12 @@
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import nullcontext as does_not_raise
 from pathlib import Path
 import pytest
+from text_quality.language.classifier import AssumedLanguageClassifier
 from text_quality.language.classifier import LanguageClassifier
+from text_quality.language.classifier import LazyLanguageClassifier
 from text_quality.language.fasttext import FastTextLanguageClassifier
 
 
@@ -25,6 +29,43 @@ class TestLanguageClassifier:
         assert LanguageClassifier.preprocess(text) == expected
 
 
+class TestAssumedLanguageClassifier:
+    @pytest.mark.parametrize("text", ["", "An English text", "Een Nederlandse tekst"])
+    def test_classify(self, text):
+        assert AssumedLanguageClassifier("nl").classify(text) == ("nl", 1.0)
+
+
+class TestLazyLanguageClassifier:
+    def test_classify(self):
+        loads = []
+        classifier = LazyLanguageClassifier(
+            lambda: loads.append(1) or AssumedLanguageClassifier("nl")
+        )
+        assert not classifier.loaded
+
+        assert classifier.classify("text") == ("nl", 1.0)
+        assert classifier.classify("text") == ("nl", 1.0)
+        assert classifier.loaded
+        assert loads == [1]
+
+    def test_threads(self):
+        loads = []
+        barrier = threading.Barrier(4)
+        classifier = LazyLanguageClassifier(
+            lambda: loads.append(1) or AssumedLanguageClassifier("nl")
+        )
+
+        def classify(text):
+            barrier.wait(timeout=10)
+            return classifier.classify(text)
+
+        with ThreadPoolExecutor(4) as executor:
+            results = list(executor.map(classify, ["text"] * 4))
+
+        assert results == [("nl", 1.0)] * 4
+        assert loads == [1]
+
+
 @pytest.mark.internet_access
 class TestFastTextLanguageClassifier:
     @pytest.mark.parametrize(
@@ -0,0 +1,97 @@
+from contextlib import nullcontext as does_not_raise
+import pytest
+from text_quality.feature.scorer.dictionary import TokenDictionary
+from text_quality.feature.scorer.q_gram import QGram
+from text_quality.language.classifier import LanguageClassifier
+from text_quality.language.prescreen import PrescreenLanguageClassifier
+from text_quality.settings import QGRAMS_FILE
+from text_quality.settings import TOKEN_DICT_FILE
+
+
+DUTCH = "op deeser den handen is onse op\nte onse waar gekomen zoo is\nt 1a per 't gh@ x1 ,, 19 zzkq"
+ENGLISH = "The quick brown fox jumps over the lazy dog and then the government of the United States declared"
+
+
+class RecordingClassifier(LanguageClassifier):
+    def __init__(self) -> None:
+        self.texts = []
+
+    def classify(self, text: str) -> tuple[str, float]:
+        self.texts.append(text)
+        return "en", 0.9
+
+
+@pytest.fixture(scope="module")
+def token_dictionary():
+    return TokenDictionary.from_file(TOKEN_DICT_FILE)
+
+
+@pytest.fixture(scope="module")
+def qgrams():
+    return QGram.from_file(QGRAMS_FILE)
+
+
+@pytest.fixture
+def fallback():
+    return RecordingClassifier()
+
+
+@pytest.fixture
+def prescreen(token_dictionary, qgrams, fallback):
+    return PrescreenLanguageClassifier("nl", token_dictionary, qgrams, fallback)
+
+
+class TestPrescreenLanguageClassifier:
+    def test_scores(self, prescreen):
+        hit_rate, q_gram_score, n_tokens = prescreen.scores(DUTCH)
+
+        assert hit_rate == pytest.approx(0.8125)
+        assert 0.5 < q_gram_score < 1.0
+        assert n_tokens == 21
+
+    @pytest.mark.parametrize(
+        "text,expected",
+        [
+            (DUTCH, ("nl", pytest.approx(0.8125))),
+            (ENGLISH, ("en", 0.9)),
+            ("op deeser den handen", ("en", 0.9)),
+            ("gh@ x1 zzkq " * 10, ("en", 0.9)),
+            ("", ("en", 0.9)),
+        ],
+    )
+    def test_classify(self, prescreen, fallback, text, expected):
+        assert prescreen.classify(text) == expected
+        assert fallback.texts == ([] if expected[0] == "nl" else [text])
+
+    def test_max_tokens(self, token_dictionary, qgrams, fallback):
+        prescreen = PrescreenLanguageClassifier(
+            "nl", token_dictionary, qgrams, fallback, max_tokens=10
+        )
+
+        assert prescreen.scores(DUTCH + " " + ENGLISH)[2] == 10
+        assert prescreen.classify(DUTCH + " " + ENGLISH)[0] == "nl"
+
+    def test_summary(self, prescreen):
+        for text in (DUTCH, DUTCH, ENGLISH):
+            prescreen.classify(text)
+
+        assert prescreen.summary() == {"accepted": 2, "fallback": 1}
+        assert prescreen.report().startswith(
+            "language pre-screen: 2 of 3 texts accepted as 'nl'"
+        )
+
+    @pytest.mark.parametrize(
+        "kwargs,expectation",
+        [
+            ({}, does_not_raise()),
+            ({"hit_rate": 1.5}, pytest.raises(ValueError)),
+            ({"q_gram_score": -0.1}, pytest.raises(ValueError)),
+            ({"min_tokens": 0}, pytest.raises(ValueError)),
+            ({"min_tokens": 20, "max_tokens": 10}, pytest.raises(ValueError)),
+        ],
+    )
+    def test_invalid(self, token_dictionary, qgrams, fallback, kwargs, expectation):
+        with expectation:
+            PrescreenLanguageClassifier(
+                "nl", token_dictionary, qgrams, fallback, **kwargs
+            )
@@ -0,0 +1,162 @@
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from text_quality.feature.scorer.q_gram import QGram
+from text_quality.monitoring.memory import MEMORY_ACCOUNTING
+from text_quality.monitoring.memory import MemoryAccounting
+from text_quality.monitoring.memory import add_memory_metrics
+from text_quality.monitoring.memory import format_size
+from text_quality.monitoring.metrics import Metrics
+from text_quality.settings import QGRAMS_FILE
+
+
+@pytest.fixture
+def accounting():
+    accounting = MemoryAccounting().start()
+    yield accounting
+    accounting.stop()
+
+
+class TestMemoryAccounting:
+    def test_disabled(self):
+        accounting = MemoryAccounting()
+
+        with accounting.component("test"), accounting.page():
+            data = bytearray(2**20)
+
+        assert accounting.components() == {}
+        assert accounting.pages() is None
+        assert data
+
+    def test_component(self, accounting):
+        with accounting.component("test"):
+            data = [bytearray(2**20) for _ in range(4)]
+        with accounting.component("test"):
+            more = bytearray(2**20)
+
+        component = accounting.components()["test"]
+        assert component["count"] == 2
+        assert component["allocated"] >= 5 * 2**20
+        assert data and more
+
+    def test_component_freed(self, accounting):
+        with accounting.component("test"):
+            data = bytearray(2**22)
+            del data
+
+        assert accounting.components()["test"]["allocated"] < 2**20
+
+    def test_untraced(self):
+        accounting = MemoryAccounting().start(trace=False)
+
+        with accounting.component("test"), accounting.page():
+            data = bytearray(2**20)
+
+        assert accounting.components()["test"]["allocated"] == 0
+        assert accounting.pages() is None
+        assert "test" in accounting.report()
+        assert data
+        assert not tracemalloc.is_tracing()
+
+    def test_pages(self, accounting):
+        for size in (2**20, 2**22):
+            with accounting.page():
+                data = bytearray(size)
+                del data
+
+        pages = accounting.pages()
+        assert pages["count"] == 2
+        assert pages["concurrency"] == 1
+        assert 0.9 * 2**20 < pages["mean"] < 2**22
+        assert 0.9 * 2**22 < pages["max"] < 2**23
+
+    def test_concurrent_pages(self, accounting):
+        barrier = threading.Barrier(4)
+
+        def process(_):
+            with accounting.page():
+                data = bytearray(2**20)
+                barrier.wait(timeout=10)
+                del data
+
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(process, range(4)))
+
+        pages = accounting.pages()
+        assert pages["count"] == 4
+        assert pages["concurrency"] == 4
+        assert pages["max"] > 0.9 * 4 * 2**20
+
+    def test_stop(self):
+        accounting = MemoryAccounting().start()
+        with accounting.page():
+            pass
+        accounting.stop()
+
+        assert not tracemalloc.is_tracing()
+        assert accounting.pages()["count"] == 1
+
+    def test_summary(self, accounting):
+        with accounting.component("test"):
+            data = bytearray(2**20)
+
+        summary = accounting.summary()
+
+        assert list(summary) == ["resident", "components", "pages", "modules"]
+        assert summary["components"]["test"]["count"] == 1
+        assert all(value > 0 for value in summary["resident"].values())
+        assert summary["modules"]
+        assert data
+
+    def test_report(self, accounting):
+        with accounting.component("test"), accounting.page():
+            data = bytearray(2**20)
+
+        report = accounting.report()
+
+        assert report.startswith("component")
+        assert "peak allocation per page (1 pages, up to 1 at once)" in report
+        assert "test_memory.py" in report
+        assert data
+
+
+def test_loader(monkeypatch):
+    accounting = MemoryAccounting().start()
+    monkeypatch.setattr(
+        "text_quality.feature.scorer.q_gram.MEMORY_ACCOUNTING", accounting
+    )
+    try:
+        QGram.from_file(QGRAMS_FILE)
+    finally:
+        accounting.stop()
+
+    assert accounting.components()[f"qgrams:{QGRAMS_FILE.name}"]["allocated"] > 0
+    assert not MEMORY_ACCOUNTING.enabled
+
+
+def test_add_memory_metrics(accounting):
+    metrics = Metrics(prefix="")
+    add_memory_metrics(metrics, accounting)
+    with accounting.component("test"), accounting.page():
+        data = bytearray(2**20)
+
+    summary = metrics.summary()
+
+    assert "component=test" in summary["component_resident_bytes"]
+    assert summary["page_peak_allocation_bytes"] > 0.9 * 2**20
+    assert data
+
+
+@pytest.mark.parametrize(
+    "size,expected",
+    [
+        (None, "-"),
+        (0, "0.0 KiB"),
+        (1536, "1.5 KiB"),
+        (5 * 2**20, "5.0 MiB"),
+        (3 * 2**30, "3.0 GiB"),
+    ],
+)
+def test_format_size(size, expected):
+    assert format_size(size) == expected
@@ -0,0 +1,164 @@
+import json
+import threading
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from text_quality.monitoring.metrics import Metrics
+from text_quality.monitoring.metrics import MetricsExporter
+from text_quality.monitoring.metrics import MetricsSink
+from text_quality.monitoring.metrics import add_process_metrics
+from text_quality.monitoring.metrics import write_prometheus_file
+from text_quality.monitoring.timing import Timer
+
+
+class TestMetrics:
+    def test_counter(self):
+        metrics = Metrics()
+        counter = metrics.counter("pages_total", "Pages.")
+
+        counter.inc()
+        counter.inc(2, reason="EMPTY")
+        counter.inc(reason="EMPTY")
+
+        assert counter.get() == 1
+        assert counter.get(reason="EMPTY") == 3
+        assert metrics.counter("pages_total", "Pages.") is counter
+        with pytest.raises(ValueError):
+            counter.inc(-1)
+
+    def test_type_mismatch(self):
+        metrics = Metrics()
+        metrics.counter("pages_total", "Pages.")
+
+        with pytest.raises(ValueError, match="counter"):
+            metrics.gauge("pages_total", "Pages.")
+
+    def test_threads(self):
+        counter = Metrics().counter("pages_total", "Pages.")
+        barrier = threading.Barrier(8)
+
+        def inc(_):
+            barrier.wait(timeout=10)
+            for _ in range(1000):
+                counter.inc(reason="CLASSIFIER")
+
+        with ThreadPoolExecutor(8) as executor:
+            list(executor.map(inc, range(8)))
+
+        assert counter.get(reason="CLASSIFIER") == 8000
+
+    def test_histogram(self):
+        histogram = Metrics().histogram("duration_seconds", "Durations.", [0.1, 1])
+
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value)
+
+        assert histogram.summary() == {
+            "count": 4,
+            "sum": pytest.approx(2.65),
+            "mean": pytest.approx(2.65 / 4),
+            "buckets": {"0.1": 2, "1": 3, "+Inf": 4},
+        }
+
+    def test_to_prometheus(self):
+        metrics = Metrics()
+        metrics.counter("pages_total", "Pages.").inc(reason='say "hi"')
+        metrics.gauge("memory_bytes", "Memory.").set(1.5)
+        metrics.histogram("duration_seconds", "Durations.", [1]).observe(0.5)
+        metrics.counter("errors_total", "Errors.")
+
+        assert metrics.to_prometheus().splitlines() == [
+            "# HELP text_quality_pages_total Pages.",
+            "# TYPE text_quality_pages_total counter",
+            'text_quality_pages_total{reason="say \\"hi\\""} 1',
+            "# HELP text_quality_memory_bytes Memory.",
+            "# TYPE text_quality_memory_bytes gauge",
+            "text_quality_memory_bytes 1.5",
+            "# HELP text_quality_duration_seconds Durations.",
+            "# TYPE text_quality_duration_seconds histogram",
+            'text_quality_duration_seconds_bucket{le="1"} 1',
+            'text_quality_duration_seconds_bucket{le="+Inf"} 1',
+            "text_quality_duration_seconds_sum 0.5",
+            "text_quality_duration_seconds_count 1",
+            "# HELP text_quality_errors_total Errors.",
+            "# TYPE text_quality_errors_total counter",
+            "text_quality_errors_total 0",
+        ]
+
+    def test_summary(self):
+        metrics = Metrics()
+        metrics.counter("pages_total", "Pages.").inc(reason="EMPTY")
+        metrics.counter("tokens_total", "Tokens.").inc(10)
+        metrics.add_collector(
+            lambda _metrics: _metrics.gauge("loaded", "Loaded.").set(2)
+        )
+
+        summary = metrics.summary()
+
+        assert summary == {
+            "pages_total": {"reason=EMPTY": 1},
+            "tokens_total": 10,
+            "loaded": 2,
+        }
+        assert json.loads(json.dumps(summary)) == summary
+
+    def test_process_metrics(self):
+        metrics = Metrics()
+        add_process_metrics(metrics)
+
+        summary = metrics.summary()
+
+        assert summary["elapsed_seconds"] >= 0
+        assert summary.get("resident_memory_bytes", 1) > 0
+
+
+class TestMetricsSink:
+    def test_record(self):
+        metrics = Metrics()
+        timer = Timer([MetricsSink(metrics)])
+
+        for _ in range(3):
+            with timer.page("page"):
+                with timer.stage("tokenize"):
+                    pass
+
+        summary = metrics.summary()
+        assert summary["page_duration_seconds"]["count"] == 3
+        assert summary["stage_seconds_total"]["stage=tokenize"] >= 0
+
+
+class TestMetricsExporter:
+    def test_write_prometheus_file(self, tmp_path):
+        metrics = Metrics()
+        metrics.counter("pages_total", "Pages.").inc()
+        file = tmp_path / "metrics.prom"
+
+        write_prometheus_file(metrics, file)
+
+        assert file.read_text(encoding="utf-8") == metrics.to_prometheus()
+        assert list(tmp_path.iterdir()) == [file]
+
+    def test_file(self, tmp_path):
+        metrics = Metrics()
+        counter = metrics.counter("pages_total", "Pages.")
+        file = tmp_path / "metrics.prom"
+
+        with MetricsExporter(metrics, file=file, interval=60):
+            assert "text_quality_pages_total 0" in file.read_text(encoding="utf-8")
+            counter.inc()
+
+        assert "text_quality_pages_total 1" in file.read_text(encoding="utf-8")
+
+    def test_port(self):
+        metrics = Metrics()
+        metrics.counter("pages_total", "Pages.").inc(5)
+
+        with MetricsExporter(metrics, port=0) as exporter:
+            with urllib.request.urlopen(
+                f"http://127.0.0.1:{exporter.port}/metrics", timeout=10
+            ) as response:
+                body = response.read().decode("utf-8")
+                content_type = response.headers["Content-Type"]
+
+        assert "text_quality_pages_total 5" in body
+        assert content_type.startswith("text/plain")
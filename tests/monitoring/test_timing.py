@@ -0,0 +1,178 @@
+import io
+import json
+import pickle
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from text_quality.monitoring.timing import NULL_TIMER
+from text_quality.monitoring.timing import TOTAL_STAGE
+from text_quality.monitoring.timing import AggregatingSink
+from text_quality.monitoring.timing import CallbackSink
+from text_quality.monitoring.timing import JsonLinesSink
+from text_quality.monitoring.timing import Timer
+
+
+class TestTimer:
+    def test_page(self):
+        records = []
+        timer = Timer(
+            [CallbackSink(lambda key, timings: records.append((key, timings)))]
+        )
+
+        with timer.page("page1"):
+            with timer.stage("stage1"):
+                pass
+            with timer.stage("stage2"):
+                pass
+            with timer.stage("stage1"):
+                pass
+
+        assert len(records) == 1
+        key, timings = records[0]
+        assert key == "page1"
+        assert list(timings.keys()) == ["stage1", "stage2", TOTAL_STAGE]
+        assert timings[TOTAL_STAGE] >= timings["stage1"] + timings["stage2"]
+
+    def test_stage_outside_page(self):
+        records = []
+        timer = Timer(
+            [CallbackSink(lambda key, timings: records.append((key, timings)))]
+        )
+
+        with timer.stage("stage1"):
+            pass
+
+        assert [(key, list(timings.keys())) for key, timings in records] == [
+            (None, ["stage1"])
+        ]
+
+    def test_add(self):
+        records = []
+        timer = Timer(
+            [CallbackSink(lambda key, timings: records.append((key, timings)))]
+        )
+
+        with timer.page("page1"):
+            timer.add("stage1", 1.0)
+            timer.add("stage1", 0.5)
+        timer.add("stage2", 2.0)
+
+        assert records[0][1]["stage1"] == 1.5
+        assert records[1] == (None, {"stage2": 2.0})
+
+    def test_stage_exception(self):
+        sink = AggregatingSink()
+        timer = Timer([sink])
+
+        with pytest.raises(ValueError):
+            with timer.page("page1"):
+                with timer.stage("stage1"):
+                    raise ValueError()
+
+        assert sink.summary()["stage1"]["count"] == 1
+
+    def test_nested_page(self):
+        timer = Timer()
+        with pytest.raises(RuntimeError):
+            with timer.page("page1"):
+                with timer.page("page2"):
+                    pass
+
+    def test_threads(self):
+        records = []
+        timer = Timer(
+            [CallbackSink(lambda key, timings: records.append((key, timings)))]
+        )
+        barrier = threading.Barrier(4)
+
+        def process(key):
+            with timer.page(key):
+                with timer.stage(key):
+                    # all threads are within a page at the same time
+                    barrier.wait(timeout=10)
+
+        with ThreadPoolExecutor(4) as executor:
+            list(executor.map(process, ["p1", "p2", "p3", "p4"]))
+
+        assert sorted(key for key, _ in records) == ["p1", "p2", "p3", "p4"]
+        for key, timings in records:
+            assert list(timings.keys()) == [key, TOTAL_STAGE]
+
+    def test_null_timer(self):
+        assert not NULL_TIMER.enabled
+        with NULL_TIMER.page("page1"):
+            with NULL_TIMER.stage("stage1"):
+                pass
+            NULL_TIMER.add("stage2", 1.0)
+
+    def test_pickle(self):
+        timer = Timer([AggregatingSink()])
+        with timer.page("page1"):
+            unpickled = pickle.loads(pickle.dumps(timer))
+
+        with unpickled.page("page2"):
+            pass
+
+        # pylint: disable=protected-access
+        assert unpickled._sinks[0].summary()[TOTAL_STAGE]["count"] == 1
+        assert not pickle.loads(pickle.dumps(NULL_TIMER)).enabled
+
+
+class TestAggregatingSink:
+    def test_summary(self):
+        sink = AggregatingSink()
+        for i in range(1, 101):
+            sink.record(str(i), {"stage1": i / 100, "stage2": 1.0})
+
+        summary = sink.summary()
+
+        assert list(summary.keys()) == ["stage1", "stage2"]
+        assert summary["stage1"] == pytest.approx(
+            {
+                "count": 100,
+                "total": 50.5,
+                "mean": 0.505,
+                "p50": 0.505,
+                "p95": 0.9505,
+                "p99": 0.9901,
+            }
+        )
+        assert summary["stage2"]["p99"] == pytest.approx(1.0)
+
+    def test_report(self):
+        sink = AggregatingSink()
+        sink.record("page1", {"stage1": 0.5})
+
+        lines = sink.report().split("\n")
+
+        assert lines[0].split() == [
+            "stage",
+            "count",
+            "total",
+            "mean",
+            "p50",
+            "p95",
+            "p99",
+        ]
+        assert lines[1].split() == [
+            "stage1",
+            "1",
+            "0.500s",
+            "500.00ms",
+            "500.00ms",
+            "500.00ms",
+            "500.00ms",
+        ]
+
+
+def test_json_lines_sink():
+    file = io.StringIO()
+    sink = JsonLinesSink(file)
+
+    sink.record("page1", {"stage1": 0.5})
+    sink.record(None, {"stage2": 1.0})
+
+    assert [json.loads(line) for line in file.getvalue().splitlines()] == [
+        {"page": "page1", "stage1": 0.5},
+        {"page": None, "stage2": 1.0},
+    ]
@@ -0,0 +1,44 @@
+import pytest
+from pagexml.model.physical_document_model import PageXMLScan
+from pagexml.model.physical_document_model import PageXMLTextLine
+from pagexml.model.physical_document_model import PageXMLTextRegion
+from text_quality.page.page import Page
+from text_quality.page.page import TextLine
+
+
+class TestPage:
+    @pytest.mark.parametrize(
+        "page_doc,expected",
+        [
+            (PageXMLScan(), []),
+            (
+                PageXMLScan(lines=[PageXMLTextLine(doc_id="l1", text="line 1")]),
+                [TextLine("l1", None, "line 1")],
+            ),
+            (
+                PageXMLScan(
+                    text_regions=[
+                        PageXMLTextRegion(
+                            doc_id="r1",
+                            lines=[
+                                PageXMLTextLine(doc_id="l1", text="line 1"),
+                                PageXMLTextLine(doc_id="l2", text=None),
+                                PageXMLTextLine(doc_id="l3", text="line 3"),
+                            ],
+                        )
+                    ],
+                    lines=[PageXMLTextLine(doc_id="l4", text="line 4")],
+                ),
+                [
+                    TextLine("l1", "r1", "line 1"),
+                    TextLine("l3", "r1", "line 3"),
+                    TextLine("l4", None, "line 4"),
+                ],
+            ),
+        ],
+    )
+    def test_text_lines(self, page_doc, expected):
+        page = Page(page_doc)
+
+        assert page.text_lines() == expected
+        assert [line.text for line in page.text_lines()] == page.lines()
@@ -0,0 +1,156 @@
+import multiprocessing
+import pickle
+import numpy as np
+import pytest
+from text_quality.feature.featurize import Featurizer
+from text_quality.feature.scorer.garbage import GarbageDetector
+from text_quality.feature.scorer.q_gram import QGram
+from text_quality.feature.tokenizer import NautilusOcrTokenizer
+from text_quality.training.features import FeatureCache
+from text_quality.training.features import content_hash
+from text_quality.training.features import extract_features
+from text_quality.training.features import resource_fingerprint
+
+
+PAGEXML = """<?xml version="1.0" encoding="UTF-8"?>
+<PcGts xmlns="http://schema.primaresearch.org/PAGE/gts/pagecontent/2013-07-15">
+<Metadata><Creator>test</Creator><Created>2020-01-01T00:00:00</Created><LastChange>2020-01-01T00:00:00</LastChange></Metadata>
+<Page imageFilename="page.jpg" imageWidth="100" imageHeight="100">
+<TextRegion id="r1"><Coords points="0,0 10,0 10,10 0,10"/>
+<TextLine id="r1l1"><Coords points="0,0 10,0 10,10 0,10"/><TextEquiv><Unicode>{text}</Unicode></TextEquiv></TextLine>
+</TextRegion>
+</Page></PcGts>"""
+
+FEATURES = ["n_gram_score", "garbage_score"]
+
+
+@pytest.fixture
+def featurizer():
+    return Featurizer(
+        {"n_gram_score": QGram(["een", "tek"]), "garbage_score": GarbageDetector()},
+        NautilusOcrTokenizer(),
+    )
+
+
+@pytest.fixture
+def pages(tmp_path):
+    files = []
+    for i, text in enumerate(
+        ["een tekst", "een andere tekst", "xxxxxxxxxxxxxxxxxxxxxxxxx"]
+    ):
+        file = tmp_path / f"{i}.xml"
+        file.write_text(PAGEXML.format(text=text))
+        files.append(file)
+    return files
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return FeatureCache(tmp_path / "cache", "fingerprint", FEATURES)
+
+
+def test_resource_fingerprint(tmp_path):
+    file = tmp_path / "resource.txt"
+    file.write_text("a")
+    fingerprint = resource_fingerprint([file], q=3)
+
+    assert resource_fingerprint([file], q=3) == fingerprint
+    assert resource_fingerprint([file], q=4) != fingerprint
+
+    file.write_text("b")
+    assert resource_fingerprint([file], q=3) != fingerprint
+
+
+class TestFeatureCache:
+    def test_add(self, cache, tmp_path):
+        cache.add({"key": np.array([0.5, 0.0])})
+
+        assert "key" in cache
+        assert cache.get("other") is None
+
+        reloaded = FeatureCache(tmp_path / "cache", "fingerprint", FEATURES)
+        assert len(reloaded) == 1
+        np.testing.assert_array_equal(reloaded.get("key"), [0.5, 0.0])
+
+    def test_other_fingerprint(self, cache, tmp_path):
+        cache.add({"key": np.array([0.5, 0.0])})
+
+        assert len(FeatureCache(tmp_path / "cache", "other", FEATURES)) == 0
+
+    def test_other_features(self, cache, tmp_path):
+        cache.add({"key": np.array([0.5, 0.0])})
+
+        assert len(FeatureCache(tmp_path / "cache", "fingerprint", ["x", "y"])) == 0
+
+    def test_compact(self, cache, tmp_path):
+        cache.add({"key1": np.array([0.5, 0.0])})
+        cache.add({"key2": np.array([1.0, 1.0])})
+        assert len(list((tmp_path / "cache" / "fingerprint").iterdir())) == 2
+
+        cache.compact()
+
+        assert len(list((tmp_path / "cache" / "fingerprint").iterdir())) == 1
+        assert len(FeatureCache(tmp_path / "cache", "fingerprint", FEATURES)) == 2
+
+
+class TestExtractFeatures:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_extract_features(self, featurizer, pages, workers):
+        features = extract_features(pages, featurizer, workers=workers)
+
+        assert features.columns.tolist() == FEATURES
+        assert features.index.tolist() == [str(page) for page in pages]
+        assert features.loc[str(pages[0])].tolist() == pytest.approx([0.375, 0.0])
+        assert features.loc[str(pages[2])].tolist() == pytest.approx([0.0, 1.0])
+
+    def test_spawn(self, featurizer, pages):
+        """The featurizer is pickled to worker processes that do not inherit the parent's memory."""
+        assert pickle.loads(pickle.dumps(featurizer)).features == FEATURES
+
+        features = extract_features(
+            pages,
+            featurizer,
+            workers=2,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+        assert features.loc[str(pages[0])].tolist() == pytest.approx([0.375, 0.0])
+
+    def test_cache(self, featurizer, pages, cache, monkeypatch):
+        expected = extract_features(pages[:2], featurizer, cache=cache)
+        assert len(cache) == 2
+
+        featurized = []
+        featurize = featurizer.featurize
+        monkeypatch.setattr(
+            featurizer,
+            "featurize",
+            lambda text: featurized.append(text) or featurize(text),
+        )
+        pages[1].write_text(PAGEXML.format(text="een tekst"))  # changed
+        features = extract_features(pages, featurizer, cache=cache)
+
+        assert len(featurized) == 1  # only the new page
+        assert features.iloc[:2].to_numpy().tolist() == [
+            expected.iloc[0].tolist(),
+            expected.iloc[0].tolist(),
+        ]
+
+    def test_invalid_file(self, featurizer, pages, cache):
+        pages[0].write_text("<invalid")
+
+        features = extract_features(pages, featurizer, cache=cache)
+
+        assert features.iloc[0].isna().all()
+        assert content_hash(pages[0].read_bytes()) not in cache
+        assert len(cache) == 2
+
+    def test_missing_file(self, featurizer, pages, cache, tmp_path):
+        missing = tmp_path / "missing.xml"
+
+        features = extract_features([missing] + pages, featurizer, cache=cache)
+
+        assert features.index.tolist() == [str(missing)] + [str(page) for page in pages]
+        assert features.iloc[0].isna().all()
+        assert not features.iloc[1:].isna().any().any()
+        assert len(cache) == 3
@@ -0,0 +1,108 @@
+"""Aggregating the classification results of the windows of a large text into one result."""
+
+import math
+from collections import Counter
+from typing import Optional
+from ..feature.featurize import Scorers
+from .pipeline import ClassifierScores
+from .pipeline import Reason
+from .pipeline import default_scores_dict
+
+
+_CLASSIFIED = (Reason.BUDGET, Reason.CLASSIFIER)
+"""The reasons of windows whose scores have been computed, in order of precedence for the aggregated reason."""
+
+
+class WindowAggregate:
+    """Aggregates the classification results of the windows of a text, in constant memory.
+
+    Windows are weighted by their number of tokens:
+
+    - the quality class is the class of the majority of the tokens, and the confidence is its share;
+    - the language is the language of the majority of the tokens, and the language confidence is its share;
+    - feature scores and their error bounds are the weighted means over the windows they have been computed for;
+    - character and token counts are summed;
+    - the reason is BUDGET if any window has been classified with approximated features, so that the text
+      can be found and reprocessed; otherwise CLASSIFIER if any window has been classified,
+      and the most frequent reason otherwise.
+
+    If no window contains any tokens, all windows have the same weight.
+    """
+
+    def __init__(self) -> None:
+        self.windows = 0
+        self._qualities: Counter[tuple[int, bool]] = Counter()
+        """Number of tokens and of windows per class."""
+        self._languages: Counter[tuple[str, bool]] = Counter()
+        """Number of tokens and of windows per language."""
+        self._reasons: Counter[Reason] = Counter()
+        self._counts: Counter[str] = Counter()
+        self._sums: Counter[str] = Counter()
+        self._weights: Counter[str] = Counter()
+        self._scorers: dict[str, None] = {}
+        """The scorers that ran for any window, in order."""
+
+    def add(self, quality: int, scores: ClassifierScores, reason: Reason) -> None:
+        """Add the result of a window."""
+        self.windows += 1
+        weight = scores["n_tokens"]
+
+        self._qualities[quality, True] += weight
+        self._qualities[quality, False] += 1
+        if scores["language"]:
+            self._languages[scores["language"], True] += weight
+            self._languages[scores["language"], False] += 1
+        self._reasons[reason] += 1
+
+        for field in ("n_characters", "n_tokens", "n_sampled"):
+            self._counts[field] += scores[field]
+        for score in Scorers.__annotations__:
+            for field in (score, f"{score}_error"):
+                if not math.isnan(scores[field]) and reason in _CLASSIFIED:
+                    self._sums[field] += weight * scores[field]
+                    self._weights[field] += weight
+        self._scorers.update(dict.fromkeys(filter(None, scores["scorers"].split(","))))
+
+    @staticmethod
+    def _majority(counter: Counter) -> tuple[Optional[object], float]:
+        """The value with the most tokens (or windows if there are no tokens), and its share."""
+        tokens = Counter(
+            {key: n for (key, by_tokens), n in counter.items() if by_tokens}
+        )
+        if not any(tokens.values()):
+            tokens = Counter(
+                {key: n for (key, by_tokens), n in counter.items() if not by_tokens}
+            )
+        if not tokens:
+            return None, 0.0
+        value, weight = tokens.most_common(1)[0]
+        return value, weight / sum(tokens.values())
+
+    def result(self) -> tuple[int, ClassifierScores, Reason]:
+        """The aggregated result of all windows added so far.
+
+        Raises:
+            ValueError: if no windows have been added.
+        """
+        if not self.windows:
+            raise ValueError("No windows to aggregate.")
+
+        quality, confidence = self._majority(self._qualities)
+        language, language_confidence = self._majority(self._languages)
+
+        scores = default_scores_dict(
+            0.0,
+            confidence=confidence,
+            language=language or "",
+            language_confidence=language_confidence,
+            scorers=",".join(self._scorers),
+            **self._counts,
+        )
+        for field, weight in self._weights.items():
+            scores[field] = self._sums[field] / weight if weight else math.nan
+
+        reason = next(
+            (reason for reason in _CLASSIFIED if self._reasons[reason]),
+            self._reasons.most_common(1)[0][0],
+        )
+        return quality, scores, reason
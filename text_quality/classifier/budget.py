@@ -0,0 +1,176 @@
+"""Bounding the processing time per page, by scoring pathological pages approximately."""
+
+import math
+import threading
+import time
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from ..feature.featurize import FeatureCounts
+from ..feature.featurize import Featurizer
+from ..feature.sampling import TokenSampler
+from ..settings import BUDGET_MAX_TOKEN_LENGTH
+from ..settings import BUDGET_MIN_SAMPLE
+from .cascade import SAMPLED_SUFFIX
+
+
+_SMOOTHING = 0.2
+"""Weight of the latest measurement in the moving average of the scoring time per character."""
+
+
+class BudgetedCounts(NamedTuple):
+    """Feature counts computed within a time budget."""
+
+    counts: FeatureCounts
+    errors: dict[str, float]
+    """The achieved error bound of each feature value; 0 if all tokens have been scored."""
+    n_sampled: int
+    """The smallest number of tokens a feature has been computed on, counting the pieces of long tokens."""
+    scorers: List[str]
+    """The features computed, with SAMPLED_SUFFIX for those computed on a sample to stay within the budget."""
+    degraded: bool
+    """Whether any feature has been approximated to stay within the budget."""
+
+
+class PageBudget:
+    """A time budget per page for scoring, beyond which the remaining scorers run on a sample of the tokens.
+
+    Before running a scorer on a page, its duration is predicted from the number of characters to score
+    and the time per character measured on earlier pages (per feature, as a moving average).
+    If the scorer would exceed the remaining budget, it runs on a stratified sample of the tokens
+    that is predicted to fit (but at least `min_sample` tokens), and the page is marked as degraded.
+    Tokens longer than `max_token_length` characters (e.g. runs of garbage without spaces), which are
+    disproportionately slow to look up, are split into pieces of that length, which keeps their weight
+    in the features that count characters; that degrades the page as well.
+
+    The budget is not a hard deadline: a scorer is never interrupted, so that a page can exceed the budget
+    by the duration of a sampled scorer, or by a misprediction. A PageBudget can be shared between threads.
+    """
+
+    def __init__(
+        self,
+        seconds: float,
+        *,
+        max_token_length: int = BUDGET_MAX_TOKEN_LENGTH,
+        min_sample: int = BUDGET_MIN_SAMPLE,
+        sampler: Optional[TokenSampler] = None,
+    ) -> None:
+        """Configure the budget.
+
+        Args:
+            seconds: the time budget per page, including tokenizing it.
+            max_token_length: longer tokens are split into pieces of this length.
+            min_sample: the minimum number of tokens to score a feature on.
+            sampler: draws the samples and estimates their errors; defaults to a TokenSampler.
+        Raises:
+            ValueError: if any of the numbers is not positive.
+        """
+        if seconds <= 0:
+            raise ValueError(f"Invalid budget: {seconds}")
+        if max_token_length < 1:
+            raise ValueError(f"Invalid maximum token length: {max_token_length}")
+        if min_sample < 2:
+            raise ValueError(f"Invalid minimum sample size: {min_sample}")
+
+        self.seconds = seconds
+        self.max_token_length = max_token_length
+        self.min_sample = min_sample
+        self._sampler = sampler or TokenSampler()
+
+        self._lock = threading.Lock()
+        self._rates: dict[str, float] = {}
+        """Seconds per character for each feature."""
+
+    def rate(self, feature: str) -> Optional[float]:
+        """The measured scoring time per character of a feature; None if not measured yet."""
+        with self._lock:
+            return self._rates.get(feature)
+
+    def _measure(self, feature: str, seconds: float, characters: int) -> None:
+        if characters == 0:
+            return
+        rate = seconds / characters
+        with self._lock:
+            previous = self._rates.get(feature)
+            self._rates[feature] = (
+                rate
+                if previous is None
+                else _SMOOTHING * rate + (1 - _SMOOTHING) * previous
+            )
+
+    def counts(
+        self, featurizer: Featurizer, tokens: List[str], elapsed: float = 0.0
+    ) -> BudgetedCounts:
+        """Compute the feature counts of a page within the budget.
+
+        Args:
+            featurizer: computes the counts.
+            tokens: the tokens of the page.
+            elapsed: the time already spent on the page, e.g. for tokenizing it.
+        """
+        deadline = time.perf_counter() + self.seconds - elapsed
+        scored = [
+            piece
+            for token in tokens
+            for piece in (
+                [
+                    token[start : start + self.max_token_length]
+                    for start in range(0, len(token), self.max_token_length)
+                ]
+                if len(token) > self.max_token_length
+                else [token]
+            )
+        ]
+        degraded = len(scored) > len(tokens)
+        characters = sum(map(len, scored))
+
+        counts: FeatureCounts = {}
+        errors: dict[str, float] = {}
+        n_sampled = len(scored)
+        scorers = []
+        for feature in featurizer.features:
+            remaining = max(0.0, deadline - time.perf_counter())
+            rate = self.rate(feature)
+            size = len(scored)
+            if rate is not None and rate * characters > remaining:
+                size = max(
+                    self.min_sample, math.floor(remaining / rate / characters * size)
+                )
+
+            start = time.perf_counter()
+            if size < len(scored):
+                counts[feature], errors[feature], sampled_characters = self._sample(
+                    featurizer, feature, scored, size
+                )
+                scorers.append(feature + SAMPLED_SUFFIX)
+                degraded = True
+            else:
+                sampled = featurizer.sample_counts(scored, [feature])
+                counts[feature] = sampled.counts[feature]
+                errors[feature] = sampled.errors[feature]
+                size = sampled.n_sampled
+                # the featurizer's own sample, assuming tokens of average length
+                sampled_characters = characters * size // max(1, len(scored))
+                scorers.append(feature)
+            self._measure(feature, time.perf_counter() - start, sampled_characters)
+            n_sampled = min(n_sampled, size)
+
+        return BudgetedCounts(counts, errors, n_sampled, scorers, degraded)
+
+    def _sample(
+        self, featurizer: Featurizer, feature: str, tokens: List[str], size: int
+    ) -> tuple[tuple[float, int], float, int]:
+        """Compute a feature on a sample of the tokens.
+
+        Returns:
+            a tuple with the counts on the sample, their error bound, and the number of characters in the sample.
+        """
+        groups = self._sampler.sample(tokens, size)
+        group_counts = [featurizer.count(group, [feature])[feature] for group in groups]
+        numerator = sum(n for n, _ in group_counts)
+        denominator = sum(d for _, d in group_counts)
+        return (
+            (numerator, denominator),
+            self._sampler.error(group_counts, size, len(tokens)),
+            sum(len(token) for group in groups for token in group),
+        )
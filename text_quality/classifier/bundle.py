@@ -0,0 +1,407 @@
+"""A single, versioned file with all resources of a classifier, for fast and consistent loading."""
+
+import hashlib
+import io
+import json
+import logging
+import mmap
+import pickle
+import tempfile
+from datetime import datetime
+from datetime import timezone
+from importlib.metadata import PackageNotFoundError
+from importlib.metadata import version as package_version
+from pathlib import Path
+from typing import Any
+from typing import BinaryIO
+from typing import Callable
+from typing import Optional
+import joblib
+import sklearn.pipeline
+from spylls import hunspell
+from .. import __version__
+from ..feature.featurize import Featurizer
+from ..feature.featurize import Scorers
+from ..feature.sampling import TokenSampler
+from ..feature.scorer.dictionary import HunspellDictionary
+from ..feature.scorer.dictionary import TokenDictionary
+from ..feature.scorer.garbage import GarbageDetector
+from ..feature.scorer.mapped_hunspell import MappedDic
+from ..feature.scorer.mapped_hunspell import MappedHunspell
+from ..feature.scorer.q_gram import QGram
+from ..feature.scorer.token_set import MappedTokenSet
+from ..feature.tokenizer import NautilusOcrTokenizer
+from ..language.fasttext import FastTextLanguageClassifier
+from ..monitoring.memory import MEMORY_ACCOUNTING
+from ..monitoring.timing import NULL_TIMER
+from ..monitoring.timing import Timer
+from ..settings import ENCODING
+from ..settings import LINE_SEPARATOR
+from ..settings import Q_GRAM_LENGTH
+from ..settings import Q_GRAMS_GAMMA
+from .registry import LanguageBundle
+from .registry import LanguageResources
+
+
+BUNDLE_FORMAT_VERSION = 1
+"""Version of the bundle file format; bundles in other versions are refused."""
+
+_MAGIC = b"TQBUNDLE"
+_ALIGNMENT = 4096
+"""Sections start at page boundaries, so that they can be memory-mapped efficiently."""
+
+_PACKAGES = ("scikit-learn", "spylls", "fasttext-wheel")
+"""Packages whose versions are recorded, since their objects are stored in the bundle."""
+
+
+class BundleError(ValueError):
+    """Raised if a bundle file is invalid, corrupt, or does not match this version of the package."""
+
+
+def _package_versions() -> dict[str, Optional[str]]:
+    versions = {}
+    for package in _PACKAGES:
+        try:
+            versions[package] = package_version(package)
+        except PackageNotFoundError:
+            versions[package] = None
+    return versions
+
+
+class ModelBundle:
+    """A model bundle: all resources for classifying texts in one language, in one file.
+
+    The file starts with a header and a JSON manifest, followed by one section per resource,
+    each aligned to a page boundary:
+
+    - 'pipeline': the pickled sklearn pipeline;
+    - 'hunspell_aff': the pickled, parsed Hunspell affix file;
+    - 'hunspell_dic': the Hunspell entries in the format of MappedDic;
+    - 'token_dict': the token dictionary in the format of MappedTokenSet;
+    - 'qgrams': the q-gram profile, already cut at the configured gamma;
+    - 'language_model': the fastText language identification model.
+
+    The manifest contains the offset, size, and SHA-256 checksum of each section, the features of the pipeline,
+    the settings the bundle has been built with, and the versions of the packages that created it.
+    The Hunspell entries and the token dictionary are memory-mapped, and are not read or parsed when loading.
+    """
+
+    SECTIONS = (
+        "pipeline",
+        "hunspell_aff",
+        "hunspell_dic",
+        "token_dict",
+        "qgrams",
+        "language_model",
+    )
+
+    def __init__(self, file: Path, *, verify: bool = True) -> None:
+        """Open a bundle file.
+
+        Args:
+            file: the bundle file.
+            verify: if True, verify the checksums of all sections; this reads the entire file.
+        Raises:
+            BundleError: if the file is not a bundle, has another format version, is corrupt,
+                or has been built with other settings than the current ones.
+        """
+        self.file = Path(file)
+        with open(self.file, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[: len(_MAGIC)] != _MAGIC:
+            raise BundleError(f"Not a model bundle: '{self.file}'.")
+        manifest_size = int.from_bytes(
+            self._mmap[len(_MAGIC) : len(_MAGIC) + 8], "little"
+        )
+        manifest_start = len(_MAGIC) + 8
+        self.manifest: dict[str, Any] = json.loads(
+            self._mmap[manifest_start : manifest_start + manifest_size].decode(ENCODING)
+        )
+
+        if self.manifest.get("format_version") != BUNDLE_FORMAT_VERSION:
+            raise BundleError(
+                f"Unsupported format version of bundle '{self.file}': "
+                f"{self.manifest.get('format_version')} (expected {BUNDLE_FORMAT_VERSION})."
+            )
+        if missing := set(self.SECTIONS) - set(self.manifest["sections"]):
+            raise BundleError(
+                f"Bundle '{self.file}' lacks sections: {sorted(missing)}."
+            )
+        if self.settings["q_gram_length"] != Q_GRAM_LENGTH:
+            raise BundleError(
+                f"Bundle '{self.file}' has been built with Q_GRAM_LENGTH={self.settings['q_gram_length']}, "
+                f"but it is {Q_GRAM_LENGTH}."
+            )
+        installed_versions = _package_versions()
+        for package, built_with in self.manifest["packages"].items():
+            if package in installed_versions and built_with != (
+                installed := installed_versions[package]
+            ):
+                logging.warning(
+                    "Bundle '%s' has been built with %s %s, but %s is installed.",
+                    self.file,
+                    package,
+                    built_with,
+                    installed,
+                )
+        if verify:
+            self.verify()
+
+    def close(self) -> None:
+        """Unmap the bundle file.
+
+        The Hunspell entries and the token dictionary map the file themselves, and remain usable.
+        """
+        self._mmap.close()
+
+    def __enter__(self) -> "ModelBundle":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    @property
+    def version(self) -> str:
+        """The version of the bundle, as given when building it."""
+        return self.manifest["version"]
+
+    @property
+    def language(self) -> str:
+        """The language of the resources."""
+        return self.manifest["language"]
+
+    @property
+    def features(self) -> list[str]:
+        """The input features of the pipeline."""
+        return self.manifest["features"]
+
+    @property
+    def settings(self) -> dict[str, Any]:
+        """The settings the bundle has been built with."""
+        return self.manifest["settings"]
+
+    def _section(self, name: str) -> tuple[int, int]:
+        section = self.manifest["sections"][name]
+        return section["offset"], section["size"]
+
+    def _bytes(self, name: str) -> bytes:
+        offset, size = self._section(name)
+        return self._mmap[offset : offset + size]
+
+    def verify(self) -> None:
+        """Verify the checksums of all sections.
+
+        Raises:
+            BundleError: if a checksum does not match.
+        """
+        for name, section in self.manifest["sections"].items():
+            offset, size = section["offset"], section["size"]
+            if offset + size > len(self._mmap):
+                raise BundleError(f"Bundle '{self.file}' is truncated.")
+            digest = hashlib.sha256(
+                memoryview(self._mmap)[offset : offset + size]
+            ).hexdigest()
+            if digest != section["sha256"]:
+                raise BundleError(
+                    f"Checksum mismatch for section '{name}' in bundle '{self.file}'."
+                )
+
+    def pipeline(self) -> sklearn.pipeline.Pipeline:
+        """Load the sklearn pipeline."""
+        with MEMORY_ACCOUNTING.component(f"pipeline:{self.file.name}"):
+            return joblib.load(io.BytesIO(self._bytes("pipeline")))
+
+    def hunspell(self) -> HunspellDictionary:
+        """Load the Hunspell dictionary, with the entries memory-mapped."""
+        with MEMORY_ACCOUNTING.component(f"hunspell:{self.language}"):
+            aff = pickle.loads(self._bytes("hunspell_aff"))
+            offset, _ = self._section("hunspell_dic")
+            return HunspellDictionary(MappedHunspell(aff, MappedDic(self.file, offset)))
+
+    def token_dictionary(self) -> TokenDictionary:
+        """Map the token dictionary."""
+        offset, _ = self._section("token_dict")
+        with MEMORY_ACCOUNTING.component(f"token_dictionary:{self.file.name}"):
+            return TokenDictionary(MappedTokenSet(self.file, offset))
+
+    def qgrams(self) -> QGram:
+        with MEMORY_ACCOUNTING.component(f"qgrams:{self.file.name}"):
+            return QGram(self._bytes("qgrams").decode(ENCODING).split(LINE_SEPARATOR))
+
+    def language_classifier(self) -> FastTextLanguageClassifier:
+        """Load the fastText model.
+
+        fastText only reads models from files; the model is extracted to the temporary directory once,
+        named by its checksum.
+        """
+        digest = self.manifest["sections"]["language_model"]["sha256"]
+        model_file = Path(tempfile.gettempdir()) / f"text_quality_lid_{digest[:16]}.ftz"
+        if not model_file.is_file():
+            with tempfile.NamedTemporaryFile(
+                dir=model_file.parent, suffix=".tmp", delete=False
+            ) as f:
+                f.write(self._bytes("language_model"))
+            Path(f.name).replace(model_file)
+        return FastTextLanguageClassifier(model_file=model_file)
+
+    def featurizer(
+        self, timer: Timer = NULL_TIMER, sampler: Optional[TokenSampler] = None
+    ) -> Featurizer:
+        """Create a featurizer from the scorers in the bundle."""
+        return Featurizer(
+            Scorers(
+                dict_score=self.hunspell(),
+                dict_score_gt=self.token_dictionary(),
+                n_gram_score=self.qgrams(),
+                garbage_score=GarbageDetector(),
+            ),
+            NautilusOcrTokenizer(),
+            timer=timer,
+            sampler=sampler,
+        )
+
+    def load(
+        self, timer: Timer = NULL_TIMER, sampler: Optional[TokenSampler] = None
+    ) -> LanguageBundle:
+        """Load the featurizer and the pipeline.
+
+        Raises:
+            BundleError: if the features of the pipeline do not match the scorers or the manifest.
+        """
+        featurizer = self.featurizer(timer, sampler)
+        pipeline = self.pipeline()
+        if not list(pipeline.feature_names_in_) == self.features == featurizer.features:
+            raise BundleError(
+                f"Pipeline input features ({list(pipeline.feature_names_in_)}) in bundle '{self.file}' "
+                f"do not match the manifest ({self.features}) or the scorers ({featurizer.features})."
+            )
+        return LanguageBundle(featurizer, pipeline)
+
+    @staticmethod
+    def build(
+        file: Path,
+        resources: LanguageResources,
+        language_model_file: Path,
+        *,
+        version: Optional[str] = None,
+        overwrite: bool = False,
+    ) -> dict[str, Any]:
+        """Build a bundle from the resource files for a language.
+
+        Args:
+            file: the bundle file to write.
+            resources: the resource files.
+            language_model_file: the fastText language identification model.
+            version: the version of the bundle; defaults to the package version and the build date.
+            overwrite: overwrite an existing bundle file.
+        Returns:
+            the manifest of the bundle.
+        Raises:
+            FileExistsError: if the file exists and overwrite is False.
+            FileNotFoundError: if a resource file does not exist.
+            BundleError: if the features of the pipeline do not match the scorers,
+                or if the manifest does not fit in the header.
+        """
+        file = Path(file)
+        if file.exists() and not overwrite:
+            raise FileExistsError(file)
+        if missing := resources.missing() + (
+            [] if Path(language_model_file).is_file() else [language_model_file]
+        ):
+            raise FileNotFoundError(
+                f"Missing resource files: {', '.join(map(str, missing))}"
+            )
+
+        pipeline = joblib.load(resources.pipeline_file)
+        features = list(pipeline.feature_names_in_)
+        if features != list(Scorers.__annotations__):
+            raise BundleError(
+                f"Pipeline input features ({features}) do not match scorers ({list(Scorers.__annotations__)})."
+            )
+
+        logging.info(
+            "Reading Hunspell dictionary '%s' in directory '%s'",
+            resources.language,
+            resources.hunspell_dir,
+        )
+        dictionary = hunspell.Dictionary.from_files(
+            str(resources.hunspell_dir / resources.language)
+        )
+        qgrams = QGram.from_file(resources.qgrams_file)
+
+        created = datetime.now(timezone.utc)
+        writers: dict[str, Callable[[BinaryIO], Any]] = {
+            "pipeline": lambda f: joblib.dump(pipeline, f),
+            "hunspell_aff": lambda f: pickle.dump(dictionary.aff, f),
+            "hunspell_dic": lambda f: MappedDic.write(dictionary.dic, f),
+            # pylint: disable=protected-access
+            "token_dict": lambda f: MappedTokenSet.write_to(
+                TokenDictionary.from_file(resources.token_dict_file)._dictionary, f
+            ),
+            "qgrams": lambda f: f.write(
+                LINE_SEPARATOR.join(qgrams._lang_qgrams).encode(ENCODING)
+            ),
+            "language_model": lambda f: f.write(Path(language_model_file).read_bytes()),
+        }
+
+        sections = {}
+        with tempfile.TemporaryFile() as content:
+            for name, write in writers.items():
+                content.write(b"\x00" * (-content.tell() % _ALIGNMENT))
+                start = content.tell()
+                write(content)
+                size = content.tell() - start
+                content.seek(start)
+                sections[name] = {
+                    "offset": start,
+                    "size": size,
+                    "sha256": hashlib.sha256(content.read(size)).hexdigest(),
+                }
+
+            manifest = {
+                "format_version": BUNDLE_FORMAT_VERSION,
+                "version": version or f"{__version__}+{created:%Y%m%d}",
+                "created": created.isoformat(timespec="seconds"),
+                "language": resources.language,
+                "features": features,
+                "settings": {
+                    "q_gram_length": Q_GRAM_LENGTH,
+                    "q_grams_gamma": Q_GRAMS_GAMMA,
+                },
+                "sources": {
+                    "hunspell": str(resources.hunspell_dir / resources.language),
+                    "token_dict": str(resources.token_dict_file),
+                    "qgrams": str(resources.qgrams_file),
+                    "pipeline": str(resources.pipeline_file),
+                    "language_model": str(language_model_file),
+                },
+                "packages": {"text-quality": __version__} | _package_versions(),
+                "sections": sections,
+            }
+            # the sections follow the header, starting at a page boundary;
+            # reserve space for the offsets growing by the header size
+            manifest_size = len(json.dumps(manifest).encode(ENCODING))
+            header_size = len(_MAGIC) + 8 + manifest_size + 16 * len(sections)
+            header_size += -header_size % _ALIGNMENT
+            for section in sections.values():
+                section["offset"] += header_size
+            encoded = json.dumps(manifest).encode(ENCODING)
+            if len(_MAGIC) + 8 + len(encoded) > header_size:
+                raise BundleError(
+                    f"Manifest of {len(encoded)} bytes does not fit in the header of {header_size} bytes."
+                )
+
+            tmp_file = file.with_name(file.name + ".tmp")
+            logging.info("Writing model bundle to file '%s'.", file)
+            with open(tmp_file, "wb") as f:
+                f.write(_MAGIC)
+                f.write(len(encoded).to_bytes(8, "little"))
+                f.write(encoded)
+                f.write(b"\x00" * (header_size - f.tell()))
+                content.seek(0)
+                while chunk := content.read(2**20):
+                    f.write(chunk)
+            tmp_file.replace(file)
+
+        return manifest
@@ -0,0 +1,198 @@
+"""Cost-aware classification that skips expensive scorers if they cannot change the result."""
+
+import math
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+import numpy as np
+import pandas as pd
+import sklearn.pipeline
+from ..feature.sampling import ratio_variance
+from ..settings import CASCADE_GRID_SIZE
+from ..settings import CASCADE_SAMPLE_SIZE
+from ..settings import CASCADE_Z
+from ..settings import SAMPLING_GROUPS
+
+
+SAMPLED_SUFFIX = ":sample"
+"""Marks scorers in ClassifierScores['scorers'] that ran on a sample of the tokens."""
+
+
+class ExpensiveFeature(NamedTuple):
+    """A feature that is only computed if the other features do not decide the class.
+
+    Before computing it, the feature value is bounded by an interval:
+    relative to the value of a cheap proxy feature if given (e.g. dict_score relative to dict_score_gt),
+    otherwise the full range [0, 1].
+    Use `calibrate()` to derive the offsets from the feature values of a corpus.
+    """
+
+    name: str
+    proxy: Optional[str] = None
+    lower: float = -1.0
+    upper: float = 1.0
+
+    def bounds(self, features: dict[str, float]) -> tuple[float, float]:
+        """The interval of possible values given the cheap features of a page."""
+        if self.proxy is None:
+            return 0.0, 1.0
+        value = features[self.proxy]
+        return max(0.0, value + self.lower), min(1.0, value + self.upper)
+
+    @classmethod
+    def calibrate(
+        cls, features: pd.DataFrame, name: str, proxy: str, coverage: float = 0.98
+    ) -> "ExpensiveFeature":
+        """Derive the interval relative to a proxy from the feature values of a corpus.
+
+        Args:
+            features: feature values of a representative corpus, one row per page.
+            name: the expensive feature.
+            proxy: the cheap feature that the expensive one is bounded relative to.
+            coverage: the expected fraction of pages for which the interval contains the true value.
+        """
+        residuals = features[name] - features[proxy]
+        tail = (1 - coverage) / 2
+        lower, upper = residuals.quantile([tail, 1 - tail])
+        return cls(name, proxy, float(lower), float(upper))
+
+
+class Decision(NamedTuple):
+    """The class that a page gets for any value of the expensive feature in an interval."""
+
+    quality: int
+    confidence: float
+    """The minimum confidence over the interval."""
+
+
+class Cascade:
+    """Decides whether the expensive feature can change the class of a page.
+
+    The sklearn pipeline is evaluated on a grid of values of the expensive feature over its interval,
+    the other features fixed. If all grid points result in the same class, the expensive scorer is skipped.
+    Otherwise, the expensive scorer runs on a sample of the tokens, which narrows the interval,
+    and only if that does not decide the class either, on all tokens.
+    Since the classifier is only evaluated at grid points, the decision is approximate.
+    """
+
+    def __init__(
+        self,
+        expensive: ExpensiveFeature = ExpensiveFeature("dict_score"),
+        *,
+        grid_size: int = CASCADE_GRID_SIZE,
+        sample_size: int = CASCADE_SAMPLE_SIZE,
+        z: float = CASCADE_Z,
+        groups: int = SAMPLING_GROUPS,
+    ) -> None:
+        """Configure the cascade.
+
+        Args:
+            expensive: the expensive feature and its bounds.
+            grid_size: the number of values of the expensive feature to evaluate the classifier on.
+            sample_size: the number of tokens to score in the sampling stage; 0 to skip sampling.
+            z: the width of the confidence interval of the sample estimate, in standard errors.
+            groups: the number of groups the sample is split into, to estimate the variance of the estimate.
+        """
+        if grid_size < 2:
+            raise ValueError(f"Invalid grid size: {grid_size}")
+        if groups < 2:
+            raise ValueError(f"Invalid number of groups: {groups}")
+        self.expensive = expensive
+        self._grid_size = grid_size
+        self.sample_size = sample_size
+        self._z = z
+        self._groups = groups
+
+    def decide(
+        self,
+        pipeline: sklearn.pipeline.Pipeline,
+        features: List[dict[str, float]],
+        bounds: List[tuple[float, float]],
+    ) -> List[Optional[Decision]]:
+        """Check for each page whether the class is the same over the interval of the expensive feature.
+
+        The pipeline is called once for all pages.
+
+        Args:
+            pipeline: the sklearn pipeline.
+            features: the values of the cheap features for each page.
+            bounds: the interval of the expensive feature for each page.
+        Returns:
+            a Decision for each page with the same class over the interval, None for the others.
+        """
+        if not features:
+            return []
+
+        rows = [
+            _features | {self.expensive.name: value}
+            for _features, (lower, upper) in zip(features, bounds)
+            for value in np.linspace(lower, upper, self._grid_size)
+        ]
+        grid = pd.DataFrame(rows, columns=pipeline.feature_names_in_)
+        qualities = pipeline.predict(grid).reshape(len(features), self._grid_size)
+        probabilities = pipeline.predict_proba(grid).reshape(
+            len(features), self._grid_size, -1
+        )
+
+        decisions = []
+        for page_qualities, page_probabilities in zip(qualities, probabilities):
+            if (page_qualities == page_qualities[0]).all():
+                column = list(pipeline.classes_).index(page_qualities[0])
+                decisions.append(
+                    Decision(page_qualities[0], page_probabilities[:, column].min())
+                )
+            else:
+                decisions.append(None)
+        return decisions
+
+    def sample(self, tokens: List[str]) -> List[str]:
+        """A deterministic, evenly spread sample of the tokens."""
+        if len(tokens) <= self.sample_size:
+            return tokens
+        step = len(tokens) / self.sample_size
+        return [tokens[int(i * step)] for i in range(self.sample_size)]
+
+    def sample_groups(self, tokens: List[str]) -> List[List[str]]:
+        """The sample of the tokens, split into interleaved groups for estimating its variance."""
+        sample = self.sample(tokens)
+        return [
+            sample[group :: self._groups]
+            for group in range(min(self._groups, len(sample)))
+        ]
+
+    @staticmethod
+    def effective_size(group_counts: List[tuple[float, int]], n_sampled: int) -> float:
+        """The number of independent Bernoulli trials a sample of tokens is worth.
+
+        Scorers count tokens with different weights (e.g. dict_score counts characters),
+        so that the counts are not independent trials; the effective size is derived from the
+        variance of the ratio estimated from the counts of the groups of the sample,
+        and is at most the number of sampled tokens.
+        """
+        denominator = sum(d for _, d in group_counts)
+        variance = ratio_variance(group_counts)
+        if variance == 0:
+            return n_sampled
+        estimate = sum(n for n, _ in group_counts) / denominator
+        return min(n_sampled, estimate * (1 - estimate) / variance)
+
+    def sample_bounds(
+        self, estimate: float, n_sampled: float, n_total: float
+    ) -> tuple[float, float]:
+        """An approximate confidence interval for a ratio estimated from a sample of tokens.
+
+        Uses the Wilson score interval with a finite population correction;
+        the interval is the estimate itself if all tokens were sampled.
+        For ratios of weighted counts, pass the effective sample size, and scale the total accordingly.
+        """
+        if n_sampled >= n_total or n_sampled == 0:
+            return estimate, estimate
+        n = n_sampled * (n_total - 1) / (n_total - n_sampled)
+        z2 = self._z**2
+        center = (estimate + z2 / (2 * n)) / (1 + z2 / n)
+        margin = (
+            self._z
+            / (1 + z2 / n)
+            * math.sqrt(estimate * (1 - estimate) / n + z2 / (4 * n**2))
+        )
+        return max(0.0, center - margin), min(1.0, center + margin)
@@ -0,0 +1,278 @@
+"""Detecting near-duplicate pages with MinHash signatures and locality-sensitive hashing (LSH)."""
+
+import hashlib
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+import numpy as np
+from ..settings import DUPLICATE_MAX_ENTRIES
+from ..settings import DUPLICATE_NUM_PERM
+from ..settings import DUPLICATE_THRESHOLD
+
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def _token_hash(token: str) -> int:
+    """A 32-bit hash of a token that is stable across processes."""
+    return int.from_bytes(
+        hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little"
+    )
+
+
+def lsh_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """Choose the number of bands and of rows per band for an LSH index.
+
+    Signatures with an estimated similarity `s` share at least one band with probability
+    `1 - (1 - s**rows)**bands`. This picks the most selective split whose threshold
+    `(1 / bands) ** (1 / rows)` does not exceed the given threshold, so that few near-duplicates are missed;
+    the candidates are verified on their signatures.
+
+    Returns:
+        the number of bands and the number of rows per band.
+    """
+    rows = max(
+        (
+            r
+            for r in range(1, num_perm + 1)
+            if num_perm % r == 0 and (r / num_perm) ** (1 / r) <= threshold
+        ),
+        default=1,
+    )
+    return num_perm // rows, rows
+
+
+class Match(NamedTuple):
+    """A page in the index that is a near-duplicate of a queried page."""
+
+    similarity: float
+    """The estimated Jaccard similarity of the token sets of both pages."""
+    result: Any
+    """The result stored with the indexed page."""
+
+
+class DuplicateIndex:
+    """An LSH index of the MinHash signatures of classified pages, with their classification results.
+
+    The signature of a page is computed from the set of its tokens; the fraction of equal values
+    in two signatures estimates the Jaccard similarity of their token sets.
+
+    The most recently added pages are kept in memory. Older pages are spilled to an SQLite database
+    if a spill file is given, and forgotten otherwise. An existing spill file is reused,
+    so that near-duplicates of pages from earlier runs are found as well.
+    An index can be shared between threads.
+    """
+
+    def __init__(
+        self,
+        threshold: float = DUPLICATE_THRESHOLD,
+        num_perm: int = DUPLICATE_NUM_PERM,
+        *,
+        max_entries: int = DUPLICATE_MAX_ENTRIES,
+        spill_file: Optional[Path] = None,
+        seed: int = 0,
+    ) -> None:
+        """Create an index.
+
+        Args:
+            threshold: the minimum estimated Jaccard similarity of near-duplicates.
+            num_perm: the number of hash functions in the MinHash signatures.
+            max_entries: the maximum number of pages kept in memory.
+            spill_file: an SQLite database file for the pages that do not fit in memory.
+            seed: the random seed for the hash functions.
+        Raises:
+            ValueError: if any of the arguments is out of range,
+                or if the spill file has been created with a different number of hash functions or seed.
+        """
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Invalid threshold: {threshold}")
+        if num_perm < 1:
+            raise ValueError(f"Invalid number of hash functions: {num_perm}")
+        if max_entries < 1:
+            raise ValueError(f"Invalid maximum number of entries: {max_entries}")
+
+        self.threshold = threshold
+        self._max_entries = max_entries
+        self._bands, self._rows = lsh_bands(num_perm, threshold)
+
+        rng = np.random.default_rng(seed)
+        # a * x + b < 2**64 for 32-bit hashes x
+        self._a = rng.integers(1, int(_MAX_HASH), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MAX_HASH), num_perm, dtype=np.uint64)
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[int, tuple[np.ndarray, Any]] = OrderedDict()
+        self._buckets: dict[int, List[int]] = {}
+        self._next_id = 0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if spill_file is not None:
+            self._db = self._open(spill_file, f"{num_perm}:{seed}")
+
+    def _open(self, file: Path, params: str) -> sqlite3.Connection:
+        db = sqlite3.connect(file, check_same_thread=False)
+        with db:
+            db.execute("CREATE TABLE IF NOT EXISTS meta (params TEXT NOT NULL)")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS entries "
+                "(id INTEGER PRIMARY KEY, signature BLOB NOT NULL, result TEXT NOT NULL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key INTEGER NOT NULL, id INTEGER NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS buckets_key ON buckets (key)")
+            row = db.execute("SELECT params FROM meta").fetchone()
+            if row is None:
+                db.execute("INSERT INTO meta VALUES (?)", (params,))
+        if row is not None and row[0] != params:
+            db.close()
+            raise ValueError(
+                f"Index '{file}' has been created with other parameters ({row[0]})."
+            )
+        self._next_id = db.execute(
+            "SELECT COALESCE(MAX(id) + 1, 0) FROM entries"
+        ).fetchone()[0]
+        return db
+
+    def __len__(self) -> int:
+        """The number of pages in the index, in memory and spilled."""
+        with self._lock:
+            spilled = (
+                self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+                if self._db
+                else 0
+            )
+            return len(self._entries) + spilled
+
+    @property
+    def in_memory(self) -> int:
+        """The number of pages kept in memory."""
+        return len(self._entries)
+
+    def signature(self, tokens: Iterable[str]) -> np.ndarray:
+        """Compute the MinHash signature of the set of tokens of a page."""
+        hashes = np.fromiter(
+            (_token_hash(token) for token in set(tokens)), dtype=np.uint64
+        )
+        if len(hashes) == 0:
+            return np.full(len(self._a), _MAX_HASH, dtype=np.uint32)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    @staticmethod
+    def similarity(signature: np.ndarray, other: np.ndarray) -> float:
+        """The Jaccard similarity of two token sets, estimated from their signatures."""
+        return float(np.mean(signature == other))
+
+    def _keys(self, signature: np.ndarray) -> List[int]:
+        """The LSH bucket keys of a signature, one per band."""
+        return [
+            int.from_bytes(
+                hashlib.blake2b(
+                    band.to_bytes(2, "little")
+                    + signature[band * self._rows : (band + 1) * self._rows].tobytes(),
+                    digest_size=8,
+                ).digest(),
+                "little",
+                signed=True,
+            )
+            for band in range(self._bands)
+        ]
+
+    def query(self, signature: np.ndarray) -> Optional[Match]:
+        """Find the most similar page in the index with a similarity of at least the threshold.
+
+        Returns:
+            the similarity and the result of that page, or None if the index contains no near-duplicate.
+        """
+        keys = self._keys(signature)
+        with self._lock:
+            candidates = {
+                id_: self._entries[id_]
+                for key in keys
+                for id_ in self._buckets.get(key, [])
+            }
+            if self._db is not None:
+                candidates |= self._spilled_candidates(keys)
+
+        best = None
+        for other, result in candidates.values():
+            similarity = self.similarity(signature, other)
+            if similarity >= self.threshold and (
+                best is None or similarity > best.similarity
+            ):
+                best = Match(similarity, result)
+        return best
+
+    def _spilled_candidates(self, keys: List[int]) -> dict[int, tuple[np.ndarray, Any]]:
+        placeholders = ",".join("?" * len(keys))
+        rows = self._db.execute(
+            "SELECT id, signature, result FROM entries WHERE id IN "
+            f"(SELECT id FROM buckets WHERE key IN ({placeholders}))",
+            keys,
+        )
+        return {
+            id_: (np.frombuffer(signature, dtype=np.uint32), json.loads(result))
+            for id_, signature, result in rows
+        }
+
+    def add(self, signature: np.ndarray, result: Any) -> None:
+        """Add a page to the index.
+
+        Args:
+            signature: the signature of the page.
+            result: the result to return for near-duplicates of the page;
+                must be serializable to JSON if the index has a spill file.
+        """
+        keys = self._keys(signature)
+        with self._lock:
+            id_ = self._next_id
+            self._next_id += 1
+            self._entries[id_] = (signature, result)
+            for key in keys:
+                self._buckets.setdefault(key, []).append(id_)
+
+            if len(self._entries) > self._max_entries:
+                self._evict(max(1, self._max_entries // 10))
+
+    def _evict(self, n: int) -> None:
+        """Remove the n oldest pages from memory, spilling them to disk if a spill file is given."""
+        evicted = [self._entries.popitem(last=False) for _ in range(n)]
+        spilled_buckets = []
+        for id_, (signature, _) in evicted:
+            for key in self._keys(signature):
+                bucket = self._buckets[key]
+                bucket.remove(id_)
+                if not bucket:
+                    del self._buckets[key]
+                spilled_buckets.append((key, id_))
+
+        if self._db is not None:
+            with self._db:
+                self._db.executemany(
+                    "INSERT INTO entries VALUES (?, ?, ?)",
+                    (
+                        (id_, signature.tobytes(), json.dumps(result))
+                        for id_, (signature, result) in evicted
+                    ),
+                )
+                self._db.executemany(
+                    "INSERT INTO buckets VALUES (?, ?)", spilled_buckets
+                )
+
+    def close(self) -> None:
+        """Spill all pages in memory to the spill file, if any, and close it."""
+        with self._lock:
+            if self._db is not None:
+                if self._entries:
+                    self._evict(len(self._entries))
+                self._db.close()
+                self._db = None
@@ -1,23 +1,50 @@
 """Classification pipeline."""
 
 import logging
+import math
+import time
 from enum import Enum
 from enum import auto
 from pathlib import Path
+from typing import Iterable
 from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
 from typing import TypedDict
 from typing import Union
 import joblib
 import pandas as pd
 import sklearn.pipeline
+from ..feature.featurize import FeatureCounts
 from ..feature.featurize import Featurizer
 from ..feature.featurize import Scorers
+from ..feature.sampling import TokenSampler
+from ..feature.scorer.scorer import Scorer
+from ..language.classifier import AssumedLanguageClassifier
+from ..language.classifier import LanguageClassifier
+from ..language.classifier import LanguageStrategy
+from ..language.classifier import LazyLanguageClassifier
 from ..language.fasttext import FastTextLanguageClassifier
+from ..language.prescreen import PrescreenLanguageClassifier
+from ..monitoring.memory import MEMORY_ACCOUNTING
+from ..monitoring.metrics import Metrics
+from ..monitoring.timing import NULL_TIMER
+from ..monitoring.timing import Timer
 from ..page.page import Page
 from ..settings import DEFAULT_LANGUAGE
 from ..settings import EMPTY_PAGE_OUTPUT
+from ..settings import LINE_SEPARATOR
 from ..settings import MINIMUM_PAGE_LENGTH
 from ..settings import SHORT_COLUMN_WIDTH
+from .budget import PageBudget
+from .bundle import ModelBundle
+from .cascade import SAMPLED_SUFFIX
+from .cascade import Cascade
+from .cascade import Decision
+from .duplicates import DuplicateIndex
+from .registry import LanguageBundle
+from .registry import LanguageRegistry
 
 
 ClassifierScores = TypedDict(
@@ -26,12 +53,23 @@ ClassifierScores = TypedDict(
         "confidence": float,
         "n_characters": int,
         "n_tokens": int,
+        "n_sampled": int,
         "language": str,
         "language_confidence": float,
+        "scorers": str,
     }
-    | {score: float for score in Scorers.__annotations__.keys()},
+    | {score: float for score in Scorers.__annotations__.keys()}
+    | {f"{score}_error": float for score in Scorers.__annotations__.keys()},
 )
-"""Container class for the scores returned by the classifier."""
+"""Container class for the scores returned by the classifier.
+
+'scorers' lists the features that have been computed, separated by commas;
+features that have not been computed in cascade mode are NaN.
+'n_sampled' is the number of tokens scored, and the '_error' fields are the error bounds
+of the feature values if they have been computed on a sample of the tokens.
+"""
+
+_FIELD_DEFAULTS = {"scorers": ""}
 
 
 class Reason(Enum):
@@ -40,7 +78,11 @@ class Reason(Enum):
     CLASSIFIER = auto()
     SHORT_COLUMNS = auto()
     EMPTY = auto()
-    LANGUAGE = auto()  # language differs from default
+    LANGUAGE = auto()  # no classifier for the language
+    # near-duplicate of a classified page, the result of which is reused
+    DUPLICATE = auto()
+    # classified with approximated features, to stay within the time budget per page
+    BUDGET = auto()
 
 
 def default_scores_dict(default_value, **fields) -> ClassifierScores:
@@ -60,36 +102,175 @@ def default_scores_dict(default_value, **fields) -> ClassifierScores:
 
     return ClassifierScores(
         {
-            field: _type(default_value)
+            field: _FIELD_DEFAULTS.get(field, _type(default_value))
             for field, _type in ClassifierScores.__annotations__.items()
         }
         | fields
     )
 
 
+class Classification(NamedTuple):
+    """The classification result for a page, a region, or a line."""
+
+    id: Optional[str]
+    quality: int
+    scores: ClassifierScores
+    reason: Reason
+
+
+class PageClassifications(TypedDict):
+    """Classification results for a page and its TextRegions and lines."""
+
+    page: Classification
+    regions: List[Classification]
+    lines: List[Classification]
+
+
 class Pipeline:
-    """A wrapper around an sklearn pipeline that adds a featurizer."""
+    """A wrapper around an sklearn pipeline that adds a featurizer.
+
+    A Pipeline can be shared between threads, e.g. to classify pages in a thread pool:
+    the featurizer, scorers, and classifiers are not modified after loading,
+    and the language registry and timer are synchronized.
+    """
 
     def __init__(
         self,
         pipeline: sklearn.pipeline.Pipeline,
         featurizer: Featurizer,
         default_language: str = DEFAULT_LANGUAGE,
+        *,
+        timer: Timer = NULL_TIMER,
+        registry: Optional[LanguageRegistry] = None,
+        cascade: Optional[Cascade] = None,
+        metrics: Optional[Metrics] = None,
+        duplicates: Optional[DuplicateIndex] = None,
+        language_classifier: Optional[LanguageClassifier] = None,
+        language_strategy: LanguageStrategy = LanguageStrategy.FASTTEXT,
+        budget: Optional[PageBudget] = None,
     ) -> None:
+        """Initialize the pipeline.
+
+        Args:
+            pipeline: the sklearn pipeline for classifying feature values.
+            featurizer: the featurizer for computing the feature values.
+            default_language: the language of the pipeline and the featurizer.
+            timer: measures the durations of the processing stages.
+            registry: featurizers and classifiers for further languages;
+                the pipeline and featurizer are added to it for the default language.
+                Texts in languages that are not in the registry are not classified.
+            cascade: if given, skip the expensive scorer for pages whose class it cannot change;
+                applies to `classify()` and `classify_with_scores()`, but not to `classify_levels()`.
+            metrics: if given, count the classified pages and tokens per reason,
+                and collect the hit rate of the language registry.
+            duplicates: if given, reuse the results of earlier pages for near-duplicates of them,
+                and add the other pages to the index; applies to `classify()` and `classify_with_scores()`,
+                but not to `classify_levels()`.
+            language_classifier: identifies the language of texts; defaults to the fastText classifier
+                with the model in the temporary directory, which is downloaded if necessary.
+            language_strategy: how the language of texts is identified: ASSUME classifies all texts
+                in the default language without identifying it; FASTTEXT identifies all texts
+                with the language classifier; PRESCREEN accepts texts evidently in the default language
+                by their tokens and q-grams, using the featurizer's token dictionary and q-gram profile,
+                and identifies only the others with the language classifier, which is then loaded on first use.
+            budget: if given, approximate the features of pages that would take longer than the budget,
+                and classify them with reason BUDGET, so that they can be reprocessed without a budget later;
+                applies to `classify()` and `classify_with_scores()`, but not to `classify_levels()`.
+                Cannot be combined with a cascade.
+        Raises:
+            ValueError: for PRESCREEN, if the featurizer has no token dictionary or q-gram profile;
+                if both a cascade and a budget are given.
+        """
+        if cascade is not None and budget is not None:
+            raise ValueError(
+                "A cascade cannot be combined with a time budget per page."
+            )
+
         self._pipeline = pipeline
         self._featurizer = featurizer
         self._default_language = default_language
-        self._language_classifier = FastTextLanguageClassifier()
+        self._language_classifier = Pipeline._create_language_classifier(
+            language_strategy, language_classifier, featurizer, default_language
+        )
+        self._timer = timer
+        self._cascade = cascade
+        self._budget = budget
+        self._duplicates = duplicates
+
+        self._metrics = metrics
+        if metrics is not None:
+            self._pages_metric = metrics.counter(
+                "pages_total", "Classified pages by reason."
+            )
+            self._tokens_metric = metrics.counter(
+                "tokens_total", "Tokens in classified pages."
+            )
+            metrics.add_collector(self._collect_metrics)
+
+        self._registry = registry or LanguageRegistry()
+        self._registry.pin(default_language, LanguageBundle(featurizer, pipeline))
 
     @property
     def features(self) -> List[str]:
         """The names of the features used in the pipeline."""
         return list(self._pipeline.feature_names_in_)
 
+    @property
+    def language_classifier(self) -> LanguageClassifier:
+        return self._language_classifier
+
+    @property
+    def languages(self) -> List[str]:
+        """The languages that are classified."""
+        return self._registry.languages
+
+    @staticmethod
+    def _create_language_classifier(
+        strategy: LanguageStrategy,
+        classifier: Optional[LanguageClassifier],
+        featurizer: Featurizer,
+        language: str,
+    ) -> LanguageClassifier:
+        if strategy is LanguageStrategy.ASSUME:
+            return AssumedLanguageClassifier(language)
+        if strategy is LanguageStrategy.PRESCREEN:
+            try:
+                token_dictionary = featurizer.scorers["dict_score_gt"]
+                qgrams = featurizer.scorers["n_gram_score"]
+            except KeyError as e:
+                raise ValueError(
+                    f"The language pre-screen requires a featurizer with the scorer '{e.args[0]}'."
+                ) from e
+            return PrescreenLanguageClassifier(
+                language,
+                token_dictionary,
+                qgrams,
+                classifier or LazyLanguageClassifier(FastTextLanguageClassifier),
+            )
+        return classifier or FastTextLanguageClassifier()
+
+    def _bundle(self, language: str) -> Optional[LanguageBundle]:
+        """Get the featurizer and classifier for a language; None if it is not supported."""
+        bundle = self._registry.get(language)
+        if bundle is None:
+            logging.info(
+                "No classifier for language '%s' (supported: %s).",
+                language,
+                ", ".join(self._registry.languages),
+            )
+        return bundle
+
     def classify(self, page: Union[Page, str]) -> int:
         """Single instance classification."""
 
-        if isinstance(page, Page):
+        if (
+            self._cascade is not None
+            or self._metrics is not None
+            or self._duplicates is not None
+            or self._budget is not None
+        ):
+            quality, _, _ = self.classify_with_scores(page)
+        elif isinstance(page, Page):
             quality = self._classify_pagexml(page)
         elif self._is_short(page):
             logging.debug(
@@ -97,16 +278,13 @@ class Pipeline:
             )
             quality = EMPTY_PAGE_OUTPUT
         else:
-            language, _ = self._language_classifier.classify(page)
-            if language == self._default_language:
-                features, _ = self._featurizer.featurize_as_dataframe(page)
-                quality = self._pipeline.predict(features)[0]
+            with self._timer.stage("language"):
+                language, _ = self._language_classifier.classify(page)
+            if bundle := self._bundle(language):
+                features, _ = bundle.featurizer.featurize_as_dataframe(page)
+                with self._timer.stage("predict"):
+                    quality = bundle.pipeline.predict(features)[0]
             else:
-                logging.info(
-                    "Language '%s' differs from default language '%s'.",
-                    language,
-                    self._default_language,
-                )
                 quality = EMPTY_PAGE_OUTPUT
 
         return quality
@@ -114,9 +292,7 @@ class Pipeline:
     def _classify_pagexml(self, pagexml: Page) -> int:
         """Classify a Page object."""
 
-        if pagexml.lines() and all(
-            len(line) < SHORT_COLUMN_WIDTH for line in pagexml.lines()
-        ):
+        if Pipeline._has_short_columns(pagexml.lines()):
             logging.warning("Page '%s' has short columns.", pagexml.id)
             quality = 3
         else:
@@ -129,74 +305,579 @@ class Pipeline:
     ) -> tuple[int, ClassifierScores, Reason]:
         """Single instance classification with scores."""
 
+        return self.classify_batch_with_scores([page])[0]
+
+    def classify_batch_with_scores(
+        self, pages: Sequence[Union[Page, str]]
+    ) -> List[tuple[int, ClassifierScores, Reason]]:
+        """Classification with scores for multiple pages.
+
+        The results equal those of `classify_with_scores()` for each page (up to floating point rounding),
+        but pages are grouped by language, and the sklearn pipeline of each language is called only once.
+
+        Args:
+            pages: the pages to classify.
+        Returns:
+            a tuple with quality, scores, and reason per page.
+        """
+
+        results = [self._apply_rules(page) for page in pages]
+
+        languages: dict[str, List[tuple[int, float]]] = {}
+        for i, result in enumerate(results):
+            if isinstance(result, str):
+                with self._timer.stage("language"):
+                    language, language_confidence = self._language_classifier.classify(
+                        result
+                    )
+                languages.setdefault(language, []).append((i, language_confidence))
+
+        for language, indices in languages.items():
+            bundle = self._bundle(language)
+            if bundle is None:
+                for i, language_confidence in indices:
+                    results[i] = (
+                        EMPTY_PAGE_OUTPUT,
+                        default_scores_dict(
+                            0,
+                            confidence=0.0,
+                            n_characters=len(results[i]),
+                            language=language,
+                            language_confidence=language_confidence,
+                        ),
+                        Reason.LANGUAGE,
+                    )
+            elif self._duplicates is not None:
+                self._classify_deduplicated(bundle, language, indices, results)
+            else:
+                self._classify_texts(bundle, language, indices, results)
+
+        self._record(results)
+        return results
+
+    def _record(self, results: Iterable[tuple[int, ClassifierScores, Reason]]) -> None:
+        if self._metrics is None:
+            return
+        for _, scores, reason in results:
+            self._pages_metric.inc(reason=reason.name)
+            self._tokens_metric.inc(scores["n_tokens"])
+
+    def _collect_metrics(self, metrics: Metrics) -> None:
+        registry = self._registry
+        metrics.counter(
+            "language_cache_hits_total", "Requests for loaded language resources."
+        ).set_total(registry.hits)
+        metrics.counter(
+            "language_cache_misses_total", "Requests that loaded language resources."
+        ).set_total(registry.misses)
+        metrics.counter(
+            "language_cache_evictions_total", "Language resources unloaded from memory."
+        ).set_total(registry.evictions)
+        requests = registry.hits + registry.misses
+        metrics.gauge(
+            "language_cache_hit_ratio",
+            "Fraction of requests for loaded language resources.",
+        ).set(registry.hits / requests if requests else 0.0)
+        metrics.gauge("languages_loaded", "Languages with loaded resources.").set(
+            len(registry.loaded)
+        )
+
+    def _classify_deduplicated(
+        self, bundle: LanguageBundle, language, indices, results
+    ):
+        """Reuse the results of near-duplicates of earlier pages, and classify the other texts.
+
+        Updates results in place. Near-duplicates within the batch reuse the result of the first of them.
+        """
+
+        index = self._duplicates
+        tokens = {}
+        tokenize_seconds = {}
+        for i, _ in indices:
+            start = time.perf_counter()
+            tokens[i] = bundle.featurizer.tokenize(results[i])
+            tokenize_seconds[i] = time.perf_counter() - start
+        signatures = {}
+        originals: dict[int, Union[int, tuple[int, ClassifierScores]]] = {}
+        unique = []
+        with self._timer.stage("duplicates"):
+            for i, language_confidence in indices:
+                if tokens[i]:
+                    signatures[i] = index.signature(tokens[i])
+                    if match := index.query(signatures[i]):
+                        originals[i] = match.result
+                    else:
+                        original = next(
+                            (
+                                j
+                                for j, _ in unique
+                                if j in signatures
+                                and index.similarity(signatures[i], signatures[j])
+                                >= index.threshold
+                            ),
+                            None,
+                        )
+                        if original is not None:
+                            originals[i] = original
+                if i not in originals:
+                    unique.append((i, language_confidence))
+
+        if unique:
+            self._classify_texts(
+                bundle,
+                language,
+                unique,
+                results,
+                {i: tokens[i] for i, _ in unique},
+                tokenize_seconds,
+            )
+
+        for i, _ in unique:
+            # approximated results are not reused, so that their near-duplicates are classified properly
+            if i in signatures and results[i][2] == Reason.CLASSIFIER:
+                quality, scores, _ = results[i]
+                index.add(signatures[i], (int(quality), scores))
+        for i, language_confidence in indices:
+            if i in originals:
+                original = originals[i]
+                if isinstance(original, int):
+                    quality, scores, reason = results[original]
+                    if reason != Reason.BUDGET:
+                        reason = Reason.DUPLICATE
+                else:
+                    (quality, scores), reason = original, Reason.DUPLICATE
+                results[i] = (
+                    quality,
+                    scores
+                    | {
+                        "n_characters": len(results[i]),
+                        "n_tokens": len(tokens[i]),
+                        "language": language,
+                        "language_confidence": language_confidence,
+                    },
+                    reason,
+                )
+
+    def _classify_texts(
+        self,
+        bundle: LanguageBundle,
+        language,
+        indices,
+        results,
+        tokens: Optional[dict[int, List[str]]] = None,
+        tokenize_seconds: Optional[dict[int, float]] = None,
+    ):
+        """Featurize and classify texts of the same language; updates results in place.
+
+        If the texts have been tokenized already, `tokenize_seconds` holds the time that took per text.
+        """
+
+        featurizer = bundle.featurizer
+        if tokenize_seconds is None:
+            tokenize_seconds = {}
+        if tokens is None:
+            tokens = {}
+            for i, _ in indices:
+                start = time.perf_counter()
+                tokens[i] = featurizer.tokenize(results[i])
+                tokenize_seconds[i] = time.perf_counter() - start
+        counts: dict[int, FeatureCounts] = {}
+        errors: dict[int, dict[str, float]] = {}
+        n_sampled: dict[int, int] = {}
+        scorers: dict[int, List[str]] = {}
+        degraded: set[int] = set()
+
+        if (
+            self._cascade is not None
+            and self._cascade.expensive.name in featurizer.features
+        ):
+            decisions = self._run_cascade(
+                bundle, tokens, counts, errors, n_sampled, scorers
+            )
+        elif self._budget is not None:
+            decisions = {}
+            for i, _tokens in tokens.items():
+                budgeted = self._budget.counts(
+                    featurizer, _tokens, tokenize_seconds.get(i, 0.0)
+                )
+                counts[i], errors[i], n_sampled[i], scorers[i], _ = budgeted
+                if budgeted.degraded:
+                    degraded.add(i)
+        else:
+            decisions = {}
+            for i, _tokens in tokens.items():
+                counts[i], errors[i], n_sampled[i] = featurizer.sample_counts(_tokens)
+                scorers[i] = featurizer.features
+
+        scores = {
+            i: default_scores_dict(
+                0,
+                n_characters=len(results[i]),
+                n_tokens=len(tokens[i]),
+                n_sampled=n_sampled[i],
+                language=language,
+                language_confidence=language_confidence,
+                scorers=",".join(scorers[i]),
+                **(
+                    {feature: math.nan for feature in featurizer.features}
+                    | Featurizer.ratios(counts[i])
+                ),
+                **{
+                    f"{feature}_error": errors[i].get(feature, math.nan)
+                    for feature in featurizer.features
+                },
+            )
+            for i, language_confidence in indices
+        }
+
+        pending = [i for i, _ in indices if i not in decisions]
+        if pending:
+            features_df = pd.DataFrame(
+                [scores[i] for i in pending], columns=featurizer.features
+            )
+            with self._timer.stage("predict"):
+                qualities = bundle.pipeline.predict(features_df)
+                confidences = bundle.pipeline.predict_proba(features_df).max(axis=1)
+            for i, quality, confidence in zip(pending, qualities, confidences):
+                decisions[i] = Decision(quality, confidence)
+
+        for i, _ in indices:
+            quality, confidence = decisions[i]
+            results[i] = (
+                quality,
+                scores[i] | {"confidence": confidence},
+                Reason.BUDGET if i in degraded else Reason.CLASSIFIER,
+            )
+
+    def _run_cascade(
+        self,
+        bundle: LanguageBundle,
+        tokens: dict[int, List[str]],
+        counts: dict[int, FeatureCounts],
+        errors: dict[int, dict[str, float]],
+        n_sampled: dict[int, int],
+        scorers: dict[int, List[str]],
+    ) -> dict[int, Decision]:
+        """Compute the cheap features, and the expensive feature only where it can change the class.
+
+        Updates counts, errors, n_sampled, and scorers in place.
+
+        Returns:
+            the classes of the pages that have been decided without computing the expensive feature on all tokens.
+        """
+        cascade = self._cascade
+        featurizer = bundle.featurizer
+        expensive = cascade.expensive.name
+        cheap = [feature for feature in featurizer.features if feature != expensive]
+
+        bounds = {}
+        for i, _tokens in tokens.items():
+            counts[i], errors[i], n_sampled[i] = featurizer.sample_counts(
+                _tokens, cheap
+            )
+            scorers[i] = list(cheap)
+            bounds[i] = cascade.expensive.bounds(Featurizer.ratios(counts[i]))
+
+        with self._timer.stage("cascade"):
+            undecided = list(tokens)
+            decisions = self._decide(bundle, undecided, counts, bounds)
+            undecided = [i for i in undecided if i not in decisions]
+
+            sampled = [i for i in undecided if 0 < cascade.sample_size < len(tokens[i])]
+        for i in sampled:
+            groups = cascade.sample_groups(tokens[i])
+            group_counts = [
+                featurizer.count(group, [expensive])[expensive] for group in groups
+            ]
+            sample_counts = (
+                sum(n for n, _ in group_counts),
+                sum(d for _, d in group_counts),
+            )
+            counts[i] = counts[i] | {expensive: sample_counts}
+            size = sum(map(len, groups))
+            # the scorer weighs tokens differently, scale the number of tokens to the effective sample size
+            effective_size = cascade.effective_size(group_counts, size)
+            lower, upper = bounds[i]
+            sample_lower, sample_upper = cascade.sample_bounds(
+                Scorer.ratio(*sample_counts),
+                effective_size,
+                effective_size * len(tokens[i]) / size,
+            )
+            errors[i][expensive] = (sample_upper - sample_lower) / 2
+            n_sampled[i] = max(n_sampled[i], size)
+            if sample_lower <= upper and sample_upper >= lower:
+                bounds[i] = (max(lower, sample_lower), min(upper, sample_upper))
+            else:
+                # the sample contradicts the proxy bounds
+                bounds[i] = (sample_lower, sample_upper)
+
+        with self._timer.stage("cascade"):
+            sample_decisions = self._decide(bundle, sampled, counts, bounds)
+        for i in sample_decisions:
+            scorers[i].append(expensive + SAMPLED_SUFFIX)
+        decisions |= sample_decisions
+
+        for i in undecided:
+            if i not in decisions:
+                sampled = featurizer.sample_counts(tokens[i], [expensive])
+                counts[i] = counts[i] | sampled.counts
+                errors[i] = errors[i] | sampled.errors
+                n_sampled[i] = max(n_sampled[i], sampled.n_sampled)
+                scorers[i].append(expensive)
+
+        return decisions
+
+    def _decide(self, bundle: LanguageBundle, indices, counts, bounds):
+        """Apply Cascade.decide() to some of the pages, returning the decisions by index."""
+        expensive = self._cascade.expensive.name
+        features = [
+            {
+                feature: value
+                for feature, value in Featurizer.ratios(counts[i]).items()
+                if feature != expensive
+            }
+            for i in indices
+        ]
+        decisions = self._cascade.decide(
+            bundle.pipeline, features, [bounds[i] for i in indices]
+        )
+        return {
+            i: decision
+            for i, decision in zip(indices, decisions)
+            if decision is not None
+        }
+
+    def _apply_rules(
+        self, page: Union[Page, str]
+    ) -> Union[tuple[int, ClassifierScores, Reason], str]:
+        """Apply the rules for short columns and empty texts to a page.
+
+        Returns:
+            quality, scores, and reason for the page if a rule applies;
+            otherwise the text to classify.
+        """
+
         if isinstance(page, Page):
-            quality, scores, reason = self._classify_pagexml_with_scores(page)
-        elif self._is_short(page):
+            if Pipeline._has_short_columns(page.lines()):
+                logging.warning("Page '%s' has short columns.", page.id)
+                return (
+                    3,
+                    default_scores_dict(
+                        0, confidence=1.0, n_characters=len(page.get_text())
+                    ),
+                    Reason.SHORT_COLUMNS,
+                )
+            page = page.get_text()
+
+        if self._is_short(page):
             logging.debug(
                 "Skipping short text: '%s' (%d characters).", page, len(page.strip())
             )
-            quality = EMPTY_PAGE_OUTPUT
-            scores = default_scores_dict(0, confidence=1.0, n_characters=len(page))
-            reason = Reason.EMPTY
-        else:
-            language, language_confidence = self._language_classifier.classify(page)
-            if language == self._default_language:
-                features, tokens = self._featurizer.featurize(page)
-                features_df: pd.DataFrame = Featurizer.as_dataframe(features)
-
-                quality = self._pipeline.predict(features_df)[0]
+            return (
+                EMPTY_PAGE_OUTPUT,
+                default_scores_dict(0, confidence=1.0, n_characters=len(page)),
+                Reason.EMPTY,
+            )
 
-                scores = ClassifierScores(
-                    confidence=self._pipeline.predict_proba(features_df).max(),
-                    n_characters=len(page),
-                    n_tokens=len(tokens),
-                    language=language,
-                    language_confidence=language_confidence,
-                    **features,
+        return page
+
+    def classify_levels(self, pagexml: Page) -> PageClassifications:
+        """Classify a page, its TextRegions, and its lines.
+
+        The text is tokenized and scored only once; the feature counts of the lines are
+        summed to compute the features of the regions and the page.
+        Hence, the page result equals the result of `classify_with_scores()`,
+        unless the cascade or token sampling are enabled: all tokens are scored here.
+        The rules for short columns and empty texts are applied to each unit separately,
+        the language is determined for the entire page.
+
+        Args:
+            pagexml: the page to classify.
+        Returns:
+            the classifications for the page, for each region, and for each line.
+        """
+        text_lines = pagexml.text_lines()
+
+        region_lines: dict[str, List[int]] = {}
+        for i, line in enumerate(text_lines):
+            if line.region_id is not None:
+                region_lines.setdefault(line.region_id, []).append(i)
+
+        units: List[tuple[Optional[str], List[int]]] = (
+            [(pagexml.id, list(range(len(text_lines))))]
+            + list(region_lines.items())
+            + [(line.id, [i]) for i, line in enumerate(text_lines)]
+        )
+        texts = [
+            LINE_SEPARATOR.join(text_lines[i].text for i in line_indices)
+            for _, line_indices in units
+        ]
+
+        results: List[Optional[tuple[int, ClassifierScores, Reason]]] = []
+        for (_, line_indices), text in zip(units, texts):
+            if Pipeline._has_short_columns([text_lines[i].text for i in line_indices]):
+                results.append(
+                    (
+                        3,
+                        default_scores_dict(0, confidence=1.0, n_characters=len(text)),
+                        Reason.SHORT_COLUMNS,
+                    )
+                )
+            elif self._is_short(text):
+                results.append(
+                    (
+                        EMPTY_PAGE_OUTPUT,
+                        default_scores_dict(0, confidence=1.0, n_characters=len(text)),
+                        Reason.EMPTY,
+                    )
                 )
-                reason = Reason.CLASSIFIER
             else:
-                logging.info(
-                    "Language '%s' differs from default language '%s'.",
-                    language,
-                    self._default_language,
+                results.append(None)
+
+        if any(result is None for result in results):
+            self._classify_units(units, texts, text_lines, results)
+
+        classifications = [
+            Classification(unit_id, *result)
+            for (unit_id, _), result in zip(units, results)
+        ]
+        self._record(results[:1])
+        return PageClassifications(
+            page=classifications[0],
+            regions=classifications[1 : len(region_lines) + 1],
+            lines=classifications[len(region_lines) + 1 :],
+        )
+
+    def _classify_units(self, units, texts, text_lines, results):
+        """Classify the units that have not been decided by a rule; updates results in place."""
+
+        with self._timer.stage("language"):
+            language, language_confidence = self._language_classifier.classify(texts[0])
+        undecided = [i for i, result in enumerate(results) if result is None]
+
+        bundle = self._bundle(language)
+        if bundle is None:
+            for i in undecided:
+                results[i] = (
+                    EMPTY_PAGE_OUTPUT,
+                    default_scores_dict(
+                        0,
+                        confidence=0.0,
+                        n_characters=len(texts[i]),
+                        language=language,
+                        language_confidence=language_confidence,
+                    ),
+                    Reason.LANGUAGE,
                 )
-                reason = Reason.LANGUAGE
-                quality = EMPTY_PAGE_OUTPUT
-                scores = default_scores_dict(
+            return
+
+        featurizer = bundle.featurizer
+        line_counts, line_tokens = featurizer.featurize_lines(
+            [line.text for line in text_lines]
+        )
+        features = [
+            Featurizer.ratios(
+                featurizer.sum_counts(line_counts[j] for j in units[i][1])
+            )
+            for i in undecided
+        ]
+        features_df = pd.DataFrame(features, columns=featurizer.features)
+
+        with self._timer.stage("predict"):
+            qualities = bundle.pipeline.predict(features_df)
+            confidences = bundle.pipeline.predict_proba(features_df).max(axis=1)
+
+        for i, _features, quality, confidence in zip(
+            undecided, features, qualities, confidences
+        ):
+            n_tokens = sum(len(line_tokens[j]) for j in units[i][1])
+            results[i] = (
+                quality,
+                default_scores_dict(
                     0,
-                    confidence=0.0,
-                    n_characters=len(page),
+                    confidence=confidence,
+                    n_characters=len(texts[i]),
+                    n_tokens=n_tokens,
+                    n_sampled=n_tokens,
                     language=language,
                     language_confidence=language_confidence,
-                )
-
-        return quality, scores, reason
-
-    def _classify_pagexml_with_scores(
-        self, pagexml: Page
-    ) -> tuple[int, ClassifierScores, Reason]:
-        """Classify a Page object with scores."""
-
-        if all(len(line) < SHORT_COLUMN_WIDTH for line in pagexml.lines()):
-            logging.warning("Page '%s' has short columns.", pagexml.id)
-
-            quality = 3
-            scores = default_scores_dict(
-                0, confidence=1.0, n_characters=len(pagexml.get_text())
+                    scorers=",".join(featurizer.features),
+                    **_features,
+                ),
+                Reason.CLASSIFIER,
             )
-            reason = Reason.SHORT_COLUMNS
-        else:
-            quality, scores, reason = self.classify_with_scores(pagexml.get_text())
 
-        return quality, scores, reason
+    @staticmethod
+    def _has_short_columns(lines: List[str]) -> bool:
+        """True if there are lines, and all are shorter than SHORT_COLUMN_WIDTH."""
+        return bool(lines) and all(len(line) < SHORT_COLUMN_WIDTH for line in lines)
 
     @staticmethod
     def _is_short(text: str):
         return len(text.strip()) < MINIMUM_PAGE_LENGTH and EMPTY_PAGE_OUTPUT is not None
 
     @classmethod
-    def from_file(cls, pipeline_file: Path, featurizer: Featurizer):
-        """Load a pipeline from a file."""
+    def from_file(cls, pipeline_file: Path, featurizer: Featurizer, **kwargs):
+        """Load a pipeline from a file.
+
+        Args:
+            pipeline_file: the file containing the sklearn pipeline.
+            featurizer: the featurizer for computing the feature values.
+            kwargs: further arguments passed to the constructor.
+        """
         logging.info("Reading classifier pipeline from file '%s'.", str(pipeline_file))
-        return cls(joblib.load(pipeline_file), featurizer)
+        with MEMORY_ACCOUNTING.component(f"pipeline:{Path(pipeline_file).name}"):
+            pipeline = joblib.load(pipeline_file)
+        return cls(pipeline, featurizer, **kwargs)
+
+    @classmethod
+    def from_bundle(
+        cls,
+        bundle: Union[Path, ModelBundle],
+        *,
+        timer: Timer = NULL_TIMER,
+        sampler: Optional[TokenSampler] = None,
+        verify: bool = True,
+        **kwargs,
+    ):
+        """Load a pipeline with all its resources from a model bundle.
+
+        Args:
+            bundle: the bundle, or the bundle file.
+            timer: measures the durations of the processing stages.
+            sampler: if given, the featurizer scores a sample of the tokens of long texts.
+            verify: if True, verify the checksums of a bundle file.
+            kwargs: further arguments passed to the constructor.
+        Raises:
+            BundleError: if the bundle is invalid, or if its features do not match the scorers.
+        """
+        opened = not isinstance(bundle, ModelBundle)
+        if opened:
+            logging.info("Reading model bundle from file '%s'.", str(bundle))
+            bundle = ModelBundle(bundle, verify=verify)
+        try:
+            featurizer, pipeline = bundle.load(timer, sampler)
+            language_classifier = kwargs.pop("language_classifier", None)
+            if language_classifier is None:
+                if (
+                    kwargs.get("language_strategy", LanguageStrategy.FASTTEXT)
+                    is LanguageStrategy.FASTTEXT
+                ):
+                    language_classifier = bundle.language_classifier()
+                else:
+                    # the lazy classifier extracts the model from the bundle when first used
+                    language_classifier = LazyLanguageClassifier(
+                        bundle.language_classifier
+                    )
+                    opened = False
+        finally:
+            if opened:
+                bundle.close()
+        return cls(
+            pipeline,
+            featurizer,
+            bundle.language,
+            timer=timer,
+            language_classifier=language_classifier,
+            **kwargs,
+        )
@@ -0,0 +1,307 @@
+"""Per-language featurizers and classifiers, loaded on demand within a memory budget."""
+
+import itertools
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+import joblib
+import sklearn.pipeline
+from ..feature.featurize import Featurizer
+from ..feature.featurize import Scorers
+from ..feature.sampling import TokenSampler
+from ..feature.scorer.dictionary import HunspellDictionary
+from ..feature.scorer.dictionary import TokenDictionary
+from ..feature.scorer.garbage import GarbageDetector
+from ..feature.scorer.q_gram import QGram
+from ..feature.scorer.token_set import MappedTokenSet
+from ..feature.tokenizer import NautilusOcrTokenizer
+from ..monitoring.memory import MEMORY_ACCOUNTING
+from ..monitoring.timing import NULL_TIMER
+from ..monitoring.timing import Timer
+from ..settings import CLASSIFIER_DIR
+from ..settings import DEFAULT_LANGUAGE
+from ..settings import DICTS_DIR
+from ..settings import HUNSPELL_DIR
+from ..settings import PIPELINE_FILE
+from ..settings import Q_GRAMS_GAMMA
+from ..settings import QGRAMS_DIR
+from ..settings import QGRAMS_FILE
+from ..settings import TOKEN_DICT_FILE
+
+
+class LanguageBundle(NamedTuple):
+    """The featurizer and the classifier for one language."""
+
+    featurizer: Featurizer
+    pipeline: sklearn.pipeline.Pipeline
+
+
+BundleLoader = Callable[[], LanguageBundle]
+
+_MEMORY_FACTORS = {"hunspell": 60, "token_dictionary": 12, "qgrams": 28, "pipeline": 2}
+"""Approximate memory of the loaded resources per byte of their files, as measured with tracemalloc."""
+
+
+class LanguageResources(NamedTuple):
+    """The resource files for building a LanguageBundle."""
+
+    language: str
+    hunspell_dir: Path
+    token_dict_file: Path
+    qgrams_file: Path
+    pipeline_file: Path
+
+    def files(self) -> List[Path]:
+        return [
+            self.hunspell_dir / f"{self.language}.aff",
+            self.hunspell_dir / f"{self.language}.dic",
+            self.token_dict_file,
+            self.qgrams_file,
+            self.pipeline_file,
+        ]
+
+    def memory_estimate(self) -> int:
+        """The approximate memory of the loaded resources in bytes, estimated from the sizes of the files.
+
+        A binary token dictionary is mapped into memory, and counts with its file size.
+        Of the q-grams file, only the lines that are loaded (see `Q_GRAMS_GAMMA`) count.
+        """
+
+        def size(file: Path) -> int:
+            return file.stat().st_size
+
+        with open(self.qgrams_file, "rb") as f:
+            qgrams_size = sum(
+                len(line) for line in itertools.islice(f, Q_GRAMS_GAMMA or None)
+            )
+
+        token_dict_factor = (
+            1
+            if MappedTokenSet.is_token_set_file(self.token_dict_file)
+            else _MEMORY_FACTORS["token_dictionary"]
+        )
+        hunspell_size = size(self.hunspell_dir / f"{self.language}.aff") + size(
+            self.hunspell_dir / f"{self.language}.dic"
+        )
+        return (
+            hunspell_size * _MEMORY_FACTORS["hunspell"]
+            + size(self.token_dict_file) * token_dict_factor
+            + qgrams_size * _MEMORY_FACTORS["qgrams"]
+            + size(self.pipeline_file) * _MEMORY_FACTORS["pipeline"]
+        )
+
+    def missing(self) -> List[Path]:
+        """The resource files that do not exist."""
+        return [file for file in self.files() if not file.is_file()]
+
+    def load(
+        self, timer: Timer = NULL_TIMER, sampler: Optional[TokenSampler] = None
+    ) -> LanguageBundle:
+        logging.info("Loading resources for language '%s'.", self.language)
+        featurizer = Featurizer(
+            Scorers(
+                dict_score=HunspellDictionary.from_path(
+                    self.hunspell_dir, self.language
+                ),
+                dict_score_gt=TokenDictionary.from_file(self.token_dict_file),
+                n_gram_score=QGram.from_file(self.qgrams_file),
+                garbage_score=GarbageDetector(),
+            ),
+            NautilusOcrTokenizer(),
+            timer=timer,
+            sampler=sampler,
+        )
+        with MEMORY_ACCOUNTING.component(f"pipeline:{self.pipeline_file.name}"):
+            pipeline = joblib.load(self.pipeline_file)
+        if list(pipeline.feature_names_in_) != featurizer.features:
+            raise ValueError(
+                f"Pipeline input features ({list(pipeline.feature_names_in_)}) "
+                f"for language '{self.language}' do not match scorers ({featurizer.features})."
+            )
+        return LanguageBundle(featurizer, pipeline)
+
+    @classmethod
+    def for_language(cls, language: str) -> "LanguageResources":
+        """The bundled resources for a language.
+
+        For the default language, these are the files configured in the settings.
+        For other languages, the files are expected in the same directories:
+        '<language>_voc.txt' (or '.bin') for the token dictionary and q-grams,
+        and 'pipeline_nn_<language>.joblib' for the classifier.
+        """
+        if language == DEFAULT_LANGUAGE:
+            return cls(
+                language, HUNSPELL_DIR, TOKEN_DICT_FILE, QGRAMS_FILE, PIPELINE_FILE
+            )
+
+        token_dict_file = DICTS_DIR / f"{language}_voc.bin"
+        if not token_dict_file.is_file():
+            token_dict_file = token_dict_file.with_suffix(".txt")
+        return cls(
+            language,
+            HUNSPELL_DIR,
+            token_dict_file,
+            QGRAMS_DIR / f"{language}_voc.txt",
+            CLASSIFIER_DIR / f"pipeline_nn_{language}.joblib",
+        )
+
+
+class LanguageRegistry:
+    """Featurizers and classifiers per language, loaded on first use.
+
+    If a memory budget is set, the least recently used bundles are evicted when the
+    estimated memory of all loaded bundles exceeds it.
+    The memory of a bundle is estimated when it is registered, e.g. from the sizes of its resource files
+    (see `LanguageResources.memory_estimate()`); measuring it while loading would be unreliable,
+    because the allocator reuses the memory of evicted bundles, and other threads allocate memory meanwhile.
+    The most recently used bundle and pinned bundles are never evicted.
+
+    The registry can be shared between threads; a bundle is loaded only once,
+    even if multiple threads request it at the same time, and loading it does not block other languages.
+    """
+
+    def __init__(self, memory_budget: Optional[int] = None) -> None:
+        """Initialize an empty registry.
+
+        Args:
+            memory_budget: the maximum memory for all loaded, non-pinned bundles in bytes; None for no limit.
+        """
+        self._memory_budget = memory_budget
+        self._loaders: dict[str, tuple[BundleLoader, int]] = {}
+        self._pinned: dict[str, LanguageBundle] = {}
+        self._loaded: OrderedDict[str, tuple[LanguageBundle, int]] = OrderedDict()
+        self._lock = threading.RLock()
+        self._loading: dict[str, threading.Lock] = {}
+        self.hits = 0
+        """The number of requests for loaded bundles."""
+        self.misses = 0
+        """The number of requests that loaded a bundle."""
+        self.evictions = 0
+        """The number of bundles that have been evicted."""
+
+    def __contains__(self, language: str) -> bool:
+        return language in self._pinned or language in self._loaders
+
+    @property
+    def languages(self) -> List[str]:
+        """All languages that can be classified."""
+        return list(self._pinned) + [
+            language for language in self._loaders if language not in self._pinned
+        ]
+
+    @property
+    def loaded(self) -> List[str]:
+        """The languages with loaded bundles, least recently used first."""
+        return list(self._pinned) + list(self._loaded)
+
+    @property
+    def memory(self) -> int:
+        """The estimated memory of the loaded, non-pinned bundles."""
+        return sum(size for _, size in self._loaded.values())
+
+    def register(self, language: str, loader: BundleLoader, size: int = 0) -> None:
+        """Register a function that loads the bundle for a language on first use.
+
+        Args:
+            language: the language of the bundle.
+            loader: loads the bundle.
+            size: the estimated memory of the loaded bundle in bytes.
+        """
+        with self._lock:
+            self._loaders[language] = (loader, size)
+            self._loaded.pop(language, None)
+
+    def pin(self, language: str, bundle: LanguageBundle) -> None:
+        """Register a loaded bundle that is never evicted."""
+        with self._lock:
+            self._pinned[language] = bundle
+            self._loaded.pop(language, None)
+
+    def get(self, language: str) -> Optional[LanguageBundle]:
+        """Get the bundle for a language, loading it if necessary.
+
+        Loading holds a lock for that language only; other threads meanwhile get pinned and loaded bundles,
+        and load bundles for other languages.
+
+        Returns:
+            the bundle, or None if the language is not registered.
+        """
+        with self._lock:
+            if (bundle := self._cached(language)) is not None:
+                return bundle
+            if language not in self._loaders:
+                return None
+            loading = self._loading.setdefault(language, threading.Lock())
+
+        with loading:
+            with self._lock:
+                # another thread may have loaded the bundle while this one was waiting
+                if (bundle := self._cached(language)) is not None:
+                    return bundle
+                if language not in self._loaders:
+                    return None
+                self.misses += 1
+                loader, size = self._loaders[language]
+
+            bundle = loader()
+            logging.info("Loaded language '%s' (%.1f MB).", language, size / 2**20)
+
+            with self._lock:
+                # the language may have been registered again or pinned while loading
+                if (
+                    self._loaders.get(language) == (loader, size)
+                    and language not in self._pinned
+                ):
+                    self._loaded[language] = (bundle, size)
+                    self._evict()
+            return bundle
+
+    def _cached(self, language: str) -> Optional[LanguageBundle]:
+        if language in self._pinned:
+            self.hits += 1
+            return self._pinned[language]
+        if language in self._loaded:
+            self.hits += 1
+            self._loaded.move_to_end(language)
+            return self._loaded[language][0]
+        return None
+
+    def _evict(self) -> None:
+        if self._memory_budget is None:
+            return
+        while len(self._loaded) > 1 and self.memory > self._memory_budget:
+            language, _ = self._loaded.popitem(last=False)
+            self.evictions += 1
+            logging.info("Evicting language '%s' from memory.", language)
+
+    @classmethod
+    def from_resources(
+        cls,
+        languages: List[str],
+        memory_budget: Optional[int] = None,
+        timer: Timer = NULL_TIMER,
+        sampler: Optional[TokenSampler] = None,
+    ) -> "LanguageRegistry":
+        """Create a registry for languages with bundled resources, see `LanguageResources.for_language()`.
+
+        Raises:
+            FileNotFoundError: if resource files for any of the languages are missing.
+        """
+        registry = cls(memory_budget)
+        for language in languages:
+            resources = LanguageResources.for_language(language)
+            if missing := resources.missing():
+                raise FileNotFoundError(
+                    f"Missing resources for language '{language}': {', '.join(map(str, missing))}"
+                )
+            registry.register(
+                language,
+                lambda r=resources: r.load(timer, sampler),
+                resources.memory_estimate(),
+            )
+        return registry
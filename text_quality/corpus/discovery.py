@@ -0,0 +1,113 @@
+"""Lazy discovery of input files."""
+
+import logging
+import os
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
+from typing import Sequence
+from typing import Union
+from .shard import normalize
+
+
+PAGEXML_PATTERN = "*.xml"
+"""Default pattern for PageXML files."""
+
+_CHUNK_SIZE = 1 << 16
+
+
+def _matches(name: str, relative_path: str, patterns: Iterable[str]) -> bool:
+    return any(
+        fnmatch(name, pattern) or fnmatch(relative_path, pattern)
+        for pattern in patterns
+    )
+
+
+def walk(
+    root: Union[str, Path],
+    include: Sequence[str] = (PAGEXML_PATTERN,),
+    exclude: Sequence[str] = (),
+    sort: bool = True,
+) -> Iterator[str]:
+    """Find files recursively, yielding them as soon as they are found.
+
+    Patterns are matched against the file or directory name as well as against the path
+    relative to the root directory, e.g. '*.xml' or 'archive/*/page/*.xml'.
+    As in `fnmatch`, '*' also matches path separators.
+
+    Args:
+        root: the directory to search.
+        include: yield files matching any of these patterns.
+        exclude: skip files and directories (including their content) matching any of these patterns.
+        sort: sort the entries within each directory, for a reproducible order.
+    Yields:
+        the paths of the matching files.
+    """
+    stack = [(str(root), "")]
+    while stack:
+        directory, relative_directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name) if sort else list(it)
+        except OSError as e:
+            logging.error("Cannot read directory '%s': %s", directory, str(e))
+            continue
+
+        subdirectories = []
+        for entry in entries:
+            relative_path = relative_directory + entry.name
+            if _matches(entry.name, relative_path, exclude):
+                continue
+            if entry.is_dir():
+                subdirectories.append((entry.path, relative_path + "/"))
+            elif entry.is_file() and _matches(entry.name, relative_path, include):
+                yield entry.path
+
+        # reversed to process subdirectories in order
+        stack.extend(reversed(subdirectories))
+
+
+def read_file_list(file: BinaryIO) -> Iterator[str]:
+    """Read file paths from a list, e.g. the output of `find` or `find -print0`.
+
+    Paths are separated by NUL characters if the first chunk of the input contains one,
+    and by newlines otherwise. Empty entries are skipped.
+
+    Args:
+        file: a binary file, e.g. sys.stdin.buffer.
+    Yields:
+        the paths in the list, decoded with the file system encoding.
+    """
+    separator = None
+    remainder = b""
+
+    while chunk := file.read(_CHUNK_SIZE):
+        if separator is None:
+            separator = b"\0" if b"\0" in chunk else b"\n"
+        *entries, remainder = (remainder + chunk).split(separator)
+        for entry in entries:
+            if path := _decode(entry, separator):
+                yield path
+
+    if path := _decode(remainder, separator):
+        yield path
+
+
+def _decode(entry: bytes, separator: bytes) -> str:
+    if separator == b"\n":
+        entry = entry.rstrip(b"\r")
+    return os.fsdecode(entry)
+
+
+def unique(paths: Iterable[Union[str, Path]]) -> Iterator[Union[str, Path]]:
+    """Skip duplicate paths, logging a warning for each of them."""
+    seen = set()
+    for path in paths:
+        key = normalize(path)
+        if key in seen:
+            logging.warning("Duplicate input file: '%s'", path)
+        else:
+            seen.add(key)
+            yield path
@@ -0,0 +1,460 @@
+"""Estimating the distribution of quality classes in a corpus from a stratified sample of its pages.
+
+For triage, the proportions of the quality classes are often all that is needed.
+The pages are divided into strata, e.g. by directory or inventory; a random sample is drawn from each stratum,
+and enlarged in rounds until the confidence intervals of the proportions are narrow enough.
+"""
+
+import csv
+import logging
+import math
+import random
+from collections import Counter
+from pathlib import Path
+from statistics import NormalDist
+from typing import Callable
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import TextIO
+from typing import Union
+from ..settings import ESTIMATE_CONFIDENCE
+from ..settings import ESTIMATE_INITIAL_SAMPLE
+from ..settings import ESTIMATE_PRECISION
+
+
+OVERALL = "*"
+"""The name of the estimate over all strata."""
+
+FIELDNAMES = [
+    "stratum",
+    "population",
+    "sampled",
+    "failed",
+    "quality_class",
+    "proportion",
+    "lower",
+    "upper",
+    "pages",
+]
+"""The columns of the CSV output, with a row per stratum and quality class."""
+
+
+def stratum_of(
+    path: Union[str, Path], root: Union[str, Path], depth: Optional[int] = None
+) -> str:
+    """The stratum of a file: its directory, truncated to a number of levels below the root directory.
+
+    Args:
+        path: the file, in the root directory or below it.
+        root: the root directory.
+        depth: the number of directory levels below the root that distinguish strata,
+            e.g. 1 for the inventories in an archive directory; None for the directory of the file.
+    Returns:
+        the directory as a path including the root.
+    """
+    parts = Path(path).parent.relative_to(root).parts
+    return str(Path(root).joinpath(*parts[:depth]))
+
+
+class Proportion(NamedTuple):
+    """An estimated proportion with its confidence interval."""
+
+    estimate: float
+    lower: float
+    upper: float
+
+    @property
+    def half_width(self) -> float:
+        return (self.upper - self.lower) / 2
+
+
+class StratumEstimate(NamedTuple):
+    """The estimated proportions of the quality classes in a stratum, or in the whole corpus."""
+
+    stratum: str
+    population: int
+    sampled: int
+    """The number of pages classified, excluding those that failed."""
+    failed: int
+    proportions: dict[int, Proportion]
+
+
+class _Stratum:
+    def __init__(self) -> None:
+        self.population = 0
+        self.reservoir: List[str] = []
+        self.drawn = 0
+        self.failed = 0
+        self.counts: Counter[int] = Counter()
+
+    @property
+    def sampled(self) -> int:
+        return sum(self.counts.values())
+
+
+class QualityEstimator:
+    """Estimates the proportions of quality classes per stratum and over a whole corpus.
+
+    All pages are added with `add()`, which keeps a uniform random sample of each stratum (reservoir sampling),
+    so that memory use does not depend on the size of the corpus. Then `run()` classifies samples in rounds:
+    first `initial` pages per stratum, then as many as needed for the target precision, estimated from the
+    proportions so far. Pages are allocated to the strata in proportion to their size and variability
+    (Neyman allocation), which minimizes the number of pages to classify for the overall estimate;
+    with a `stratum_precision`, each stratum is sampled until its own estimates are precise enough as well.
+
+    The confidence intervals of the strata are Wilson score intervals, the overall intervals are based on
+    the variance of the stratified estimator; both use the finite population correction.
+    """
+
+    def __init__(
+        self,
+        *,
+        precision: float = ESTIMATE_PRECISION,
+        stratum_precision: Optional[float] = None,
+        confidence: float = ESTIMATE_CONFIDENCE,
+        initial: int = ESTIMATE_INITIAL_SAMPLE,
+        max_samples: Optional[int] = None,
+        seed: int = 0,
+    ) -> None:
+        """Configure the estimator.
+
+        Args:
+            precision: the target half-width of the overall confidence intervals.
+            stratum_precision: if given, the target half-width of the confidence intervals of each stratum.
+            confidence: the confidence level of the intervals.
+            initial: the number of pages per stratum in the first round.
+            max_samples: the maximum number of pages to classify in total; the target precision
+                may not be reached then.
+            seed: the random seed for drawing the samples.
+        Raises:
+            ValueError: if any of the arguments is out of range.
+        """
+        for name, value in (("precision", precision), ("confidence", confidence)):
+            if not 0 < value < 1:
+                raise ValueError(f"Invalid {name}: {value}")
+        if stratum_precision is not None and not 0 < stratum_precision < 1:
+            raise ValueError(f"Invalid stratum precision: {stratum_precision}")
+        if initial < 2:
+            raise ValueError(f"Invalid initial sample size: {initial}")
+        if max_samples is not None and max_samples < 1:
+            raise ValueError(f"Invalid maximum number of samples: {max_samples}")
+
+        self.precision = precision
+        self.stratum_precision = stratum_precision
+        self._z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self._initial = initial
+        self._max_samples = max_samples
+        self._random = random.Random(seed)
+        self._strata: dict[str, _Stratum] = {}
+
+        # no stratum ever needs more pages than a simple random sample of a proportion of 0.5
+        self.capacity = max(
+            initial,
+            math.ceil(
+                self._z**2 * 0.25 / min(precision, stratum_precision or precision) ** 2
+            ),
+        )
+        """The number of pages kept in the random sample of each stratum."""
+
+    @property
+    def population(self) -> int:
+        return sum(stratum.population for stratum in self._strata.values())
+
+    @property
+    def drawn(self) -> int:
+        """The number of pages drawn for classification so far."""
+        return sum(stratum.drawn for stratum in self._strata.values())
+
+    def add(self, path: str, stratum: str) -> None:
+        """Add a page of the corpus to a stratum."""
+        _stratum = self._strata.setdefault(stratum, _Stratum())
+        _stratum.population += 1
+        if len(_stratum.reservoir) < self.capacity:
+            _stratum.reservoir.append(path)
+        elif (i := self._random.randrange(_stratum.population)) < self.capacity:
+            _stratum.reservoir[i] = path
+
+    def record(self, stratum: str, quality: Optional[int]) -> None:
+        """Record the quality class of a page drawn from a stratum; None if the page could not be classified."""
+        if quality is None:
+            self._strata[stratum].failed += 1
+        else:
+            self._strata[stratum].counts[quality] += 1
+
+    def _deviation(self, stratum: _Stratum, classes: Iterable[int]) -> float:
+        """The largest standard deviation of the class indicators, with proportions smoothed towards 0.5.
+
+        Smoothing prevents a stratum in which a class has not been observed yet from appearing to have no variance.
+        """
+        n = stratum.sampled
+        return max(
+            (
+                math.sqrt(p * (1 - p))
+                for p in ((stratum.counts[c] + 1) / (n + 2) for c in classes)
+            ),
+            default=0.5,
+        )
+
+    def _allocate(self) -> dict[str, int]:
+        """The number of classified pages required from each stratum for the target precision.
+
+        The overall sample size is allocated to the strata by Neyman allocation; strata that would be allocated
+        more pages than they contain are sampled completely, and the allocation is repeated for the others.
+        """
+        classes = self.classes()
+        population = self.population
+        weights = {
+            name: stratum.population / population
+            for name, stratum in self._strata.items()
+        }
+        deviations = {
+            name: self._deviation(stratum, classes)
+            for name, stratum in self._strata.items()
+        }
+        variance = (self.precision / self._z) ** 2
+
+        required = {}
+        remaining = set(self._strata)
+        while remaining:
+            total = sum(weights[name] * deviations[name] for name in remaining)
+            n = total**2 / (
+                variance
+                + sum(
+                    weights[name] * deviations[name] ** 2 / population
+                    for name in remaining
+                )
+            )
+            allocation = {
+                name: n * weights[name] * deviations[name] / total for name in remaining
+            }
+            complete = {
+                name
+                for name in remaining
+                if allocation[name] >= self._strata[name].population
+            }
+            if not complete:
+                required |= {name: math.ceil(allocation[name]) for name in remaining}
+                break
+            required |= {name: self._strata[name].population for name in complete}
+            remaining -= complete
+
+        if self.stratum_precision is not None:
+            for name, stratum in self._strata.items():
+                n_stratum = (self._z * deviations[name] / self.stratum_precision) ** 2
+                required[name] = max(
+                    required[name],
+                    math.ceil(n_stratum / (1 + (n_stratum - 1) / stratum.population)),
+                )
+        return required
+
+    def _targets(self) -> dict[str, int]:
+        """The number of pages to have drawn from each stratum after the next round."""
+        if all(stratum.drawn == 0 for stratum in self._strata.values()):
+            return {
+                name: min(self._initial, len(stratum.reservoir))
+                for name, stratum in self._strata.items()
+            }
+
+        required = self._allocate()
+        targets = {}
+        for name, stratum in self._strata.items():
+            # at most double the sample per round, as the proportions are uncertain;
+            # pages that could not be classified are replaced
+            goal = min(required[name], 2 * max(1, stratum.sampled))
+            targets[name] = min(
+                len(stratum.reservoir),
+                stratum.drawn + max(0, goal - stratum.sampled),
+            )
+        return targets
+
+    def draw(self) -> List[tuple[str, str]]:
+        """Draw the pages to classify in the next round.
+
+        Returns:
+            tuples of the stratum and the path of each page; empty if the target precision has been reached,
+            all pages have been drawn, or the maximum number of samples has been reached.
+        """
+        if not self._strata:
+            return []
+        if not self.drawn:
+            for stratum in self._strata.values():
+                # the reservoir is a random sample, but in the order of the corpus until it is full
+                self._random.shuffle(stratum.reservoir)
+
+        additions = {
+            name: target - self._strata[name].drawn
+            for name, target in self._targets().items()
+            if target > self._strata[name].drawn
+        }
+        budget = (
+            self._max_samples - self.drawn if self._max_samples is not None else None
+        )
+        if budget is not None and sum(additions.values()) > budget:
+            scale = budget / sum(additions.values())
+            additions = {name: math.floor(n * scale) for name, n in additions.items()}
+
+        batch = []
+        for name, n in additions.items():
+            stratum = self._strata[name]
+            batch += [
+                (name, path)
+                for path in stratum.reservoir[stratum.drawn : stratum.drawn + n]
+            ]
+            stratum.drawn += n
+        return batch
+
+    def run(
+        self, classify: Callable[[List[str]], Iterable[Optional[int]]]
+    ) -> StratumEstimate:
+        """Classify samples in rounds until the target precision is reached.
+
+        Args:
+            classify: classifies a list of pages, returning the quality class of each;
+                None for pages that could not be classified.
+        Returns:
+            the overall estimate.
+        """
+        round_ = 0
+        while batch := self.draw():
+            round_ += 1
+            for (stratum, _), quality in zip(
+                batch, classify([path for _, path in batch])
+            ):
+                self.record(stratum, quality)
+            overall = self.overall()
+            logging.info(
+                "Round %d: classified %d pages (%d in total), precision ±%.3f.",
+                round_,
+                len(batch),
+                overall.sampled,
+                self.half_width(overall),
+            )
+        return self.overall()
+
+    def classes(self) -> List[int]:
+        """The quality classes observed so far."""
+        return sorted(
+            set().union(*(stratum.counts for stratum in self._strata.values()))
+        )
+
+    def _interval(self, count: int, n: int, population: int) -> Proportion:
+        """The Wilson score interval of a proportion, with finite population correction."""
+        if n == 0:
+            return Proportion(0.0, 0.0, 1.0)
+        p = count / n
+        z2 = self._z**2 * ((population - n) / (population - 1) if population > 1 else 0)
+        center = (p + z2 / (2 * n)) / (1 + z2 / n)
+        half_width = (
+            math.sqrt(p * (1 - p) / n + z2 / (4 * n**2)) * math.sqrt(z2) / (1 + z2 / n)
+        )
+        return Proportion(
+            p, max(0.0, center - half_width), min(1.0, center + half_width)
+        )
+
+    def estimates(self) -> List[StratumEstimate]:
+        """The estimates of all strata, sorted by name."""
+        classes = self.classes()
+        return [
+            StratumEstimate(
+                name,
+                stratum.population,
+                stratum.sampled,
+                stratum.failed,
+                {
+                    c: self._interval(
+                        stratum.counts[c], stratum.sampled, stratum.population
+                    )
+                    for c in classes
+                },
+            )
+            for name, stratum in sorted(self._strata.items())
+        ]
+
+    def overall(self) -> StratumEstimate:
+        """The estimate over all strata, weighting the strata by their population.
+
+        The intervals are normal approximations, with the proportions in the variance smoothed towards 0.5
+        (as in the Agresti-Coull interval). Strata without any classified pages are left out.
+        """
+        strata = [stratum for stratum in self._strata.values() if stratum.sampled]
+        population = sum(stratum.population for stratum in strata)
+        proportions = {}
+        for c in self.classes():
+            estimate = 0.0
+            variance = 0.0
+            for stratum in strata:
+                weight = stratum.population / population
+                estimate += weight * stratum.counts[c] / stratum.sampled
+                # smoothed, so that a class not (or always) observed in a stratum still has a variance
+                p = (stratum.counts[c] + 1) / (stratum.sampled + 2)
+                variance += (
+                    weight**2
+                    * (1 - stratum.sampled / stratum.population)
+                    * p
+                    * (1 - p)
+                    / stratum.sampled
+                )
+            half_width = self._z * math.sqrt(variance)
+            proportions[c] = Proportion(
+                estimate,
+                max(0.0, estimate - half_width),
+                min(1.0, estimate + half_width),
+            )
+        return StratumEstimate(
+            OVERALL,
+            self.population,
+            sum(stratum.sampled for stratum in self._strata.values()),
+            sum(stratum.failed for stratum in self._strata.values()),
+            proportions,
+        )
+
+    @staticmethod
+    def half_width(estimate: StratumEstimate) -> float:
+        """The largest half-width of the confidence intervals of an estimate."""
+        return max(
+            (proportion.half_width for proportion in estimate.proportions.values()),
+            default=0.0,
+        )
+
+    def to_csv(self, file: TextIO) -> int:
+        """Write the estimates of all strata and the overall estimate, with a row per quality class.
+
+        Returns:
+            the number of rows written.
+        """
+        writer = csv.DictWriter(file, fieldnames=FIELDNAMES)
+        writer.writeheader()
+        rows = 0
+        for estimate in self.estimates() + [self.overall()]:
+            for quality, proportion in estimate.proportions.items():
+                writer.writerow(
+                    {
+                        "stratum": estimate.stratum,
+                        "population": estimate.population,
+                        "sampled": estimate.sampled,
+                        "failed": estimate.failed,
+                        "quality_class": quality,
+                        "proportion": proportion.estimate,
+                        "lower": proportion.lower,
+                        "upper": proportion.upper,
+                        "pages": round(proportion.estimate * estimate.population),
+                    }
+                )
+                rows += 1
+        return rows
+
+    def report(self) -> str:
+        """A human-readable summary of the overall estimate."""
+        overall = self.overall()
+        lines = [
+            f"{overall.sampled} of {overall.population} pages in {len(self._strata)} strata classified "
+            f"({overall.failed} failed); precision ±{self.half_width(overall):.3f} (target ±{self.precision:.3f})."
+        ]
+        lines += [
+            f"class {quality}: {proportion.estimate:.1%} [{proportion.lower:.1%}, {proportion.upper:.1%}], "
+            f"~{round(proportion.estimate * overall.population)} pages"
+            for quality, proportion in overall.proportions.items()
+        ]
+        return "\n".join(lines)
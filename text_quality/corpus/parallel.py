@@ -0,0 +1,59 @@
+"""Processing the pages of a corpus in a thread pool."""
+
+import os
+import sys
+from collections import deque
+from concurrent.futures import Executor
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import TypeVar
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def gil_enabled() -> bool:
+    """False on free-threaded Python builds with the GIL disabled, where threads run Python code in parallel."""
+    # pylint: disable=protected-access
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def ordered_map(
+    function: Callable[[T], R],
+    items: Iterable[T],
+    executor: Optional[Executor] = None,
+    max_pending: Optional[int] = None,
+) -> Iterator[R]:
+    """Apply a function to all items in an executor, yielding the results in the order of the items.
+
+    Unlike `Executor.map()`, the items are consumed lazily: at most `max_pending` items are submitted
+    to the executor ahead of the result that is yielded next, so that memory usage is bounded
+    for long streams of items.
+
+    Args:
+        function: the function to apply.
+        items: the input items.
+        executor: the executor to run the function in; if None, the function is applied in this thread.
+        max_pending: the maximum number of submitted items; defaults to four per CPU.
+    Raises:
+        any exception raised by the function, when its result is due.
+    """
+    if executor is None:
+        yield from map(function, items)
+        return
+
+    max_pending = max_pending or 4 * (os.cpu_count() or 1)
+    pending = deque()
+    try:
+        for item in items:
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+            pending.append(executor.submit(function, item))
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
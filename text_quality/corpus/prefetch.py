@@ -0,0 +1,222 @@
+"""Reading input files ahead of their processing, in a pool of reader threads.
+
+On network file systems, reading many small files one at a time leaves the CPU idle while waiting for I/O.
+A Prefetcher reads the next files in parallel while the current one is processed,
+and measures whether the processing waits for the readers (I/O-bound) or the other way around (CPU-bound).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+from typing import Generic
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import TypedDict
+from typing import TypeVar
+from ..settings import PREFETCH_BYTES
+from ..settings import PREFETCH_WORKERS
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+IO_BOUND_WAIT = 0.1
+"""Fraction of the time waiting for the readers above which processing is considered I/O-bound."""
+
+
+class PrefetchSummary(TypedDict):
+    """Statistics of a Prefetcher; durations in seconds."""
+
+    items: int
+    bytes: int
+    elapsed: float
+    read: float
+    """Total time the readers spent reading, summed over the threads."""
+    wait: float
+    """Time the processing waited for the readers."""
+    reader_utilization: float
+    """Fraction of the available reader time spent reading."""
+    wait_fraction: float
+    """Fraction of the elapsed time the processing waited for the readers."""
+
+
+def file_size(path) -> int:
+    """The size of a file in bytes; 0 if it cannot be determined."""
+    try:
+        return os.path.getsize(path)
+    except (OSError, TypeError):
+        return 0
+
+
+class Prefetcher(Generic[T, R]):
+    """Applies a reading function to items in reader threads, ahead of their consumption.
+
+    Results are yielded in the order of the items. At most `max_items` items are read ahead,
+    and no further items are read while the results that have been read ahead and not yet consumed
+    amount to `max_bytes` or more, as estimated by the `size` function (e.g. the file size);
+    memory usage is then bounded by `max_bytes` plus an item per reader thread.
+
+    Use as a context manager, or call `close()` to stop the reader threads.
+    """
+
+    def __init__(
+        self,
+        read: Callable[[T], R],
+        max_items: int,
+        *,
+        workers: int = PREFETCH_WORKERS,
+        max_bytes: int = PREFETCH_BYTES,
+        size: Callable[[T], int] = file_size,
+    ) -> None:
+        """Create a prefetcher.
+
+        Args:
+            read: the function reading an item, e.g. parsing a file.
+            max_items: the maximum number of items to read ahead.
+            workers: the number of reader threads.
+            max_bytes: the maximum number of bytes of results read ahead.
+            size: returns the number of bytes of an item; called in the reader threads.
+        Raises:
+            ValueError: if any of the numbers is not positive.
+        """
+        if max_items < 1:
+            raise ValueError(f"Invalid number of items to read ahead: {max_items}")
+        if workers < 1:
+            raise ValueError(f"Invalid number of reader threads: {workers}")
+        if max_bytes < 1:
+            raise ValueError(f"Invalid number of bytes to read ahead: {max_bytes}")
+
+        self._read = read
+        self._size = size
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix="prefetch")
+
+        self._lock = threading.Lock()
+        self._items = 0
+        self._bytes = 0
+        self._elapsed = 0.0
+        self._read_seconds = 0.0
+        self._wait_seconds = 0.0
+
+        self._budget = threading.Condition()
+        self._held = 0
+        """The size of the results that have been read and not consumed."""
+        self._consumed = 0
+        """The index of the next result to consume."""
+        self._stopped = False
+
+    def _read_item(self, index: int, item: T) -> tuple[Optional[R], int]:
+        with self._budget:
+            # the next result to consume is always read, so that waiting for it cannot block
+            self._budget.wait_for(
+                lambda: self._held < self.max_bytes
+                or index <= self._consumed
+                or self._stopped
+            )
+            if self._stopped:
+                return None, 0
+
+        start = time.perf_counter()
+        try:
+            result, size = self._read(item), self._size(item)
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self._read_seconds += duration
+        with self._budget:
+            self._held += size
+        return result, size
+
+    def _next(self, pending: deque) -> R:
+        future: Future = pending.popleft()
+        start = time.perf_counter()
+        try:
+            result, size = future.result()
+        finally:
+            self._wait_seconds += time.perf_counter() - start
+            with self._budget:
+                self._consumed += 1
+                self._budget.notify_all()
+        with self._budget:
+            self._held -= size
+            self._budget.notify_all()
+        self._items += 1
+        self._bytes += size
+        return result
+
+    def map(self, items: Iterable[T]) -> Iterator[R]:
+        """Read the items ahead, yielding the results in order.
+
+        Only one `map()` can be iterated at a time.
+
+        Raises:
+            any exception raised by the reading function, when its result is due.
+        """
+        with self._budget:
+            self._held = 0
+            self._consumed = 0
+            self._stopped = False
+
+        pending: deque = deque()
+        start = time.perf_counter()
+        try:
+            for index, item in enumerate(items):
+                if len(pending) >= self.max_items:
+                    yield self._next(pending)
+                pending.append(self._executor.submit(self._read_item, index, item))
+            while pending:
+                yield self._next(pending)
+        finally:
+            with self._budget:
+                self._stopped = True
+                self._budget.notify_all()
+            for future in pending:
+                future.cancel()
+            self._elapsed += time.perf_counter() - start
+
+    def summary(self) -> PrefetchSummary:
+        """Statistics of all items read so far."""
+        with self._lock:
+            read_seconds = self._read_seconds
+        elapsed = self._elapsed
+        return PrefetchSummary(
+            items=self._items,
+            bytes=self._bytes,
+            elapsed=elapsed,
+            read=read_seconds,
+            wait=self._wait_seconds,
+            reader_utilization=(
+                read_seconds / (self.workers * elapsed) if elapsed else 0.0
+            ),
+            wait_fraction=self._wait_seconds / elapsed if elapsed else 0.0,
+        )
+
+    def report(self) -> str:
+        """A human-readable summary, stating whether processing has been I/O-bound or CPU-bound."""
+        summary = self.summary()
+        if summary["wait_fraction"] > IO_BOUND_WAIT:
+            bound = "I/O-bound: more reader threads may help"
+        else:
+            bound = "CPU-bound: the readers keep up with processing"
+        return (
+            f"prefetch: {summary['items']} items, {summary['bytes'] / 2**20:.1f} MiB "
+            f"in {summary['elapsed']:.1f}s; "
+            f"readers busy {summary['reader_utilization']:.0%} of {self.workers} threads, "
+            f"processing waited for input {summary['wait_fraction']:.0%} of the time ({bound})."
+        )
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self) -> "Prefetcher[T, R]":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,92 @@
+"""Streaming input of pre-extracted page texts."""
+
+import json
+import logging
+from itertools import islice
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import TextIO
+from typing import TypeVar
+from ..settings import ENCODING
+
+
+ID_FIELD = "id"
+TEXT_FIELD = "text"
+
+_CHUNK_SIZE = 1 << 16
+
+T = TypeVar("T")
+
+
+class TextRecord(NamedTuple):
+    """A page text with an identifier."""
+
+    id: str
+    text: str
+
+
+def read_jsonl(
+    file: TextIO, id_field: str = ID_FIELD, text_field: str = TEXT_FIELD
+) -> Iterator[TextRecord]:
+    """Read records from a JSON Lines file, one at a time.
+
+    Invalid lines and records without text are logged and skipped.
+    Records without an id are identified by the file name and line number.
+
+    Args:
+        file: the input file.
+        id_field: the field containing the record id.
+        text_field: the field containing the text.
+    Yields:
+        a TextRecord for each valid line.
+    """
+    name = getattr(file, "name", "<jsonl>")
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            text = record[text_field]
+        except (json.JSONDecodeError, KeyError, TypeError) as e:
+            logging.error("Invalid record in '%s', line %d: %s", name, line_number, e)
+            continue
+        if not isinstance(text, str):
+            logging.error(
+                "Invalid text in '%s', line %d: %s", name, line_number, repr(text)
+            )
+            continue
+        yield TextRecord(str(record.get(id_field, f"{name}:{line_number}")), text)
+
+
+def read_nul_separated(file: BinaryIO, name: str) -> Iterator[TextRecord]:
+    """Read texts separated by NUL characters, one at a time.
+
+    Args:
+        file: the binary input file, e.g. sys.stdin.buffer.
+        name: used for identifying the records as '<name>:<number>', starting at 1.
+    Yields:
+        a TextRecord for each text.
+    """
+    parts: List[bytes] = []  # chunks of the current text
+    number = 0
+    while chunk := file.read(_CHUNK_SIZE):
+        *ends, start = chunk.split(b"\0")
+        for end in ends:
+            number += 1
+            yield TextRecord(f"{name}:{number}", b"".join(parts + [end]).decode(ENCODING))
+            parts = []
+        parts.append(start)
+    if any(parts):
+        yield TextRecord(f"{name}:{number + 1}", b"".join(parts).decode(ENCODING))
+
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """Split an iterable into lists of at most `size` items, lazily."""
+    if size < 1:
+        raise ValueError(f"Invalid batch size: {size}")
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
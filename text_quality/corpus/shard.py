@@ -0,0 +1,140 @@
+"""Deterministic partitioning of inputs over multiple runs, and merging of their outputs."""
+
+import csv
+import hashlib
+import logging
+import os
+from pathlib import Path
+from typing import Iterable
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import TextIO
+from typing import Union
+
+
+FILENAME_FIELD = "filename"
+"""The column in the output identifying the input."""
+
+LEVEL_FIELD = "level"
+"""The optional column with the granularity of an output row."""
+
+
+class Shard(NamedTuple):
+    """A partition of the inputs, identified by a 0-based index and the number of shards."""
+
+    index: int
+    count: int
+
+    def __contains__(self, path: Union[str, Path]) -> bool:
+        return shard_of(path, self.count) == self.index
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+    @classmethod
+    def parse(cls, value: str) -> "Shard":
+        """Parse a shard specification like '0/4' (the first of four shards).
+
+        Raises:
+            ValueError: if the value is not of the form 'I/N' with 0 <= I < N.
+        """
+        try:
+            index, count = (int(part) for part in value.split("/"))
+        except ValueError as e:
+            raise ValueError(f"Invalid shard '{value}', expected 'I/N'.") from e
+        if not 0 <= index < count:
+            raise ValueError(f"Invalid shard '{value}', expected 0 <= I < N.")
+        return cls(index, count)
+
+
+def normalize(path: Union[str, Path]) -> str:
+    """Normalize a path for hashing and comparing, independent of the platform."""
+    return Path(os.path.normpath(path)).as_posix()
+
+
+def shard_of(path: Union[str, Path], count: int) -> int:
+    """Assign a path to one of `count` shards, based on a stable hash of the path.
+
+    The result does not depend on the process, the platform, or the order of inputs.
+    """
+    digest = hashlib.blake2b(normalize(path).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % count
+
+
+class MergeError(ValueError):
+    """Raised if the merged outputs are inconsistent or incomplete."""
+
+    def __init__(self, duplicates: List[str], missing: List[str]) -> None:
+        self.duplicates = duplicates
+        self.missing = missing
+        super().__init__(
+            f"{len(duplicates)} duplicate input(s), {len(missing)} missing input(s)."
+        )
+
+
+def merge(
+    inputs: Iterable[TextIO],
+    output: TextIO,
+    expected: Optional[Iterable[str]] = None,
+    strict: bool = True,
+) -> int:
+    """Merge CSV outputs of multiple shards into one, ordered by normalized file name.
+
+    The order of rows for the same input (e.g. region and line rows) is preserved.
+    All rows are held in memory for sorting.
+
+    Args:
+        inputs: CSV files with identical headers.
+        output: the file to write the merged rows to.
+        expected: if given, all inputs that should be in the outputs.
+        strict: if True, raise a MergeError after writing the output if inputs are duplicated or missing.
+    Returns:
+        the number of distinct inputs in the merged output.
+    Raises:
+        ValueError: if the headers of the inputs differ.
+        MergeError: if strict and inputs are duplicated or missing.
+    """
+    fieldnames: Optional[List[str]] = None
+    rows: List[dict] = []
+    sources: dict[str, set[int]] = {}
+    page_rows: dict[str, int] = {}
+
+    for i, file in enumerate(inputs):
+        reader = csv.DictReader(file)
+        if fieldnames is None:
+            fieldnames = reader.fieldnames
+        elif reader.fieldnames != fieldnames:
+            raise ValueError(
+                f"Header of '{getattr(file, 'name', i)}' ({reader.fieldnames}) "
+                f"differs from previous inputs ({fieldnames})."
+            )
+        for row in reader:
+            key = normalize(row[FILENAME_FIELD])
+            sources.setdefault(key, set()).add(i)
+            if row.get(LEVEL_FIELD, "page") == "page":
+                page_rows[key] = page_rows.get(key, 0) + 1
+            rows.append(row)
+
+    rows.sort(key=lambda row: normalize(row[FILENAME_FIELD]))
+
+    writer = csv.DictWriter(output, fieldnames=fieldnames or [FILENAME_FIELD])
+    writer.writeheader()
+    writer.writerows(rows)
+
+    duplicates = sorted(
+        key for key in sources if len(sources[key]) > 1 or page_rows.get(key, 0) > 1
+    )
+    for duplicate in duplicates:
+        logging.error("Duplicate input: '%s'", duplicate)
+
+    missing = []
+    if expected is not None:
+        missing = sorted({normalize(path) for path in expected} - sources.keys())
+        for path in missing:
+            logging.error("Missing input: '%s'", path)
+
+    if strict and (duplicates or missing):
+        raise MergeError(duplicates, missing)
+
+    return len(sources)
@@ -0,0 +1,267 @@
+"""Generating synthetic corpora with HTR-like noise, for load and scale testing.
+
+Pages are generated from the bundled token dictionary and Hunspell word lists.
+Each page is generated from the seed and its index alone, so that a corpus of any size is reproducible,
+can be generated in parts and in parallel, and does not need to be held in memory.
+"""
+
+import random
+import string
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Sequence
+from xml.sax.saxutils import escape
+from ..settings import DEFAULT_LANGUAGE
+from ..settings import ENCODING
+from ..settings import HUNSPELL_DIR
+from ..settings import LINE_SEPARATOR
+from ..settings import SHORT_COLUMN_WIDTH
+from ..settings import TOKEN_DICT_FILE
+
+
+GARBAGE_CHARACTERS = string.ascii_letters + string.digits + string.punctuation + "„⸗¬"
+"""Characters that garbage tokens and random substitutions consist of."""
+
+CONFUSIONS: dict[str, Sequence[str]] = {
+    "a": ("o", "u", "e"),
+    "c": ("e", "t"),
+    "e": ("c", "o"),
+    "f": ("s", "t"),
+    "h": ("b", "k", "li"),
+    "i": ("l", "j", "1"),
+    "l": ("i", "1", "t"),
+    "m": ("rn", "in", "nn"),
+    "n": ("u", "ri", "m"),
+    "o": ("a", "0", "e"),
+    "r": ("v", "n"),
+    "s": ("f", "5"),
+    "t": ("l", "f"),
+    "u": ("n", "ii", "v"),
+    "v": ("r", "u"),
+}
+"""Characters that HTR models typically confuse, with their substitutes."""
+
+HYPHENS = ("-", "⸗", "¬", "=")
+"""Characters marking words broken across lines."""
+
+
+class Noise(NamedTuple):
+    """Probabilities of the kinds of noise in a synthetic corpus."""
+
+    substitution: float = 0.0
+    """Probability of a character to be substituted, by a confusable or a random character."""
+    hyphenation: float = 0.0
+    """Probability of a line to end with a word that continues on the next line."""
+    garbage: float = 0.0
+    """Probability of a token to be replaced by a sequence of random characters."""
+    short_columns: float = 0.0
+    """Probability of a page to consist of short lines only, as in broken column segmentations."""
+    foreign: float = 0.0
+    """Probability of a page to be in another language than the default language."""
+
+
+NOISE_LEVELS: dict[str, Noise] = {
+    "clean": Noise(),
+    "htr": Noise(
+        substitution=0.03,
+        hyphenation=0.1,
+        garbage=0.02,
+        short_columns=0.02,
+        foreign=0.02,
+    ),
+    "poor": Noise(
+        substitution=0.15,
+        hyphenation=0.2,
+        garbage=0.2,
+        short_columns=0.05,
+        foreign=0.05,
+    ),
+}
+"""Predefined noise levels."""
+
+
+class SyntheticPage(NamedTuple):
+    """A generated page, with the properties it has been generated with."""
+
+    id: str
+    lines: List[str]
+    language: str
+    short_columns: bool
+
+    @property
+    def text(self) -> str:
+        return LINE_SEPARATOR.join(self.lines)
+
+
+@lru_cache(maxsize=None)
+def token_dictionary_words(file: Path = TOKEN_DICT_FILE) -> List[str]:
+    """The alphabetic words in a token dictionary file, sorted."""
+    with open(file, "rt", encoding=ENCODING) as f:
+        return sorted({line.strip() for line in f if line.strip().isalpha()})
+
+
+@lru_cache(maxsize=None)
+def hunspell_words(language: str, hunspell_dir: Path = HUNSPELL_DIR) -> List[str]:
+    """The alphabetic stems in a Hunspell .dic file, sorted."""
+    with open(
+        hunspell_dir / f"{language}.dic", "rt", encoding=ENCODING, errors="replace"
+    ) as f:
+        next(f, None)  # the number of entries
+        return sorted(
+            {
+                stem
+                for line in f
+                if not line[:1].isspace()
+                and (stem := line.split("/", 1)[0].strip()).isalpha()
+            }
+        )
+
+
+class CorpusGenerator:
+    """Generates pages of words from a vocabulary per language, with HTR-like noise."""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        *,
+        noise: Noise = NOISE_LEVELS["htr"],
+        lines: tuple[int, int] = (20, 40),
+        line_tokens: tuple[float, float] = (7.0, 2.5),
+        languages: Sequence[str] = ("de", "fr"),
+        hunspell_dir: Path = HUNSPELL_DIR,
+        token_dict_file: Path = TOKEN_DICT_FILE,
+    ) -> None:
+        """Configure the generator.
+
+        Args:
+            seed: the random seed; pages are identical for identical seeds, indices, and arguments.
+            noise: the probabilities of the kinds of noise.
+            lines: the minimum and maximum number of lines per page, drawn uniformly.
+            line_tokens: the mean and standard deviation of the number of tokens per line,
+                drawn from a normal distribution, with at least one token per line.
+            languages: the languages of foreign pages, with Hunspell dictionaries in the directory.
+            hunspell_dir: the directory with Hunspell dictionaries.
+            token_dict_file: the token dictionary for the default language,
+                combined with its Hunspell dictionary.
+        Raises:
+            ValueError: if any of the arguments is out of range.
+            FileNotFoundError: if a word list does not exist.
+        """
+        if not 1 <= lines[0] <= lines[1]:
+            raise ValueError(f"Invalid number of lines: {lines}")
+        if line_tokens[0] < 1 or line_tokens[1] < 0:
+            raise ValueError(f"Invalid distribution of tokens per line: {line_tokens}")
+        if not all(0 <= p <= 1 for p in noise):
+            raise ValueError(f"Invalid noise probabilities: {noise}")
+        if noise.foreign > 0 and not languages:
+            raise ValueError("Foreign pages require at least one other language.")
+
+        self.seed = seed
+        self.noise = noise
+        self.lines = lines
+        self.line_tokens = line_tokens
+
+        self._vocabularies = {
+            DEFAULT_LANGUAGE: sorted(
+                set(token_dictionary_words(token_dict_file))
+                | set(hunspell_words(DEFAULT_LANGUAGE, hunspell_dir))
+            )
+        } | {language: hunspell_words(language, hunspell_dir) for language in languages}
+        self._languages = list(languages)
+
+    def page(self, index: int) -> SyntheticPage:
+        """Generate the page with the given index."""
+        rnd = random.Random(f"{self.seed}:{index}")
+        noise = self.noise
+
+        language = (
+            rnd.choice(self._languages)
+            if rnd.random() < noise.foreign
+            else DEFAULT_LANGUAGE
+        )
+        words = self._vocabularies[language]
+        short_columns = rnd.random() < noise.short_columns
+
+        lines: List[List[str]] = []
+        for _ in range(rnd.randint(*self.lines)):
+            n_tokens = max(1, round(rnd.gauss(*self.line_tokens)))
+            lines.append(
+                [
+                    (
+                        self._garbage(rnd)
+                        if rnd.random() < noise.garbage
+                        else self._substitute(rnd.choice(words), rnd)
+                    )
+                    for _ in range(n_tokens)
+                ]
+            )
+
+        if short_columns:
+            # only fragments of the first words, as in narrow columns cut off by the segmentation
+            width = SHORT_COLUMN_WIDTH - 1
+            lines = [[line[0][: rnd.randint(1, width)]] for line in lines]
+        else:
+            self._hyphenate(lines, rnd)
+
+        return SyntheticPage(
+            f"page_{index:08d}",
+            [" ".join(line) for line in lines],
+            language,
+            short_columns,
+        )
+
+    def pages(self, n_pages: int, start: int = 0) -> Iterator[SyntheticPage]:
+        """Generate the pages with indices `start` to `start + n_pages - 1`, lazily."""
+        return (self.page(index) for index in range(start, start + n_pages))
+
+    def _substitute(self, word: str, rnd: random.Random) -> str:
+        if not self.noise.substitution:
+            return word
+        return "".join(
+            (
+                rnd.choice(CONFUSIONS.get(c, GARBAGE_CHARACTERS))
+                if rnd.random() < self.noise.substitution
+                else c
+            )
+            for c in word
+        )
+
+    @staticmethod
+    def _garbage(rnd: random.Random) -> str:
+        return "".join(rnd.choices(GARBAGE_CHARACTERS, k=rnd.randint(1, 8)))
+
+    def _hyphenate(self, lines: List[List[str]], rnd: random.Random) -> None:
+        """Break the last words of lines across the line boundary."""
+        for line, next_line in zip(lines, lines[1:]):
+            if len(line[-1]) >= 4 and rnd.random() < self.noise.hyphenation:
+                word = line.pop()
+                split = rnd.randint(2, len(word) - 2)
+                line.append(word[:split] + rnd.choice(HYPHENS))
+                next_line.insert(0, word[split:])
+
+
+def to_pagexml(page: SyntheticPage, lines_per_region: int = 10) -> str:
+    """Render a page as a PageXML document, with its lines in regions of up to `lines_per_region` lines."""
+    coords = '<Coords points="0,0 10,0 10,10 0,10"/>'
+    regions = []
+    for r, start in enumerate(range(0, len(page.lines), lines_per_region), start=1):
+        text_lines = "".join(
+            f'<TextLine id="r{r}l{n}">{coords}<TextEquiv><Unicode>{escape(line)}</Unicode></TextEquiv></TextLine>\n'
+            for n, line in enumerate(
+                page.lines[start : start + lines_per_region], start=1
+            )
+        )
+        regions.append(f'<TextRegion id="r{r}">{coords}\n{text_lines}</TextRegion>\n')
+
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<PcGts xmlns="http://schema.primaresearch.org/PAGE/gts/pagecontent/2013-07-15">\n'
+        "<Metadata><Creator>text_quality</Creator><Created>2020-01-01T00:00:00</Created>"
+        "<LastChange>2020-01-01T00:00:00</LastChange></Metadata>\n"
+        f'<Page imageFilename="{page.id}.jpg" imageWidth="1000" imageHeight="1000">\n'
+        + "".join(regions)
+        + "</Page></PcGts>\n"
+    )
@@ -0,0 +1,193 @@
+"""Watching directories for new and modified input files."""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import Union
+from ..settings import WATCH_INTERVAL
+from ..settings import WATCH_SETTLE
+from .discovery import PAGEXML_PATTERN
+from .discovery import walk
+
+
+class FileState(NamedTuple):
+    """The modification time and size of a file; a file has changed if either of them has."""
+
+    mtime_ns: int
+    size: int
+
+    @classmethod
+    def of(cls, stat: os.stat_result) -> "FileState":
+        return cls(stat.st_mtime_ns, stat.st_size)
+
+
+class FolderWatcher:
+    """Polls directories for new and modified files, and yields them in batches once they are complete.
+
+    A file is complete once its size and modification time are the same in two consecutive scans,
+    and have not changed for `settle` seconds, so that files that are still being written are not processed.
+    Files that are modified after they have been processed are yielded again.
+
+    Files are only recorded as processed when `mark_processed()` is called, e.g. after their results
+    have been written. With a state file, this record is stored in an SQLite database,
+    so that a restarted watcher skips the files that have been processed before;
+    files are identified by their absolute paths.
+    """
+
+    def __init__(
+        self,
+        directories: Iterable[Union[str, Path]],
+        include: Sequence[str] = (PAGEXML_PATTERN,),
+        exclude: Sequence[str] = (),
+        *,
+        interval: float = WATCH_INTERVAL,
+        settle: float = WATCH_SETTLE,
+        state_file: Optional[Path] = None,
+    ) -> None:
+        """Create a watcher.
+
+        Args:
+            directories: the directories to watch recursively.
+            include: watch files matching any of these patterns, see `walk()`.
+            exclude: skip files and directories matching any of these patterns.
+            interval: the number of seconds between scans.
+            settle: the number of seconds a file must remain unchanged before it is yielded.
+            state_file: an SQLite database file recording the processed files.
+        Raises:
+            ValueError: if the interval or the settle time is negative.
+        """
+        if interval < 0:
+            raise ValueError(f"Invalid interval: {interval}")
+        if settle < 0:
+            raise ValueError(f"Invalid settle time: {settle}")
+
+        self._directories = [str(directory) for directory in directories]
+        self._include = include
+        self._exclude = exclude
+        self.interval = interval
+        self.settle = settle
+
+        self._processed: dict[str, FileState] = {}
+        """Files that have been processed by absolute path, with their state at the time."""
+        self._pending: dict[str, tuple[FileState, float]] = {}
+        """Files that have changed, with their state and the time it was first seen."""
+        self._ready: dict[str, FileState] = {}
+        """Files that have been yielded, with their state at the time."""
+
+        self._db: Optional[sqlite3.Connection] = None
+        if state_file is not None:
+            self._db = sqlite3.connect(state_file)
+            with self._db:
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS processed "
+                    "(path TEXT PRIMARY KEY, mtime_ns INTEGER NOT NULL, size INTEGER NOT NULL)"
+                )
+            self._processed = {
+                path: FileState(mtime_ns, size)
+                for path, mtime_ns, size in self._db.execute(
+                    "SELECT path, mtime_ns, size FROM processed"
+                )
+            }
+            logging.info(
+                "Read %d processed files from state file '%s'.",
+                len(self._processed),
+                state_file,
+            )
+
+    @property
+    def processed(self) -> int:
+        """The number of files recorded as processed."""
+        return len(self._processed)
+
+    def scan(self) -> List[str]:
+        """Scan the directories once.
+
+        Returns:
+            the files that are complete and have not been processed in their current state,
+            in the order in which they have been found.
+        """
+        now = time.time()
+        seen = set()
+        ready = []
+        for path in (
+            path
+            for directory in self._directories
+            for path in walk(directory, self._include, self._exclude)
+        ):
+            seen.add(path)
+            try:
+                state = FileState.of(os.stat(path))
+            except OSError:
+                # deleted since it was found
+                continue
+            if (
+                self._processed.get(os.path.abspath(path)) == state
+                or self._ready.get(path) == state
+            ):
+                continue
+
+            previous, since = self._pending.get(path, (None, now))
+            if previous != state:
+                self._pending[path] = (state, now)
+            # files that were last modified long ago are complete when seen unchanged again
+            elif min(since, state.mtime_ns / 1e9) <= now - self.settle:
+                self._pending.pop(path, None)
+                self._ready[path] = state
+                ready.append(path)
+
+        for path in self._pending.keys() - seen:
+            del self._pending[path]
+        return ready
+
+    def batches(
+        self, batch_size: int, stop: Optional[threading.Event] = None
+    ) -> Iterator[List[str]]:
+        """Scan the directories repeatedly, yielding the complete files in batches.
+
+        Args:
+            batch_size: the maximum number of files per batch.
+            stop: stop watching when this event is set; watch indefinitely if None.
+        Yields:
+            batches of files to process.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            ready = self.scan()
+            for start in range(0, len(ready), batch_size):
+                yield ready[start : start + batch_size]
+            stop.wait(self.interval)
+
+    def mark_processed(self, paths: Iterable[str]) -> None:
+        """Record files as processed, in the state in which they were yielded."""
+        processed = [
+            (os.path.abspath(path), self._ready.pop(path))
+            for path in paths
+            if path in self._ready
+        ]
+        self._processed.update(processed)
+        if self._db is not None:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO processed VALUES (?, ?, ?)",
+                    ((path, *state) for path, state in processed),
+                )
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    def __enter__(self) -> "FolderWatcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,82 @@
+"""Splitting large plain text files into windows, without reading them into memory."""
+
+import mmap
+import re
+from enum import Enum
+from pathlib import Path
+from typing import Iterator
+from typing import Union
+from ..settings import ENCODING
+from ..settings import WINDOW_TOKENS
+from .records import TextRecord
+
+
+class WindowMode(Enum):
+    """Ways of splitting a text into windows."""
+
+    FORMFEED = "formfeed"
+    """Split at form feed characters, e.g. page breaks in the output of 'pdftotext'."""
+    BLANK_LINE = "blank-line"
+    """Split at blank lines, i.e. into paragraphs."""
+    TOKENS = "tokens"
+    """Split into windows of a fixed number of whitespace-separated tokens."""
+
+
+_SEPARATORS = {
+    WindowMode.FORMFEED: re.compile(rb"\f"),
+    WindowMode.BLANK_LINE: re.compile(rb"\n[ \t\r\f\v]*\n\s*"),
+}
+
+
+def _spans(buffer, mode: WindowMode, size: int) -> Iterator[tuple[int, int]]:
+    if mode == WindowMode.TOKENS:
+        # up to `size` tokens, each with the preceding whitespace
+        pattern = re.compile(rb"(?:\s*\S+){1,%d}" % size)
+        for match in pattern.finditer(buffer):
+            yield match.span()
+    else:
+        start = 0
+        for match in _SEPARATORS[mode].finditer(buffer):
+            yield start, match.start()
+            start = match.end()
+        yield start, len(buffer)
+
+
+def read_windows(
+    file: Union[str, Path],
+    mode: WindowMode = WindowMode.FORMFEED,
+    size: int = WINDOW_TOKENS,
+) -> Iterator[TextRecord]:
+    """Split a text file into windows, one at a time.
+
+    The file is memory-mapped, so that only the current window is held in memory.
+    Windows that contain only whitespace are skipped.
+
+    Args:
+        file: the input file, encoded in UTF-8.
+        mode: how to split the text.
+        size: the number of tokens per window if the mode is `WindowMode.TOKENS`.
+    Yields:
+        a TextRecord per window, identified as '<file>:<number>', starting at 1.
+    Raises:
+        ValueError: if the size is not positive.
+    """
+    if size < 1:
+        raise ValueError(f"Invalid window size: {size}")
+
+    with open(file, "rb") as f:
+        if f.seek(0, 2) == 0:
+            # empty files cannot be mapped
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            spans = _spans(buffer, mode, size)
+            try:
+                number = 0
+                for start, end in spans:
+                    text = buffer[start:end].decode(ENCODING, errors="replace")
+                    if text.strip():
+                        number += 1
+                        yield TextRecord(f"{file}:{number}", text)
+            finally:
+                # release the matches on the buffer before it is closed
+                spans.close()
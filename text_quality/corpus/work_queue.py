@@ -0,0 +1,414 @@
+"""A work queue of input files in an SQLite database, drained by any number of workers.
+
+Unlike static shards, workers claim small batches of inputs as they go, so that the load is balanced
+if inputs vary in size, and the inputs of workers that die are reclaimed by the others.
+The database file can be on storage shared between nodes, so that no central service is needed.
+"""
+
+import csv
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from enum import IntEnum
+from pathlib import Path
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Mapping
+from typing import NamedTuple
+from typing import Optional
+from typing import Sequence
+from typing import TextIO
+from typing import Union
+from ..settings import QUEUE_LEASE
+from ..settings import QUEUE_MAX_ATTEMPTS
+
+
+class TaskState(IntEnum):
+    """The states of an input in a work queue."""
+
+    PENDING = 0
+    CLAIMED = 1
+    DONE = 2
+    FAILED = 3
+    """Claimed `max_attempts` times without being completed, e.g. because it crashes workers."""
+
+
+class QueueStatus(NamedTuple):
+    """The number of inputs per state."""
+
+    pending: int
+    claimed: int
+    done: int
+    failed: int
+
+    def __str__(self) -> str:
+        return ", ".join(f"{n} {state}" for state, n in self._asdict().items())
+
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    state INTEGER NOT NULL DEFAULT {TaskState.PENDING.value},
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, id);
+CREATE TABLE IF NOT EXISTS results (
+    task INTEGER NOT NULL REFERENCES tasks (id),
+    n INTEGER NOT NULL,
+    row TEXT NOT NULL,
+    PRIMARY KEY (task, n)
+);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+def _to_json(value):
+    # numpy scalars in the output rows
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def worker_id() -> str:
+    """An identifier of this process that is unique across nodes."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class WorkQueue:
+    """A queue of input paths, claimed in batches by workers with expiring leases.
+
+    - `add()` inputs, from any worker; inputs that are in the queue already are ignored.
+    - `claim()` a batch of pending inputs, with a lease of `lease` seconds.
+      A background thread renews the leases of the claimed inputs while the queue is open,
+      so that only the inputs of workers that have stopped expire.
+    - `complete()` claimed inputs with their output rows, which are stored in the same transaction.
+      An input is completed once: if its lease had expired and another worker completed it already,
+      the results are discarded.
+    - Expired inputs are reclaimed by other workers; inputs that have been claimed `max_attempts` times
+      without being completed are failed.
+
+    All changes are transactions on the database, which is locked while they are written.
+    The database uses a rollback journal rather than write-ahead logging, which does not work on network file systems;
+    the file system must support POSIX file locks (e.g. NFSv4 or Lustre, not all SMB mounts).
+    Leases are compared with the clocks of the nodes, which should be synchronized to well within `lease` seconds.
+    Paths are stored as given, so they must be valid on all nodes, e.g. absolute paths on the shared storage.
+    """
+
+    def __init__(
+        self,
+        file: Union[str, Path],
+        *,
+        worker: Optional[str] = None,
+        lease: float = QUEUE_LEASE,
+        max_attempts: int = QUEUE_MAX_ATTEMPTS,
+        timeout: float = 60.0,
+    ) -> None:
+        """Open a work queue, creating the database if it does not exist.
+
+        Args:
+            file: the SQLite database file.
+            worker: an identifier of this worker; defaults to one from the host name and the process id.
+            lease: the number of seconds claimed inputs are held without renewal.
+            max_attempts: the number of times an input is claimed before it is failed.
+            timeout: the number of seconds to wait for a lock on the database.
+        Raises:
+            ValueError: if the lease or the number of attempts is not positive.
+        """
+        if lease <= 0:
+            raise ValueError(f"Invalid lease: {lease}")
+        if max_attempts < 1:
+            raise ValueError(f"Invalid number of attempts: {max_attempts}")
+
+        self.file = Path(file)
+        self.worker = worker or worker_id()
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._timeout = timeout
+
+        self._db = self._connect()
+        self._db.executescript(_SCHEMA)
+
+        self._stopped = threading.Event()
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # transactions are managed explicitly
+        return sqlite3.connect(
+            self.file,
+            timeout=self._timeout,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+
+    @staticmethod
+    @contextmanager
+    def _transaction(db: sqlite3.Connection):
+        # take the write lock at the start, so that a claim cannot be interleaved with another
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def add(self, paths: Iterable[Union[str, Path]], chunk_size: int = 1000) -> int:
+        """Add inputs to the queue, in transactions of `chunk_size` inputs.
+
+        Returns:
+            the number of inputs that were not in the queue yet.
+        """
+        added = 0
+        paths = iter(paths)
+        while chunk := [str(path) for _, path in zip(range(chunk_size), paths)]:
+            with self._transaction(self._db) as db:
+                changes = db.total_changes
+                db.executemany(
+                    "INSERT OR IGNORE INTO tasks (path) VALUES (?)",
+                    ((path,) for path in chunk),
+                )
+                added += db.total_changes - changes
+        return added
+
+    def claim(self, n: int) -> List[str]:
+        """Claim up to n pending inputs, in the order they were added.
+
+        Expired leases are released first, and inputs that have reached the maximum number of attempts are failed.
+
+        Returns:
+            the claimed inputs; empty if no inputs are pending.
+        """
+        now = time.time()
+        with self._transaction(self._db) as db:
+            expired = db.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "worker = NULL, lease_expires = NULL WHERE state = ? AND lease_expires < ?",
+                (
+                    self.max_attempts,
+                    TaskState.FAILED,
+                    TaskState.PENDING,
+                    TaskState.CLAIMED,
+                    now,
+                ),
+            ).rowcount
+            tasks = db.execute(
+                "SELECT id, path FROM tasks WHERE state = ? ORDER BY id LIMIT ?",
+                (TaskState.PENDING, n),
+            ).fetchall()
+            db.executemany(
+                "UPDATE tasks SET state = ?, worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                "WHERE id = ?",
+                (
+                    (TaskState.CLAIMED, self.worker, now + self.lease, task_id)
+                    for task_id, _ in tasks
+                ),
+            )
+        if expired:
+            logging.warning("Reclaimed %d inputs with expired leases.", expired)
+        return [path for _, path in tasks]
+
+    def complete(self, results: Mapping[str, Sequence[dict]]) -> int:
+        """Mark inputs as done, and store their output rows, in one transaction.
+
+        Args:
+            results: the output rows per input.
+        Returns:
+            the number of inputs whose results have been stored;
+            inputs that have been completed by another worker already are skipped.
+        """
+        stored = 0
+        with self._transaction(self._db) as db:
+            for path, rows in results.items():
+                task = db.execute(
+                    "SELECT id FROM tasks WHERE path = ? AND state != ?",
+                    (path, TaskState.DONE),
+                ).fetchone()
+                if task is None:
+                    logging.warning("Input '%s' has been completed already.", path)
+                    continue
+                db.execute(
+                    "UPDATE tasks SET state = ?, worker = ?, lease_expires = NULL WHERE id = ?",
+                    (TaskState.DONE, self.worker, task[0]),
+                )
+                db.executemany(
+                    "INSERT INTO results (task, n, row) VALUES (?, ?, ?)",
+                    (
+                        (task[0], n, json.dumps(row, default=_to_json))
+                        for n, row in enumerate(rows)
+                    ),
+                )
+                stored += 1
+        return stored
+
+    def release(self) -> int:
+        """Return the inputs claimed by this worker to the queue, e.g. when interrupted.
+
+        The attempts are counted, so that inputs that crash workers are failed eventually:
+        inputs that have reached the maximum number of attempts are failed instead of released.
+
+        Returns:
+            the number of released (or failed) inputs.
+        """
+        with self._transaction(self._db) as db:
+            return db.execute(
+                "UPDATE tasks SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "worker = NULL, lease_expires = NULL WHERE state = ? AND worker = ?",
+                (
+                    self.max_attempts,
+                    TaskState.FAILED,
+                    TaskState.PENDING,
+                    TaskState.CLAIMED,
+                    self.worker,
+                ),
+            ).rowcount
+
+    def renew(self, db: Optional[sqlite3.Connection] = None) -> int:
+        """Renew the leases of the inputs claimed by this worker.
+
+        Returns:
+            the number of renewed leases.
+        """
+        with self._transaction(db or self._db) as db:
+            return db.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE state = ? AND worker = ?",
+                (time.time() + self.lease, TaskState.CLAIMED, self.worker),
+            ).rowcount
+
+    def _renew_periodically(self) -> None:
+        db = self._connect()
+        try:
+            while not self._stopped.wait(self.lease / 3):
+                try:
+                    self.renew(db)
+                except sqlite3.Error as e:
+                    logging.error("Error renewing leases: %s", str(e))
+        finally:
+            db.close()
+
+    def drain(
+        self,
+        batch_size: int,
+        stop: Optional[threading.Event] = None,
+        *,
+        wait: bool = True,
+        poll: float = 5.0,
+    ) -> Iterator[List[str]]:
+        """Claim batches of inputs until the queue is empty.
+
+        Each batch should be completed before the next one is requested.
+
+        Args:
+            batch_size: the maximum number of inputs per batch.
+            stop: stop claiming when this event is set.
+            wait: if True, keep polling while other workers hold claims, to reclaim their inputs
+                if their leases expire; otherwise, stop as soon as no inputs are pending.
+            poll: the number of seconds between claims while waiting.
+        Yields:
+            batches of claimed inputs.
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            if batch := self.claim(batch_size):
+                yield batch
+            elif wait and self.status().claimed:
+                stop.wait(poll)
+            else:
+                return
+
+    def status(self) -> QueueStatus:
+        counts = dict(
+            self._db.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state")
+        )
+        return QueueStatus(*(counts.get(state, 0) for state in TaskState))
+
+    def paths(self, state: TaskState) -> List[str]:
+        """The inputs in a state, in the order they were added."""
+        return [
+            path
+            for (path,) in self._db.execute(
+                "SELECT path FROM tasks WHERE state = ? ORDER BY id", (state,)
+            )
+        ]
+
+    def check_fieldnames(self, fieldnames: Sequence[str]) -> None:
+        """Record the output columns, or check that they equal those of the other workers.
+
+        Raises:
+            ValueError: if other workers produce other output columns, e.g. with other arguments.
+        """
+        with self._transaction(self._db) as db:
+            db.execute(
+                "INSERT OR IGNORE INTO meta VALUES ('fieldnames', ?)",
+                (json.dumps(list(fieldnames)),),
+            )
+            (value,) = db.execute(
+                "SELECT value FROM meta WHERE key = 'fieldnames'"
+            ).fetchone()
+        if json.loads(value) != list(fieldnames):
+            raise ValueError(
+                f"Output columns ({list(fieldnames)}) differ from those of other workers ({json.loads(value)})."
+            )
+
+    def results(self) -> Iterator[dict]:
+        """The stored output rows, in the order the inputs were added."""
+        for (row,) in self._db.execute(
+            "SELECT row FROM results JOIN tasks ON results.task = tasks.id ORDER BY tasks.id, results.n"
+        ):
+            yield json.loads(row)
+
+    def to_csv(self, output: TextIO) -> int:
+        """Write the stored output rows to a CSV file.
+
+        Returns:
+            the number of rows written.
+        """
+        fieldnames = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'fieldnames'"
+        ).fetchone()
+        writer = csv.DictWriter(
+            output, fieldnames=json.loads(fieldnames[0]) if fieldnames else []
+        )
+        writer.writeheader()
+        n_rows = 0
+        for row in self.results():
+            writer.writerow(row)
+            n_rows += 1
+        return n_rows
+
+    def start(self) -> "WorkQueue":
+        """Start renewing the leases of claimed inputs in the background."""
+        if self._heartbeat is None:
+            self._stopped.clear()
+            self._heartbeat = threading.Thread(
+                target=self._renew_periodically, daemon=True
+            )
+            self._heartbeat.start()
+        return self
+
+    def close(self) -> None:
+        """Stop renewing leases, release the inputs claimed by this worker, and close the database."""
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.join()
+            self._heartbeat = None
+        if self._db is not None:
+            if released := self.release():
+                logging.info("Released %d claimed inputs.", released)
+            self._db.close()
+            self._db = None
+
+    def __enter__(self) -> "WorkQueue":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -1,10 +1,17 @@
+from typing import Iterable
 from typing import List
+from typing import Optional
 from typing import TypedDict
 import pandas as pd
+from ..monitoring.timing import NULL_TIMER
+from ..monitoring.timing import Timer
+from .sampling import SampledCounts
+from .sampling import TokenSampler
 from .scorer.dictionary import HunspellDictionary
 from .scorer.dictionary import TokenDictionary
 from .scorer.garbage import GarbageDetector
 from .scorer.q_gram import QGram
+from .scorer.scorer import Scorer
 from .tokenizer import Tokenizer
 
 
@@ -17,27 +24,127 @@ class Scorers(TypedDict):
     garbage_score: GarbageDetector
 
 
+FeatureCounts = dict[str, tuple[float, int]]
+"""The counts (numerator, denominator) underlying each feature value."""
+
+
 class Featurizer:
-    """A collection of scorers to featurize an input text."""
+    """A collection of scorers to featurize an input text.
+
+    A Featurizer is thread-safe, provided that its tokenizer and scorers are (see Scorer).
+    """
 
-    def __init__(self, scorers: Scorers, tokenizer: Tokenizer) -> None:
+    def __init__(
+        self,
+        scorers: Scorers,
+        tokenizer: Tokenizer,
+        *,
+        timer: Timer = NULL_TIMER,
+        sampler: Optional[TokenSampler] = None,
+    ) -> None:
+        """Initialize the featurizer.
+
+        Args:
+            scorers: the scorers per feature.
+            tokenizer: the tokenizer.
+            timer: measures the durations of tokenizing and scoring.
+            sampler: if given, `featurize()` and `sample_counts()` score a sample of the tokens of long texts.
+        """
         self._scorers = scorers
         self._tokenizer = tokenizer
+        self._timer = timer
+        self._sampler = sampler
 
     @property
     def features(self) -> List[str]:
         return list(self._scorers.keys())
 
+    @property
+    def scorers(self) -> Scorers:
+        return self._scorers
+
+    def tokenize(self, text: str) -> List[str]:
+        with self._timer.stage("tokenize"):
+            return self._tokenizer.tokenize(text)
+
     def featurize(self, text: str) -> tuple[dict[str, float], List[str]]:
-        tokens = self._tokenizer.tokenize(text)
-        return {
-            feature: scorer.score(tokens) for feature, scorer in self._scorers.items()
-        }, tokens
+        tokens = self.tokenize(text)
+
+        return Featurizer.ratios(self.sample_counts(tokens).counts), tokens
+
+    def featurize_lines(
+        self, lines: List[str]
+    ) -> tuple[List[FeatureCounts], List[List[str]]]:
+        """Compute the feature counts for each line, in a single pass over the text.
+
+        Counts can be summed over lines with `sum_counts()` to featurize larger units,
+        e.g. regions or the entire page, without tokenizing and scoring them again.
+
+        Returns:
+            a tuple with the feature counts and the tokens for each line.
+        """
+        with self._timer.stage("tokenize"):
+            tokens = self._tokenizer.tokenize_lines(lines)
+
+        return [self.count(line_tokens) for line_tokens in tokens], tokens
+
+    def count(
+        self, tokens: List[str], features: Optional[Iterable[str]] = None
+    ) -> FeatureCounts:
+        """Compute the counts underlying the feature values for a list of tokens.
+
+        Args:
+            tokens: the tokens to score.
+            features: compute only these features; defaults to all features.
+        """
+        counts = {}
+        for feature in self.features if features is None else features:
+            with self._timer.stage(f"score:{feature}"):
+                counts[feature] = self._scorers[feature].counts(tokens)
+        return counts
+
+    def sample_counts(
+        self, tokens: List[str], features: Optional[Iterable[str]] = None
+    ) -> SampledCounts:
+        """Compute the counts on a sample of the tokens if a sampler is configured, otherwise on all tokens.
+
+        Args:
+            tokens: the tokens to score.
+            features: compute only these features; defaults to all features.
+        """
+        if features is not None:
+            features = list(features)
+        if self._sampler is None:
+            counts = self.count(tokens, features)
+            return SampledCounts(
+                counts, {feature: 0.0 for feature in counts}, len(tokens)
+            )
+        return self._sampler.counts(tokens, lambda sample: self.count(sample, features))
+
+    def sum_counts(self, counts: Iterable[FeatureCounts]) -> FeatureCounts:
+        """Sum feature counts, e.g. over all lines in a region."""
+        total = {feature: (0.0, 0) for feature in self.features}
+        for _counts in counts:
+            for feature, (numerator, denominator) in _counts.items():
+                total_numerator, total_denominator = total[feature]
+                total[feature] = (
+                    total_numerator + numerator,
+                    total_denominator + denominator,
+                )
+        return total
 
     def featurize_as_dataframe(self, text: str) -> tuple[pd.DataFrame, List[str]]:
         features, tokens = self.featurize(text)
         return Featurizer.as_dataframe(features), tokens
 
+    @staticmethod
+    def ratios(counts: FeatureCounts) -> dict[str, float]:
+        """Compute the feature values from feature counts."""
+        return {
+            feature: Scorer.ratio(numerator, denominator)
+            for feature, (numerator, denominator) in counts.items()
+        }
+
     @staticmethod
     def as_dataframe(features: dict[str, float]) -> pd.DataFrame:
         return pd.DataFrame({feature: [value] for feature, value in features.items()})
@@ -0,0 +1,167 @@
+"""Scoring a sample of the tokens of long texts, with bounded errors."""
+
+import math
+import random
+from statistics import NormalDist
+from typing import Callable
+from typing import List
+from typing import NamedTuple
+from ..settings import SAMPLING_CONFIDENCE
+from ..settings import SAMPLING_ERROR_BOUND
+from ..settings import SAMPLING_GROUPS
+
+
+Counts = dict[str, tuple[float, int]]
+"""The counts (numerator, denominator) per feature, as computed by `Featurizer.count()`."""
+
+
+def ratio_variance(group_counts: List[tuple[float, int]]) -> float:
+    """The linearized variance of a ratio estimated from the counts of the random groups of a sample.
+
+    Since the variance is estimated from the variation between the groups, it accounts for tokens
+    that are counted with different weights, e.g. by characters. Without finite population correction.
+    """
+    denominator = sum(d for _, d in group_counts)
+    n_groups = len(group_counts)
+    if n_groups < 2 or denominator == 0:
+        return 0.0
+
+    ratio = sum(n for n, _ in group_counts) / denominator
+    return (
+        n_groups
+        / (n_groups - 1)
+        * sum((n - ratio * d) ** 2 for n, d in group_counts)
+        / denominator**2
+    )
+
+
+class SampledCounts(NamedTuple):
+    """Feature counts computed on a sample of the tokens."""
+
+    counts: Counts
+    errors: dict[str, float]
+    """The achieved error bound of each feature value; 0 if all tokens have been scored."""
+    n_sampled: int
+    """The number of tokens that have been scored."""
+
+
+class TokenSampler:
+    """Selects a sample of tokens that is large enough for all feature values to be within an error bound.
+
+    The sample is stratified over the position in the text: the tokens are divided into equally sized strata,
+    and one token is drawn from each, so that all parts of a page (e.g. of a ledger spread) are represented.
+    The initial sample size suffices for a proportion over all tokens at the given confidence;
+    since the scorers weigh tokens differently (e.g. by characters), the error of each feature is estimated
+    from the variation between random groups of the sample, and the sample is enlarged if it exceeds the bound.
+    """
+
+    def __init__(
+        self,
+        error_bound: float = SAMPLING_ERROR_BOUND,
+        confidence: float = SAMPLING_CONFIDENCE,
+        *,
+        groups: int = SAMPLING_GROUPS,
+        max_rounds: int = 3,
+        seed: int = 0,
+    ) -> None:
+        """Configure the sampler.
+
+        Args:
+            error_bound: the maximum absolute error of a feature value.
+            confidence: the probability of a feature value being within the error bound.
+            groups: the number of random groups to estimate the error from.
+            max_rounds: the maximum number of samples to draw for a page; the last sample is used
+                even if it exceeds the error bound, which is then reported in the errors.
+            seed: the random seed; the same tokens always result in the same sample.
+        Raises:
+            ValueError: if any of the arguments is out of range.
+        """
+        if not 0 < error_bound < 1:
+            raise ValueError(f"Invalid error bound: {error_bound}")
+        if not 0 < confidence < 1:
+            raise ValueError(f"Invalid confidence: {confidence}")
+        if groups < 2:
+            raise ValueError(f"Invalid number of groups: {groups}")
+        if max_rounds < 1:
+            raise ValueError(f"Invalid maximum number of rounds: {max_rounds}")
+
+        self.error_bound = error_bound
+        self._z = NormalDist().inv_cdf((1 + confidence) / 2)
+        self._groups = groups
+        self._max_rounds = max_rounds
+        self._seed = seed
+
+    def sample_size(self, n_tokens: int) -> int:
+        """The sample size for estimating a proportion within the error bound, with finite population correction."""
+        if n_tokens == 0:
+            return 0
+        n = self._z**2 * 0.25 / self.error_bound**2
+        return min(n_tokens, max(self._groups, math.ceil(n / (1 + (n - 1) / n_tokens))))
+
+    def sample(self, tokens: List[str], size: int) -> List[List[str]]:
+        """Draw a stratified sample of tokens.
+
+        Returns:
+            the sampled tokens, split into random groups of (nearly) equal size.
+        """
+        rnd = random.Random(self._seed)
+        step = len(tokens) / size
+        groups: List[List[str]] = [[] for _ in range(min(self._groups, size))]
+        for i in range(size):
+            start = int(i * step)
+            end = max(start + 1, int((i + 1) * step))
+            groups[i % len(groups)].append(tokens[rnd.randrange(start, end)])
+        return groups
+
+    def error(
+        self, group_counts: List[tuple[float, int]], n_sampled: int, n_tokens: int
+    ) -> float:
+        """The error bound of a ratio estimated from the counts of the random groups of a sample.
+
+        Uses the linearized variance of the ratio estimator, with finite population correction.
+        """
+        if n_sampled >= n_tokens:
+            return 0.0
+        return self._z * math.sqrt(
+            ratio_variance(group_counts) * (1 - n_sampled / n_tokens)
+        )
+
+    def counts(
+        self, tokens: List[str], count: Callable[[List[str]], Counts]
+    ) -> SampledCounts:
+        """Compute feature counts on a sample of the tokens.
+
+        Args:
+            tokens: all tokens of a text.
+            count: computes the counts for a list of tokens, e.g. `Featurizer.count()`.
+        Returns:
+            the counts summed over the sample, with the achieved error bounds.
+        """
+        size = self.sample_size(len(tokens))
+        for i in range(self._max_rounds):
+            if size >= len(tokens):
+                break
+
+            group_counts = [count(group) for group in self.sample(tokens, size)]
+            counts = {
+                feature: (
+                    sum(_counts[feature][0] for _counts in group_counts),
+                    sum(_counts[feature][1] for _counts in group_counts),
+                )
+                for feature in group_counts[0]
+            }
+            errors = {
+                feature: self.error(
+                    [_counts[feature] for _counts in group_counts], size, len(tokens)
+                )
+                for feature in counts
+            }
+            worst = max(errors.values(), default=0.0)
+            if worst <= self.error_bound or i == self._max_rounds - 1:
+                return SampledCounts(counts, errors, size)
+
+            # the variance decreases approximately with the inverse of the sample size
+            size = math.ceil(size * (worst / self.error_bound) ** 2)
+
+        counts = count(tokens)
+        return SampledCounts(counts, {feature: 0.0 for feature in counts}, len(tokens))
@@ -1,11 +1,14 @@
 import logging
 from abc import abstractmethod
 from pathlib import Path
+from typing import Iterable
 from typing import List
 from spylls import hunspell
+from ...monitoring.memory import MEMORY_ACCOUNTING
 from ...settings import ENCODING
 from ...settings import LINE_SEPARATOR
 from .scorer import Scorer
+from .token_set import MappedTokenSet
 
 
 class Dictionary(Scorer):
@@ -16,33 +19,48 @@ class Dictionary(Scorer):
     def _lookup(self, token: str) -> bool:
         return NotImplemented
 
-    def score(self, tokens: List[str]) -> float:
+    def _lookup_all(self, tokens: List[str]) -> Iterable[bool]:
+        """Look up multiple tokens; subclasses can override this with a batch lookup."""
+        return map(self._lookup, tokens)
+
+    def counts(self, tokens: List[str]) -> tuple[float, int]:
         """
         `See Nautilus-OCR <https://github.com/natliblux/nautilusocr/blob/2d4d59c45466b5cc8c9897798bd8b205a7f0c02c/src/epr/features_epr.py#L129>`_
-        """
-        if not any(len(token) > 0 for token in tokens):
-            # empty input
-            return 0.0
 
+        Returns:
+            A tuple with the number of characters in matched tokens and the total number of characters.
+        """
         matched_count = 0
         total_count = 0
 
-        for token in tokens:
+        for token, found in zip(tokens, self._lookup_all(tokens)):
             total_count += len(token)
 
             # TODO: lowercase token?
-            matched_count += self._lookup(token) * len(token)
+            matched_count += found * len(token)
 
-        return matched_count / total_count
+        return matched_count, total_count
 
 
 class TokenDictionary(Dictionary):
     def __init__(self, dictionary) -> None:
-        super().__init__(set(dictionary))
+        """A dictionary of tokens.
+
+        Args:
+            dictionary: an iterable of tokens, or a MappedTokenSet that is used as is.
+        """
+        super().__init__(
+            dictionary if isinstance(dictionary, MappedTokenSet) else set(dictionary)
+        )
 
     def _lookup(self, token: str) -> bool:
         return token in self._dictionary
 
+    def _lookup_all(self, tokens: List[str]) -> Iterable[bool]:
+        if isinstance(self._dictionary, MappedTokenSet):
+            return self._dictionary.contains(tokens)
+        return super()._lookup_all(tokens)
+
     def to_file(self, filepath: Path, sort: bool = True, overwrite: bool = False):
         if filepath.exists() and not overwrite:
             raise FileExistsError(filepath)
@@ -53,12 +71,33 @@ class TokenDictionary(Dictionary):
         with open(filepath, "wt", encoding=ENCODING) as f:
             f.write(LINE_SEPARATOR.join(tokens))
 
+    def to_binary_file(self, filepath: Path, overwrite: bool = False):
+        """Write the dictionary in the binary format of MappedTokenSet."""
+        MappedTokenSet.write(self._dictionary, filepath, overwrite=overwrite)
+
     @classmethod
     def from_file(cls, filepath: Path):
-        logging.info("Reading token dictionary from file '%s'.", str(filepath))
-        with open(filepath, "rt", encoding=ENCODING) as f:
-            tokens = [line.strip() for line in f if not line.strip().startswith("#")]
-        return cls(tokens)
+        """Read a token dictionary from a text file, or map a binary file.
+
+        The format is detected automatically.
+        Text files contain one token per line; lines starting with '#' are ignored.
+        """
+        with MEMORY_ACCOUNTING.component(f"token_dictionary:{Path(filepath).name}"):
+            if MappedTokenSet.is_token_set_file(filepath):
+                logging.info("Mapping token dictionary from file '%s'.", str(filepath))
+                return cls(MappedTokenSet(filepath))
+
+            logging.info("Reading token dictionary from file '%s'.", str(filepath))
+            with open(filepath, "rt", encoding=ENCODING) as f:
+                tokens = (line.strip() for line in f)
+                return cls(token for token in tokens if not token.startswith("#"))
+
+    @staticmethod
+    def convert(text_file: Path, binary_file: Path, overwrite: bool = False):
+        """Convert a token dictionary text file to the binary format."""
+        TokenDictionary.from_file(text_file).to_binary_file(
+            binary_file, overwrite=overwrite
+        )
 
 
 class HunspellDictionary(Dictionary):
@@ -70,4 +109,5 @@ class HunspellDictionary(Dictionary):
         logging.info(
             "Reading Hunspell dictionary '%s' in directory '%s'", language, str(path)
         )
-        return cls(hunspell.Dictionary.from_files(str(path / language)))
+        with MEMORY_ACCOUNTING.component(f"hunspell:{language}"):
+            return cls(hunspell.Dictionary.from_files(str(path / language)))
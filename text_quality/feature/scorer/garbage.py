@@ -12,17 +12,17 @@ class GarbageDetector(Scorer):
     EPR_RULE5 = 8
     EPR_RULE9 = 2
 
-    def score(self, tokens: List[str]) -> float:  # noqa: MC0001
+    def counts(self, tokens: List[str]) -> tuple[float, int]:  # noqa: MC0001
         """
         `See Nautilus-OCR <https://github.com/natliblux/nautilusocr/blob/2d4d59c45466b5cc8c9897798bd8b205a7f0c02c/src/epr/features_epr.py#L148>`_
+
+        Returns:
+            A tuple with the number of garbage tokens and the total number of tokens.
         """
         # pylint: disable=consider-using-enumerate,too-many-branches,too-many-locals,too-many-statements,chained-comparison
 
         issues = 0
 
-        if len(tokens) == 0:
-            return 0
-
         for token in tokens:
 
             # rule1
@@ -135,4 +135,4 @@ class GarbageDetector(Scorer):
                 issues += 1
                 continue
 
-        return issues / len(tokens)
+        return issues, len(tokens)
@@ -0,0 +1,229 @@
+"""Hunspell dictionaries with the .dic entries in a memory-mappable format, for loading without parsing."""
+
+import hashlib
+import json
+import mmap
+from collections import defaultdict
+from pathlib import Path
+from typing import BinaryIO
+from typing import Iterable
+from typing import List
+import numpy as np
+from spylls import hunspell
+from spylls.hunspell.algo import lookup
+from spylls.hunspell.algo.capitalization import Type as CapType
+from spylls.hunspell.data import aff as aff_data
+from spylls.hunspell.data import dic as dic_data
+from ...settings import ENCODING
+
+
+_MAGIC = b"TQHDIC\x00\x01"
+_DTYPE = np.dtype("<u8")
+_CACHE_SIZE = 2**16
+"""Maximum number of stems whose entries are cached after decoding."""
+
+
+def _hash(key: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "little")
+
+
+def _write_array(f: BinaryIO, values: Iterable[int]) -> None:
+    f.write(np.fromiter(values, dtype=_DTYPE).tobytes())
+
+
+def _write_padded(f: BinaryIO, blob: bytes) -> None:
+    f.write(blob)
+    f.write(b"\x00" * (-len(blob) % _DTYPE.itemsize))
+
+
+class _MappedStrings:
+    """A sequence of strings in a buffer: their number, their offsets in the blob, and the blob."""
+
+    def __init__(self, buffer, offset: int) -> None:
+        self._buffer = buffer
+        size = int.from_bytes(buffer[offset : offset + 8], "little")
+        self._offsets = np.frombuffer(
+            buffer, dtype=_DTYPE, count=size + 1, offset=offset + 8
+        )
+        self._blob_start = offset + 8 + (size + 1) * _DTYPE.itemsize
+        blob_size = int(self._offsets[-1])
+        self.end = self._blob_start + blob_size + (-blob_size % _DTYPE.itemsize)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        start = self._blob_start + int(self._offsets[i])
+        end = self._blob_start + int(self._offsets[i + 1])
+        return self._buffer[start:end].decode(ENCODING)
+
+    @staticmethod
+    def write(strings: List[str], f: BinaryIO) -> None:
+        encoded = [string.encode(ENCODING) for string in strings]
+        f.write(len(encoded).to_bytes(8, "little"))
+        _write_array(f, [0] + np.cumsum([len(e) for e in encoded]).tolist())
+        _write_padded(f, b"".join(encoded))
+
+
+class _MappedMultiMap:
+    """Maps strings to lists of integers, in a buffer of sorted key hashes, keys, and values."""
+
+    def __init__(self, buffer, offset: int) -> None:
+        self._buffer = buffer
+        n_keys = int.from_bytes(buffer[offset : offset + 8], "little")
+        n_values = int.from_bytes(buffer[offset + 8 : offset + 16], "little")
+        position = offset + 16
+
+        def array(count: int) -> np.ndarray:
+            nonlocal position
+            result = np.frombuffer(buffer, dtype=_DTYPE, count=count, offset=position)
+            position += count * _DTYPE.itemsize
+            return result
+
+        self._hashes = array(n_keys)
+        self._value_offsets = array(n_keys + 1)
+        self._values = array(n_values)
+        self._keys = _MappedStrings(buffer, position)
+        self.end = self._keys.end
+
+    def get(self, key: str) -> List[int]:
+        encoded = key.encode(ENCODING)
+        key_hash = _hash(encoded)
+        position = int(np.searchsorted(self._hashes, np.uint64(key_hash)))
+        # hash collisions are possible, compare all keys with the same hash
+        while position < len(self._hashes) and self._hashes[position] == key_hash:
+            if self._keys[position] == key:
+                start, end = self._value_offsets[position : position + 2]
+                return self._values[start:end].tolist()
+            position += 1
+        return []
+
+    @staticmethod
+    def write(items: dict[str, List[int]], f: BinaryIO) -> None:
+        keys = sorted(items, key=lambda key: (_hash(key.encode(ENCODING)), key))
+        f.write(len(keys).to_bytes(8, "little"))
+        f.write(sum(len(values) for values in items.values()).to_bytes(8, "little"))
+        _write_array(f, (_hash(key.encode(ENCODING)) for key in keys))
+        _write_array(f, [0] + np.cumsum([len(items[key]) for key in keys]).tolist())
+        _write_array(f, (value for key in keys for value in items[key]))
+        _MappedStrings.write(keys, f)
+
+
+class MappedDic(dic_data.Dic):
+    """The entries of a Hunspell .dic file in a memory-mapped file, as used by the spylls lookup.
+
+    The file contains the entries (stem, flags, capitalization, and data tags) encoded as JSON,
+    and indices from the stems and their lowercase forms to the entries.
+    Entries are decoded when their stem is looked up, so that loading does not parse the entries;
+    the decoded entries of recently looked up stems are cached.
+    """
+
+    # pylint: disable=super-init-not-called
+    def __init__(self, file: Path, offset: int = 0) -> None:
+        """Map a file written by `MappedDic.write()`.
+
+        Args:
+            file: the file to map.
+            offset: the position of the entries in the file, e.g. in a model bundle.
+        Raises:
+            ValueError: if the file does not contain Hunspell entries at the offset.
+        """
+        self._file = Path(file)
+        self._offset = offset
+        with open(self._file, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[offset : offset + len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"Not a Hunspell entries file: '{self._file}'.")
+
+        self._entries = _MappedStrings(self._mmap, offset + len(_MAGIC))
+        self._index = _MappedMultiMap(self._mmap, self._entries.end)
+        self._lowercase_index = _MappedMultiMap(self._mmap, self._index.end)
+
+        # only the homonyms of recently looked up stems are cached, bounded by _CACHE_SIZE
+        self._homonyms: dict[tuple[str, bool], List[dic_data.Word]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __reduce__(self):
+        # re-map the file instead of copying the content, e.g. when sent to other processes
+        return (self.__class__, (self._file, self._offset))
+
+    @property
+    def words(self) -> List[dic_data.Word]:
+        """All entries; decodes the entire file."""
+        return [self._word(i) for i in range(len(self._entries))]
+
+    def _word(self, i: int) -> dic_data.Word:
+        stem, flags, captype, data, alt_spellings = json.loads(self._entries[i])
+        return dic_data.Word(
+            stem=stem,
+            flags=set(flags),
+            data=defaultdict(list, data),
+            captype=CapType[captype],
+            alt_spellings=alt_spellings,
+        )
+
+    def homonyms(self, stem: str, *, ignorecase: bool = False) -> List[dic_data.Word]:
+        key = (stem, ignorecase)
+        if (homonyms := self._homonyms.get(key)) is None:
+            index = self._lowercase_index if ignorecase else self._index
+            homonyms = [self._word(i) for i in index.get(stem)]
+            if len(self._homonyms) >= _CACHE_SIZE:
+                self._homonyms.clear()
+            self._homonyms[key] = homonyms
+        return homonyms
+
+    def append(self, word: dic_data.Word, *, lower: List[str]):
+        raise TypeError("A mapped dictionary is read-only.")
+
+    @staticmethod
+    def write(dic: dic_data.Dic, f: BinaryIO) -> None:
+        """Write the entries of a parsed .dic file in the mapped format to an open file."""
+        ids = {id(word): i for i, word in enumerate(dic.words)}
+
+        f.write(_MAGIC)
+        _MappedStrings.write(
+            [
+                json.dumps(
+                    [
+                        word.stem,
+                        sorted(word.flags),
+                        word.captype.name,
+                        dict(word.data),
+                        word.alt_spellings,
+                    ],
+                    ensure_ascii=False,
+                )
+                for word in dic.words
+            ],
+            f,
+        )
+        for index in (dic.index, dic.lowercase_index):
+            _MappedMultiMap.write(
+                {
+                    stem: [ids[id(word)] for word in words]
+                    for stem, words in index.items()
+                },
+                f,
+            )
+
+
+class MappedHunspell:
+    """A spylls Hunspell dictionary for lookups only, with the .dic entries memory-mapped.
+
+    Lookups give the same results as `spylls.hunspell.Dictionary.lookup()` on the source files.
+    """
+
+    def __init__(self, aff: aff_data.Aff, dic: MappedDic) -> None:
+        self.aff = aff
+        self.dic = dic
+        self._lookup = lookup.Lookup(aff, dic)
+
+    def lookup(self, word: str) -> bool:
+        return self._lookup(word)
+
+    @staticmethod
+    def write_dic(dictionary: hunspell.Dictionary, f: BinaryIO) -> None:
+        """Write the .dic entries of a parsed dictionary in the mapped format to an open file."""
+        MappedDic.write(dictionary.dic, f)
@@ -1,8 +1,8 @@
 import logging
-from functools import lru_cache
 from pathlib import Path
 from typing import List
 from typing import Optional
+from ...monitoring.memory import MEMORY_ACCOUNTING
 from ...settings import ENCODING
 from ...settings import LINE_SEPARATOR
 from ...settings import Q_GRAM_LENGTH
@@ -11,41 +11,40 @@ from .scorer import Scorer
 
 
 class QGram(Scorer):
+    """Scores tokens by the ranks of their character q-grams in a language profile.
+
+    The ranks are computed once when the profile is loaded; afterwards, the scorer is immutable
+    and can be shared between threads.
+    """
+
     def __init__(self, qgrams: List[str]) -> None:
 
         self._lang_qgrams = qgrams
-        self._qgram_set = set(qgrams)
+        self._ranks: dict[str, int] = {}
+        for rank, qgram in enumerate(qgrams):
+            self._ranks.setdefault(qgram, rank)
 
-    @lru_cache
     def get_rank(self, qgram: str) -> Optional[int]:
-        if qgram not in self._qgram_set:
-            return None
-        return self._lang_qgrams.index(qgram)
+        return self._ranks.get(qgram)
 
-    @lru_cache(maxsize=1024)
     def _get_ngram_score(self, ngram: str) -> float:
-        # pylint: disable=consider-using-enumerate
-        for i in range(0, len(self._lang_qgrams)):
-            if ngram == self._lang_qgrams[i]:
-                return 1 - (1 / len(self._lang_qgrams) * i)
-        raise AssertionError()
+        return 1 - (1 / len(self._lang_qgrams) * self._ranks[ngram])
 
-    def _get_ngram_scores(self, ngrams: List[str]) -> float:
+    def _get_ngram_scores(self, ngrams: List[str]) -> tuple[float, int]:
         """
         `See Nautilus-OCR <https://github.com/natliblux/nautilusocr/blob/2d4d59c45466b5cc8c9897798bd8b205a7f0c02c/src/epr/features_epr.py#L51>`_
-        """
-        if len(ngrams) == 0:
-            return 0
 
+        Returns:
+            A tuple with the summed scores of the n-grams, and the number of n-grams.
+        """
         score = 0
         for ngram in ngrams:
-            if ngram in self._qgram_set:
+            if ngram in self._ranks:
                 score += self._get_ngram_score(ngram)
 
-        score = score / len(ngrams)
-        return score
+        return score, len(ngrams)
 
-    def score(self, tokens: List[str]) -> float:
+    def counts(self, tokens: List[str]) -> tuple[float, int]:
         return self._get_ngram_scores(QGram._get_qgrams(tokens))
 
     def to_file(self, filepath: Path):
@@ -82,13 +81,15 @@ class QGram(Scorer):
             str(filepath),
             gamma,
         )
-        q_grams = []
-        with open(filepath, "rt", encoding=ENCODING) as f:
-            for line in f:
-                q_grams.append(line.strip())
-                if gamma and len(q_grams) >= gamma:
-                    logging.info(
-                        "Stopping reading q-grams list, %d q-grams read.", len(q_grams)
-                    )
-                    break
-        return cls(q_grams)
+        with MEMORY_ACCOUNTING.component(f"qgrams:{Path(filepath).name}"):
+            q_grams = []
+            with open(filepath, "rt", encoding=ENCODING) as f:
+                for line in f:
+                    q_grams.append(line.strip())
+                    if gamma and len(q_grams) >= gamma:
+                        logging.info(
+                            "Stopping reading q-grams list, %d q-grams read.",
+                            len(q_grams),
+                        )
+                        break
+            return cls(q_grams)
@@ -0,0 +1,221 @@
+"""Building ranked q-gram profiles for QGram from large corpora."""
+
+import logging
+import os
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Executor
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import wait
+from functools import partial
+from itertools import islice
+from pathlib import Path
+from typing import Iterable
+from typing import Iterator
+from typing import List
+from typing import Optional
+from typing import Union
+from ...corpus.records import batched
+from ...corpus.records import read_jsonl
+from ...page.page import Page
+from ...settings import ENCODING
+from ...settings import LINE_SEPARATOR
+from ..tokenizer import NautilusOcrTokenizer
+from ..tokenizer import Tokenizer
+from .q_gram import QGram
+
+
+MAX_QGRAMS: int = 1_000_000
+"""Default number of distinct q-grams to keep in memory while counting."""
+
+TEXT_BLOCK_LINES: int = 10_000
+"""Number of lines of a plain text file that are tokenized at once."""
+
+
+class QGramCounter:
+    """Counts q-grams with bounded memory; counters of different parts of a corpus can be merged.
+
+    If the number of distinct q-grams exceeds `max_size`, the least frequent ones are dropped,
+    as in Lossy Counting (Manku & Motwani, 2002).
+    The counts of q-grams that re-appear later are then underestimated by at most `error`,
+    which leaves the ranks of the frequent q-grams, which form the profile, intact.
+    Without pruning, the counts are exact and do not depend on the order of merging.
+    """
+
+    def __init__(self, max_size: Optional[int] = MAX_QGRAMS) -> None:
+        if max_size is not None and max_size < 1:
+            raise ValueError(f"Invalid maximum size: {max_size}")
+        self._counts: Counter = Counter()
+        self._max_size = max_size
+        self.error: int = 0
+        """An upper bound of the count any q-gram might have lost by pruning."""
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __getitem__(self, qgram: str) -> int:
+        return self._counts[qgram]
+
+    def update(self, qgrams: Iterable[str]) -> None:
+        self._counts.update(qgrams)
+        self._prune()
+
+    def merge(self, other: "QGramCounter") -> None:
+        """Add the counts of another counter to this one."""
+        self._counts.update(other._counts)
+        self.error += other.error
+        self._prune()
+
+    def _prune(self) -> None:
+        if self._max_size is None or len(self._counts) <= self._max_size:
+            return
+
+        # keep half of the maximum size, so that pruning does not happen on every update;
+        # cut by rank, since many q-grams can have the same count, e.g. 1
+        keep = max(1, self._max_size // 2)
+        ranked = self._counts.most_common()
+        self._counts = Counter(dict(ranked[:keep]))
+        self.error += ranked[keep][1]
+        logging.debug(
+            "Pruned q-gram counts to %d q-grams, error bound %d.",
+            len(self._counts),
+            self.error,
+        )
+
+    def ranked(self, limit: Optional[int] = None) -> List[str]:
+        """The q-grams by descending frequency; equally frequent q-grams are sorted alphabetically.
+
+        Args:
+            limit: return at most this many q-grams.
+        """
+        ranked = sorted(self._counts.items(), key=lambda item: (-item[1], item[0]))
+        return [qgram for qgram, _ in islice(ranked, limit)]
+
+    def to_file(
+        self, filepath: Path, limit: Optional[int] = None, overwrite: bool = False
+    ) -> int:
+        """Write the ranked q-grams to a file that can be read with `QGram.from_file()`.
+
+        Returns:
+            the number of q-grams written.
+        """
+        if filepath.exists() and not overwrite:
+            raise FileExistsError(filepath)
+
+        qgrams = self.ranked(limit)
+        logging.info("Writing %d q-grams to file '%s'.", len(qgrams), filepath)
+        with open(filepath, "wt", encoding=ENCODING) as f:
+            f.write(LINE_SEPARATOR.join(qgrams))
+        return len(qgrams)
+
+    def to_qgram(self, limit: Optional[int] = None) -> QGram:
+        return QGram(self.ranked(limit))
+
+
+def read_texts(path: Union[str, Path]) -> Iterator[str]:
+    """Read the texts from a corpus file, based on its extension.
+
+    * '.xml': a PageXML file, yielding the text of the page.
+    * '.jsonl': a JSON Lines file, yielding the 'text' field of each record.
+    * '.dic': a Hunspell dictionary, yielding the words (without affix flags) in blocks.
+    * otherwise: a plain text file, yielding blocks of lines.
+
+    Files that cannot be read are logged and skipped.
+    """
+    path = Path(path)
+    try:
+        if path.suffix == ".xml":
+            yield Page.from_file(path).get_text()
+        elif path.suffix == ".jsonl":
+            with open(path, "rt", encoding=ENCODING) as f:
+                yield from (record.text for record in read_jsonl(f))
+        elif path.suffix == ".dic":
+            yield from _read_blocks(path, _hunspell_word)
+        else:
+            yield from _read_blocks(path)
+    except Exception as e:
+        logging.error("Error reading file '%s': %s", path, str(e))
+
+
+def _read_blocks(path: Path, parse_line=None) -> Iterator[str]:
+    with open(path, "rt", encoding=ENCODING) as f:
+        lines = (line.rstrip("\r\n") for line in f)
+        if parse_line is not None:
+            lines = (parse_line(line) for line in islice(lines, 1, None))
+        for block in batched(lines, TEXT_BLOCK_LINES):
+            yield LINE_SEPARATOR.join(block)
+
+
+def _hunspell_word(line: str) -> str:
+    """Extract the word from a line of a Hunspell .dic file; comments yield an empty string."""
+    if line.startswith(("\t", "#")):
+        return ""
+    return line.split("/", 1)[0].split("\t", 1)[0].strip()
+
+
+def count_files(
+    paths: Iterable[Union[str, Path]],
+    tokenizer: Tokenizer,
+    max_size: Optional[int] = MAX_QGRAMS,
+) -> QGramCounter:
+    """Count the q-grams in the texts of the given files."""
+    counter = QGramCounter(max_size)
+    for path in paths:
+        for text in read_texts(path):
+            counter.update(QGram._get_qgrams(tokenizer.tokenize(text)))
+    return counter
+
+
+def build_profile(
+    paths: Iterable[Union[str, Path]],
+    *,
+    tokenizer: Optional[Tokenizer] = None,
+    workers: Optional[int] = None,
+    files_per_task: int = 16,
+    max_size: Optional[int] = MAX_QGRAMS,
+    executor: Optional[Executor] = None,
+) -> QGramCounter:
+    """Count the q-grams in a corpus, in parallel.
+
+    The paths are consumed lazily and distributed over the workers in batches;
+    the number of pending batches is limited, so that memory usage does not depend on the size of the corpus.
+
+    Args:
+        paths: the corpus files, see `read_texts()`.
+        tokenizer: defaults to NautilusOcrTokenizer.
+        workers: the number of worker processes; defaults to the number of CPUs. If 1, count in this process.
+        files_per_task: the number of files each worker processes at once.
+        max_size: the maximum number of distinct q-grams per counter, see QGramCounter.
+        executor: use this executor instead of creating a process pool.
+    Returns:
+        a QGramCounter with the merged counts.
+    """
+    tokenizer = tokenizer or NautilusOcrTokenizer()
+    batches = batched(paths, files_per_task)
+    count = partial(count_files, tokenizer=tokenizer, max_size=max_size)
+
+    total = QGramCounter(max_size)
+    if executor is None and workers == 1:
+        for batch in batches:
+            total.merge(count(batch))
+    else:
+        workers = workers or os.cpu_count() or 1
+        pool = executor or ProcessPoolExecutor(workers)
+        try:
+            pending = set()
+            for batch in batches:
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        total.merge(future.result())
+                pending.add(pool.submit(count, batch))
+            for future in wait(pending).done:
+                total.merge(future.result())
+        finally:
+            if executor is None:
+                pool.shutdown()
+
+    logging.info(
+        "Counted %d distinct q-grams (error bound %d).", len(total), total.error
+    )
+    return total
@@ -4,8 +4,28 @@ from typing import List
 
 
 class Scorer(ABC):
-    """Abstract class for scorers to compute feature values"""
+    """Abstract class for scorers to compute feature values.
+
+    Feature values are ratios of counts, e.g. matched characters over all characters.
+    Counts of separate token sequences (e.g. lines) can be summed before computing the ratio,
+    resulting in the same feature value as for the concatenated token sequences.
+
+    Scorers must not change their state after construction, so that they can be shared between threads.
+    """
 
     @abstractmethod
-    def score(self, tokens: List[str]) -> float:
+    def counts(self, tokens: List[str]) -> tuple[float, int]:
+        """Compute the counts underlying the feature value.
+
+        Returns:
+            A tuple (numerator, denominator).
+        """
         return NotImplemented
+
+    def score(self, tokens: List[str]) -> float:
+        return Scorer.ratio(*self.counts(tokens))
+
+    @staticmethod
+    def ratio(numerator: float, denominator: int) -> float:
+        """Compute a feature value from counts; 0 if the denominator is 0."""
+        return numerator / denominator if denominator else 0.0
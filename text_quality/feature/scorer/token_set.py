@@ -0,0 +1,170 @@
+"""A compact, memory-mappable set of tokens."""
+
+import hashlib
+import logging
+import mmap
+from pathlib import Path
+from typing import BinaryIO
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Sequence
+import numpy as np
+from ...settings import ENCODING
+
+
+_MAGIC = b"TQTOKS\x00\x01"
+_HEADER_SIZE = len(_MAGIC) + 8
+_DTYPE = np.dtype("<u8")
+
+
+def _hash(token: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(token, digest_size=8).digest(), "little")
+
+
+class MappedTokenSet:
+    """An immutable set of tokens in a binary file, memory-mapped for sharing between processes.
+
+    The file consists of a header, the 64-bit hashes of all tokens in ascending order,
+    the offsets of the tokens in the blob, and the blob of UTF-8 encoded tokens in the same order.
+    Lookups use a binary search over the hashes, and compare the token bytes for the matching hashes.
+    Loading the file does not read or parse the content; pages are loaded by the OS on demand.
+    """
+
+    def __init__(self, file: Path, offset: int = 0) -> None:
+        """Map a token set file.
+
+        Args:
+            file: the file to map.
+            offset: the position of the token set in the file, e.g. in a model bundle.
+        Raises:
+            ValueError: if the file does not contain a token set at the offset.
+        """
+        self._file = Path(file)
+        self._offset = offset
+        with open(self._file, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[offset : offset + len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"Not a token set file: '{self._file}'.")
+        size = int.from_bytes(
+            self._mmap[offset + len(_MAGIC) : offset + _HEADER_SIZE], "little"
+        )
+
+        self._hashes = np.frombuffer(
+            self._mmap, dtype=_DTYPE, count=size, offset=offset + _HEADER_SIZE
+        )
+        self._offsets = np.frombuffer(
+            self._mmap,
+            dtype=_DTYPE,
+            count=size + 1,
+            offset=offset + _HEADER_SIZE + size * _DTYPE.itemsize,
+        )
+        self._blob_start = offset + _HEADER_SIZE + (2 * size + 1) * _DTYPE.itemsize
+
+    def __len__(self) -> int:
+        return len(self._hashes)
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self)):
+            yield self._token(i).decode(ENCODING)
+
+    def __contains__(self, token: str) -> bool:
+        encoded = token.encode(ENCODING)
+        return self._find(encoded, _hash(encoded))
+
+    def __reduce__(self):
+        # re-map the file instead of copying the content, e.g. when sent to other processes
+        return (self.__class__, (self._file, self._offset))
+
+    def contains(self, tokens: Sequence[str]) -> np.ndarray:
+        """Check the membership of multiple tokens at once.
+
+        Returns:
+            a boolean array with one entry per token.
+        """
+        encoded = [token.encode(ENCODING) for token in tokens]
+        hashes = np.fromiter(
+            (_hash(token) for token in encoded), dtype=_DTYPE, count=len(encoded)
+        )
+        positions = np.searchsorted(self._hashes, hashes)
+        candidates = positions < len(self._hashes)
+        candidates[candidates] = (
+            self._hashes[positions[candidates]] == hashes[candidates]
+        )
+
+        result = np.zeros(len(encoded), dtype=bool)
+        indices = np.flatnonzero(candidates)
+        candidate_positions = positions[indices]
+        starts = (self._offsets[candidate_positions] + self._blob_start).tolist()
+        ends = (self._offsets[candidate_positions + 1] + self._blob_start).tolist()
+        for i, position, start, end in zip(
+            indices.tolist(), candidate_positions.tolist(), starts, ends
+        ):
+            # the first token with the same hash is nearly always the one looked for
+            token = encoded[i]
+            result[i] = self._mmap[start:end] == token or self._find(
+                token, int(hashes[i]), position + 1
+            )
+        return result
+
+    def _find(
+        self, token: bytes, token_hash: int, position: Optional[int] = None
+    ) -> bool:
+        if position is None:
+            position = int(np.searchsorted(self._hashes, np.uint64(token_hash)))
+        # hash collisions are possible, compare all tokens with the same hash
+        while position < len(self._hashes) and self._hashes[position] == token_hash:
+            if self._token(position) == token:
+                return True
+            position += 1
+        return False
+
+    def _token(self, i: int) -> bytes:
+        start = self._blob_start + int(self._offsets[i])
+        end = self._blob_start + int(self._offsets[i + 1])
+        return self._mmap[start:end]
+
+    @staticmethod
+    def write(tokens: Iterable[str], file: Path, overwrite: bool = False) -> int:
+        """Write tokens to a binary file.
+
+        Returns:
+            the number of distinct tokens written.
+        """
+        file = Path(file)
+        if file.exists() and not overwrite:
+            raise FileExistsError(file)
+
+        with open(file, "wb") as f:
+            size = MappedTokenSet.write_to(tokens, f)
+        logging.info("Wrote %d tokens to file '%s'.", size, file)
+        return size
+
+    @staticmethod
+    def write_to(tokens: Iterable[str], f: BinaryIO) -> int:
+        """Write tokens in the binary format to an open file.
+
+        Returns:
+            the number of distinct tokens written.
+        """
+        encoded = sorted(
+            (_hash(token), token)
+            for token in {token.encode(ENCODING) for token in tokens}
+        )
+        offsets = np.zeros(len(encoded) + 1, dtype=_DTYPE)
+        np.cumsum([len(token) for _, token in encoded], out=offsets[1:])
+
+        f.write(_MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(np.array([h for h, _ in encoded], dtype=_DTYPE).tobytes())
+        f.write(offsets.tobytes())
+        for _, token in encoded:
+            f.write(token)
+        return len(encoded)
+
+    @staticmethod
+    def is_token_set_file(file: Path) -> bool:
+        """Check the header of a file."""
+        with open(file, "rb") as f:
+            return f.read(len(_MAGIC)) == _MAGIC
@@ -8,27 +8,65 @@ class Tokenizer(ABC):
     def tokenize(self, text: str) -> List[str]:
         return NotImplemented
 
+    def tokenize_lines(self, lines: List[str]) -> List[List[str]]:
+        """Tokenize a sequence of lines, returning the tokens per line.
+
+        This default implementation tokenizes each line separately.
+        Subclasses should override it if tokens can span multiple lines.
+        """
+        return [self.tokenize(line) for line in lines]
+
 
 class NautilusOcrTokenizer(Tokenizer):
     _HYPHENS = {"-", "⸗", "="}
 
     def tokenize(self, text: str) -> List[str]:
         """`Nautilus-OCR tokenizer <https://github.com/natliblux/nautilusocr/blob/2d4d59c45466b5cc8c9897798bd8b205a7f0c02c/src/epr/features_epr.py#L84>`_"""
+        return [token for token, _ in self._tokenize(text)]
+
+    def tokenize_lines(self, lines: List[str]) -> List[List[str]]:
+        """Tokenize lines as one text, joined by newlines.
+
+        Tokens that are hyphenated across a line break are assigned to the line they start in,
+        so that the concatenation of all lines' tokens equals the tokens of the joined text.
+        """
+        line_ends = []
+        offset = 0
+        for line in lines:
+            offset += len(line) + 1
+            line_ends.append(offset)
+
+        tokens: List[List[str]] = [[] for _ in lines]
+        line = 0
+        for token, start in self._tokenize("\n".join(lines)):
+            while start >= line_ends[line]:
+                line += 1
+            tokens[line].append(token)
+        return tokens
+
+    def _tokenize(self, text: str) -> List[tuple[str, int]]:
+        """Tokenize a text, returning the tokens with their start offsets in the text."""
 
         tokens = []
+        starts = []
 
         new_token = ""
-        for c in text:
+        for i, c in enumerate(text):
             if c == " " and len(new_token) > 0:
                 tokens.append(new_token)
                 new_token = ""
             elif c == "\n" and len(new_token) > 0:
                 if new_token[-1] in self._HYPHENS:
                     new_token = new_token[:-1]
+                    if len(new_token) == 0:
+                        starts.pop()
                 else:
                     tokens.append(new_token)
                     new_token = ""
             else:
+                if len(new_token) == 0:
+                    # a token starting with a line break belongs to the next line
+                    starts.append(i + 1 if c == "\n" else i)
                 new_token += c
         if len(new_token) > 0:
             tokens.append(new_token)
@@ -39,4 +77,4 @@ class NautilusOcrTokenizer(Tokenizer):
             if not token[0].isalpha():
                 tokens[i] = token[1:]
 
-        return tokens
+        return list(zip(tokens, starts))
@@ -1,5 +1,21 @@
 import abc
 import string
+import threading
+from enum import Enum
+from typing import Callable
+from typing import Optional
+
+
+class LanguageStrategy(Enum):
+    """How the language of pages is identified."""
+
+    ASSUME = "assume"
+    """All pages are in the default language; no identification."""
+    FASTTEXT = "fasttext"
+    """Every page is identified by the fastText classifier."""
+    PRESCREEN = "prescreen"
+    """Pages that are evidently in the default language are accepted by a pre-screen;
+    only the other pages are identified by the fastText classifier."""
 
 
 class LanguageClassifier(abc.ABC):
@@ -24,3 +40,47 @@ class LanguageClassifier(abc.ABC):
         for c in LanguageClassifier.REMOVE_CHARACTERS:
             text = text.replace(c, " ")  # noqa: self-cls-assignment
         return text.strip()
+
+
+class AssumedLanguageClassifier(LanguageClassifier):
+    """Classifies every text as the same language, with full confidence."""
+
+    def __init__(self, language: str) -> None:
+        self.language = language
+
+    def classify(self, text: str) -> tuple[str, float]:
+        return self.language, 1.0
+
+
+class LazyLanguageClassifier(LanguageClassifier):
+    """Loads a language classifier when it is first used.
+
+    This avoids loading or downloading a model that is never needed.
+
+    Loading is thread-safe: the classifier is loaded once, even if used from several threads at once.
+    """
+
+    def __init__(self, load: Callable[[], LanguageClassifier]) -> None:
+        """Initialize the classifier.
+
+        Args:
+            load: creates the classifier.
+        """
+        self._load = load
+        self._classifier: Optional[LanguageClassifier] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._classifier is not None
+
+    def classifier(self) -> LanguageClassifier:
+        """The classifier, loaded if necessary."""
+        if self._classifier is None:
+            with self._lock:
+                if self._classifier is None:
+                    self._classifier = self._load()
+        return self._classifier
+
+    def classify(self, text: str) -> tuple[str, float]:
+        return self.classifier().classify(text)
@@ -6,6 +6,7 @@ from collections import Counter
 from pathlib import Path
 import fasttext
 from numpy.typing import ArrayLike
+from ..monitoring.memory import MEMORY_ACCOUNTING
 from .classifier import LanguageClassifier
 
 
@@ -49,7 +50,8 @@ class FastTextLanguageClassifier(LanguageClassifier):
 
         if not model_file.exists():
             self._download_model(model_file)
-        self._model = fasttext.load_model(str(model_file))
+        with MEMORY_ACCOUNTING.component(f"fasttext:{model_file.name}"):
+            self._model = fasttext.load_model(str(model_file))
 
         self._line_threshold = line_threshold
 
@@ -0,0 +1,130 @@
+"""A cheap language pre-screen based on the resources that are loaded for classifying a language anyway."""
+
+import threading
+from typing import TypedDict
+from ..feature.scorer.dictionary import TokenDictionary
+from ..feature.scorer.q_gram import QGram
+from ..feature.scorer.scorer import Scorer
+from ..settings import PRESCREEN_HIT_RATE
+from ..settings import PRESCREEN_MAX_TOKENS
+from ..settings import PRESCREEN_MIN_TOKENS
+from ..settings import PRESCREEN_Q_GRAM_SCORE
+from .classifier import LanguageClassifier
+
+
+class PrescreenSummary(TypedDict):
+    """The number of texts accepted by the pre-screen, and of those passed on to the fallback classifier."""
+
+    accepted: int
+    fallback: int
+
+
+class PrescreenLanguageClassifier(LanguageClassifier):
+    """Accepts texts that are evidently in a language, and passes the others on to a fallback classifier.
+
+    A text is accepted if enough of its tokens are found in the token dictionary of the language,
+    and its character q-grams match the q-gram profile of the language well enough.
+    Only these ambiguous texts are identified by the (slower) fallback classifier,
+    e.g. texts in other languages, very noisy texts, and texts with too few tokens to decide on.
+
+    Accepted texts have the fraction of characters in known tokens as their confidence.
+    """
+
+    def __init__(
+        self,
+        language: str,
+        token_dictionary: TokenDictionary,
+        qgrams: QGram,
+        fallback: LanguageClassifier,
+        *,
+        hit_rate: float = PRESCREEN_HIT_RATE,
+        q_gram_score: float = PRESCREEN_Q_GRAM_SCORE,
+        min_tokens: int = PRESCREEN_MIN_TOKENS,
+        max_tokens: int = PRESCREEN_MAX_TOKENS,
+    ) -> None:
+        """Initialize the classifier.
+
+        Args:
+            language: the language of the token dictionary and the q-gram profile.
+            token_dictionary: the token dictionary of the language, e.g. the one of its featurizer.
+            qgrams: the q-gram profile of the language, e.g. the one of its featurizer.
+            fallback: identifies the texts that are not accepted; see LazyLanguageClassifier
+                for loading it only once it is needed.
+            hit_rate: the minimum fraction of characters in tokens found in the token dictionary.
+            q_gram_score: the minimum q-gram score.
+            min_tokens: texts with fewer tokens are passed on to the fallback classifier.
+            max_tokens: the number of tokens at the start of a text that are scored.
+        Raises:
+            ValueError: if a threshold is not between 0 and 1, or a number of tokens is not positive.
+        """
+        if not 0.0 <= hit_rate <= 1.0:
+            raise ValueError(f"Invalid hit rate: {hit_rate}")
+        if not 0.0 <= q_gram_score <= 1.0:
+            raise ValueError(f"Invalid q-gram score: {q_gram_score}")
+        if not 0 < min_tokens <= max_tokens:
+            raise ValueError(f"Invalid numbers of tokens: {min_tokens}, {max_tokens}")
+
+        self.language = language
+        self._token_dictionary = token_dictionary
+        self._qgrams = qgrams
+        self._fallback = fallback
+        self._hit_rate = hit_rate
+        self._q_gram_score = q_gram_score
+        self._min_tokens = min_tokens
+        self._max_tokens = max_tokens
+
+        self._lock = threading.Lock()
+        self._accepted = 0
+        self._fallbacks = 0
+
+    def scores(self, text: str) -> tuple[float, float, int]:
+        """Score a text against the language.
+
+        Returns:
+            A tuple with the fraction of characters in tokens found in the token dictionary,
+            the q-gram score, and the number of tokens scored.
+        """
+        tokens = LanguageClassifier.preprocess(text).split()[: self._max_tokens]
+        return (
+            Scorer.ratio(*self._token_dictionary.counts(tokens)),
+            Scorer.ratio(*self._qgrams.counts(tokens)),
+            len(tokens),
+        )
+
+    def accepts(self, text: str) -> tuple[bool, float]:
+        """Whether the text is evidently in the language.
+
+        Returns:
+            A tuple with the decision and the fraction of characters in tokens found in the token dictionary.
+        """
+        hit_rate, q_gram_score, n_tokens = self.scores(text)
+        return (
+            n_tokens >= self._min_tokens
+            and hit_rate >= self._hit_rate
+            and q_gram_score >= self._q_gram_score
+        ), hit_rate
+
+    def classify(self, text: str) -> tuple[str, float]:
+        accepted, hit_rate = self.accepts(text)
+        with self._lock:
+            if accepted:
+                self._accepted += 1
+            else:
+                self._fallbacks += 1
+
+        if accepted:
+            return self.language, hit_rate
+        return self._fallback.classify(text)
+
+    def summary(self) -> PrescreenSummary:
+        with self._lock:
+            return PrescreenSummary(accepted=self._accepted, fallback=self._fallbacks)
+
+    def report(self) -> str:
+        """A human-readable summary of the decisions."""
+        summary = self.summary()
+        total = summary["accepted"] + summary["fallback"]
+        return (
+            f"language pre-screen: {summary['accepted']} of {total} texts accepted as '{self.language}', "
+            f"{summary['fallback']} passed on to the language classifier."
+        )
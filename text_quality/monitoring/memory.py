@@ -0,0 +1,300 @@
+"""Opt-in accounting of the memory used by the loaded components and by processing pages.
+
+Components (dictionaries, q-grams, classifiers) are measured around their loaders,
+in resident memory (RSS) and, if tracing, in Python allocations that remain after loading.
+Pages are measured in their peak Python allocation while processing, which requires tracing.
+
+Memory is a property of the process, so the accounting is process-wide: the loaders measure themselves
+into `MEMORY_ACCOUNTING`, which does nothing until it is started.
+"""
+
+import sys
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Optional
+from typing import TypedDict
+import numpy as np
+from .metrics import Metrics
+from .metrics import resident_memory
+
+
+class ComponentMemory(TypedDict):
+    """The memory used by a component, in bytes, summed over the times it has been loaded."""
+
+    count: int
+    resident: int
+    """Growth of the resident memory while loading, excluding the overhead of tracing."""
+    allocated: int
+    """Python allocations that remain after loading; 0 if not tracing."""
+
+
+class PageMemory(TypedDict):
+    """Peak Python allocations while processing pages, in bytes."""
+
+    count: int
+    mean: float
+    p95: float
+    max: int
+    concurrency: int
+    """The maximum number of pages processed at once; peaks are shared by concurrent pages."""
+
+
+def peak_resident_memory() -> Optional[int]:
+    """The peak resident memory of this process in bytes; None if it cannot be determined."""
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    except (ImportError, OSError):
+        return None
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_size(size: Optional[float]) -> str:
+    """A number of bytes in KiB, MiB, or GiB; '-' for None."""
+    if size is None:
+        return "-"
+    for unit in ("KiB", "MiB"):
+        size /= 1024
+        if abs(size) < 1024:
+            return f"{size:.1f} {unit}"
+    return f"{size / 1024:.1f} GiB"
+
+
+def _module(filename: str) -> str:
+    """A file name relative to the longest entry of sys.path that contains it."""
+    path = Path(filename)
+    for entry in sorted((Path(p) for p in sys.path if p), key=lambda p: -len(p.parts)):
+        if path.is_relative_to(entry):
+            return str(path.relative_to(entry))
+    return filename
+
+
+class MemoryAccounting:
+    """Measures the memory used by components and pages, once started.
+
+    Components are measured with the `component()` context manager around their loaders,
+    and pages with the `page()` context manager around their processing.
+    Both are thread-safe. Pages processed in parallel threads share the peak of their allocations,
+    because tracing is process-wide; the reported peak per page is then an upper bound.
+    Components loaded while other threads are processing pages are attributed their allocations as well.
+
+    Tracing slows down processing considerably, so that it is suitable for sizing, not for production runs.
+    """
+
+    _CONTEXT = nullcontext()
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._components: dict[str, ComponentMemory] = {}
+        self._page_peaks: list[int] = []
+        self._active_pages = 0
+        self._concurrency = 0
+        self._baseline = 0
+        self._started_tracing = False
+        self._start_resident: Optional[int] = None
+        self._traced = False
+        self.enabled = False
+
+    @property
+    def tracing(self) -> bool:
+        return self.enabled and tracemalloc.is_tracing()
+
+    def start(self, trace: bool = True) -> "MemoryAccounting":
+        """Start measuring.
+
+        Args:
+            trace: if True, trace Python allocations (see `tracemalloc`), for measuring pages and
+                the allocations of components. Otherwise, only the resident memory of components is measured.
+        """
+        if trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        self._traced = tracemalloc.is_tracing()
+        self._start_resident = resident_memory()
+        self.enabled = True
+        return self
+
+    def stop(self) -> None:
+        """Stop measuring; the measurements so far remain available."""
+        self.enabled = False
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def reset(self) -> None:
+        """Discard all measurements."""
+        with self._lock:
+            self._components.clear()
+            self._page_peaks.clear()
+            self._concurrency = 0
+
+    def component(self, name: str):
+        """A context manager measuring the memory used by loading a component.
+
+        Args:
+            name: the name of the component, e.g. 'hunspell:nl'; repeated loads are summed.
+        """
+        if not self.enabled:
+            return self._CONTEXT
+        return self._measure_component(name)
+
+    @contextmanager
+    def _measure_component(self, name: str):
+        tracing = tracemalloc.is_tracing()
+        resident = resident_memory()
+        allocated = tracemalloc.get_traced_memory()[0] if tracing else 0
+        overhead = tracemalloc.get_tracemalloc_memory() if tracing else 0
+        try:
+            yield
+        finally:
+            resident_delta = 0
+            if resident is not None and (after := resident_memory()) is not None:
+                resident_delta = after - resident
+                if tracing:
+                    resident_delta -= tracemalloc.get_tracemalloc_memory() - overhead
+            allocated_delta = (
+                tracemalloc.get_traced_memory()[0] - allocated if tracing else 0
+            )
+            with self._lock:
+                memory = self._components.setdefault(
+                    name, ComponentMemory(count=0, resident=0, allocated=0)
+                )
+                memory["count"] += 1
+                memory["resident"] += max(0, resident_delta)
+                memory["allocated"] += max(0, allocated_delta)
+
+    def page(self):
+        """A context manager measuring the peak Python allocations while processing a page.
+
+        Does nothing if not tracing.
+        """
+        if not self.tracing:
+            return self._CONTEXT
+        return self._measure_page()
+
+    @contextmanager
+    def _measure_page(self):
+        with self._lock:
+            if self._active_pages == 0:
+                tracemalloc.reset_peak()
+                self._baseline = tracemalloc.get_traced_memory()[0]
+            self._active_pages += 1
+            self._concurrency = max(self._concurrency, self._active_pages)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active_pages -= 1
+                if tracemalloc.is_tracing():
+                    self._page_peaks.append(
+                        max(0, tracemalloc.get_traced_memory()[1] - self._baseline)
+                    )
+
+    def components(self) -> dict[str, ComponentMemory]:
+        """The memory per component, in the order they were first loaded."""
+        with self._lock:
+            return {name: memory.copy() for name, memory in self._components.items()}
+
+    def pages(self) -> Optional[PageMemory]:
+        """The peak allocations of the pages; None if no pages have been measured."""
+        with self._lock:
+            peaks = list(self._page_peaks)
+            concurrency = self._concurrency
+        if not peaks:
+            return None
+        return PageMemory(
+            count=len(peaks),
+            mean=float(np.mean(peaks)),
+            p95=float(np.percentile(peaks, 95)),
+            max=max(peaks),
+            concurrency=concurrency,
+        )
+
+    def modules(self, limit: int = 10) -> list[tuple[str, int]]:
+        """The source files with the most Python allocations that currently remain, e.g. caches.
+
+        Returns:
+            up to `limit` tuples of a file name, relative to sys.path, and a number of bytes;
+            empty if not tracing.
+        """
+        if not tracemalloc.is_tracing():
+            return []
+        statistics = tracemalloc.take_snapshot().statistics("filename")
+        return [
+            (_module(stat.traceback[0].filename), stat.size) for stat in statistics
+        ][:limit]
+
+    def summary(self) -> dict[str, object]:
+        """All measurements as a dictionary for a JSON report."""
+        return {
+            "resident": {
+                "start": self._start_resident,
+                "current": resident_memory(),
+                "peak": peak_resident_memory(),
+            },
+            "components": self.components(),
+            "pages": self.pages(),
+            "modules": dict(self.modules()),
+        }
+
+    def report(self) -> str:
+        """A human-readable report of the measurements."""
+        components = self.components()
+        width = max((len(name) for name in components), default=9)
+        lines = [
+            f"{'component':<{width}} {'count':>5} {'resident':>10} {'allocated':>10}"
+        ]
+        for name, memory in components.items():
+            allocated = memory["allocated"] if self._traced else None
+            lines.append(
+                f"{name:<{width}} {memory['count']:>5d} "
+                f"{format_size(memory['resident']):>10} {format_size(allocated):>10}"
+            )
+
+        if (pages := self.pages()) is not None:
+            lines.append("")
+            lines.append(
+                f"peak allocation per page ({pages['count']} pages, up to {pages['concurrency']} at once): "
+                + ", ".join(
+                    f"{field} {format_size(pages[field])}"
+                    for field in ("mean", "p95", "max")
+                )
+            )
+        if modules := self.modules():
+            lines.append("")
+            lines.append("largest remaining allocations:")
+            lines += [f"{format_size(size):>10} {module}" for module, size in modules]
+
+        lines.append("")
+        lines.append(
+            f"resident memory: start {format_size(self._start_resident)}, "
+            f"current {format_size(resident_memory())}, peak {format_size(peak_resident_memory())}"
+        )
+        return "\n".join(lines)
+
+
+MEMORY_ACCOUNTING = MemoryAccounting()
+"""The process-wide memory accounting, disabled until started."""
+
+
+def add_memory_metrics(metrics: Metrics, accounting: MemoryAccounting) -> None:
+    """Add gauges for the memory per component and the peak allocation per page."""
+
+    def collect(_metrics: Metrics) -> None:
+        resident = _metrics.gauge(
+            "component_resident_bytes", "Resident memory used by loading a component."
+        )
+        for name, memory in accounting.components().items():
+            resident.set(memory["resident"], component=name)
+        if (pages := accounting.pages()) is not None:
+            _metrics.gauge(
+                "page_peak_allocation_bytes",
+                "Maximum peak of Python allocations while processing a page.",
+            ).set(pages["max"])
+
+    metrics.add_collector(collect)
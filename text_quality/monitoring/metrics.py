@@ -0,0 +1,384 @@
+"""Operational metrics of long classification runs, exported in the Prometheus text format and as JSON."""
+
+import bisect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+from typing import Union
+from .timing import TOTAL_STAGE
+from .timing import TimingSink
+
+
+METRICS_PREFIX = "text_quality"
+"""Prefix of all metric names."""
+
+LATENCY_BUCKETS: tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+"""Upper bounds of the histogram buckets for durations, in seconds."""
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def resident_memory() -> Optional[int]:
+    """The resident memory of this process in bytes; None if it cannot be determined."""
+    try:
+        with open("/proc/self/statm", "rt", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _labels(labels: dict[str, object]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    TYPE = "untyped"
+
+    def __init__(self, name: str, help_text: str, lock: threading.Lock) -> None:
+        self.name = name
+        self.help = help_text
+        self._lock = lock
+        self._values: dict[Labels, float] = {}
+
+    def get(self, **labels) -> float:
+        return self._values.get(_labels(labels), 0.0)
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        if not self._values:
+            yield self.name, (), 0.0
+        for labels, value in sorted(self._values.items()):
+            yield self.name, labels, value
+
+    def summary(self) -> Union[float, dict[str, float]]:
+        if list(self._values) in ([], [()]):
+            return self._values.get((), 0.0)
+        return {
+            ",".join(f"{name}={value}" for name, value in labels): value
+            for labels, value in sorted(self._values.items())
+        }
+
+
+class Counter(_Metric):
+    """A value that only increases, optionally per combination of labels."""
+
+    TYPE = "counter"
+
+    def inc(self, value: float = 1.0, **labels) -> None:
+        if value < 0:
+            raise ValueError(f"Counters cannot decrease: {value}")
+        key = _labels(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def set_total(self, value: float, **labels) -> None:
+        """Set the value of a counter that is maintained elsewhere, e.g. in a collector."""
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+
+class Gauge(_Metric):
+    """A value that can go up and down, optionally per combination of labels."""
+
+    TYPE = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[_labels(labels)] = value
+
+
+class Histogram(_Metric):
+    """Counts observations in buckets of cumulative upper bounds."""
+
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        lock: threading.Lock,
+        buckets: Iterable[float] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, help_text, lock)
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts)
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def samples(self) -> Iterable[tuple[str, Labels, float]]:
+        cumulative = 0
+        for bound, count in zip(self.buckets + [float("inf")], self._counts):
+            cumulative += count
+            yield f"{self.name}_bucket", (("le", _format_value(bound)),), cumulative
+        yield f"{self.name}_sum", (), self._sum
+        yield f"{self.name}_count", (), cumulative
+
+    def summary(self) -> dict[str, float]:
+        count = self.count
+        return {
+            "count": count,
+            "sum": self._sum,
+            "mean": self._sum / count if count else 0.0,
+            "buckets": {
+                _format_value(bound): cumulative
+                for bound, cumulative in zip(
+                    self.buckets + [float("inf")],
+                    (sum(self._counts[: i + 1]) for i in range(len(self._counts))),
+                )
+            },
+        }
+
+
+class Metrics:
+    """A thread-safe collection of named counters, gauges, and histograms.
+
+    Metrics are created on first use with `counter()`, `gauge()`, or `histogram()`;
+    later calls with the same name return the existing metric.
+    Collectors are called before every export, e.g. to update gauges of external state.
+    """
+
+    def __init__(self, prefix: str = METRICS_PREFIX) -> None:
+        self._prefix = prefix
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors: list[Callable[["Metrics"], None]] = []
+
+    def _metric(self, cls, name: str, help_text: str, **kwargs):
+        name = f"{self._prefix}_{name}" if self._prefix else name
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, help_text, self._lock, **kwargs)
+            metric = self._metrics[name]
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric '{name}' is a {metric.TYPE}, not a {cls.TYPE}.")
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._metric(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._metric(Gauge, name, help_text)
+
+    def histogram(
+        self, name: str, help_text: str, buckets: Iterable[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._metric(Histogram, name, help_text, buckets=buckets)
+
+    def add_collector(self, collector: Callable[["Metrics"], None]) -> None:
+        self._collectors.append(collector)
+
+    def collect(self) -> None:
+        for collector in self._collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                logging.warning("Error collecting metrics: %s", str(e))
+
+    def to_prometheus(self) -> str:
+        """Export all metrics in the Prometheus text exposition format."""
+        self.collect()
+        lines = []
+        with self._lock:
+            for name, metric in self._metrics.items():
+                lines.append(f"# HELP {name} {metric.help}")
+                lines.append(f"# TYPE {name} {metric.TYPE}")
+                for sample_name, labels, value in metric.samples():
+                    lines.append(
+                        f"{sample_name}{_format_labels(labels)} {_format_value(value)}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> dict[str, object]:
+        """All metrics as a dictionary for a JSON summary, keyed by name without prefix."""
+        self.collect()
+        with self._lock:
+            return {
+                name.removeprefix(f"{self._prefix}_"): metric.summary()
+                for name, metric in self._metrics.items()
+            }
+
+
+def add_process_metrics(metrics: Metrics) -> None:
+    """Add gauges for the resident memory and the run time of this process."""
+    start = time.monotonic()
+
+    def collect(_metrics: Metrics) -> None:
+        if (memory := resident_memory()) is not None:
+            _metrics.gauge(
+                "resident_memory_bytes", "Resident memory of the process."
+            ).set(memory)
+        _metrics.gauge("elapsed_seconds", "Time since the run started.").set(
+            time.monotonic() - start
+        )
+
+    metrics.add_collector(collect)
+
+
+class MetricsSink(TimingSink):
+    """Records the durations measured by a Timer as metrics.
+
+    Pages result in a latency histogram, and all stages in the total time spent per stage.
+    """
+
+    def __init__(self, metrics: Metrics) -> None:
+        self._page_duration = metrics.histogram(
+            "page_duration_seconds", "Processing time per page (or batch of records)."
+        )
+        self._stage_seconds = metrics.counter(
+            "stage_seconds_total", "Total processing time per stage."
+        )
+
+    def record(self, key: Optional[str], timings: dict[str, float]) -> None:
+        for stage, duration in timings.items():
+            if stage == TOTAL_STAGE:
+                self._page_duration.observe(duration)
+            else:
+                self._stage_seconds.inc(duration, stage=stage)
+
+
+def write_prometheus_file(metrics: Metrics, file: Path) -> None:
+    """Write the metrics to a file atomically, e.g. for the node_exporter textfile collector."""
+    tmp_file = file.with_name(file.name + ".tmp")
+    with open(tmp_file, "wt", encoding="utf-8") as f:
+        f.write(metrics.to_prometheus())
+    os.replace(tmp_file, file)
+
+
+class MetricsExporter:
+    """Exports metrics periodically to a file, and/or serves them over HTTP.
+
+    Use as a context manager; the file is written a final time when the context is left.
+    """
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        *,
+        file: Optional[Path] = None,
+        port: Optional[int] = None,
+        host: str = "127.0.0.1",
+        interval: float = 15.0,
+    ) -> None:
+        """Configure the exporter.
+
+        Args:
+            metrics: the metrics to export.
+            file: write the metrics to this file in the Prometheus text format.
+            port: serve the metrics on this port at any path, e.g. '/metrics'; 0 for any free port.
+            host: the address to serve the metrics on.
+            interval: the number of seconds between writes of the file.
+        """
+        self._metrics = metrics
+        self._file = file
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._writer: Optional[threading.Thread] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+
+        if port is not None:
+            self._server = ThreadingHTTPServer((host, port), self._handler())
+
+    @property
+    def port(self) -> Optional[int]:
+        """The port the metrics are served on; None if they are not served."""
+        return self._server.server_address[1] if self._server else None
+
+    def _handler(self):
+        metrics = self._metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # pylint: disable=invalid-name
+                body = metrics.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                logging.debug("Metrics request: " + format, *args)
+
+        return Handler
+
+    def _write_periodically(self) -> None:
+        while not self._stopped.wait(self._interval):
+            self._write()
+
+    def _write(self) -> None:
+        try:
+            write_prometheus_file(self._metrics, self._file)
+        except OSError as e:
+            logging.error("Error writing metrics file '%s': %s", self._file, str(e))
+
+    def start(self) -> "MetricsExporter":
+        if self._server is not None:
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            logging.info("Serving metrics on port %d.", self.port)
+        if self._file is not None:
+            self._write()
+            self._writer = threading.Thread(
+                target=self._write_periodically, daemon=True
+            )
+            self._writer.start()
+        return self
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._writer is not None:
+            self._writer.join()
+            self._write()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> "MetricsExporter":
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
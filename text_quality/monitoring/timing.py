@@ -0,0 +1,209 @@
+"""Opt-in timing of the processing stages, with pluggable sinks."""
+
+import json
+import threading
+import time
+from abc import ABC
+from abc import abstractmethod
+from collections import defaultdict
+from contextlib import contextmanager
+from contextlib import nullcontext
+from typing import Callable
+from typing import Iterable
+from typing import Optional
+from typing import TextIO
+from typing import TypedDict
+import numpy as np
+
+
+TOTAL_STAGE = "total"
+"""Stage name for the total duration of a page."""
+
+
+class StageSummary(TypedDict):
+    """Aggregated durations of a single stage, in seconds."""
+
+    count: int
+    total: float
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+
+
+class TimingSink(ABC):
+    """Abstract class for receiving timing records."""
+
+    @abstractmethod
+    def record(self, key: Optional[str], timings: dict[str, float]) -> None:
+        """Receive the timings for one page.
+
+        Args:
+            key: an identifier of the page, e.g. the file name; None for stages outside of a page.
+            timings: the duration in seconds per stage.
+        """
+        return NotImplemented
+
+
+class AggregatingSink(TimingSink):
+    """Collects all timings in memory for summarizing them."""
+
+    def __init__(self) -> None:
+        self._durations: dict[str, list[float]] = defaultdict(list)
+
+    def record(self, key: Optional[str], timings: dict[str, float]) -> None:
+        for stage, duration in timings.items():
+            self._durations[stage].append(duration)
+
+    def summary(self) -> dict[str, StageSummary]:
+        """Summarize the durations per stage.
+
+        Returns:
+            a StageSummary per stage, in the order the stages were first recorded.
+        """
+        summary = {}
+        for stage, durations in self._durations.items():
+            p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+            summary[stage] = StageSummary(
+                count=len(durations),
+                total=sum(durations),
+                mean=sum(durations) / len(durations),
+                p50=p50,
+                p95=p95,
+                p99=p99,
+            )
+        return summary
+
+    def report(self) -> str:
+        """A human-readable table of the summary, durations in milliseconds."""
+        fields = list(StageSummary.__annotations__.keys())
+        width = max((len(stage) for stage in self._durations), default=5)
+
+        lines = [f"{'stage':<{width}} " + " ".join(f"{f:>10}" for f in fields)]
+        for stage, summary in self.summary().items():
+            values = [f"{summary['count']:>10d}", f"{summary['total']:>9.3f}s"] + [
+                f"{summary[field] * 1000:>8.2f}ms" for field in fields[2:]
+            ]
+            lines.append(f"{stage:<{width}} " + " ".join(values))
+        return "\n".join(lines)
+
+
+class JsonLinesSink(TimingSink):
+    """Writes one JSON record per page."""
+
+    def __init__(self, file: TextIO) -> None:
+        self._file = file
+
+    def record(self, key: Optional[str], timings: dict[str, float]) -> None:
+        self._file.write(json.dumps({"page": key} | timings) + "\n")
+
+
+class CallbackSink(TimingSink):
+    """Passes the timings of every page on to a function."""
+
+    def __init__(self, callback: Callable[[Optional[str], dict[str, float]], None]):
+        self._callback = callback
+
+    def record(self, key: Optional[str], timings: dict[str, float]) -> None:
+        self._callback(key, timings)
+
+
+class Timer:
+    """Measures the durations of processing stages and sends them to sinks.
+
+    Stages are measured with the `stage()` context manager.
+    Stages within a `page()` context are collected and sent to the sinks as one record
+    when the page is finished; other stages are sent individually.
+    Repeated stages within a page are summed.
+
+    A Timer can be shared between threads: pages are tracked per thread,
+    and the sinks receive one record at a time.
+    """
+
+    def __init__(self, sinks: Iterable[TimingSink] = ()) -> None:
+        self._sinks = list(sinks)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        """Drop the thread-local timings and the lock, which cannot be pickled, e.g. for worker processes."""
+        return {
+            name: value
+            for name, value in self.__dict__.items()
+            if name not in ("_local", "_lock")
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def _timings(self) -> Optional[dict[str, float]]:
+        """The timings of the current page in this thread."""
+        return getattr(self._local, "timings", None)
+
+    @_timings.setter
+    def _timings(self, timings: Optional[dict[str, float]]) -> None:
+        self._local.timings = timings
+
+    @property
+    def enabled(self) -> bool:
+        return True
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, duration: float) -> None:
+        """Add the duration of a stage that has been measured elsewhere, e.g. in another thread."""
+        if self._timings is None:
+            self._emit(None, {name: duration})
+        else:
+            self._timings[name] = self._timings.get(name, 0.0) + duration
+
+    @contextmanager
+    def page(self, key: str):
+        if self._timings is not None:
+            raise RuntimeError("Nested page timing is not supported.")
+
+        self._timings = {}
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings = self._timings | {TOTAL_STAGE: time.perf_counter() - start}
+            self._timings = None
+            self._emit(key, timings)
+
+    def _emit(self, key: Optional[str], timings: dict[str, float]):
+        with self._lock:
+            for sink in self._sinks:
+                sink.record(key, timings)
+
+
+class NullTimer(Timer):
+    """A Timer that does not measure anything, with minimal overhead."""
+
+    _CONTEXT = nullcontext()
+
+    @property
+    def enabled(self) -> bool:
+        return False
+
+    def stage(self, name: str):
+        return self._CONTEXT
+
+    def page(self, key: str):
+        return self._CONTEXT
+
+    def add(self, name: str, duration: float) -> None:
+        pass
+
+
+NULL_TIMER = NullTimer()
+"""The default, disabled Timer."""
@@ -1,10 +1,21 @@
 from pathlib import Path
 from typing import List
+from typing import NamedTuple
+from typing import Optional
 from pagexml.model.physical_document_model import PageXMLScan
 from pagexml.parser import parse_pagexml_file
 from ..settings import LINE_SEPARATOR
 
 
+class TextLine(NamedTuple):
+    """A line of text with its identifiers."""
+
+    id: str
+    region_id: Optional[str]
+    """The id of the top-level TextRegion containing the line; None for lines outside of regions."""
+    text: str
+
+
 class Page:
     """A wrapper around a PageXML file."""
 
@@ -22,6 +33,22 @@ class Page:
             line.text for line in self._page_doc.get_lines() if line.text is not None
         ]
 
+    def text_lines(self) -> List[TextLine]:
+        """Return lines from page with their ids and the ids of their regions.
+
+        The lines are in the same order as returned by `lines()`.
+        """
+        regions = {
+            id(line): region.id
+            for region in self._page_doc.text_regions or []
+            for line in region.get_lines()
+        }
+        return [
+            TextLine(line.id, regions.get(id(line)), line.text)
+            for line in self._page_doc.get_lines()
+            if line.text is not None
+        ]
+
     def get_text(self):
         """Get the entire text of the page."""
         return LINE_SEPARATOR.join(self.lines())
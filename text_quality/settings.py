@@ -25,6 +25,82 @@ LINE_SEPARATOR = os.getenv("LINE_SEPARATOR", "\n")
 Q_GRAM_LENGTH: int = int(os.environ.get("Q_GRAM_LENGTH", "3"))
 Q_GRAMS_GAMMA: int = int(os.environ.get("Q_GRAMS_GAMMA", "1000"))
 
+CASCADE_GRID_SIZE: int = 11
+"""Number of values of an expensive feature the classifier is evaluated on in cascade mode."""
+
+CASCADE_SAMPLE_SIZE: int = 200
+"""Number of tokens an expensive scorer runs on before running on all tokens in cascade mode."""
+
+CASCADE_Z: float = 2.58
+"""Width of the confidence interval for sample estimates in cascade mode, in standard errors."""
+
+SAMPLING_ERROR_BOUND: float = 0.02
+"""Maximum absolute error of feature values computed on a token sample, see TokenSampler."""
+
+SAMPLING_CONFIDENCE: float = 0.95
+"""Confidence level at which sampled feature values are within the error bound."""
+
+SAMPLING_GROUPS: int = 10
+"""Number of random groups a token sample is split into for estimating its error."""
+
+DUPLICATE_THRESHOLD: float = 0.9
+"""Minimum estimated Jaccard similarity of the token sets of near-duplicate pages."""
+
+DUPLICATE_NUM_PERM: int = 128
+"""Number of hash functions in the MinHash signatures of pages."""
+
+DUPLICATE_MAX_ENTRIES: int = 100_000
+"""Number of pages the near-duplicate index keeps in memory; older pages are spilled to disk or forgotten."""
+
+WINDOW_TOKENS: int = 500
+"""Number of whitespace-separated tokens per window when splitting large texts into windows of fixed size."""
+
+WATCH_INTERVAL: float = 1.0
+"""Seconds between scans of watched directories for new and modified files."""
+
+WATCH_SETTLE: float = 2.0
+"""Seconds a file must remain unchanged before it is processed, to skip files that are still being written."""
+
+QUEUE_LEASE: float = 300.0
+"""Seconds a worker holds a claimed batch of a work queue without a heartbeat, before other workers may reclaim it."""
+
+QUEUE_MAX_ATTEMPTS: int = 3
+"""Number of times an input of a work queue is claimed before it is given up as failed."""
+
+PREFETCH_WORKERS: int = 8
+"""Number of threads reading input files ahead of their classification."""
+
+PREFETCH_BYTES: int = 64 * 2**20
+"""Maximum size of the input files that have been read ahead and are waiting to be classified."""
+
+BUDGET_MAX_TOKEN_LENGTH: int = 100
+"""Longer tokens are split into pieces of this many characters when classifying within a time budget per page."""
+
+BUDGET_MIN_SAMPLE: int = 50
+"""Minimum number of tokens a feature is computed on when classifying within a time budget per page."""
+
+ESTIMATE_PRECISION: float = 0.02
+"""Target half-width of the confidence intervals of the estimated proportions of the quality classes in a corpus."""
+
+ESTIMATE_CONFIDENCE: float = 0.95
+"""Confidence level of the intervals of the estimated proportions of the quality classes."""
+
+ESTIMATE_INITIAL_SAMPLE: int = 30
+"""Number of pages per stratum classified before estimating how many more are needed."""
+
+PRESCREEN_HIT_RATE: float = 0.6
+"""Minimum fraction of characters in tokens found in the token dictionary,
+for the language pre-screen to accept a page."""
+
+PRESCREEN_Q_GRAM_SCORE: float = 0.5
+"""Minimum q-gram score for the language pre-screen to accept a page."""
+
+PRESCREEN_MIN_TOKENS: int = 10
+"""Pages with fewer tokens are left to the language classifier by the pre-screen."""
+
+PRESCREEN_MAX_TOKENS: int = 500
+"""Number of tokens at the start of a page the language pre-screen looks at."""
+
 SOURCE_DIR = Path(__file__).parent
 DATA_DIR = SOURCE_DIR / "data"
 
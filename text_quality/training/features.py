@@ -0,0 +1,250 @@
+"""Featurizing labelled corpora for training a classifier, with a persistent cache."""
+
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.context import BaseContext
+from pathlib import Path
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Union
+import numpy as np
+import pandas as pd
+from .. import __version__
+from ..feature.featurize import Featurizer
+from ..page.page import Page
+from ..settings import HUNSPELL_DIR
+from ..settings import HUNSPELL_LANGUAGE
+from ..settings import Q_GRAM_LENGTH
+from ..settings import Q_GRAMS_GAMMA
+from ..settings import QGRAMS_FILE
+from ..settings import TOKEN_DICT_FILE
+
+
+CACHE_FILE_PATTERN = "*.npz"
+
+DEFAULT_RESOURCES: List[Path] = [
+    HUNSPELL_DIR / f"{HUNSPELL_LANGUAGE}.aff",
+    HUNSPELL_DIR / f"{HUNSPELL_LANGUAGE}.dic",
+    TOKEN_DICT_FILE,
+    QGRAMS_FILE,
+]
+"""The resource files the default Featurizer is built from."""
+
+_HASH_SIZE = 16
+_CHUNK_SIZE = 1 << 20
+
+
+def content_hash(data: bytes) -> str:
+    """A hash of the content of a file, identifying it independently of its path."""
+    return hashlib.blake2b(data, digest_size=_HASH_SIZE).hexdigest()
+
+
+def resource_fingerprint(files: Iterable[Path], **parameters) -> str:
+    """A fingerprint of everything the feature values depend on besides the page content.
+
+    Args:
+        files: resource files, e.g. dictionaries; their content is hashed.
+        parameters: other settings, e.g. the q-gram length; their string representations are hashed.
+    Returns:
+        a hexadecimal hash that changes if any file or parameter changes.
+    """
+    digest = hashlib.blake2b(digest_size=_HASH_SIZE)
+    digest.update(f"text_quality={__version__}\n".encode())
+    for name, value in sorted(parameters.items()):
+        digest.update(f"{name}={value}\n".encode())
+    for file in files:
+        with open(file, "rb") as f:
+            while chunk := f.read(_CHUNK_SIZE):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_fingerprint(features: List[str]) -> str:
+    """The resource fingerprint of the default Featurizer, as configured in the settings."""
+    return resource_fingerprint(
+        DEFAULT_RESOURCES,
+        features=",".join(features),
+        q_gram_length=Q_GRAM_LENGTH,
+        q_grams_gamma=Q_GRAMS_GAMMA,
+    )
+
+
+class FeatureCache:
+    """Feature vectors of pages, keyed by the content hash of the page files.
+
+    The cache is a directory with one subdirectory per resource fingerprint,
+    so that changing a resource does not invalidate the vectors of other configurations.
+    Every `add()` writes a new .npz file, so that entries are never rewritten
+    and concurrent experiments do not corrupt the cache; `compact()` merges the files.
+    """
+
+    def __init__(
+        self, directory: Union[str, Path], fingerprint: str, features: List[str]
+    ) -> None:
+        self._directory = Path(directory) / fingerprint
+        self._features = list(features)
+        self._vectors: dict[str, np.ndarray] = {}
+
+        for file in sorted(self._directory.glob(CACHE_FILE_PATTERN)):
+            self._load(file)
+        logging.info(
+            "Loaded %d cached feature vectors from '%s'.",
+            len(self._vectors),
+            self._directory,
+        )
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._vectors
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self._vectors.get(key)
+
+    def _load(self, file: Path) -> None:
+        try:
+            with np.load(file) as data:
+                if data["features"].tolist() != self._features:
+                    logging.warning(
+                        "Ignoring cache file with other features: '%s'", file
+                    )
+                    return
+                self._vectors.update(zip(data["keys"].tolist(), data["vectors"]))
+        except (OSError, ValueError, KeyError) as e:
+            logging.error("Ignoring invalid cache file '%s': %s", file, str(e))
+
+    def _write(self, vectors: dict[str, np.ndarray]) -> Path:
+        self._directory.mkdir(parents=True, exist_ok=True)
+        file = self._directory / f"{time.time_ns()}-{os.getpid()}.npz"
+        tmp_file = file.with_suffix(".tmp")
+        with open(tmp_file, "wb") as f:
+            np.savez(
+                f,
+                features=np.array(self._features),
+                keys=np.array(list(vectors.keys()), dtype=f"U{2 * _HASH_SIZE}"),
+                vectors=np.array(list(vectors.values()), dtype=float).reshape(
+                    len(vectors), len(self._features)
+                ),
+            )
+        os.replace(tmp_file, file)
+        return file
+
+    def add(self, vectors: dict[str, np.ndarray]) -> None:
+        """Add feature vectors to the cache, and write them to a new file."""
+        vectors = {key: v for key, v in vectors.items() if key not in self._vectors}
+        if vectors:
+            self._write(vectors)
+            self._vectors.update(vectors)
+
+    def compact(self) -> None:
+        """Merge all cache files of this fingerprint into one."""
+        files = list(self._directory.glob(CACHE_FILE_PATTERN))
+        if len(files) > 1:
+            new_file = self._write(self._vectors)
+            for file in files:
+                if file != new_file:
+                    file.unlink()
+
+
+_worker_featurizer: Optional[Featurizer] = None
+
+
+def _init_worker(featurizer: Featurizer) -> None:
+    # pylint: disable=global-statement
+    global _worker_featurizer
+    _worker_featurizer = featurizer
+
+
+def _featurize_file(path: Union[str, Path]) -> Optional[np.ndarray]:
+    try:
+        text = Page.from_file(path).get_text()
+    except Exception as e:
+        logging.error("Error parsing file '%s': %s", path, str(e))
+        return None
+    features, _ = _worker_featurizer.featurize(text)
+    return np.array(list(features.values()), dtype=float)
+
+
+def extract_features(
+    paths: Iterable[Union[str, Path]],
+    featurizer: Featurizer,
+    *,
+    cache: Optional[FeatureCache] = None,
+    workers: int = 1,
+    mp_context: Optional[BaseContext] = None,
+) -> pd.DataFrame:
+    """Featurize PageXML files, e.g. for training the classifier pipeline.
+
+    Only pages that are not in the cache are parsed and featurized, in parallel if `workers` > 1.
+    The featurizer is sent to each worker process only once.
+
+    Args:
+        paths: the PageXML files.
+        featurizer: the Featurizer to compute the feature values with.
+        cache: a FeatureCache to read from and add new feature vectors to.
+        workers: the number of processes to featurize pages in.
+        mp_context: the multiprocessing context to start the worker processes with; defaults to the platform default.
+    Returns:
+        a DataFrame with one row per path, indexed by path, and one column per feature.
+        Rows of files that cannot be read or parsed contain NaN values.
+    """
+    paths = [str(path) for path in paths]
+    keys: List[Optional[str]] = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                keys.append(content_hash(f.read()))
+        except OSError as e:
+            logging.error("Error reading file '%s': %s", path, str(e))
+            keys.append(None)
+
+    missing = {}  # paths to featurize, by key
+    for path, key in zip(paths, keys):
+        if key is not None and (cache is None or key not in cache):
+            missing.setdefault(key, path)
+    logging.info(
+        "Featurizing %d of %d pages with %d worker(s).",
+        len(missing),
+        len(paths),
+        workers,
+    )
+
+    if workers > 1 and len(missing) > 1:
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(featurizer,),
+        ) as pool:
+            vectors = list(
+                pool.map(
+                    _featurize_file,
+                    missing.values(),
+                    chunksize=max(1, len(missing) // (4 * workers)),
+                )
+            )
+    else:
+        _init_worker(featurizer)
+        vectors = [_featurize_file(path) for path in missing.values()]
+
+    new_vectors = {
+        key: vector for key, vector in zip(missing, vectors) if vector is not None
+    }
+    if cache is not None:
+        cache.add(new_vectors)
+
+    empty = np.full(len(featurizer.features), np.nan)
+    rows = [
+        new_vectors.get(key, cache.get(key) if cache is not None else None)
+        for key in keys
+    ]
+    return pd.DataFrame(
+        [empty if row is None else row for row in rows],
+        index=pd.Index(paths, name="path"),
+        columns=featurizer.features,
+    )